@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Analytics benchmark: analytics.summarize with NumPy vs the pure-Python
+fallback used on Android, on a synthetic library.
+
+The load (one bulk query) and the computations are timed separately.
+
+Usage:
+    python benchmarks/bench_analytics.py [--sessions N] [--books N] [--repeat N]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from booktrack import analytics
+from booktrack.database import DatabaseManager
+from synthetic import generate_library
+
+
+def best_of(func, repeat: int):
+    """Return (fastest time in milliseconds, last result) over repeat runs."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000, result
+
+
+def compute_all(data, books):
+    """Every analytic summarize() computes, from already loaded columns."""
+    analytics.velocity_by_book(data)
+    analytics.rolling_average(data, 7)
+    analytics.rolling_average(data, 30)
+    analytics.streaks(data)
+    analytics.time_of_day_histogram(data)
+    analytics.projected_completion(data, books)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sessions', type=int, default=1_000_000)
+    parser.add_argument('--books', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    backends = [('pure Python', False)]
+    if analytics.np is not None:
+        backends.insert(0, ('NumPy', True))
+    else:
+        print('NumPy is not installed; timing the pure-Python path only')
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(os.path.join(tmp, 'bench.db'))
+        print(f"Generating {args.books} books / {args.sessions} sessions...")
+        generate_library(db, args.books, args.sessions)
+        books = db.get_books(status='Active')
+
+        results = []
+        for name, use_numpy in backends:
+            load_ms, data = best_of(
+                lambda: analytics.load_sessions(db, use_numpy=use_numpy), args.repeat
+            )
+            compute_ms, _ = best_of(lambda: compute_all(data, books), args.repeat)
+            results.append((name, load_ms, compute_ms))
+        db.close()
+
+    print(f"{'backend':<14}{'load ms':>10}{'compute ms':>12}{'total ms':>10}")
+    for name, load_ms, compute_ms in results:
+        print(f"{name:<14}{load_ms:>10.0f}{compute_ms:>12.0f}{load_ms + compute_ms:>10.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Query cache benchmark: the reads made when flipping between the Active
+Books, All Books and Statistics views, with and without the cache.
+
+Every few view switches a reading session is logged, as it would be in
+use, so the timings include the misses that follow an invalidation.
+
+Usage:
+    python benchmarks/bench_cache.py [--sessions N] [--books N] [--switches N]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from booktrack.cache import DEFAULT_CACHE_SIZE
+from booktrack.database import DatabaseManager
+from synthetic import generate_library
+
+PAGE_SIZE = 20
+
+
+def switch_views(db, switches: int, write_every: int):
+    """Run the reads of switches view changes; returns seconds per switch."""
+    book_id = db.get_books_page(None, 1)[0][0]['id']
+    start = time.perf_counter()
+    for i in range(switches):
+        view = i % 3
+        if view == 2:
+            db.get_statistics()
+        else:
+            status = 'Active' if view == 0 else None
+            db.count_books(status=status)
+            db.get_books_page(status, PAGE_SIZE)
+        if write_every and i % write_every == write_every - 1:
+            db.add_reading_session(book_id, 600)
+    return (time.perf_counter() - start) / switches
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sessions', type=int, default=1_000_000)
+    parser.add_argument('--books', type=int, default=2000)
+    parser.add_argument('--switches', type=int, default=3000)
+    parser.add_argument('--write-every', type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.db')
+        with DatabaseManager(path) as db:
+            print(f"Generating {args.books} books / {args.sessions} sessions...")
+            generate_library(db, args.books, args.sessions)
+
+        results = []
+        for name, cache_size in (('no cache', 0), ('cache', DEFAULT_CACHE_SIZE)):
+            with DatabaseManager(path, cache_size=cache_size) as db:
+                seconds = switch_views(db, args.switches, args.write_every)
+                results.append((name, seconds, db.cache_info()))
+
+    print(f"{'':<10}{'ms/switch':>11}{'hits':>8}{'misses':>8}")
+    for name, seconds, info in results:
+        print(f"{name:<10}{seconds * 1000:>11.3f}{info['hits']:>8}{info['misses']:>8}")
+
+
+if __name__ == '__main__':
+    main()
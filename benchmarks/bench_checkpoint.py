@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Timer checkpoint overhead: the cost of DatabaseManager.checkpoint_session
+and what it adds up to per hour of reading at several checkpoint intervals.
+
+CPU time is process time, so it excludes time spent waiting on the disk;
+the bytes written to the WAL per checkpoint are measured separately with
+automatic WAL checkpoints turned off.
+
+Usage:
+    python benchmarks/bench_checkpoint.py [--checkpoints N]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from booktrack.database import DatabaseManager
+
+INTERVALS = [5, 15, 30, 60]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--checkpoints', type=int, default=5000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.db')
+        with DatabaseManager(path, pragmas={'wal_autocheckpoint': 0}) as db:
+            book_id = db.add_book('Dune', 'Frank Herbert')
+            db.checkpoint_session(book_id, 0, True)
+            wal_before = os.path.getsize(path + '-wal')
+
+            wall = []
+            cpu_start = time.process_time()
+            for i in range(args.checkpoints):
+                start = time.perf_counter()
+                db.checkpoint_session(book_id, i * 15.0, True)
+                wall.append(time.perf_counter() - start)
+            cpu = (time.process_time() - cpu_start) / args.checkpoints
+            wal_bytes = (os.path.getsize(path + '-wal') - wal_before) / args.checkpoints
+
+    wall.sort()
+    print(f"checkpoint wall time: median {statistics.median(wall) * 1e6:.0f} us, "
+          f"p99 {wall[int(len(wall) * 0.99)] * 1e6:.0f} us")
+    print(f"checkpoint CPU time: {cpu * 1e6:.0f} us, WAL bytes: {wal_bytes:.0f}")
+    print()
+    print(f"{'interval s':>10}{'per hour':>10}{'CPU ms/hour':>13}{'KB/hour':>10}")
+    for interval in INTERVALS:
+        per_hour = 3600 // interval
+        print(f"{interval:>10}{per_hour:>10}{per_hour * cpu * 1000:>13.1f}"
+              f"{per_hour * wal_bytes / 1024:>10.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Per-call latency benchmark for DatabaseManager connection handling.
+
+Compares the old connect-per-call pattern against the persistent
+per-thread connection used by DatabaseManager.
+
+Usage:
+    python benchmarks/bench_connection.py [--books N] [--calls N]
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+# Add the src directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from booktrack.database import DatabaseManager
+
+
+def connect_per_call_get_book(db_path: str, book_id: int):
+    """Fetch one book the way DatabaseManager did before pooling."""
+    with sqlite3.connect(db_path) as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT id, title, author, total_pages, cover_image_url, status, created_at
+            FROM books WHERE id = ?
+        ''', (book_id,))
+        return cursor.fetchone()
+
+
+def connect_per_call_add_session(db_path: str, book_id: int):
+    """Insert one session the way DatabaseManager did before pooling."""
+    with sqlite3.connect(db_path) as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            INSERT INTO reading_sessions (book_id, duration_seconds, pages_read, notes)
+            VALUES (?, ?, ?, ?)
+        ''', (book_id, 1800, 10, None))
+        conn.commit()
+        return cursor.lastrowid
+
+
+def time_calls(func, calls: int) -> float:
+    """Return the mean latency of func() in microseconds."""
+    start = time.perf_counter()
+    for _ in range(calls):
+        func()
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--books', type=int, default=1000)
+    parser.add_argument('--calls', type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'bench.db')
+        db = DatabaseManager(db_path)
+        with db.get_connection() as conn:
+            conn.executemany(
+                'INSERT INTO books (title, author, total_pages) VALUES (?, ?, ?)',
+                ((f'Book {i}', f'Author {i % 50}', 300) for i in range(args.books))
+            )
+        book_id = args.books // 2
+
+        results = [
+            ('get_book', 'connect per call',
+             time_calls(lambda: connect_per_call_get_book(db_path, book_id), args.calls)),
+            ('get_book', 'persistent',
+             time_calls(lambda: db.get_book(book_id), args.calls)),
+            ('add_reading_session', 'connect per call',
+             time_calls(lambda: connect_per_call_add_session(db_path, book_id), args.calls)),
+            ('add_reading_session', 'persistent',
+             time_calls(lambda: db.add_reading_session(book_id, 1800, 10), args.calls)),
+        ]
+        db.close()
+
+    print(f"{'method':<22}{'mode':<20}{'µs/call':>10}")
+    for method, mode, micros in results:
+        print(f"{method:<22}{mode:<20}{micros:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
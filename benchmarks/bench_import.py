@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Bulk import benchmark: import_books/import_sessions vs one add_* call per row.
+
+The per-row path is timed on a sample and extrapolated, since running it for
+a million sessions takes far too long.
+
+Usage:
+    python benchmarks/bench_import.py [--sessions N] [--books N] [--sample N]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from booktrack.database import DatabaseManager
+
+
+def make_books(count: int):
+    return [{'id': i, 'title': f'Book {i}', 'author': f'Author {i % 50}', 'total_pages': 300}
+            for i in range(count)]
+
+
+def make_sessions(count: int, books: int, seed: int = 42):
+    """Generate session dicts lazily, like a streamed export."""
+    rng = random.Random(seed)
+    for _ in range(count):
+        yield {
+            'book_id': rng.randrange(books),
+            'duration_seconds': rng.randint(60, 7200),
+            'pages_read': rng.randint(1, 60),
+            'notes': None,
+            'session_date': f'2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d} '
+                            f'{rng.randint(0, 23):02d}:00:00',
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sessions', type=int, default=1_000_000)
+    parser.add_argument('--books', type=int, default=1000)
+    parser.add_argument('--sample', type=int, default=5000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(os.path.join(tmp, 'per_row.db'))
+        ids = [db.add_book(b['title'], b['author'], b['total_pages']) for b in make_books(args.books)]
+        start = time.perf_counter()
+        for session in make_sessions(args.sample, args.books):
+            db.add_reading_session(ids[session['book_id']], session['duration_seconds'],
+                                   session['pages_read'], session['notes'])
+        per_row = (time.perf_counter() - start) / args.sample
+        db.close()
+
+        db = DatabaseManager(os.path.join(tmp, 'bulk.db'))
+        start = time.perf_counter()
+        id_map = db.import_books(make_books(args.books))
+        imported = db.import_sessions(make_sessions(args.sessions, args.books), id_map,
+                                      batch_size=5000)
+        bulk = time.perf_counter() - start
+        assert imported == args.sessions
+        assert db.verify_rollups() == []
+        db.close()
+
+    print(f"per-row add_reading_session: {per_row * 1e6:8.1f} µs/row "
+          f"(~{per_row * args.sessions:.0f} s for {args.sessions} sessions)")
+    print(f"bulk import_sessions:        {bulk / args.sessions * 1e6:8.1f} µs/row "
+          f"({bulk:.1f} s for {args.sessions} sessions)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Instrumentation overhead: per-call time of a cache hit (get_book) and of
+a query (get_books_page with the cache off), with instrumentation off and
+on.
+
+Usage:
+    python benchmarks/bench_instrumentation.py [--calls N]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from booktrack.database import DatabaseManager
+from booktrack.instrumentation import Instrumentation
+
+
+def per_call(func, calls: int) -> float:
+    """Best of three runs of calls calls, in microseconds per call."""
+    best = None
+    for _ in range(3):
+        start = time.perf_counter()
+        for _ in range(calls):
+            func()
+        elapsed = (time.perf_counter() - start) / calls * 1e6
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--calls', type=int, default=20000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.db')
+        with DatabaseManager(path) as db:
+            db.import_books({'title': f'Book {i}', 'author': 'Author'} for i in range(200))
+
+        # Alternated, so warm-up does not favour either mode
+        results = {}
+        for name in ('off', 'on') * 2:
+            instrumentation = Instrumentation() if name == 'on' else None
+            with DatabaseManager(path, instrumentation=instrumentation) as cached, \
+                    DatabaseManager(path, cache_size=0, instrumentation=instrumentation) as uncached:
+                hit = per_call(lambda: cached.get_book(1), args.calls)
+                page = per_call(lambda: uncached.get_books_page('Active', 20), args.calls // 10)
+            best = results.get(name, (hit, page))
+            results[name] = (min(hit, best[0]), min(page, best[1]))
+
+    print(f"{'':<12}{'get_book hit us':>17}{'get_books_page us':>19}")
+    for name, (hit, page) in results.items():
+        print(f"{name:<12}{hit:>17.2f}{page:>19.2f}")
+
+
+if __name__ == '__main__':
+    main()
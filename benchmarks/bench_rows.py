@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Memory benchmark for get_reading_sessions() result rows on a synthetic
+library: the original dict per row vs SessionRow vs SessionColumns.
+
+Memory is the tracemalloc peak while building the full, unfiltered result,
+divided by the number of sessions.
+
+Usage:
+    python benchmarks/bench_rows.py [--sessions N] [--books N]
+"""
+
+import argparse
+import gc
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from booktrack.database import DatabaseManager
+from synthetic import generate_library
+
+
+def dict_sessions(conn):
+    """Build the result the way get_reading_sessions used to."""
+    cursor = conn.execute('''
+        SELECT rs.id, rs.book_id, rs.duration_seconds, rs.pages_read,
+               rs.notes, rs.session_date, b.title, b.author
+        FROM reading_sessions rs
+        JOIN books b ON rs.book_id = b.id
+        ORDER BY rs.session_date DESC
+    ''')
+    sessions = []
+    for row in cursor.fetchall():
+        sessions.append({
+            'id': row[0],
+            'book_id': row[1],
+            'duration_seconds': row[2],
+            'pages_read': row[3],
+            'notes': row[4],
+            'session_date': row[5],
+            'book_title': row[6],
+            'book_author': row[7]
+        })
+    return sessions
+
+
+def measure(func):
+    """Return (retained bytes, peak bytes, seconds) for building func()'s result."""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func()
+    seconds = time.perf_counter() - start
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return retained, peak, seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sessions', type=int, default=1_000_000)
+    parser.add_argument('--books', type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(os.path.join(tmp, 'bench.db'))
+        print(f"Generating {args.books} books / {args.sessions} sessions...")
+        generate_library(db, args.books, args.sessions)
+        conn = db.get_connection()
+
+        results = [
+            ('dict per row (original)', measure(lambda: dict_sessions(conn))),
+            ('SessionRow', measure(db.get_reading_sessions)),
+            ('SessionColumns', measure(lambda: db.get_reading_sessions(columnar=True))),
+        ]
+        db.close()
+
+    print(f"{'representation':<26}{'bytes/row':>11}{'peak/row':>11}{'total MB':>10}{'seconds':>9}")
+    for name, (retained, peak, seconds) in results:
+        print(f"{name:<26}{retained / args.sessions:>11.0f}{peak / args.sessions:>11.0f}"
+              f"{retained / 2**20:>10.1f}{seconds:>9.2f}")
+
+
+if __name__ == '__main__':
+    main()
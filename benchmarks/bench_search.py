@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Search latency benchmark: DatabaseManager.search over a library with many
+session notes, FTS5 vs the LIKE fallback.
+
+Notes are drawn from a fixed vocabulary with a skewed word distribution,
+so the queries cover both rare and very common terms.
+
+Usage:
+    python benchmarks/bench_search.py [--notes N] [--books N] [--repeat N]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from booktrack.database import DatabaseManager
+from booktrack.search import _search_like
+from synthetic import generate_library
+
+QUERIES = [
+    'dragon',            # common word
+    'dragon cas',        # common word plus a prefix being typed
+    'quietly',           # rare word
+    'mar',               # short prefix
+    'book 42',           # title match
+    'zzzz',              # no match
+]
+
+
+def make_vocabulary(rng: random.Random, size: int):
+    syllables = ['ka', 'lo', 'mi', 'ren', 'tha', 'dor', 'vel', 'sa', 'qu', 'ie']
+    words = {'dragon', 'castle', 'quietly', 'market', 'marble'}
+    while len(words) < size:
+        words.add(''.join(rng.choice(syllables) for _ in range(rng.randint(2, 4))))
+    words = sorted(words)
+    # Make 'dragon' and 'castle' very common and 'quietly' rare
+    weights = [50 if w in ('dragon', 'castle') else 0.2 if w == 'quietly' else 1 for w in words]
+    return words, weights
+
+
+def add_notes(db_manager, count: int, seed: int = 42):
+    rng = random.Random(seed)
+    words, weights = make_vocabulary(rng, 3000)
+    book_ids = [row[0] for row in db_manager.get_connection().execute('SELECT id FROM books')]
+    db_manager.import_sessions(
+        {'book_id': rng.choice(book_ids), 'duration_seconds': 600,
+         'notes': ' '.join(rng.choices(words, weights, k=rng.randint(8, 24)))}
+        for _ in range(count)
+    )
+
+
+def time_query(func, repeat: int):
+    """Return (median ms, max ms, result count) for func()."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        results = func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings), max(timings), len(results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--notes', type=int, default=100_000)
+    parser.add_argument('--books', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(os.path.join(tmp, 'bench.db'))
+        print(f"Generating {args.books} books / {args.notes} notes...")
+        generate_library(db, args.books, 0)
+        add_notes(db, args.notes)
+        conn = db.get_connection()
+
+        print(f"{'query':<14}{'FTS5 median':>12}{'FTS5 max':>10}{'LIKE median':>13}{'hits':>6}")
+        for query in QUERIES:
+            fts_median, fts_max, hits = time_query(lambda: db.search(query), args.repeat)
+            like_median, _, _ = time_query(lambda: _search_like(conn, query, 20),
+                                           max(1, args.repeat // 10))
+            print(f"{query!r:<14}{fts_median:>10.2f}ms{fts_max:>8.2f}ms"
+                  f"{like_median:>11.1f}ms{hits:>6}")
+        db.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+HTTP API throughput: requests per second and latency of a read-mostly
+mix from concurrent loopback clients, with one, two and four reader
+threads, on a synthetic library.
+
+Each client polls /books, /sessions and /stats with If-None-Match (so
+most answers are 304s while nothing changes) and logs a session every
+--write-every requests.
+
+Usage:
+    python benchmarks/bench_server.py [--clients 1 8 32] [--requests N] [--write-every N]
+"""
+
+import argparse
+import asyncio
+import http.client
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from booktrack.database import DatabaseManager
+from booktrack.server import BooktrackServer
+from synthetic import generate_library
+
+PATHS = ['/books?limit=50', '/sessions?limit=50', '/stats']
+
+
+def run_client(port: int, requests: int, book_ids, write_every: int):
+    """Make requests requests on one keep-alive connection; returns (latencies, 304s)."""
+    conn = http.client.HTTPConnection('127.0.0.1', port)
+    etags = {}
+    latencies = []
+    not_modified = 0
+    for i in range(requests):
+        start = time.perf_counter()
+        if write_every and i % write_every == write_every - 1:
+            body = json.dumps({'book_id': book_ids[i % len(book_ids)], 'duration_seconds': 600})
+            conn.request('POST', '/sessions', body=body,
+                         headers={'Content-Type': 'application/json'})
+            response = conn.getresponse()
+            response.read()
+        else:
+            path = PATHS[i % len(PATHS)]
+            headers = {'If-None-Match': etags[path]} if path in etags else {}
+            conn.request('GET', path, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            if response.status == 304:
+                not_modified += 1
+            else:
+                etags[path] = response.getheader('ETag')
+        latencies.append(time.perf_counter() - start)
+    conn.close()
+    return latencies, not_modified
+
+
+def measure(path: str, readers: int, clients: int, requests: int, book_ids,
+            write_every: int):
+    ready = threading.Event()
+    state = {}
+
+    async def serve():
+        async with BooktrackServer(path, port=0, readers=readers) as server:
+            state['port'] = server.port
+            state['stop'] = asyncio.Event()
+            state['loop'] = asyncio.get_running_loop()
+            ready.set()
+            await state['stop'].wait()
+
+    thread = threading.Thread(target=asyncio.run, args=(serve(),))
+    thread.start()
+    ready.wait()
+    try:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(clients) as pool:
+            results = list(pool.map(lambda _: run_client(state['port'], requests, book_ids,
+                                                       write_every),
+                                    range(clients)))
+        elapsed = time.perf_counter() - start
+    finally:
+        state['loop'].call_soon_threadsafe(state['stop'].set)
+        thread.join()
+
+    latencies = sorted(latency for client, _ in results for latency in client)
+    return {
+        'rps': len(latencies) / elapsed,
+        'p50_ms': statistics.median(latencies) * 1000,
+        'p95_ms': latencies[int(len(latencies) * 0.95)] * 1000,
+        'not_modified': sum(count for _, count in results) / len(latencies),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--clients', type=int, nargs='+', default=[1, 8, 32])
+    parser.add_argument('--requests', type=int, default=300, help='requests per client')
+    parser.add_argument('--write-every', type=int, default=10,
+                        help='log a session every N requests, 0 for none (default: 10)')
+    parser.add_argument('--books', type=int, default=1000)
+    parser.add_argument('--sessions', type=int, default=100000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.db')
+        with DatabaseManager(path) as db:
+            generate_library(db, args.books, args.sessions)
+            book_ids = [book['id'] for book in db.iter_books()]
+
+        print(f"{'readers':>8}{'clients':>9}{'req/s':>10}{'p50 ms':>9}{'p95 ms':>9}{'304s':>7}")
+        for readers in (1, 2, 4):
+            for clients in args.clients:
+                result = measure(path, readers, clients, args.requests, book_ids,
+                                 args.write_every)
+                print(f"{readers:>8}{clients:>9}{result['rps']:>10.0f}{result['p50_ms']:>9.2f}"
+                      f"{result['p95_ms']:>9.2f}{result['not_modified']:>7.0%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Concurrent sessions benchmark: one scheduled wakeup per Timer vs
+SessionManager's single shared tick loop, for hundreds of running timers.
+
+The timers are started at random offsets within a tick, as sessions
+started by hand would be, on a shortened tick so the run takes seconds.
+For each approach it reports event loop wakeups per tick, the CPU time
+the ticks cost, and how late the ticks were.
+
+Usage:
+    python benchmarks/bench_sessions.py [--timers N ...] [--tick-ms N] [--ticks N]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from booktrack.session_manager import MIN_TICK_INTERVAL_NS, SessionManager
+from booktrack.timer import NS_PER_SECOND, Timer
+
+
+async def per_timer(count, tick_ns, run_s):
+    """Each Timer schedules its own ticks, as one Timer per session would."""
+    lateness = []
+    timers = []
+    for _ in range(count):
+        timer = Timer(tick_ns=tick_ns)
+
+        def on_tick(elapsed, timer=timer):
+            lateness.append(timer.get_elapsed_ns() % tick_ns)
+
+        timer.add_tick_callback(on_tick)
+        timer.start()
+        timer.start_ticking()
+        timers.append(timer)
+        await asyncio.sleep(random.random() * tick_ns / 1e9 / count)
+    lateness.clear()
+    cpu_start = time.process_time()
+    await asyncio.sleep(run_s)
+    cpu = time.process_time() - cpu_start
+    for timer in timers:
+        timer.stop_ticking()
+    # One wakeup per tick
+    return len(lateness), cpu, lateness
+
+
+async def shared(count, tick_ns, run_s):
+    # Scaled with the tick, as MIN_TICK_INTERVAL_NS is to a one second tick
+    sessions = SessionManager(tick_ns=tick_ns,
+                              min_interval_ns=MIN_TICK_INTERVAL_NS * tick_ns // NS_PER_SECOND)
+    lateness = []
+
+    def on_tick(book_id, elapsed):
+        lateness.append(sessions.get(book_id).get_elapsed_ns() % tick_ns)
+
+    sessions.add_tick_callback(on_tick)
+    sessions.start_ticking()
+    for book_id in range(count):
+        sessions.start(book_id)
+        await asyncio.sleep(random.random() * tick_ns / 1e9 / count)
+    lateness.clear()
+    wakeups = sessions.wakeups
+    cpu_start = time.process_time()
+    await asyncio.sleep(run_s)
+    cpu = time.process_time() - cpu_start
+    sessions.stop_ticking()
+    return sessions.wakeups - wakeups, cpu, lateness
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--timers', type=int, nargs='+', default=[100, 300, 1000])
+    parser.add_argument('--tick-ms', type=int, default=200)
+    parser.add_argument('--ticks', type=int, default=10)
+    args = parser.parse_args()
+    tick_ns = args.tick_ms * 1_000_000
+    run_s = args.ticks * args.tick_ms / 1000
+
+    print(f"{'timers':>7}  {'approach':<10}{'wakeups/tick':>13}{'CPU ms/tick':>13}"
+          f"{'median late ms':>16}{'max late ms':>13}")
+    for count in args.timers:
+        for name, approach in (('per-timer', per_timer), ('shared', shared)):
+            wakeups, cpu, lateness = asyncio.run(approach(count, tick_ns, run_s))
+            print(f"{count:>7}  {name:<10}{wakeups / args.ticks:>13.1f}"
+                  f"{cpu * 1000 / args.ticks:>13.2f}"
+                  f"{statistics.median(lateness) / 1e6:>16.2f}{max(lateness) / 1e6:>13.2f}")
+
+
+if __name__ == '__main__':
+    main()
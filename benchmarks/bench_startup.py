@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark: the data side of launching the app, from interpreter
+start to the first book list being ready to render, in a fresh process
+each run.
+
+'double' is the old startup: the Active Books view and a second, All
+Books refresh were both loaded, each with a count and a page query.
+'staged' is the current one: a single get_book_list() round trip for
+Active Books. Both open the database on the worker thread, as the app
+does. toga is not involved, so the times exclude building widgets, of
+which the old startup also did twice as much.
+
+Usage:
+    python benchmarks/bench_startup.py [--books N] [--sessions N] [--runs N]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+sys.path.insert(0, SRC)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from booktrack.database import DatabaseManager
+from synthetic import generate_library
+
+PAGE_SIZE = 20
+
+# Run in a fresh interpreter; prints ms from start to first data and to all data
+FLOWS = {
+    'double': '''
+async def main():
+    async def load(status):
+        total = await db.count_books(status=status)
+        return total, await db.get_books_page(status, PAGE_SIZE)
+    first = asyncio.ensure_future(load('Active'))
+    second = asyncio.ensure_future(load(None))
+    await first
+    ready = time.perf_counter()
+    await second
+    return ready
+''',
+    'staged': '''
+async def main():
+    await db.get_book_list('Active', PAGE_SIZE)
+    return time.perf_counter()
+''',
+}
+
+SCRIPT = '''
+import time
+start = time.perf_counter()
+import asyncio
+from booktrack.async_db import AsyncDatabaseManager
+PAGE_SIZE = {page_size}
+db = AsyncDatabaseManager({path!r})
+{flow}
+ready = asyncio.run(main())
+done = time.perf_counter()
+db.close()
+print((ready - start) * 1000, (done - start) * 1000)
+'''
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--books', type=int, default=2000)
+    parser.add_argument('--sessions', type=int, default=100_000)
+    parser.add_argument('--runs', type=int, default=15)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.db')
+        with DatabaseManager(path) as db:
+            print(f"Generating {args.books} books / {args.sessions} sessions...")
+            generate_library(db, args.books, args.sessions)
+
+        env = dict(os.environ, PYTHONPATH=SRC)
+        print(f"{'startup':<10}{'first data ms':>15}{'all data ms':>13}")
+        for name, flow in FLOWS.items():
+            script = SCRIPT.format(page_size=PAGE_SIZE, path=path, flow=flow)
+            ready, done = [], []
+            for _ in range(args.runs):
+                output = subprocess.run([sys.executable, '-c', script], env=env, check=True,
+                                        capture_output=True, text=True).stdout.split()
+                ready.append(float(output[0]))
+                done.append(float(output[1]))
+            print(f"{name:<10}{statistics.median(ready):>15.1f}{statistics.median(done):>13.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Statistics benchmark: the original per-metric queries vs the statistics
+engine reading the rollup tables, on a synthetic library.
+
+"legacy" runs the five queries get_statistics used to issue; "legacy + new
+metrics" adds the queries the same approach needs for per-book totals,
+pages/hour, average session length and streaks.
+
+Usage:
+    python benchmarks/bench_statistics.py [--sessions N] [--books N] [--repeat N]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from booktrack.database import DatabaseManager
+from synthetic import generate_library
+
+
+def legacy_statistics(conn):
+    """The five separate queries get_statistics used to run."""
+    cursor = conn.cursor()
+    cursor.execute('SELECT SUM(duration_seconds) FROM reading_sessions')
+    total_seconds = cursor.fetchone()[0] or 0
+    cursor.execute('SELECT COUNT(*) FROM reading_sessions')
+    total_sessions = cursor.fetchone()[0]
+    cursor.execute('SELECT COUNT(*) FROM books')
+    total_books = cursor.fetchone()[0]
+    cursor.execute('SELECT status, COUNT(*) FROM books GROUP BY status')
+    books_by_status = dict(cursor.fetchall())
+    cursor.execute('''
+        SELECT DATE(session_date) as date, SUM(duration_seconds) as total_seconds
+        FROM reading_sessions
+        WHERE session_date >= datetime('now', '-30 days')
+        GROUP BY DATE(session_date)
+        ORDER BY date DESC
+    ''')
+    daily_stats = cursor.fetchall()
+    return {
+        'total_reading_time_seconds': total_seconds,
+        'total_sessions': total_sessions,
+        'total_books': total_books,
+        'books_by_status': books_by_status,
+        'daily_stats': daily_stats,
+    }
+
+
+def legacy_full_statistics(conn):
+    """The legacy approach extended to the engine's full metric set."""
+    stats = legacy_statistics(conn)
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT b.id, b.title, SUM(rs.duration_seconds), COUNT(*), SUM(rs.pages_read)
+        FROM reading_sessions rs JOIN books b ON rs.book_id = b.id
+        GROUP BY b.id
+    ''')
+    stats['per_book'] = cursor.fetchall()
+    cursor.execute('''
+        SELECT SUM(pages_read), SUM(duration_seconds)
+        FROM reading_sessions WHERE pages_read IS NOT NULL
+    ''')
+    stats['pages'] = cursor.fetchone()
+    cursor.execute('''
+        SELECT DISTINCT DATE(session_date) FROM reading_sessions ORDER BY 1
+    ''')
+    stats['days'] = cursor.fetchall()
+    return stats
+
+
+def best_of(func, repeat: int) -> float:
+    """Return the fastest of repeat runs in milliseconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sessions', type=int, default=1_000_000)
+    parser.add_argument('--books', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(os.path.join(tmp, 'bench.db'))
+        print(f"Generating {args.books} books / {args.sessions} sessions...")
+        start = time.perf_counter()
+        generate_library(db, args.books, args.sessions)
+        generate_s = time.perf_counter() - start
+        conn = db.get_connection()
+
+        legacy_ms = best_of(lambda: legacy_statistics(conn), args.repeat)
+        legacy_full_ms = best_of(lambda: legacy_full_statistics(conn), args.repeat)
+        engine_ms = best_of(db.get_statistics, args.repeat)
+        db.close()
+
+    print(f"legacy (original 5 metrics):     {legacy_ms:9.1f} ms")
+    print(f"legacy + new metrics:            {legacy_full_ms:9.1f} ms")
+    print(f"statistics engine (all metrics): {engine_ms:9.1f} ms")
+    print(f"library generation (with rollup triggers): {generate_s:.1f} s")
+
+
+if __name__ == '__main__':
+    main()
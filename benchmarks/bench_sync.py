@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Delta sync benchmark: time and changeset bytes of a first sync vs later ones.
+
+A synthetic library is synced to an empty database, then --changes
+sessions are logged and --changes books edited on one side and synced
+again, then synced once more with nothing changed. Later syncs should
+cost in proportion to the changes, not the library.
+
+Usage:
+    python benchmarks/bench_sync.py [--books N] [--sessions N] [--changes N]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from booktrack.database import DatabaseManager
+from booktrack.sync import iter_changes, pull, site_id, watermarks
+from synthetic import generate_library
+
+
+def timed_pull(db: DatabaseManager, peer: DatabaseManager):
+    """Pull peer's changes into db; returns (seconds, changes, bytes as JSON)."""
+    since = watermarks(db, site_id(peer))
+    size = sum(len(json.dumps(changeset))
+               for changeset in iter_changes(peer, since, site_id(db)))
+    start = time.perf_counter()
+    changes = pull(db, peer)['changes']
+    return time.perf_counter() - start, changes, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--books', type=int, default=1000)
+    parser.add_argument('--sessions', type=int, default=100000)
+    parser.add_argument('--changes', type=int, default=100)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        desktop = DatabaseManager(os.path.join(tmp, 'desktop.db'))
+        phone = DatabaseManager(os.path.join(tmp, 'phone.db'))
+        generate_library(desktop, args.books, args.sessions)
+
+        print(f"{'sync':<14}{'seconds':>10}{'changes':>10}{'bytes':>14}")
+        result = timed_pull(phone, desktop)
+        print(f"{'first':<14}{result[0]:>10.3f}{result[1]:>10}{result[2]:>14}")
+
+        book_ids = [book['id'] for book in desktop.iter_books()]
+        for i in range(args.changes):
+            book_id = book_ids[i % len(book_ids)]
+            desktop.add_reading_session(book_id, 600, 10)
+            desktop.update_book(book_id, total_pages=500 + i)
+        result = timed_pull(phone, desktop)
+        print(f"{'incremental':<14}{result[0]:>10.3f}{result[1]:>10}{result[2]:>14}")
+
+        result = timed_pull(phone, desktop)
+        print(f"{'unchanged':<14}{result[0]:>10.3f}{result[1]:>10}{result[2]:>14}")
+
+        assert phone.get_statistics()['total_sessions'] == desktop.get_statistics()['total_sessions']
+        assert phone.verify_rollups() == []
+        desktop.close()
+        phone.close()
+
+
+if __name__ == '__main__':
+    main()
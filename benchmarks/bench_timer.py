@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Timer display benchmark: the old asyncio.sleep() polling loop vs Timer's
+aligned ticks, on a shortened tick so the run takes seconds.
+
+For each approach it reports how late the display changed after each
+boundary of elapsed time, how many values it skipped, and how many times
+it woke up while the timer was paused.
+
+Usage:
+    python benchmarks/bench_timer.py [--tick-ms N] [--ticks N]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from booktrack.timer import NS_PER_SECOND, Timer
+
+
+def summarize(updates, tick_ns):
+    """Lateness in ms of each display change, and the number of skipped values."""
+    lateness = []
+    skipped = 0
+    shown = 0
+    for elapsed_ns in updates:
+        value = elapsed_ns // tick_ns
+        if value != shown:
+            skipped += value - shown - 1
+            lateness.append((elapsed_ns - value * tick_ns) / 1e6)
+            shown = value
+    return lateness, skipped
+
+
+async def polling(timer, tick_ns, run_s, pause_s):
+    """The original update_timer_display: sleep one tick, reformat, repeat."""
+    updates = []
+    paused_wakeups = 0
+
+    async def loop():
+        nonlocal paused_wakeups
+        while True:
+            updates.append(timer.get_elapsed_ns())
+            if not timer.is_running:
+                paused_wakeups += 1
+            await asyncio.sleep(tick_ns / NS_PER_SECOND)
+
+    timer.start()
+    task = asyncio.ensure_future(loop())
+    await asyncio.sleep(run_s)
+    timer.pause()
+    await asyncio.sleep(pause_s)
+    task.cancel()
+    return updates, paused_wakeups
+
+
+async def ticking(timer, tick_ns, run_s, pause_s):
+    updates = []
+    paused_wakeups = 0
+
+    def on_tick(elapsed):
+        nonlocal paused_wakeups
+        updates.append(timer.get_elapsed_ns())
+        if not timer.is_running:
+            paused_wakeups += 1
+
+    timer.add_tick_callback(on_tick)
+    timer.start()
+    timer.start_ticking()
+    await asyncio.sleep(run_s)
+    timer.pause()
+    await asyncio.sleep(pause_s)
+    timer.stop_ticking()
+    return updates, paused_wakeups
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--tick-ms', type=int, default=10)
+    parser.add_argument('--ticks', type=int, default=500)
+    args = parser.parse_args()
+    tick_ns = args.tick_ms * 1_000_000
+    run_s = args.ticks * args.tick_ms / 1000
+
+    print(f"{'approach':<10}{'median late ms':>16}{'max late ms':>13}{'skipped':>9}"
+          f"{'paused wakeups':>16}")
+    for name, approach in (('polling', polling), ('ticks', ticking)):
+        timer = Timer(tick_ns=tick_ns)
+        updates, paused_wakeups = asyncio.run(approach(timer, tick_ns, run_s, run_s / 2))
+        lateness, skipped = summarize(updates, tick_ns)
+        print(f"{name:<10}{statistics.median(lateness):>16.2f}{max(lateness):>13.2f}"
+              f"{skipped:>9}{paused_wakeups:>16}")
+
+
+if __name__ == '__main__':
+    main()
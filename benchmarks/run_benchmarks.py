@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite: every DatabaseManager method, export and book list
+rendering, timed on seeded synthetic libraries of 1k, 100k and 1M
+reading sessions.
+
+Each library is generated once from a fixed seed and copied before every
+run, so each run starts from the same database. The query cache is
+disabled, so reads are timed against SQLite rather than the cache.
+
+Results are written as JSON. Given a baseline written by an earlier run
+(--baseline), the suite exits with status 1 if the median time of any
+benchmark grew by more than --threshold. Nothing needs a display; list
+rendering is timed only when toga and its dummy backend are installed.
+
+Usage:
+    python benchmarks/run_benchmarks.py [--sizes 1k 100k 1m] [--output results.json]
+        [--baseline baseline.json] [--threshold 0.25] [--data-dir DIR]
+"""
+
+import argparse
+import inspect
+import io
+import itertools
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from collections import deque
+from datetime import datetime
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from booktrack.database import DatabaseManager
+from booktrack.instrumentation import UNINSTRUMENTED
+from synthetic import generate_library
+
+# Lists are rendered on toga's dummy backend, which needs no display
+os.environ.setdefault('TOGA_BACKEND', 'toga_dummy')
+try:
+    import toga_dummy  # noqa: F401
+    from booktrack.widgets import BookListItemPool, PagedBookList
+except ImportError:
+    PagedBookList = None
+
+# (books, sessions) of each library size
+LIBRARIES = {
+    '1k': (100, 1_000),
+    '100k': (2_000, 100_000),
+    '1m': (5_000, 1_000_000),
+}
+SEED = 42
+
+# A benchmark's median must grow by this fraction and by at least
+# NOISE_FLOOR_MS to count as a regression
+DEFAULT_THRESHOLD = 0.25
+NOISE_FLOOR_MS = 0.05
+
+PAGE_SIZE = 20
+
+
+class Benchmark(NamedTuple):
+    name: str
+    # The DatabaseManager method measured, None for app-level work
+    method: Optional[str]
+    # run(db, prepared) is timed; prepared = setup(db), which is not
+    run: Callable
+    setup: Optional[Callable] = None
+
+
+def benchmarks(book_id: int, book_ids: List[int]) -> List[Benchmark]:
+    """The benchmarks, for a library with book_id's sessions and book_ids' books."""
+    titles = itertools.count()
+
+    def new_book(db):
+        return db.add_book(f'Benchmark {next(titles)}', 'Benchmark Author', 300)
+
+    def consume(iterator):
+        deque(iterator, maxlen=0)
+
+    export = io.StringIO()
+    small = DatabaseManager(':memory:')
+    small_book = small.add_book('Imported', 'Benchmark Author', 200)
+    small.import_sessions({'book_id': small_book, 'duration_seconds': 600} for _ in range(100))
+    small.export_to_file(export, fmt='jsonl')
+    small.close()
+    export_text = export.getvalue()
+
+    suite = [
+        Benchmark('init_database', 'init_database', lambda db, _: db.init_database()),
+        Benchmark('get_books', 'get_books', lambda db, _: db.get_books()),
+        Benchmark('get_books[Active]', 'get_books', lambda db, _: db.get_books(status='Active')),
+        Benchmark('iter_books', 'iter_books', lambda db, _: consume(db.iter_books())),
+        Benchmark('get_books_page', 'get_books_page',
+                  lambda db, _: db.get_books_page('Active', PAGE_SIZE)),
+        Benchmark('get_book_list', 'get_book_list',
+                  lambda db, _: db.get_book_list('Active', PAGE_SIZE)),
+        Benchmark('count_books', 'count_books', lambda db, _: db.count_books('Active')),
+        Benchmark('get_book', 'get_book', lambda db, _: db.get_book(book_id)),
+        Benchmark('get_reading_sessions[book]', 'get_reading_sessions',
+                  lambda db, _: db.get_reading_sessions(book_id)),
+        Benchmark('get_reading_sessions[columnar]', 'get_reading_sessions',
+                  lambda db, _: db.get_reading_sessions(columnar=True)),
+        Benchmark('get_sessions_page', 'get_sessions_page',
+                  lambda db, _: db.get_sessions_page(limit=PAGE_SIZE)),
+        Benchmark('iter_reading_sessions', 'iter_reading_sessions',
+                  lambda db, _: consume(db.iter_reading_sessions())),
+        Benchmark('get_statistics', 'get_statistics', lambda db, _: db.get_statistics()),
+        Benchmark('search[title]', 'search', lambda db, _: db.search('Book 12')),
+        Benchmark('search[notes]', 'search', lambda db, _: db.search('notes')),
+        Benchmark('verify_rollups', 'verify_rollups', lambda db, _: db.verify_rollups()),
+        Benchmark('export_data', 'export_data', lambda db, _: db.export_data()),
+        Benchmark('export_to_file', 'export_to_file',
+                  lambda db, _: db.export_to_file(io.StringIO(), fmt='jsonl')),
+
+        Benchmark('add_book', 'add_book', lambda db, _: new_book(db)),
+        Benchmark('update_book', 'update_book',
+                  lambda db, pages: db.update_book(book_id, total_pages=pages),
+                  setup=lambda db: 300 + next(titles)),
+        Benchmark('delete_book', 'delete_book', lambda db, new_id: db.delete_book(new_id),
+                  setup=new_book),
+        Benchmark('add_reading_session', 'add_reading_session',
+                  lambda db, _: db.add_reading_session(book_id, 600, 10, 'Benchmark notes')),
+        Benchmark('checkpoint_session', 'checkpoint_session',
+                  lambda db, _: db.checkpoint_session(book_id, 15.0, True)),
+        Benchmark('checkpoint_sessions', 'checkpoint_sessions',
+                  lambda db, _: db.checkpoint_sessions(
+                      (book, 15.0, True) for book in book_ids[:20])),
+        Benchmark('get_active_sessions', 'get_active_sessions',
+                  lambda db, _: db.get_active_sessions()),
+        Benchmark('clear_active_session', 'clear_active_session',
+                  lambda db, _: db.clear_active_session(book_id),
+                  setup=lambda db: db.checkpoint_session(book_id, 15.0, True)),
+        Benchmark('save_sessions', 'save_sessions',
+                  lambda db, _: db.save_sessions(
+                      {'book_id': book_id, 'duration_seconds': 600} for _ in range(10))),
+        Benchmark('import_books', 'import_books',
+                  lambda db, _: db.import_books(
+                      {'title': f'Imported {next(titles)}', 'author': 'Benchmark Author'}
+                      for _ in range(100))),
+        Benchmark('import_sessions', 'import_sessions',
+                  lambda db, _: db.import_sessions(
+                      {'book_id': book_id, 'duration_seconds': 600} for _ in range(1000))),
+        Benchmark('import_file', 'import_file',
+                  lambda db, _: db.import_file(io.StringIO(export_text))),
+        Benchmark('rebuild_rollups', 'rebuild_rollups', lambda db, _: db.rebuild_rollups()),
+        Benchmark('vacuum', 'vacuum', lambda db, _: db.vacuum()),
+    ]
+
+    if PagedBookList is not None:
+        def render_book_list(db, _):
+            pool = BookListItemPool(lambda book: None, lambda book: None, lambda book: None)
+            book_list = PagedBookList(None, pool, page_size=PAGE_SIZE)
+            book_list.add_page(*db.get_books_page(None, PAGE_SIZE))
+
+        suite.append(Benchmark('render_book_list', None, render_book_list))
+    return suite
+
+
+def untimed_methods() -> List[str]:
+    """Public DatabaseManager methods that no benchmark measures.
+
+    Methods instrumentation leaves untimed run no SQL worth timing here either.
+    """
+    measured = {benchmark.method for benchmark in benchmarks(1, [1])}
+    return sorted(
+        name for name, _ in inspect.getmembers(DatabaseManager, inspect.isfunction)
+        if not name.startswith('_') and name not in measured and name not in UNINSTRUMENTED
+    )
+
+
+def run_library(path: str, repeat: int = 5, max_seconds: float = 2.0) -> Dict[str, Dict]:
+    """Time every benchmark on the library at path, which is modified.
+
+    Each benchmark runs repeat times, or fewer once it has taken
+    max_seconds in total; returns {name: {'median_ms', 'min_ms', 'runs'}}.
+    """
+    results = {}
+    with DatabaseManager(path, cache_size=0) as db:
+        book_id = db.get_connection().execute(
+            'SELECT book_id FROM reading_sessions GROUP BY book_id '
+            'ORDER BY COUNT(*) DESC, book_id LIMIT 1'
+        ).fetchone()[0]
+        book_ids = [row[0] for row in db.get_connection().execute('SELECT id FROM books')]
+        for benchmark in benchmarks(book_id, book_ids):
+            times = []
+            while len(times) < repeat and sum(times) < max_seconds:
+                prepared = benchmark.setup(db) if benchmark.setup else None
+                start = time.perf_counter()
+                benchmark.run(db, prepared)
+                times.append(time.perf_counter() - start)
+            results[benchmark.name] = {
+                'median_ms': statistics.median(times) * 1000,
+                'min_ms': min(times) * 1000,
+                'runs': len(times),
+            }
+    return results
+
+
+def compare(results: Dict, baseline: Dict, threshold: float = DEFAULT_THRESHOLD
+            ) -> List[Tuple[str, str, float, float]]:
+    """(size, name, baseline ms, current ms) of each regressed benchmark.
+
+    Benchmarks missing from either side are not compared.
+    """
+    regressions = []
+    for size, current in results['results'].items():
+        previous = baseline['results'].get(size, {})
+        for name, timing in current.items():
+            if name not in previous:
+                continue
+            before, after = previous[name]['median_ms'], timing['median_ms']
+            if after > before * (1 + threshold) and after - before > NOISE_FLOOR_MS:
+                regressions.append((size, name, before, after))
+    return regressions
+
+
+def library_path(data_dir: str, size: str) -> str:
+    """The pristine library of a size in data_dir, generated if missing."""
+    path = os.path.join(data_dir, f'library-{size}-{SEED}.db')
+    if not os.path.exists(path):
+        books, sessions = LIBRARIES[size]
+        print(f"Generating {size} library ({books} books / {sessions} sessions)...")
+        with DatabaseManager(path) as db:
+            generate_library(db, books, sessions, seed=SEED)
+            db.get_connection().execute('PRAGMA wal_checkpoint(TRUNCATE)')
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', nargs='+', choices=list(LIBRARIES), default=list(LIBRARIES))
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', help='write the results to this JSON file')
+    parser.add_argument('--baseline', help='fail on regressions against this JSON file')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument('--data-dir', help='keep generated libraries here between runs')
+    args = parser.parse_args()
+
+    missing = untimed_methods()
+    if missing:
+        print(f"warning: no benchmark for {', '.join(missing)}")
+    if PagedBookList is None:
+        print("toga's dummy backend is not installed; render_book_list is skipped")
+
+    results = {
+        'meta': {
+            'date': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'platform': platform.platform(),
+            'seed': SEED,
+        },
+        'results': {},
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = args.data_dir or tmp
+        os.makedirs(data_dir, exist_ok=True)
+        for size in args.sizes:
+            work = os.path.join(tmp, f'run-{size}.db')
+            shutil.copyfile(library_path(data_dir, size), work)
+            results['results'][size] = run_library(work, args.repeat)
+
+            print(f"\n{size}:")
+            print(f"{'benchmark':<32}{'median ms':>11}{'min ms':>10}{'runs':>6}")
+            for name, timing in results['results'][size].items():
+                print(f"{name:<32}{timing['median_ms']:>11.3f}{timing['min_ms']:>10.3f}"
+                      f"{timing['runs']:>6}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regressions (over {args.threshold:.0%} slower):")
+            for size, name, before, after in regressions:
+                print(f"  {size} {name}: {before:.3f} ms -> {after:.3f} ms")
+            return 1
+        print(f"\nNo regressions against {args.baseline}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,56 @@
+"""
+Seeded synthetic library generator for benchmarks.
+
+Rows are inserted with executemany straight into the schema created by
+DatabaseManager, so generating a large library does not depend on the
+speed of the API being measured.
+"""
+
+import random
+from datetime import datetime, timedelta
+
+STATUSES = ['Active', 'Read', 'Paused', 'Abandoned']
+
+
+def generate_library(db_manager, books: int, sessions: int, seed: int = 42,
+                     days: int = 3 * 365, batch_size: int = 50000,
+                     anchor: datetime = None):
+    """Fill db_manager's database with a reproducible library.
+    
+    Dates are spread over the given number of days before anchor, which
+    defaults to today's midnight so recent-window queries see data.
+    """
+    rng = random.Random(seed)
+    now = anchor or datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    conn = db_manager.get_connection()
+
+    with conn:
+        conn.executemany('''
+            INSERT INTO books (title, author, total_pages, status, created_at)
+            VALUES (?, ?, ?, ?, ?)
+        ''', (
+            (f'Book {i}', f'Author {i % max(1, books // 5)}', rng.randint(80, 900),
+             rng.choice(STATUSES),
+             (now - timedelta(days=rng.randint(0, days))).strftime('%Y-%m-%d %H:%M:%S'))
+            for i in range(books)
+        ))
+    book_ids = [row[0] for row in conn.execute('SELECT id FROM books')]
+
+    def session_rows(count):
+        for _ in range(count):
+            when = now - timedelta(seconds=rng.randint(0, days * 86400))
+            pages = rng.randint(1, 60) if rng.random() < 0.8 else None
+            notes = f'Session notes {rng.randint(0, 10000)}' if rng.random() < 0.1 else None
+            yield (rng.choice(book_ids), rng.randint(60, 7200), pages, notes,
+                   when.strftime('%Y-%m-%d %H:%M:%S'))
+
+    remaining = sessions
+    while remaining > 0:
+        count = min(batch_size, remaining)
+        with conn:
+            conn.executemany('''
+                INSERT INTO reading_sessions
+                    (book_id, duration_seconds, pages_read, notes, session_date)
+                VALUES (?, ?, ?, ?, ?)
+            ''', session_rows(count))
+        remaining -= count
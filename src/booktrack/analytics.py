@@ -0,0 +1,308 @@
+"""
+Reading analytics over the full session history.
+
+``load_sessions`` reads the columns analytics need (book, day, duration,
+pages, hour) in one bulk fetch. The functions below then compute
+reading velocity, rolling averages, streaks, time-of-day histograms and
+projected completion dates from those columns without touching the
+database again.
+
+NumPy is used when it is installed, which keeps every computation
+vectorised and interactive at millions of sessions. The Android build does
+not ship NumPy, so each function also has a pure-Python path returning the
+same results.
+
+Days and hours are both local time, as the app shows them; session_date
+is stored in UTC. (The statistics rollups in stats.py count UTC days.)
+"""
+
+import math
+from array import array
+from datetime import date, timedelta
+from itertools import chain
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - depends on the build
+    np = None
+
+from .database import date_bound
+from .rows import NO_PAGES
+
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+def _to_date(day: int) -> date:
+    """Convert days since the Unix epoch to a date."""
+    return date.fromordinal(_EPOCH_ORDINAL + int(day))
+
+
+def _to_day(value: date) -> int:
+    """Convert a date to days since the Unix epoch."""
+    return value.toordinal() - _EPOCH_ORDINAL
+
+
+def _today() -> date:
+    # Days are local, like the hours
+    return date.today()
+
+
+class SessionArrays:
+    """Session columns loaded for analytics.
+
+    book_id, day (the local day session_date falls in, counted from the
+    Unix epoch), duration, pages (NO_PAGES when not recorded) and hour
+    (the local hour session_date falls in) are NumPy int64 arrays when NumPy is used, otherwise
+    ``array('q')``. Sessions are in no particular order.
+    """
+
+    def __init__(self, book_id, day, duration, pages, hour, use_numpy: bool):
+        self.book_id = book_id
+        self.day = day
+        self.duration = duration
+        self.pages = pages
+        self.hour = hour
+        self.use_numpy = use_numpy
+
+    def __len__(self) -> int:
+        return len(self.day)
+
+
+def load_sessions(db_manager, book_id: Optional[int] = None, since=None, until=None,
+                  use_numpy: Optional[bool] = None) -> SessionArrays:
+    """Load session columns with a single query.
+
+    Rows come back in whatever order SQLite scans them, which is much
+    faster than sorting in SQL; nothing below depends on the order.
+    Sessions whose session_date does not parse are skipped, as in the
+    statistics. since and until filter session_date as in
+    iter_reading_sessions. use_numpy defaults to whether NumPy is
+    installed.
+    """
+    if use_numpy is None:
+        use_numpy = np is not None
+    if use_numpy and np is None:
+        raise RuntimeError('NumPy is not installed')
+
+    conditions = ['DATE(session_date) IS NOT NULL']
+    params = []
+    if book_id is not None:
+        conditions.append('book_id = ?')
+        params.append(book_id)
+    if since is not None:
+        conditions.append('session_date >= ?')
+        params.append(date_bound(since))
+    if until is not None:
+        conditions.append('session_date < ?')
+        params.append(date_bound(until))
+
+    rows = db_manager.get_connection().execute(f'''
+        SELECT book_id, CAST(strftime('%s', session_date, 'localtime') AS INTEGER) / 86400,
+               duration_seconds, COALESCE(pages_read, {NO_PAGES}),
+               CAST(strftime('%H', session_date, 'localtime') AS INTEGER)
+        FROM reading_sessions
+        WHERE {" AND ".join(conditions)}
+    ''', params).fetchall()
+
+    if use_numpy:
+        flat = np.fromiter(chain.from_iterable(rows), dtype=np.int64, count=5 * len(rows))
+        columns = flat.reshape(-1, 5).T
+    else:
+        columns = [array('q', column) for column in zip(*rows)]
+        if not columns:
+            columns = [array('q') for _ in range(5)]
+    return SessionArrays(*columns, use_numpy=use_numpy)
+
+
+def velocity_by_book(data: SessionArrays) -> Dict[int, float]:
+    """Pages per hour for each book, over sessions that recorded pages."""
+    if data.use_numpy:
+        mask = data.pages >= 0
+        books = data.book_id[mask]
+        if not len(books):
+            return {}
+        pages = np.bincount(books, weights=data.pages[mask])
+        seconds = np.bincount(books, weights=data.duration[mask])
+        ids = np.flatnonzero(seconds)
+        return dict(zip(ids.tolist(), (pages[ids] / (seconds[ids] / 3600)).tolist()))
+
+    pages: Dict[int, int] = {}
+    seconds: Dict[int, int] = {}
+    for book, duration, read in zip(data.book_id, data.duration, data.pages):
+        if read != NO_PAGES:
+            pages[book] = pages.get(book, 0) + read
+            seconds[book] = seconds.get(book, 0) + duration
+    return {book: pages[book] / (total / 3600)
+            for book, total in seconds.items() if total}
+
+
+def _daily_seconds(data: SessionArrays, last_day: int) -> Tuple[int, list]:
+    """Reading seconds per day from the first session day to last_day.
+
+    Returns (first day, totals) with days counted from the Unix epoch;
+    days without sessions are included as 0.
+    """
+    if not len(data):
+        return last_day + 1, []
+    if data.use_numpy:
+        first = int(data.day.min())
+        keep = data.day <= last_day
+        totals = np.bincount(data.day[keep] - first, weights=data.duration[keep],
+                             minlength=max(0, last_day - first + 1))
+        return first, totals
+
+    first = min(data.day)
+    totals = [0] * max(0, last_day - first + 1)
+    for day, duration in zip(data.day, data.duration):
+        offset = day - first
+        if offset < len(totals):
+            totals[offset] += duration
+    return first, totals
+
+
+def rolling_average(data: SessionArrays, window: int = 7,
+                    today: Optional[date] = None) -> List[Tuple[date, float]]:
+    """Trailing window-day mean of daily reading seconds, for every day.
+
+    Covers the first session day through today; days without sessions
+    count as zero.
+    """
+    last_day = _to_day(today or _today())
+    first, totals = _daily_seconds(data, last_day)
+    if data.use_numpy:
+        sums = np.cumsum(np.concatenate(([0.0], totals)))
+        lower = np.maximum(np.arange(1, len(totals) + 1) - window, 0)
+        means = (sums[1:] - sums[lower]) / window
+        return [(_to_date(first + i), mean) for i, mean in enumerate(means.tolist())]
+
+    result = []
+    running = 0
+    for i, seconds in enumerate(totals):
+        running += seconds
+        if i >= window:
+            running -= totals[i - window]
+        result.append((_to_date(first + i), running / window))
+    return result
+
+
+def streaks(data: SessionArrays, today: Optional[date] = None) -> Dict[str, int]:
+    """Current and longest runs of consecutive reading days.
+
+    The current streak counts back from today, or from yesterday if
+    nothing has been read yet today.
+    """
+    today_day = _to_day(today or _today())
+    if not len(data):
+        return {'current': 0, 'longest': 0}
+
+    if data.use_numpy:
+        days = np.unique(data.day)
+        breaks = np.flatnonzero(np.diff(days) != 1)
+        # Runs are delimited by the breaks between non-consecutive days
+        starts = np.concatenate(([0], breaks + 1))
+        ends = np.concatenate((breaks, [len(days) - 1]))
+        runs = ends - starts + 1
+        longest = int(runs.max())
+        last_day, last_run = int(days[-1]), int(runs[-1])
+    else:
+        longest = run = 0
+        previous = None
+        for day in sorted(set(data.day)):
+            run = run + 1 if previous is not None and day - previous == 1 else 1
+            longest = max(longest, run)
+            previous = day
+        last_day, last_run = previous, run
+
+    current = last_run if today_day - last_day in (0, 1) else 0
+    return {'current': current, 'longest': longest}
+
+
+def time_of_day_histogram(data: SessionArrays, by: str = 'seconds') -> List[int]:
+    """Reading per hour of the day (0-23) that sessions started in.
+
+    by is 'seconds' for reading time or 'sessions' for session counts.
+    Hours are local time.
+    """
+    if by not in ('seconds', 'sessions'):
+        raise ValueError("by must be 'seconds' or 'sessions'")
+    if data.use_numpy:
+        weights = data.duration if by == 'seconds' else None
+        return np.bincount(data.hour, weights=weights, minlength=24).astype(np.int64).tolist()
+
+    histogram = [0] * 24
+    for hour, duration in zip(data.hour, data.duration):
+        histogram[hour] += duration if by == 'seconds' else 1
+    return histogram
+
+
+def projected_completion(data: SessionArrays, books: Iterable[Mapping],
+                         today: Optional[date] = None) -> Dict[int, Optional[date]]:
+    """Projected finishing date for each Active book with total_pages.
+
+    Assumes the pace so far continues: pages read per day since the
+    book's first session. Books with no pages recorded yet project to
+    None; books already past their total project to today.
+    """
+    today = today or _today()
+    today_day = _to_day(today)
+
+    if data.use_numpy:
+        mask = data.pages >= 0
+        pages_read = np.bincount(data.book_id[mask], weights=data.pages[mask])
+        first_day = {}
+        if len(data):
+            # Earliest session day of every book that has one
+            earliest = np.full(int(data.book_id.max()) + 1, data.day.max())
+            np.minimum.at(earliest, data.book_id, data.day)
+            ids = np.unique(data.book_id)
+            first_day = dict(zip(ids.tolist(), earliest[ids].tolist()))
+
+        def read(book_id):
+            return int(pages_read[book_id]) if book_id < len(pages_read) else 0
+    else:
+        totals: Dict[int, int] = {}
+        first_day = {}
+        for book, day, pages in zip(data.book_id, data.day, data.pages):
+            if day < first_day.get(book, day + 1):
+                first_day[book] = day
+            if pages != NO_PAGES:
+                totals[book] = totals.get(book, 0) + pages
+
+        def read(book_id):
+            return totals.get(book_id, 0)
+
+    projections = {}
+    for book in books:
+        if book['status'] != 'Active' or not book.get('total_pages'):
+            continue
+        done = read(book['id'])
+        remaining = book['total_pages'] - done
+        if remaining <= 0:
+            projections[book['id']] = today
+            continue
+        if not done:
+            projections[book['id']] = None
+            continue
+        days = max(1, today_day - first_day[book['id']] + 1)
+        projections[book['id']] = today + timedelta(days=math.ceil(remaining * days / done))
+    return projections
+
+
+def summarize(db_manager, today: Optional[date] = None,
+              use_numpy: Optional[bool] = None) -> Dict:
+    """Compute every analytic from one load of the session history."""
+    today = today or _today()
+    data = load_sessions(db_manager, use_numpy=use_numpy)
+    rolling_7 = rolling_average(data, 7, today)
+    rolling_30 = rolling_average(data, 30, today)
+    return {
+        'velocity_by_book': velocity_by_book(data),
+        'rolling_7_day_seconds': rolling_7[-1][1] if rolling_7 else 0.0,
+        'rolling_30_day_seconds': rolling_30[-1][1] if rolling_30 else 0.0,
+        'streaks': streaks(data, today),
+        'time_of_day_seconds': time_of_day_histogram(data),
+        'projected_completion': projected_completion(
+            data, db_manager.iter_books(status='Active'), today
+        ),
+    }
@@ -6,25 +6,101 @@ import toga
 from toga.style import Pack
 from toga.style.pack import COLUMN, ROW
 import asyncio
-import json
 import os
-from datetime import datetime
+import time
+from datetime import date, datetime
 from typing import Dict, List, Optional
 
-from .database import DatabaseManager
+from .async_db import AsyncDatabaseManager
+from .events import BULK, DELETED, INSERTED, ChangeEvent
+from .instrumentation import Instrumentation
+from .session_manager import SessionManager
 from .timer import Timer
-from .widgets import BookForm, BookListItem, SessionLogForm
+from .widgets import BookListItem, BookListItemPool, PagedBookList
+
+
+# Number of books fetched and built per page of the book list
+BOOK_PAGE_SIZE = 20
+
+# Load the next page once the list is scrolled this close to the end (pixels)
+SCROLL_PRELOAD_DISTANCE = 400
+
+# Database calls that take longer than this (seconds) show a loading view
+LOADING_DELAY = 0.2
+
+# Placeholder rows shown in the book list until the first query answers
+SKELETON_ROWS = 5
+
+# Search once typing has paused for this long (seconds)
+SEARCH_DEBOUNCE = 0.15
+
+# Results shown for a search
+SEARCH_LIMIT = 30
+
+# A running reading session is checkpointed this often (seconds), so at
+# most this much reading is lost if the app is killed
+CHECKPOINT_INTERVAL = 15
+
+# Typing this into the search box opens the diagnostics view, which shows
+# what instrumentation (BOOKTRACK_INSTRUMENT=1) has recorded
+DIAGNOSTICS_QUERY = ':diagnostics'
+
+# Entries per section of the diagnostics view
+DIAGNOSTICS_ROWS = 15
+
+# Startup times are measured from when this module is imported, which
+# __main__ does first thing
+LAUNCHED_AT = time.perf_counter()
+
+
+def summarize_trends(db_manager):
+    """analytics.summarize, imported on first use on the database worker.
+    
+    analytics loads NumPy, which takes longer than the rest of startup.
+    The summary reads the whole session history, so it is kept in the
+    query cache until a book or session changes.
+    """
+    from . import analytics
+    today = date.today()
+    return db_manager.cache.get_or_compute(
+        db_manager.get_connection(), ('summarize_trends', today),
+        ('books', 'reading_sessions'), lambda: analytics.summarize(db_manager, today)
+    )
 
 
 class Booktrack(toga.App):
     """Main Booktrack application class."""
     
     def startup(self):
-        """Initialize the app."""
-        self.db_manager = DatabaseManager()
-        self.current_timer = None
+        """Initialize the app.
+        
+        Startup is staged so the window appears before any query: the
+        navigation and a skeleton of the Active Books view are shown at
+        once, the database is opened on its worker thread meanwhile, and
+        the view is filled by a single query when that answers.
+        """
+        # Off unless BOOKTRACK_INSTRUMENT is set
+        self.instrumentation = Instrumentation.from_environment()
+        
+        # Every query runs on the database worker thread, never on the UI
+        # loop; the database is opened there too, so this does not block
+        self.db_manager = AsyncDatabaseManager(instrumentation=self.instrumentation)
+        # Reading sessions, one timer per book, on one shared tick loop
+        self.sessions = SessionManager()
+        self.sessions.add_tick_callback(self.on_timer_tick)
+        self.session_books: Dict[int, Dict] = {}
+        self.session_buttons: Dict[int, toga.Button] = {}
+        self.pending_checkpoints = set()
+        # The book whose session the timer view shows
         self.current_book = None
-        self.timer_task = None
+        self.search_task = None
+        self.search_return_view = None
+        
+        # Views are patched in place as the data changes
+        self.db_manager.subscribe(self.on_database_change, loop=self.loop)
+        
+        # Release the database connections when the app closes
+        self.on_exit = self.on_app_exit
         
         # Create main interface
         self.create_main_interface()
@@ -32,10 +108,35 @@ class Booktrack(toga.App):
         # Show main window
         self.main_window = toga.MainWindow(title=self.formal_name)
         self.main_window.content = self.main_container
+        # No timer ticks while the app is in the background
+        self.main_window.on_hide = self.on_window_hide
+        self.main_window.on_show = self.on_window_show
         self.main_window.show()
+        # The window is drawn once control returns to the event loop
+        self.loop.call_soon(self.record_startup, 'first_frame')
+        self.sessions.start_ticking(self.loop)
         
-        # Load initial data
-        self.refresh_book_list()
+        # Fill in the first view, then offer back interrupted sessions
+        self.loop.create_task(self.load_first_view())
+    
+    async def load_first_view(self):
+        """Replace the startup skeleton with the Active Books list."""
+        try:
+            total, books, cursor = await self.db_manager.get_book_list('Active', BOOK_PAGE_SIZE)
+            # Unless the user has already moved to another view
+            if self.current_view == 'active_books':
+                with self.instrumentation.timer('render.book_list'):
+                    self.display_book_list('Active', total, books, cursor)
+        except Exception as e:
+            self.show_error_message(f'Error loading books: {str(e)}')
+        self.loop.call_soon(self.record_startup, 'interactive')
+        
+        # Offer back a session the app was killed in the middle of
+        await self.recover_session()
+    
+    def record_startup(self, stage: str):
+        """Record the time from launch to a startup stage, when instrumented."""
+        self.instrumentation.record(f'startup.{stage}', time.perf_counter() - LAUNCHED_AT)
     
     def create_main_interface(self):
         """Create the main application interface."""
@@ -43,15 +144,37 @@ class Booktrack(toga.App):
         self.create_navigation()
         
         # Create main content area
-        self.main_content = toga.ScrollContainer(style=Pack(flex=1))
+        self.main_content = toga.ScrollContainer(
+            on_scroll=self.on_content_scroll,
+            style=Pack(flex=1)
+        )
+        # The book list and statistics views are kept and patched after
+        # changes; None means they have to be built again when next shown
+        self.book_list = None
+        self.book_list_content = None
+        self.book_list_status = None
+        self.book_list_title = None
+        self.stats_content = None
+        self.stats_labels = {}
+        self.stats_day = None
+        self.stats_titles = {}
+        self.trends_box = None
+        
+        # Book rows are built once and shared by the Active and All views
+        self.book_pool = BookListItemPool(
+            self.start_reading_session,
+            self.edit_book,
+            self.delete_book
+        )
         
         # Create main container
         self.main_container = toga.Box(style=Pack(direction=COLUMN))
         self.main_container.add(self.nav_box)
         self.main_container.add(self.main_content)
         
-        # Show active books by default
-        self.show_active_books()
+        # Active books are shown by default, once startup has queried them
+        self.current_view = 'active_books'
+        self.main_content.content = self.create_skeleton('Active Books')
     
     def create_navigation(self):
         """Create navigation bar."""
@@ -88,62 +211,205 @@ class Booktrack(toga.App):
             style=Pack(flex=1, margin=5)
         )
         
+        self.search_input = toga.TextInput(
+            placeholder='Search books and notes',
+            on_change=self.on_search_change,
+            style=Pack(flex=2, margin=5)
+        )
+        
+        self.nav_box.add(self.search_input)
         self.nav_box.add(active_btn)
         self.nav_box.add(all_books_btn)
         self.nav_box.add(stats_btn)
         self.nav_box.add(add_book_btn)
         self.nav_box.add(export_btn)
     
-    def show_active_books(self, widget=None):
+    async def show_active_books(self, widget=None):
         """Show active books view."""
         self.current_view = 'active_books'
-        self.refresh_book_list(status='Active')
+        with self.instrumentation.timer('view.active_books'):
+            await self.refresh_book_list(status='Active')
     
-    def show_all_books(self, widget=None):
+    async def show_all_books(self, widget=None):
         """Show all books view."""
         self.current_view = 'all_books'
-        self.refresh_book_list()
+        with self.instrumentation.timer('view.all_books'):
+            await self.refresh_book_list()
     
-    def show_statistics(self, widget=None):
+    async def show_statistics(self, widget=None):
         """Show statistics view."""
         self.current_view = 'statistics'
-        self.display_statistics()
+        # The daily window moves at midnight, so the view is rebuilt then
+        if self.stats_content is not None and self.stats_day == date.today():
+            self.main_content.content = self.stats_content
+        else:
+            with self.instrumentation.timer('view.statistics'):
+                await self.display_statistics()
+    
+    async def load(self, awaitable, message: str = 'Loading...'):
+        """Await a database call, showing a loading view if it is slow."""
+        task = asyncio.ensure_future(awaitable)
+        done, _ = await asyncio.wait({task}, timeout=LOADING_DELAY)
+        if not done:
+            self.show_loading(message)
+        return await task
+    
+    def create_skeleton(self, title: str) -> toga.Box:
+        """Placeholder book list, shown until its first query answers."""
+        content_box = toga.Box(style=Pack(direction=COLUMN, margin=10))
+        content_box.add(toga.Label(
+            title,
+            style=Pack(font_size=18, font_weight='bold', margin=(0, 0, 10, 0))
+        ))
+        for _ in range(SKELETON_ROWS):
+            content_box.add(toga.Box(style=Pack(height=60, margin=5, background_color='#eeeeee')))
+        return content_box
+    
+    def show_loading(self, message: str):
+        """Show a placeholder while data is loading."""
+        content_box = toga.Box(style=Pack(direction=COLUMN, margin=10))
+        content_box.add(toga.Label(
+            message,
+            style=Pack(text_align='center', margin=20)
+        ))
+        self.main_content.content = content_box
     
-    def refresh_book_list(self, status: Optional[str] = None):
+    async def refresh_book_list(self, status: Optional[str] = None):
         """Refresh the book list display."""
-        books = self.db_manager.get_books(status=status)
+        view = getattr(self, 'current_view', None)
+        # Only the first page is queried and built up front
+        total, books, cursor = await self.load(
+            self.db_manager.get_book_list(status, BOOK_PAGE_SIZE)
+        )
         
+        # The user has switched views while this one was loading
+        if getattr(self, 'current_view', None) != view:
+            return
+        
+        with self.instrumentation.timer('render.book_list'):
+            self.display_book_list(status, total, books, cursor)
+    
+    def display_book_list(self, status: Optional[str], total: int, books: List[Dict], cursor):
+        """Build the book list view from its total and first page."""
         # Create content box
         content_box = toga.Box(style=Pack(direction=COLUMN, margin=10))
+        if self.book_list is not None:
+            self.book_list.close()
+        self.book_list = None
+        self.book_list_status = status
+        self.book_list_title = None
         
-        if not books:
+        if not total:
             empty_label = toga.Label(
                 'No books found. Add a book to get started!',
                 style=Pack(text_align='center', margin=20)
             )
             content_box.add(empty_label)
         else:
-            title = f"{'Active' if status == 'Active' else 'All'} Books ({len(books)})"
-            title_label = toga.Label(
-                title,
+            self.book_list_title = toga.Label(
+                self.book_list_heading(total),
                 style=Pack(font_size=18, font_weight='bold', margin=(0, 0, 10, 0))
             )
-            content_box.add(title_label)
+            content_box.add(self.book_list_title)
             
-            for book in books:
-                book_item = BookListItem(
-                    book,
+            self.book_list = PagedBookList(
+                lambda after, limit: self.db_manager.get_books_page(status, limit, after),
+                self.book_pool,
+                page_size=BOOK_PAGE_SIZE
+            )
+            self.book_list.add_page(books, cursor)
+            content_box.add(self.book_list.box)
+        
+        self.book_list_content = content_box
+        self.main_content.content = content_box
+    
+    def book_list_heading(self, total: int) -> str:
+        """Title shown above the book list."""
+        return f"{'Active' if self.book_list_status == 'Active' else 'All'} Books ({total})"
+    
+    async def on_content_scroll(self, widget, **kwargs):
+        """Load more books as the list is scrolled towards its end."""
+        if self.book_list is None or widget.content is not self.book_list_content:
+            return
+        remaining = widget.max_vertical_position - widget.vertical_position
+        if remaining < SCROLL_PRELOAD_DISTANCE:
+            await self.book_list.load_next_page()
+    
+    def on_search_change(self, widget):
+        """Search as the user types, once typing pauses."""
+        if self.search_task is not None:
+            self.search_task.cancel()
+            self.search_task = None
+        
+        text = widget.value.strip()
+        if text == DIAGNOSTICS_QUERY:
+            self.show_diagnostics()
+        elif text:
+            self.search_task = asyncio.ensure_future(self.run_search(text))
+        elif getattr(self, 'current_view', None) in ('search', 'diagnostics'):
+            # Cleared; go back to the view the search started from
+            self.current_view = self.search_return_view or 'active_books'
+            self.search_return_view = None
+            asyncio.ensure_future(self.show_current_view())
+    
+    async def run_search(self, text: str, delay: float = SEARCH_DEBOUNCE):
+        """Wait out the debounce delay, then search and show the results."""
+        await asyncio.sleep(delay)
+        results = await self.db_manager.search(text, limit=SEARCH_LIMIT)
+        
+        # Typing has moved on while the query ran
+        if self.search_input.value.strip() != text:
+            return
+        if getattr(self, 'current_view', None) not in ('search', 'diagnostics'):
+            self.search_return_view = getattr(self, 'current_view', None)
+            self.current_view = 'search'
+        self.display_search_results(text, results)
+    
+    def display_search_results(self, text: str, results: List[Dict]):
+        """Display search results, best matches first."""
+        content_box = toga.Box(style=Pack(direction=COLUMN, margin=10))
+        count = f"{len(results)}+" if len(results) == SEARCH_LIMIT else len(results)
+        content_box.add(toga.Label(
+            f'Search "{text}" ({count})',
+            style=Pack(font_size=18, font_weight='bold', margin=(0, 0, 10, 0))
+        ))
+        
+        if not results:
+            content_box.add(toga.Label(
+                'No books or notes match.',
+                style=Pack(text_align='center', margin=20)
+            ))
+        
+        for result in results:
+            if result['type'] == 'book':
+                # Not from the pool: pooled rows belong to the kept book list
+                item = BookListItem(
+                    result['book'],
                     self.start_reading_session,
                     self.edit_book,
                     self.delete_book
                 )
-                content_box.add(book_item.create_item_box())
+                content_box.add(item.create_item_box())
+                continue
+            
+            session = result['session']
+            note_box = toga.Box(style=Pack(direction=COLUMN, margin=5))
+            note_box.add(toga.Label(
+                f"{session['book_title']} - {session['session_date']}",
+                style=Pack(font_weight='bold', margin=(0, 0, 2, 0))
+            ))
+            note_box.add(toga.Label(result['snippet'], style=Pack(font_size=12)))
+            content_box.add(note_box)
         
         self.main_content.content = content_box
     
-    def display_statistics(self):
+    async def display_statistics(self):
         """Display reading statistics."""
-        stats = self.db_manager.get_statistics()
+        stats = await self.load(self.db_manager.get_statistics(), 'Loading statistics...')
+        if self.current_view != 'statistics':
+            return
+        render_start = time.perf_counter()
+        self.stats_labels = {}
         
         content_box = toga.Box(style=Pack(direction=COLUMN, margin=10))
         
@@ -175,6 +441,29 @@ class Booktrack(toga.App):
             style=Pack(font_size=14, margin=5)
         )
         content_box.add(books_label)
+        self.stats_labels['total_books'] = (books_label, stats['total_books'])
+        
+        # Average session length
+        average_minutes = stats['average_session_seconds'] / 60
+        average_label = toga.Label(
+            f"Average Session: {average_minutes:.0f} minutes",
+            style=Pack(font_size=14, margin=5)
+        )
+        content_box.add(average_label)
+        
+        # Reading speed
+        speed_label = toga.Label(
+            f"Reading Speed: {stats['pages_per_hour']:.1f} pages/hour",
+            style=Pack(font_size=14, margin=5)
+        )
+        content_box.add(speed_label)
+        
+        # Longest streak
+        streak_label = toga.Label(
+            f"Longest Streak: {stats['longest_streak_days']} days",
+            style=Pack(font_size=14, margin=5)
+        )
+        content_box.add(streak_label)
         
         # Books by status
         if stats['books_by_status']:
@@ -190,6 +479,7 @@ class Booktrack(toga.App):
                     style=Pack(font_size=12, margin=(0, 0, 2, 20))
                 )
                 content_box.add(status_item)
+                self.stats_labels[status] = (status_item, count)
         
         # Recent daily stats
         if stats['daily_stats']:
@@ -199,43 +489,127 @@ class Booktrack(toga.App):
             )
             content_box.add(daily_label)
             
-            for date, seconds in stats['daily_stats'][:7]:  # Show last 7 days
+            for day, seconds in stats['daily_stats'][:7]:  # Show last 7 days
                 hours = seconds / 3600
                 daily_item = toga.Label(
-                    f"  {date}: {hours:.1f} hours",
+                    f"  {day}: {hours:.1f} hours",
                     style=Pack(font_size=12, margin=(0, 0, 2, 20))
                 )
                 content_box.add(daily_item)
         
+        # Most read books
+        if stats['per_book']:
+            per_book_label = toga.Label(
+                'Most Read Books:',
+                style=Pack(font_size=14, font_weight='bold', margin=(10, 0, 5, 0))
+            )
+            content_box.add(per_book_label)
+            
+            top_books = sorted(
+                stats['per_book'].values(),
+                key=lambda book: book['total_seconds'],
+                reverse=True
+            )
+            for book in top_books[:5]:
+                hours = book['total_seconds'] / 3600
+                book_item = toga.Label(
+                    f"  {book['title']}: {hours:.1f} hours ({book['sessions']} sessions)",
+                    style=Pack(font_size=12, margin=(0, 0, 2, 20))
+                )
+                content_box.add(book_item)
+        
+        # Trends read the whole session history, so they wait to be asked for
+        self.trends_box = toga.Box(style=Pack(direction=COLUMN))
+        self.trends_box.add(toga.Button(
+            'Show Trends',
+            on_press=self.show_trends,
+            style=Pack(margin=(10, 5, 5, 5))
+        ))
+        content_box.add(self.trends_box)
+        self.stats_titles = {book_id: book['title'] for book_id, book in stats['per_book'].items()}
+        
+        self.stats_content = content_box
+        self.stats_day = date.today()
         self.main_content.content = content_box
+        self.instrumentation.record('render.statistics', time.perf_counter() - render_start)
+    
+    async def show_trends(self, widget=None):
+        """Fill the statistics view's trends section from the analytics module."""
+        trends_box = self.trends_box
+        if widget is not None:
+            widget.enabled = False
+        trends = await self.db_manager.run(summarize_trends)
+        # The statistics view was rebuilt meanwhile; it has its own button
+        if trends_box is not self.trends_box:
+            return
+        trends_box.clear()
+        
+        trends_label = toga.Label(
+            'Trends:',
+            style=Pack(font_size=14, font_weight='bold', margin=(10, 0, 5, 0))
+        )
+        trends_box.add(trends_label)
+        
+        streak = trends['streaks']['current']
+        peak_hour = max(range(24), key=trends['time_of_day_seconds'].__getitem__)
+        trend_lines = [
+            f"  7-day average: {trends['rolling_7_day_seconds'] / 60:.0f} minutes/day",
+            f"  30-day average: {trends['rolling_30_day_seconds'] / 60:.0f} minutes/day",
+            f"  Current streak: {streak} days",
+        ]
+        if any(trends['time_of_day_seconds']):
+            trend_lines.append(f"  Most reading at: {peak_hour:02d}:00")
+        for line in trend_lines:
+            trends_box.add(toga.Label(line, style=Pack(font_size=12, margin=(0, 0, 2, 20))))
+        
+        # Projected finishing dates for active books
+        projections = {
+            book_id: finish for book_id, finish in trends['projected_completion'].items()
+            if finish is not None
+        }
+        if projections:
+            finish_label = toga.Label(
+                'Projected Finish:',
+                style=Pack(font_size=14, font_weight='bold', margin=(10, 0, 5, 0))
+            )
+            trends_box.add(finish_label)
+            
+            for book_id, finish in sorted(projections.items(), key=lambda item: item[1])[:5]:
+                pace = trends['velocity_by_book'].get(book_id)
+                pace_text = f", {pace:.0f} pages/hour" if pace else ''
+                finish_item = toga.Label(
+                    f"  {self.stats_titles.get(book_id, 'Unknown')}: "
+                    f"{finish.isoformat()}{pace_text}",
+                    style=Pack(font_size=12, margin=(0, 0, 2, 20))
+                )
+                trends_box.add(finish_item)
     
     def show_add_book_form(self, widget=None):
         """Show add book form."""
-        def on_save(book_data):
+        async def on_save(book_data):
             if book_data:
                 try:
-                    self.db_manager.add_book(
+                    await self.db_manager.add_book(
                         title=book_data['title'],
                         author=book_data['author'],
                         total_pages=book_data['total_pages'],
                         cover_image_url=book_data['cover_image_url']
                     )
                     self.show_success_message('Book added successfully!')
-                    self.refresh_current_view()
                 except Exception as e:
                     self.show_error_message(f'Error adding book: {str(e)}')
-            else:
-                self.refresh_current_view()
+            await self.show_current_view()
         
+        from .forms import BookForm
         book_form = BookForm(on_save)
         self.main_content.content = book_form.create_form_box()
     
     def edit_book(self, book_data: Dict):
         """Show edit book form."""
-        def on_save(updated_data):
+        async def on_save(updated_data):
             if updated_data:
                 try:
-                    self.db_manager.update_book(
+                    await self.db_manager.update_book(
                         book_id=updated_data['id'],
                         title=updated_data['title'],
                         author=updated_data['author'],
@@ -244,12 +618,11 @@ class Booktrack(toga.App):
                         status=updated_data['status']
                     )
                     self.show_success_message('Book updated successfully!')
-                    self.refresh_current_view()
                 except Exception as e:
                     self.show_error_message(f'Error updating book: {str(e)}')
-            else:
-                self.refresh_current_view()
+            await self.show_current_view()
         
+        from .forms import BookForm
         book_form = BookForm(on_save, book_data)
         self.main_content.content = book_form.create_form_box()
     
@@ -262,48 +635,98 @@ class Booktrack(toga.App):
             )
             
             if result:
-                self.db_manager.delete_book(book_data['id'])
+                await self.db_manager.delete_book(book_data['id'])
+                self.sessions.discard(book_data['id'])
+                self.session_books.pop(book_data['id'], None)
                 self.show_success_message('Book deleted successfully!')
-                self.refresh_current_view()
+                await self.show_current_view()
         except Exception as e:
             self.show_error_message(f'Error deleting book: {str(e)}')
     
     def start_reading_session(self, book_data: Dict):
-        """Start a reading session for a book."""
+        """Start a reading session for a book, or show the one it has."""
         if book_data['status'] not in ['Active']:
             self.show_error_message('Cannot start reading session for non-active books.')
             return
         
-        self.current_book = book_data
-        self.current_timer = Timer()
-        self.current_timer.start()
-        
-        self.show_timer_interface()
+        # Other books' sessions keep running alongside this one
+        book_id = book_data['id']
+        self.session_books[book_id] = book_data
+        self.sessions.start(book_id)
         
-        # Start timer update task
-        self.timer_task = asyncio.create_task(self.update_timer_display())
+        self.show_timer_interface(book_data)
+        asyncio.ensure_future(self.checkpoint_sessions([book_id]))
+    
+    async def recover_session(self):
+        """Offer to recover reading sessions interrupted by the app being killed."""
+        try:
+            active = [session for session in await self.db_manager.get_active_sessions()
+                      if session['book_id'] not in self.sessions]
+            if not active:
+                return
+            if len(active) == 1:
+                session = active[0]
+                message = (f"Your reading session for '{session['book_title']}' was interrupted "
+                           f"after {Timer().format_time(session['elapsed_seconds'])}. Recover it?")
+            else:
+                titles = ', '.join(f"'{session['book_title']}'" for session in active)
+                message = (f"Your reading sessions for {titles} were interrupted. "
+                           f"Recover them?")
+            recover = await self.main_window.confirm_dialog('Recover Reading Session', message)
+            if not recover:
+                for session in active:
+                    await self.db_manager.clear_active_session(session['book_id'])
+                return
+            
+            shown = None
+            for session in active:
+                book = await self.db_manager.get_book(session['book_id'])
+                if book is None or book['id'] in self.sessions:
+                    continue
+                # Paused: the time since the last checkpoint is unknown
+                self.sessions.restore(book['id'], session['elapsed_seconds'])
+                self.session_books[book['id']] = book
+                shown = shown or book
+            if shown is not None and self.current_book is None:
+                self.show_timer_interface(shown)
+        except Exception as e:
+            self.show_error_message(f'Error recovering session: {str(e)}')
+    
+    async def checkpoint_sessions(self, book_ids=None):
+        """Save the timer state of sessions, every one by default, to the journal."""
+        checkpoints = [checkpoint for checkpoint in self.sessions.checkpoints()
+                       if book_ids is None or checkpoint[0] in book_ids]
+        if checkpoints:
+            await self.db_manager.checkpoint_sessions(checkpoints)
+    
+    def flush_checkpoints(self):
+        """Checkpoint the sessions that became due during this round of ticks."""
+        book_ids, self.pending_checkpoints = self.pending_checkpoints, set()
+        asyncio.ensure_future(self.checkpoint_sessions(book_ids))
     
-    def show_timer_interface(self):
-        """Show the timer interface."""
+    def show_timer_interface(self, book_data: Dict):
+        """Show the timer interface for book_data's session."""
+        self.current_book = book_data
         content_box = toga.Box(style=Pack(direction=COLUMN, margin=20, text_align='center'))
         
         # Book title
         book_title = toga.Label(
-            f"Reading: {self.current_book['title']}",
+            f"Reading: {book_data['title']}",
             style=Pack(font_size=18, font_weight='bold', margin=(0, 0, 10, 0), text_align='center')
         )
         content_box.add(book_title)
         
         # Author
         book_author = toga.Label(
-            f"by {self.current_book['author']}",
+            f"by {book_data['author']}",
             style=Pack(font_size=14, margin=(0, 0, 20, 0), text_align='center')
         )
         content_box.add(book_author)
         
         # Timer display
+        timer = self.sessions.get(book_data['id'])
         self.timer_display = toga.Label(
-            '00:00:00',
+            timer.format_time(),
             style=Pack(font_size=32, font_weight='bold', margin=20, text_align='center')
         )
         content_box.add(self.timer_display)
@@ -342,103 +765,279 @@ class Booktrack(toga.App):
         
         content_box.add(button_box)
         
+        # The other sessions, each a button that switches to it
+        self.session_buttons = {}
+        others = [book_id for book_id in self.sessions if book_id != book_data['id']]
+        if others:
+            content_box.add(toga.Label(
+                'Other sessions',
+                style=Pack(font_size=14, font_weight='bold', margin=(20, 0, 5, 0))
+            ))
+            for book_id in others:
+                button = toga.Button(
+                    self.session_button_label(book_id),
+                    on_press=lambda widget, book_id=book_id: self.show_timer_interface(
+                        self.session_books[book_id]),
+                    style=Pack(margin=5)
+                )
+                self.session_buttons[book_id] = button
+                content_box.add(button)
+            
+            stop_all_button = toga.Button(
+                'Stop All & Save',
+                on_press=self.stop_and_save_all_sessions,
+                style=Pack(margin=5)
+            )
+            content_box.add(stop_all_button)
+        
         self.main_content.content = content_box
     
-    async def update_timer_display(self):
-        """Update the timer display continuously."""
-        while self.current_timer and self.timer_display:
-            try:
-                elapsed_time = self.current_timer.format_time()
-                self.timer_display.text = elapsed_time
-                await asyncio.sleep(1)
-            except Exception:
-                break
-    
-    def pause_timer(self, widget):
-        """Pause the current timer."""
-        if self.current_timer:
-            self.current_timer.pause()
-    
-    def resume_timer(self, widget):
-        """Resume the current timer."""
-        if self.current_timer:
-            self.current_timer.resume()
-    
-    def stop_and_save_session(self, widget):
-        """Stop timer and show session log form."""
-        if self.current_timer:
-            elapsed_seconds = int(self.current_timer.stop())
-            
-            # Cancel timer update task
-            if self.timer_task:
-                self.timer_task.cancel()
-                self.timer_task = None
-            
-            self.show_session_log_form(elapsed_seconds)
+    def session_button_label(self, book_id: int, elapsed: Optional[float] = None) -> str:
+        """Label of the button switching to book_id's session."""
+        timer = self.sessions.get(book_id)
+        state = '' if timer.is_running else ' (paused)'
+        return f"{self.session_books[book_id]['title']}  {timer.format_time(elapsed)}{state}"
     
-    def cancel_session(self, widget):
-        """Cancel the current reading session."""
-        if self.current_timer:
-            self.current_timer.reset()
-        
-        if self.timer_task:
-            self.timer_task.cancel()
-            self.timer_task = None
+    def on_timer_tick(self, book_id: int, elapsed: float):
+        """Show the new second, checkpointing every CHECKPOINT_INTERVAL seconds."""
+        if self.current_book is not None and book_id == self.current_book['id']:
+            self.timer_display.text = self.sessions.get(book_id).format_time(elapsed)
+        elif book_id in self.session_buttons:
+            self.session_buttons[book_id].text = self.session_button_label(book_id, elapsed)
         
-        self.current_timer = None
+        seconds = int(elapsed)
+        if seconds and seconds % CHECKPOINT_INTERVAL == 0:
+            # Sessions ticking together are checkpointed in one batch
+            if not self.pending_checkpoints:
+                self.loop.call_soon(self.flush_checkpoints)
+            self.pending_checkpoints.add(book_id)
+    
+    def on_window_hide(self, window, **kwargs):
+        """Suspend timer ticks in the background, checkpointing first."""
+        self.sessions.stop_ticking()
+        if self.sessions:
+            # Backgrounded apps are the ones that get killed
+            asyncio.ensure_future(self.checkpoint_sessions())
+    
+    def on_window_show(self, window, **kwargs):
+        """Resume timer ticks, catching the displays up straight away."""
+        self.sessions.start_ticking(self.loop)
+    
+    async def pause_timer(self, widget):
+        """Pause the shown session."""
+        if self.current_book:
+            book_id = self.current_book['id']
+            self.sessions.pause(book_id)
+            await self.checkpoint_sessions([book_id])
+    
+    async def resume_timer(self, widget):
+        """Resume the shown session."""
+        if self.current_book:
+            book_id = self.current_book['id']
+            self.sessions.resume(book_id)
+            await self.checkpoint_sessions([book_id])
+    
+    async def stop_and_save_session(self, widget):
+        """Stop the shown session and show the session log form."""
+        if self.current_book:
+            book_id = self.current_book['id']
+            finished = self.sessions.stop([book_id])
+            if finished:
+                session = finished[0]
+                self.show_session_log_form(session)
+                # Still recoverable until the form is saved
+                await self.db_manager.checkpoint_session(
+                    book_id, session['duration_seconds'], False
+                )
+    
+    async def stop_and_save_all_sessions(self, widget):
+        """Stop every session and save them all in one transaction."""
+        finished = self.sessions.stop()
+        self.current_book = None
+        try:
+            await self.db_manager.save_sessions(finished)
+            self.show_success_message(f'{len(finished)} reading sessions saved successfully!')
+        except Exception as e:
+            # The checkpoints are kept, so the sessions are offered again
+            self.show_error_message(f'Error saving sessions: {str(e)}')
+        self.session_books.clear()
+        await self.show_current_view()
+    
+    async def cancel_session(self, widget):
+        """Cancel the shown reading session."""
+        if self.current_book:
+            book_id = self.current_book['id']
+            self.sessions.discard(book_id)
+            self.session_books.pop(book_id, None)
+            await self.db_manager.clear_active_session(book_id)
         self.current_book = None
         
-        self.refresh_current_view()
+        await self.show_current_view()
     
-    def show_session_log_form(self, duration_seconds: int):
-        """Show the session logging form."""
-        def on_save(session_data):
+    def show_session_log_form(self, session: Dict):
+        """Show the session logging form for a stopped session."""
+        book_id = session['book_id']
+        
+        async def on_save(session_data):
             if session_data:
                 try:
-                    self.db_manager.add_reading_session(
-                        book_id=self.current_book['id'],
-                        duration_seconds=session_data['duration_seconds'],
-                        pages_read=session_data['pages_read'],
-                        notes=session_data['notes']
-                    )
+                    # Saving also clears the session's checkpoint
+                    await self.db_manager.save_sessions([dict(session_data, book_id=book_id)])
                     self.show_success_message('Reading session saved successfully!')
                 except Exception as e:
+                    # The checkpoint is kept, so the session is offered again
                     self.show_error_message(f'Error saving session: {str(e)}')
+            else:
+                await self.db_manager.clear_active_session(book_id)
             
-            # Reset timer state
-            self.current_timer = None
+            self.session_books.pop(book_id, None)
             self.current_book = None
-            self.refresh_current_view()
+            await self.show_current_view()
         
-        session_form = SessionLogForm(duration_seconds, on_save)
+        from .forms import SessionLogForm
+        session_form = SessionLogForm(session['duration_seconds'], on_save)
         self.main_content.content = session_form.create_form_box()
     
-    def refresh_current_view(self):
+    def on_database_change(self, event: ChangeEvent):
+        """Patch the kept views for one committed change."""
+        if event.table == 'books' and event.action != BULK:
+            self.patch_book_list(event)
+            self.patch_statistics(event)
+            self.refresh_search()
+            return
+        
+        # A new session changes nearly every statistic, and bulk changes
+        # touch too many rows to patch one at a time
+        self.stats_content = None
+        if event.action == BULK:
+            self.book_list_content = None
+        self.refresh_search()
+    
+    def patch_book_list(self, event: ChangeEvent):
+        """Insert, update or remove the one row of the book list a change affects."""
+        if self.book_list_content is None:
+            return
+        book = event.row
+        
+        if event.action == DELETED:
+            item = self.book_pool.items.get(book['id'])
+            if item is not None and self.book_list is not None:
+                self.book_list.remove(item)
+            self.book_pool.discard(book['id'])
+        elif self.list_includes(book):
+            if self.book_list is None:
+                # The list was empty; build it when next shown
+                self.book_list_content = None
+                return
+            item = self.book_pool.get(book)
+            if item not in self.book_list.items:
+                self.book_list.place(item)
+        else:
+            item = self.book_pool.update(book)
+            if item is not None and self.book_list is not None:
+                self.book_list.remove(item)
+        
+        asyncio.ensure_future(self.update_book_list_total())
+    
+    async def update_book_list_total(self):
+        """Bring the book list heading up to date with the rollup count."""
+        content = self.book_list_content
+        total = await self.db_manager.count_books(status=self.book_list_status)
+        if content is None or content is not self.book_list_content:
+            # Rebuilt or invalidated meanwhile; that view has its own count
+            return
+        if total:
+            self.book_list_title.text = self.book_list_heading(total)
+            return
+        
+        # The last book has gone; show the empty message instead
+        self.book_list_content = None
+        if self.main_content.content is content:
+            await self.refresh_current_view()
+    
+    def patch_statistics(self, event: ChangeEvent):
+        """Bump the book counters of the statistics view for a new book."""
+        if self.stats_content is None:
+            return
+        if event.action != INSERTED or event.row['status'] not in self.stats_labels:
+            self.stats_content = None
+            return
+        
+        label, count = self.stats_labels['total_books']
+        label.text = f"Total Books: {count + 1}"
+        self.stats_labels['total_books'] = (label, count + 1)
+        
+        status = event.row['status']
+        label, count = self.stats_labels[status]
+        label.text = f"  {status}: {count + 1}"
+        self.stats_labels[status] = (label, count + 1)
+    
+    def refresh_search(self):
+        """Run the search being shown again so its results stay current."""
+        if getattr(self, 'current_view', None) == 'search':
+            if self.search_task is not None:
+                self.search_task.cancel()
+            self.search_task = asyncio.ensure_future(
+                self.run_search(self.search_input.value.strip(), delay=0)
+            )
+    
+    def list_includes(self, book: Dict) -> bool:
+        """Whether the book list being shown should contain this book."""
+        return self.book_list_status is None or book['status'] == self.book_list_status
+    
+    async def show_current_view(self):
+        """Show the current view again, rebuilding it only if a change invalidated it."""
+        if not hasattr(self, 'current_view'):
+            await self.show_active_books()
+        elif self.current_view == 'statistics':
+            await self.show_statistics()
+        elif self.current_view == 'search':
+            await self.run_search(self.search_input.value.strip(), delay=0)
+        elif self.current_view == 'diagnostics':
+            self.show_diagnostics()
+        elif self.book_list_content is not None:
+            self.main_content.content = self.book_list_content
+        else:
+            await self.refresh_current_view()
+    
+    async def refresh_current_view(self):
         """Refresh the current view."""
         if hasattr(self, 'current_view'):
             if self.current_view == 'active_books':
-                self.show_active_books()
+                await self.show_active_books()
             elif self.current_view == 'all_books':
-                self.show_all_books()
+                await self.show_all_books()
             elif self.current_view == 'statistics':
-                self.show_statistics()
+                await self.show_statistics()
+            elif self.current_view == 'search':
+                await self.run_search(self.search_input.value.strip(), delay=0)
+            elif self.current_view == 'diagnostics':
+                self.show_diagnostics()
         else:
-            self.show_active_books()
+            await self.show_active_books()
     
     async def export_data(self, widget=None):
         """Export all data to JSON file."""
-        try:
-            data = self.db_manager.export_data()
-            
-            # Create export filename with timestamp
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"booktrack_export_{timestamp}.json"
-            
-            # Get user's home directory for export
-            export_path = os.path.join(os.path.expanduser("~"), filename)
-            
+        # Create export filename with timestamp
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        filename = f"booktrack_export_{timestamp}.json"
+        
+        # Get user's home directory for export
+        export_path = os.path.join(os.path.expanduser("~"), filename)
+        
+        self.show_export_progress()
+        loop = asyncio.get_running_loop()
+        
+        def report_progress(done, total):
+            loop.call_soon_threadsafe(self.update_export_progress, done, total)
+        
+        def write_file(db_manager):
             with open(export_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+                return db_manager.export_to_file(f, progress=report_progress)
+        
+        try:
+            # The file is written on the database worker, off the UI loop
+            await self.db_manager.run(write_file)
             
             await self.main_window.info_dialog(
                 'Export Successful',
@@ -450,6 +1049,94 @@ class Booktrack(toga.App):
                 'Export Failed',
                 f'Failed to export data: {str(e)}'
             )
+        finally:
+            await self.show_current_view()
+    
+    def show_export_progress(self):
+        """Show the export progress view."""
+        content_box = toga.Box(style=Pack(direction=COLUMN, margin=20))
+        
+        self.export_label = toga.Label(
+            'Exporting data...',
+            style=Pack(font_size=14, margin=(0, 0, 10, 0))
+        )
+        content_box.add(self.export_label)
+        
+        self.export_progress = toga.ProgressBar(max=100, style=Pack(flex=1))
+        content_box.add(self.export_progress)
+        
+        self.main_content.content = content_box
+    
+    def update_export_progress(self, done: int, total: int):
+        """Update the export progress view."""
+        self.export_progress.value = 100 * done / total if total else 100
+        self.export_label.text = f'Exporting data... {done} of {total} rows'
+    
+    def show_diagnostics(self):
+        """Show the recorded call, view and SQL timings and the last errors."""
+        if getattr(self, 'current_view', None) not in ('search', 'diagnostics'):
+            self.search_return_view = getattr(self, 'current_view', None)
+        self.current_view = 'diagnostics'
+        content_box = toga.Box(style=Pack(direction=COLUMN, margin=10))
+        content_box.add(toga.Label(
+            'Diagnostics',
+            style=Pack(font_size=18, font_weight='bold', margin=(0, 0, 10, 0))
+        ))
+        
+        if not self.instrumentation.enabled:
+            content_box.add(toga.Label(
+                'Instrumentation is off. Start the app with BOOKTRACK_INSTRUMENT=1 to record it.',
+                style=Pack(margin=5)
+            ))
+            self.main_content.content = content_box
+            return
+        
+        snapshot = self.instrumentation.snapshot()
+        
+        def section(title: str, lines: List[str]):
+            content_box.add(toga.Label(
+                title,
+                style=Pack(font_size=14, font_weight='bold', margin=(10, 0, 5, 0))
+            ))
+            for line in lines or ['Nothing recorded yet']:
+                content_box.add(toga.Label(line, style=Pack(font_size=11, margin=(0, 0, 2, 10))))
+        
+        section('Time by call and view (total, count, p50 / p95 / max)', [
+            f"{name}: {h['total_ms']:.1f} ms, {h['count']}x, "
+            f"{h['p50_ms']:.2f} / {h['p95_ms']:.2f} / {h['max_ms']:.2f} ms"
+            for name, h in list(snapshot['histograms'].items())[:DIAGNOSTICS_ROWS]
+        ])
+        section('Most frequent SQL', [
+            f"{query['count']}x {query['sql'][:120]}"
+            for query in snapshot['queries'][:DIAGNOSTICS_ROWS]
+        ])
+        section('Recent errors', [error['message'] for error in snapshot['errors'][-10:]])
+        
+        dump_button = toga.Button(
+            'Save to file',
+            on_press=self.dump_diagnostics,
+            style=Pack(margin=(10, 5))
+        )
+        content_box.add(dump_button)
+        self.main_content.content = content_box
+    
+    def dump_diagnostics(self, widget=None):
+        """Write the instrumentation snapshot to a JSON file in the home directory."""
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        path = os.path.join(os.path.expanduser("~"), f"booktrack_diagnostics_{timestamp}.json")
+        try:
+            self.instrumentation.dump(path)
+            self.show_success_message(f'Diagnostics saved to:\n{path}')
+        except OSError as e:
+            self.show_error_message(f'Error saving diagnostics: {str(e)}')
+    
+    def on_app_exit(self, app, **kwargs):
+        """Close database connections before the app exits."""
+        self.sessions.stop_ticking()
+        self.db_manager.close()
+        if self.instrumentation.dump_path:
+            self.instrumentation.dump()
+        return True
     
     def show_success_message(self, message: str):
         """Show success message to user."""
@@ -462,6 +1149,7 @@ class Booktrack(toga.App):
         # In a real app, this could be a toast notification
         # For now, we'll use the console
         print(f"ERROR: {message}")
+        self.instrumentation.error(message)
 
 
 def main():
@@ -0,0 +1,160 @@
+"""
+Asynchronous access to the Booktrack database.
+
+``AsyncDatabaseManager`` owns a ``DatabaseManager`` on a dedicated worker
+thread. Calls are queued to that thread and answered with awaitables, so
+an event loop (the toga UI) never runs SQL itself and a slow query or disk
+only delays the view that is waiting for it.
+"""
+
+import asyncio
+import queue
+import threading
+from typing import Callable, Dict, Optional
+
+from .cache import DEFAULT_CACHE_SIZE
+from .database import DatabaseManager
+from .events import ChangeEvent, ChangeListener
+from .instrumentation import Instrumentation
+
+# Queued by close() to stop the worker
+_STOP = object()
+
+
+def _resolve(future: asyncio.Future, result, error: Optional[BaseException]):
+    """Complete a future on its own loop, unless the caller gave up on it."""
+    if future.cancelled():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+
+
+def call_method(db_manager: DatabaseManager, name: str, *args, **kwargs):
+    """Call db_manager's method name with the arguments.
+
+    For run() and thread pools, which take a function: the method is looked
+    up on the instance, so instrumented methods are timed.
+    """
+    return getattr(db_manager, name)(*args, **kwargs)
+
+
+class AsyncDatabaseManager:
+    """Runs DatabaseManager calls on one worker thread and returns awaitables.
+
+    Every public DatabaseManager method is available as a coroutine with
+    the same arguments, e.g. ``await db.get_books(status='Active')``.
+    Requests run one at a time in the order they were made, on a single
+    connection, and the DatabaseManager itself (including the schema
+    migrations) is created on the worker, so constructing this class never
+    blocks.
+    """
+
+    def __init__(self, db_path: str = None, pragmas: Optional[Dict] = None,
+                 cache_size: int = DEFAULT_CACHE_SIZE,
+                 instrumentation: Optional[Instrumentation] = None):
+        self._requests = queue.Queue()
+        self._listeners = []
+        self._closed = False
+        self.db_manager: Optional[DatabaseManager] = None
+        self._thread = threading.Thread(
+            target=self._run,
+            args=(db_path, pragmas, cache_size, instrumentation),
+            name='booktrack-db',
+            daemon=True
+        )
+        self._thread.start()
+
+    def _run(self, db_path, pragmas, cache_size, instrumentation):
+        """Worker loop: open the database, then serve requests until closed."""
+        try:
+            self.db_manager = DatabaseManager(db_path, pragmas, cache_size, instrumentation)
+            self.db_manager.subscribe(self._dispatch_event)
+            init_error = None
+        except Exception as e:
+            init_error = e
+
+        while True:
+            request = self._requests.get()
+            if request is _STOP:
+                break
+            func, args, kwargs, loop, future = request
+            result = error = None
+            if init_error is not None:
+                error = init_error
+            else:
+                try:
+                    result = func(self.db_manager, *args, **kwargs)
+                except Exception as e:
+                    error = e
+            try:
+                loop.call_soon_threadsafe(_resolve, future, result, error)
+            except RuntimeError:
+                # The caller's loop has been closed; nobody is waiting
+                pass
+
+        if self.db_manager is not None:
+            self.db_manager.close()
+
+    def run(self, func: Callable, *args, **kwargs) -> asyncio.Future:
+        """Run func(db_manager, *args, **kwargs) on the worker thread.
+
+        Returns a future of the calling event loop that resolves to the
+        result, or raises what func raised.
+        """
+        if self._closed:
+            raise RuntimeError('AsyncDatabaseManager is closed')
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._requests.put((func, args, kwargs, loop, future))
+        return future
+
+    def __getattr__(self, name: str):
+        method = getattr(DatabaseManager, name, None)
+        if name.startswith('_') or not callable(method):
+            raise AttributeError(name)
+
+        async def call(*args, **kwargs):
+            return await self.run(call_method, name, *args, **kwargs)
+
+        call.__name__ = name
+        call.__doc__ = method.__doc__
+        return call
+
+    def subscribe(self, listener: ChangeListener,
+                  loop: Optional[asyncio.AbstractEventLoop] = None):
+        """Call listener(event) on loop for every committed change.
+
+        loop defaults to the running loop. Events are delivered before the
+        result of the call that caused them.
+        """
+        if loop is None:
+            loop = asyncio.get_running_loop()
+        self._listeners.append((listener, loop))
+
+    def unsubscribe(self, listener: ChangeListener):
+        """Stop sending change events to listener."""
+        self._listeners = [(l, loop) for l, loop in self._listeners if l != listener]
+
+    def _dispatch_event(self, event: ChangeEvent):
+        """Forward a change event from the worker to each listener's loop."""
+        for listener, loop in list(self._listeners):
+            try:
+                loop.call_soon_threadsafe(listener, event)
+            except RuntimeError:
+                pass
+
+    def close(self, timeout: Optional[float] = None):
+        """Finish the queued requests, close the database and stop the worker."""
+        if self._closed:
+            return
+        self._closed = True
+        self._requests.put(_STOP)
+        self._thread.join(timeout)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await asyncio.get_running_loop().run_in_executor(None, self.close)
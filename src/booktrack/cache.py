@@ -0,0 +1,146 @@
+"""
+Read-through cache for DatabaseManager queries.
+
+Switching between views re-runs the same reads (the book list pages, the
+book counts, the statistics) although nothing has changed in between.
+``QueryCache`` keeps the most recently used results, keyed by method and
+arguments, and DatabaseManager drops them as soon as a write touches a
+table they were read from.
+
+Writes that do not go through DatabaseManager are caught as well: before
+each lookup the connection's ``PRAGMA data_version`` (which moves when
+another connection commits) and ``total_changes`` (which moves when this
+connection writes) are compared with the values last seen, and any
+difference not accounted for clears the whole cache.
+"""
+
+import functools
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Iterable, Optional
+
+# Number of query results kept by default
+DEFAULT_CACHE_SIZE = 128
+
+
+class QueryCache:
+    """Bounded LRU cache of query results, invalidated by table.
+
+    Cached results are shared between callers and must not be modified.
+    A maxsize of 0 disables caching.
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        # key -> (tables read, result), least recently used first
+        self._entries: OrderedDict = OrderedDict()
+        # Bumped by every invalidation; a result computed across one is
+        # not stored, since it may predate the change
+        self._generation = 0
+        self._lock = threading.Lock()
+        # Per thread: (connection, data_version, total_changes) last seen
+        self._local = threading.local()
+
+    def get_or_compute(self, conn: sqlite3.Connection, key: Hashable,
+                       tables: Iterable[str], compute: Callable):
+        """Return the cached result for key, or compute() it and cache it.
+
+        tables are the tables the result is read from. Reads made inside an
+        open transaction bypass the cache, since they may see rows that are
+        not committed yet.
+        """
+        if not self.maxsize or conn.in_transaction:
+            return compute()
+        try:
+            hash(key)
+        except TypeError:
+            return compute()
+
+        self._check_connection(conn)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            generation = self._generation
+
+        result = compute()
+        with self._lock:
+            if generation == self._generation:
+                self._entries[key] = (frozenset(tables), result)
+                if len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+        return result
+
+    def invalidate(self, tables: Optional[Iterable[str]] = None):
+        """Drop the results read from any of tables, or every result."""
+        with self._lock:
+            self._generation += 1
+            if tables is None:
+                self._entries.clear()
+                return
+            tables = frozenset(tables)
+            stale = [key for key, (read, _) in self._entries.items() if read & tables]
+            for key in stale:
+                del self._entries[key]
+
+    def wrote(self, conn: sqlite3.Connection, tables: Iterable[str]):
+        """Invalidate tables after a write committed on conn.
+
+        The write is also recorded as seen, so it does not look like an
+        untracked one at the next lookup. If another connection committed
+        since the last lookup, which recording it would hide, the whole
+        cache is cleared instead.
+        """
+        state = self._connection_state(conn)
+        seen = getattr(self._local, 'seen', None)
+        if seen is None or seen[:2] != state[:2]:
+            self.invalidate()
+        else:
+            self.invalidate(tables)
+        self._local.seen = state
+
+    def info(self) -> Dict[str, int]:
+        """Hit and miss counts and the current and maximum size."""
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses,
+                    'size': len(self._entries), 'maxsize': self.maxsize}
+
+    @staticmethod
+    def _connection_state(conn: sqlite3.Connection):
+        return conn, conn.execute('PRAGMA data_version').fetchone()[0], conn.total_changes
+
+    def _check_connection(self, conn: sqlite3.Connection):
+        """Clear the cache if the database changed behind our back.
+
+        A connection seen for the first time may have missed any number of
+        changes, so it clears the cache too.
+        """
+        state = self._connection_state(conn)
+        if getattr(self._local, 'seen', None) != state:
+            self.invalidate()
+            self._local.seen = state
+
+
+def cached(*tables: str):
+    """Serve a DatabaseManager read method through its query cache.
+
+    The cache key is the method name and its arguments as passed; tables
+    are the tables the result is read from.
+    """
+    def decorator(method):
+        name = method.__name__
+
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            key = (name, args, tuple(sorted(kwargs.items()))) if kwargs else (name, args)
+            return self.cache.get_or_compute(
+                self.get_connection(), key, tables, lambda: method(self, *args, **kwargs)
+            )
+        return wrapper
+    return decorator
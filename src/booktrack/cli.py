@@ -0,0 +1,208 @@
+"""
+Headless command-line interface to the Booktrack library, for scripting.
+
+Works on the same database as the app through DatabaseManager, without
+loading toga, so it starts quickly and runs where there is no display::
+
+    python -m booktrack.cli list --status Active
+    python -m booktrack.cli add "Dune" "Frank Herbert" --pages 412
+    python -m booktrack.cli log-session 1 45m --pages 30
+    python -m booktrack.cli stats --days 7
+    python -m booktrack.cli export --format jsonl -o library.jsonl
+    python -m booktrack.cli import library.jsonl
+    python -m booktrack.cli vacuum
+    python -m booktrack.cli sync /media/phone/booktrack.db
+
+Results are written to stdout as JSON Lines, one object per line, and
+``list`` streams its rows as they are read, so output can be piped into
+tools like ``jq`` or ``head`` whatever the size of the library. Errors go
+to stderr with a non-zero exit status.
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+from typing import Dict, Iterable, List, Optional, TextIO
+
+from .database import STATUSES, DatabaseManager
+
+# 1h30m, 45m, 90s, 1h 5m 3s
+_DURATION_UNITS = re.compile(r'(\d+)\s*([hms])')
+_UNIT_SECONDS = {'h': 3600, 'm': 60, 's': 1}
+
+
+class CommandError(Exception):
+    """A command that cannot be carried out, reported without a traceback."""
+
+
+def parse_duration(text: str) -> int:
+    """Seconds in a duration given as seconds, H:MM:SS, MM:SS or like 1h30m."""
+    text = text.strip().lower()
+    if text.isdigit():
+        return int(text)
+    if re.fullmatch(r'\d+(:\d{1,2}){1,2}', text):
+        seconds = 0
+        for part in text.split(':'):
+            seconds = seconds * 60 + int(part)
+        return seconds
+    if re.fullmatch(r'(\s*\d+\s*[hms])+', text):
+        return sum(int(value) * _UNIT_SECONDS[unit]
+                   for value, unit in _DURATION_UNITS.findall(text))
+    raise argparse.ArgumentTypeError(
+        f"invalid duration '{text}', expected seconds, H:MM:SS or like 1h30m")
+
+
+def _write_lines(out: TextIO, records: Iterable[Dict]) -> int:
+    """Write records as JSON Lines; returns the number written."""
+    count = 0
+    for record in records:
+        out.write(json.dumps(record, ensure_ascii=False, default=str))
+        out.write('\n')
+        count += 1
+    return count
+
+
+def _list(db: DatabaseManager, args, out: TextIO):
+    if args.sessions:
+        rows = db.iter_reading_sessions(args.book, since=args.since, until=args.until)
+    else:
+        rows = db.iter_books(args.status)
+    _write_lines(out, (dict(row) for row in rows))
+
+
+def _add(db: DatabaseManager, args, out: TextIO):
+    book_id = db.add_book(args.title, args.author, args.pages, args.cover)
+    _write_lines(out, [dict(db.get_book(book_id))])
+
+
+def _log_session(db: DatabaseManager, args, out: TextIO):
+    if db.get_book(args.book_id) is None:
+        raise CommandError(f'no book with id {args.book_id}')
+    session_id = db.add_reading_session(args.book_id, args.duration, args.pages, args.notes)
+    _write_lines(out, [{'id': session_id, 'book_id': args.book_id,
+                        'duration_seconds': args.duration, 'pages_read': args.pages,
+                        'notes': args.notes}])
+
+
+def _stats(db: DatabaseManager, args, out: TextIO):
+    _write_lines(out, [db.get_statistics(args.days)])
+
+
+def _export(db: DatabaseManager, args, out: TextIO):
+    if args.output in (None, '-'):
+        db.export_to_file(out, args.format)
+        return
+    with open(args.output, 'w', encoding='utf-8') as fp:
+        counts = db.export_to_file(fp, args.format)
+    _write_lines(out, [dict(counts, path=args.output)])
+
+
+def _import(db: DatabaseManager, args, out: TextIO):
+    if args.file == '-':
+        counts = db.import_file(sys.stdin)
+    else:
+        try:
+            with open(args.file, encoding='utf-8') as fp:
+                counts = db.import_file(fp)
+        except FileNotFoundError:
+            raise CommandError(f'no such file: {args.file}')
+    _write_lines(out, [counts])
+
+
+def _vacuum(db: DatabaseManager, args, out: TextIO):
+    sizes = db.vacuum()
+    _write_lines(out, [dict(sizes, saved=sizes['size_before'] - sizes['size_after'])])
+
+
+def _sync(db: DatabaseManager, args, out: TextIO):
+    if not os.path.exists(args.peer):
+        raise CommandError(f'no such file: {args.peer}')
+    from .sync import sync
+    with DatabaseManager(args.peer) as peer:
+        _write_lines(out, [sync(db, peer)])
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog='booktrack', description='Manage a Booktrack library from the command line.')
+    parser.add_argument('--db', metavar='PATH',
+                        help='database file (default: ~/.booktrack/booktrack.db)')
+    commands = parser.add_subparsers(dest='command', metavar='COMMAND', required=True)
+
+    command = commands.add_parser('list', help='list books, or reading sessions')
+    command.add_argument('--status', choices=STATUSES, help='only books with this status')
+    command.add_argument('--sessions', action='store_true',
+                         help='list reading sessions instead of books')
+    command.add_argument('--book', type=int, metavar='BOOK_ID',
+                         help="with --sessions, only this book's sessions")
+    command.add_argument('--since', metavar='DATE',
+                         help='with --sessions, only sessions on or after DATE (YYYY-MM-DD)')
+    command.add_argument('--until', metavar='DATE',
+                         help='with --sessions, only sessions before DATE (YYYY-MM-DD)')
+    command.set_defaults(run=_list)
+
+    command = commands.add_parser('add', help='add a book')
+    command.add_argument('title')
+    command.add_argument('author')
+    command.add_argument('--pages', type=int, help='total number of pages')
+    command.add_argument('--cover', metavar='URL', help='cover image URL')
+    command.set_defaults(run=_add)
+
+    command = commands.add_parser('log-session', help='record a reading session')
+    command.add_argument('book_id', type=int)
+    command.add_argument('duration', type=parse_duration,
+                         help='seconds, H:MM:SS, MM:SS or like 1h30m')
+    command.add_argument('--pages', type=int, help='pages read')
+    command.add_argument('--notes', help='session notes')
+    command.set_defaults(run=_log_session)
+
+    command = commands.add_parser('stats', help='reading statistics')
+    command.add_argument('--days', type=int, default=30,
+                         help='days of daily totals to include (default: 30)')
+    command.set_defaults(run=_stats)
+
+    command = commands.add_parser('export', help='export the library')
+    command.add_argument('--format', choices=('json', 'jsonl'), default='jsonl',
+                         help='export format (default: jsonl)')
+    command.add_argument('-o', '--output', metavar='FILE',
+                         help='file to write (default: stdout)')
+    command.set_defaults(run=_export)
+
+    command = commands.add_parser('import', help='import a JSON or JSON Lines export')
+    command.add_argument('file', help="export file, or - for stdin")
+    command.set_defaults(run=_import)
+
+    command = commands.add_parser('vacuum', help='compact the database file')
+    command.set_defaults(run=_vacuum)
+
+    command = commands.add_parser('sync', help='exchange changes with another database')
+    command.add_argument('peer', metavar='PATH', help="the other database's file")
+    command.set_defaults(run=_sync)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None, stdout: Optional[TextIO] = None) -> int:
+    """Run the command line argv (sys.argv[1:] by default); returns the exit status."""
+    args = build_parser().parse_args(argv)
+    out = stdout or sys.stdout
+    try:
+        with DatabaseManager(args.db) as db:
+            args.run(db, args, out)
+        out.flush()
+    except (CommandError, ValueError) as error:
+        # ValueError: malformed import files and the like
+        print(f'booktrack: {error}', file=sys.stderr)
+        return 1
+    except BrokenPipeError:
+        # The reader went away, e.g. piped into head; not an error. Output
+        # still buffered is dropped, so flushing at exit does not fail again
+        if stdout is None:
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
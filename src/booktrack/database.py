@@ -1,13 +1,105 @@
 import sqlite3
 import os
-from datetime import datetime
-from typing import List, Dict, Optional, Tuple
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime, timezone
+from itertools import chain, islice
+from typing import Iterable, Iterator, List, Dict, Optional, Tuple, Union
+
+from .cache import DEFAULT_CACHE_SIZE, QueryCache, cached
+from .events import BULK, DELETED, INSERTED, UPDATED, ChangeEvent, ChangeListener
+from .instrumentation import NULL_INSTRUMENTATION, Instrumentation
+from .migrations import migrate
+from .rows import BookRow, SessionColumns, SessionRow, session_rows
+from .search import create_search_index, has_search_index, search
+from .stats import (compute_statistics, deferred_session_rollups, rebuild_rollups,
+                    verify_rollups)
+
+
+# Book statuses offered by the app's book form
+STATUSES = ('Active', 'Read', 'Paused', 'Abandoned')
+
+# Pragmas applied to every connection opened by DatabaseManager.
+# WAL lets readers proceed while a write is in progress and, combined with
+# synchronous=NORMAL, avoids an fsync on every commit. cache_size is in KiB
+# when negative; mmap_size is in bytes.
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'cache_size': -8000,
+    'mmap_size': 64 * 1024 * 1024,
+    'foreign_keys': 'ON',
+}
+
+
+def _to_int(value) -> Optional[int]:
+    """Convert Decimal, float or numeric strings to int; '' and junk become None."""
+    if value is None or value == '':
+        return None
+    try:
+        return int(value)
+    except (ValueError, TypeError):
+        return None
+
+
+def _require(record: Dict, fields: Tuple[str, ...], kind: str):
+    """Raise ValueError if an imported record lacks any of fields."""
+    missing = [field for field in fields if record.get(field) is None]
+    if missing:
+        raise ValueError(f"{kind} record without {', '.join(missing)}: {record!r}")
+
+
+def _batches(rows: Iterable, size: int):
+    """Split an iterable into lists of at most size items."""
+    iterator = iter(rows)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _fetch_batches(cursor: sqlite3.Cursor, size: int) -> Iterator[Tuple]:
+    """Yield a cursor's rows, fetching size rows at a time."""
+    while True:
+        rows = cursor.fetchmany(size)
+        if not rows:
+            return
+        yield from rows
+
+
+def date_bound(value) -> Optional[str]:
+    """Format a date, datetime or string for comparison with session_date."""
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    return value.isoformat()
+
+
+SESSIONS_QUERY = '''
+    SELECT rs.id, rs.book_id, rs.duration_seconds, rs.pages_read,
+           rs.notes, rs.session_date, b.title, b.author
+    FROM reading_sessions rs
+    JOIN books b ON rs.book_id = b.id
+'''
+
+
+# Bulk session imports larger than this drop the reading_sessions indexes
+# and rebuild them at the end, which is much faster than updating them row
+# by row in random order
+BULK_INDEX_THRESHOLD = 50000
+
+# Rows read or written per batch when streaming, exporting and importing
+DEFAULT_BATCH_SIZE = 500
 
 
 class DatabaseManager:
     """Manages SQLite database operations for the Booktrack application."""
     
-    def __init__(self, db_path: str = None):
+    def __init__(self, db_path: str = None, pragmas: Optional[Dict] = None,
+                 cache_size: int = DEFAULT_CACHE_SIZE,
+                 instrumentation: Optional[Instrumentation] = None):
         if db_path is None:
             # Store in app's private data directory
             app_dir = os.path.expanduser("~/.booktrack")
@@ -15,111 +107,314 @@ class DatabaseManager:
             db_path = os.path.join(app_dir, "booktrack.db")
         
         self.db_path = db_path
+        self.pragmas = dict(DEFAULT_PRAGMAS)
+        if pragmas:
+            self.pragmas.update(pragmas)
+        
+        # One long-lived connection per thread, opened on first use
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        
+        # Called with a ChangeEvent after every committed write
+        self._listeners: List[ChangeListener] = []
+        
+        # Results of the frequent reads, dropped by writes to their tables;
+        # cache_size=0 disables it
+        self.cache = QueryCache(cache_size)
+        
+        # Off by default; when on, the public methods are timed and every
+        # statement is traced
+        self.instrumentation = instrumentation or NULL_INSTRUMENTATION
+        self.instrumentation.instrument_database(self)
+        
         self.init_database()
     
+    def get_connection(self) -> sqlite3.Connection:
+        """Return the calling thread's connection, opening it if needed.
+        
+        The connection is reused for every call made from the same thread,
+        so callers must not close it; use transaction() to write.
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # check_same_thread is disabled only so close() can release
+            # connections owned by other threads; each connection is still
+            # used exclusively by the thread that opened it.
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            for name, value in self.pragmas.items():
+                conn.execute(f'PRAGMA {name} = {value}')
+            self.instrumentation.trace(conn)
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+    
+    def close(self):
+        """Close every connection opened by this manager."""
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+        # Threads that reconnect after close() get a fresh connection
+        self._local = threading.local()
+    
+    @contextmanager
+    def transaction(self):
+        """Run a block in one write transaction, joining an open one.
+        
+        Yields the calling thread's connection. Cache invalidation and
+        change events of the writes inside wait until the commit, and are
+        dropped if the block raises and the transaction rolls back.
+        """
+        conn = self.get_connection()
+        if conn.in_transaction:
+            yield conn
+            return
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn
+        except BaseException:
+            conn.rollback()
+            self._local.pending_events = []
+            self._local.pending_tables = set()
+            self.cache.wrote(conn, ())
+            raise
+        conn.commit()
+        tables = getattr(self._local, 'pending_tables', None)
+        if tables:
+            self._local.pending_tables = set()
+            self.cache.wrote(conn, tables)
+        self._flush_events()
+    
+    @contextmanager
+    def _snapshot(self):
+        """Run a block of reads on one snapshot, joining an open transaction.
+        
+        Writes committed by other connections meanwhile are not seen
+        until the block ends. Reads inside bypass the query cache.
+        """
+        conn = self.get_connection()
+        if conn.in_transaction:
+            yield conn
+            return
+        conn.execute('BEGIN')
+        try:
+            yield conn
+        finally:
+            # Nothing was written; this only ends the read
+            conn.rollback()
+    
+    def subscribe(self, listener: ChangeListener):
+        """Call listener(event) with a ChangeEvent after every committed write.
+        
+        Listeners run synchronously on the thread that made the change.
+        """
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+    
+    def unsubscribe(self, listener: ChangeListener):
+        """Stop sending change events to listener."""
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+    
+    def _changed(self, *tables: str):
+        """Drop cached reads of tables, once an open transaction commits."""
+        conn = self.get_connection()
+        if conn.in_transaction:
+            pending = getattr(self._local, 'pending_tables', None)
+            if pending is None:
+                pending = self._local.pending_tables = set()
+            pending.update(tables)
+            return
+        self.cache.wrote(conn, tables)
+    
+    def notify_bulk_change(self, *tables: str):
+        """Report writes made with SQL of the caller's own, such as in transaction().
+        
+        Cached reads of tables are dropped and listeners get one BULK event
+        per table, once an open transaction commits.
+        """
+        self._changed(*tables)
+        for table in tables:
+            self._emit(BULK, table)
+    
+    def cache_info(self) -> Dict[str, int]:
+        """Query cache hits, misses, size and maxsize."""
+        return self.cache.info()
+    
+    def _emit(self, action: str, table: str, row: Optional[Dict] = None):
+        """Send a change event, holding it back until an open transaction commits."""
+        event = ChangeEvent(action, table, row)
+        if self.get_connection().in_transaction:
+            pending = getattr(self._local, 'pending_events', None)
+            if pending is None:
+                pending = self._local.pending_events = []
+            pending.append(event)
+            return
+        for listener in list(self._listeners):
+            listener(event)
+    
+    def _flush_events(self):
+        """Send the events held back by a transaction that has committed."""
+        pending = getattr(self._local, 'pending_events', None)
+        if not pending:
+            return
+        self._local.pending_events = []
+        for event in pending:
+            for listener in list(self._listeners):
+                listener(event)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
     def init_database(self):
-        """Initialize the database with required tables."""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            
-            # Create books table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS books (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    title TEXT NOT NULL,
-                    author TEXT NOT NULL,
-                    total_pages INTEGER,
-                    cover_image_url TEXT,
-                    status TEXT DEFAULT 'Active',
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            
-            # Create reading_sessions table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS reading_sessions (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    book_id INTEGER NOT NULL,
-                    duration_seconds INTEGER NOT NULL,
-                    pages_read INTEGER,
-                    notes TEXT,
-                    session_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (book_id) REFERENCES books (id) ON DELETE CASCADE
-                )
-            ''')
-            
-            conn.commit()
+        """Initialize the database, applying any pending schema migrations."""
+        conn = self.get_connection()
+        migrate(conn)
+        # Migration 6 skips the search index without FTS5; a library
+        # migrated by such a build gets it once opened by one with FTS5
+        if not has_search_index(conn):
+            with self.transaction():
+                create_search_index(conn)
     
     def add_book(self, title: str, author: str, total_pages: Optional[int] = None, 
-                 cover_image_url: Optional[str] = None) -> int:
+                 cover_image_url: Optional[str] = None, status: str = 'Active') -> int:
         """Add a new book to the library."""
-        # Convert total_pages to int if it's a Decimal or other numeric type
-        if total_pages is not None:
-            try:
-                total_pages = int(total_pages) if total_pages != '' else None
-            except (ValueError, TypeError):
-                total_pages = None
+        total_pages = _to_int(total_pages)
         
-        with sqlite3.connect(self.db_path) as conn:
+        with self.transaction() as conn:
             cursor = conn.cursor()
             cursor.execute('''
-                INSERT INTO books (title, author, total_pages, cover_image_url)
-                VALUES (?, ?, ?, ?)
-            ''', (title, author, total_pages, cover_image_url))
-            conn.commit()
-            return cursor.lastrowid
+                INSERT INTO books (title, author, total_pages, cover_image_url, status)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (title, author, total_pages, cover_image_url, status))
+            book_id = cursor.lastrowid
+        
+        self._changed('books')
+        if self._listeners:
+            self._emit(INSERTED, 'books', self.get_book(book_id))
+        return book_id
     
-    def get_books(self, status: Optional[str] = None) -> List[Dict]:
-        """Get books from the library, optionally filtered by status."""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            if status:
-                cursor.execute('''
-                    SELECT id, title, author, total_pages, cover_image_url, status, created_at
-                    FROM books WHERE status = ?
-                    ORDER BY created_at DESC
-                ''', (status,))
-            else:
-                cursor.execute('''
-                    SELECT id, title, author, total_pages, cover_image_url, status, created_at
-                    FROM books
-                    ORDER BY created_at DESC
-                ''')
-            
-            books = []
-            for row in cursor.fetchall():
-                books.append({
-                    'id': row[0],
-                    'title': row[1],
-                    'author': row[2],
-                    'total_pages': row[3],
-                    'cover_image_url': row[4],
-                    'status': row[5],
-                    'created_at': row[6]
-                })
-            return books
-    
-    def get_book(self, book_id: int) -> Optional[Dict]:
-        """Get a specific book by ID."""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
+    @cached('books')
+    def get_books(self, status: Optional[str] = None) -> List[BookRow]:
+        """Get books from the library, optionally filtered by status.
+        
+        Books are returned as BookRow, a compact read-only mapping.
+        """
+        conn = self.get_connection()
+        return [BookRow(*row) for row in self._query_books(conn, status)]
+    
+    def iter_books(self, status: Optional[str] = None,
+                   batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[BookRow]:
+        """Yield books in get_books() order without loading the whole list.
+        
+        Rows are fetched from one cursor batch_size at a time, as the
+        generator is consumed.
+        """
+        cursor = self._query_books(self.get_connection(), status)
+        for row in _fetch_batches(cursor, batch_size):
+            yield BookRow(*row)
+    
+    def _query_books(self, conn: sqlite3.Connection, status: Optional[str]) -> sqlite3.Cursor:
+        """Run the get_books() query and return its cursor."""
+        if status:
+            return conn.execute('''
                 SELECT id, title, author, total_pages, cover_image_url, status, created_at
-                FROM books WHERE id = ?
-            ''', (book_id,))
-            
-            row = cursor.fetchone()
-            if row:
-                return {
-                    'id': row[0],
-                    'title': row[1],
-                    'author': row[2],
-                    'total_pages': row[3],
-                    'cover_image_url': row[4],
-                    'status': row[5],
-                    'created_at': row[6]
-                }
-            return None
+                FROM books WHERE status = ?
+                ORDER BY created_at DESC, id DESC
+            ''', (status,))
+        return conn.execute('''
+            SELECT id, title, author, total_pages, cover_image_url, status, created_at
+            FROM books
+            ORDER BY created_at DESC, id DESC
+        ''')
+    
+    @cached('books')
+    def get_books_page(self, status: Optional[str] = None, limit: int = 50,
+                       after: Optional[Tuple[str, int]] = None
+                       ) -> Tuple[List[BookRow], Optional[Tuple[str, int]]]:
+        """Get one page of books in get_books() order.
+        
+        Uses keyset pagination on (created_at, id): pass the returned cursor
+        as after to fetch the next page. The cursor is None on the last page.
+        Each page is an index range scan, however deep into the list it is.
+        """
+        conditions = []
+        params = []
+        if status:
+            conditions.append('status = ?')
+            params.append(status)
+        if after is not None:
+            conditions.append('(created_at, id) < (?, ?)')
+            params.extend(after)
+        where = f'WHERE {" AND ".join(conditions)}' if conditions else ''
+        params.append(limit)
+        
+        cursor = self.get_connection().execute(f'''
+            SELECT id, title, author, total_pages, cover_image_url, status, created_at
+            FROM books {where}
+            ORDER BY created_at DESC, id DESC
+            LIMIT ?
+        ''', params)
+        books = [BookRow(*row) for row in cursor]
+        
+        next_cursor = None
+        if len(books) == limit:
+            next_cursor = (books[-1]['created_at'], books[-1]['id'])
+        return books, next_cursor
+    
+    @cached('books')
+    def get_book_list(self, status: Optional[str] = None, limit: int = 50,
+                      after: Optional[Tuple[str, int]] = None
+                      ) -> Tuple[int, List[BookRow], Optional[Tuple[str, int]]]:
+        """Get a book list's total and one page of it: (total, page, cursor).
+        
+        One call instead of count_books() and get_books_page(), so a view
+        is filled after a single round trip to the database worker. Both
+        are read from one snapshot, so the total matches the page even if
+        another connection writes in between.
+        """
+        with self._snapshot():
+            total = self.count_books(status=status)
+            if not total:
+                return 0, [], None
+            books, cursor = self.get_books_page(status, limit, after)
+        return total, books, cursor
+    
+    @cached('books')
+    def count_books(self, status: Optional[str] = None) -> int:
+        """Count books, optionally by status, from the statistics rollup."""
+        conn = self.get_connection()
+        if status:
+            row = conn.execute(
+                'SELECT book_count FROM status_rollup WHERE status = ?', (status,)
+            ).fetchone()
+            return row[0] if row else 0
+        return conn.execute(
+            'SELECT COALESCE(SUM(book_count), 0) FROM status_rollup'
+        ).fetchone()[0]
+    
+    @cached('books')
+    def get_book(self, book_id: int) -> Optional[BookRow]:
+        """Get a specific book by ID."""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT id, title, author, total_pages, cover_image_url, status, created_at
+            FROM books WHERE id = ?
+        ''', (book_id,))
+        
+        row = cursor.fetchone()
+        if row:
+            return BookRow(*row)
+        return None
     
     def update_book(self, book_id: int, title: str = None, author: str = None,
                     total_pages: int = None, cover_image_url: str = None,
@@ -136,12 +431,7 @@ class DatabaseManager:
             params.append(author)
         if total_pages is not None:
             updates.append("total_pages = ?")
-            # Convert total_pages to int if it's a Decimal or other numeric type
-            try:
-                total_pages = int(total_pages) if total_pages != '' else None
-            except (ValueError, TypeError):
-                total_pages = None
-            params.append(total_pages)
+            params.append(_to_int(total_pages))
         if cover_image_url is not None:
             updates.append("cover_image_url = ?")
             params.append(cover_image_url)
@@ -154,127 +444,483 @@ class DatabaseManager:
         
         params.append(book_id)
         
-        with sqlite3.connect(self.db_path) as conn:
+        with self.transaction() as conn:
             cursor = conn.cursor()
             cursor.execute(f'''
                 UPDATE books SET {", ".join(updates)}
                 WHERE id = ?
             ''', params)
-            conn.commit()
-            return cursor.rowcount > 0
+            updated = cursor.rowcount > 0
+        
+        if updated:
+            self._changed('books')
+        if updated and self._listeners:
+            self._emit(UPDATED, 'books', self.get_book(book_id))
+        return updated
     
     def delete_book(self, book_id: int) -> bool:
         """Delete a book and all associated reading sessions."""
-        with sqlite3.connect(self.db_path) as conn:
+        book = self.get_book(book_id) if self._listeners else None
+        with self.transaction() as conn:
             cursor = conn.cursor()
-            # Delete associated reading sessions first
-            cursor.execute('DELETE FROM reading_sessions WHERE book_id = ?', (book_id,))
-            # Delete the book
+            # Delete the book first, so sync records one tombstone for it
+            # rather than one per session
             cursor.execute('DELETE FROM books WHERE id = ?', (book_id,))
-            conn.commit()
-            return cursor.rowcount > 0
+            deleted = cursor.rowcount > 0
+            # Then its reading sessions, if foreign keys did not cascade
+            cursor.execute('DELETE FROM reading_sessions WHERE book_id = ?', (book_id,))
+            cursor.execute('DELETE FROM active_sessions WHERE book_id = ?', (book_id,))
+        
+        if deleted:
+            self._changed('books', 'reading_sessions')
+        if deleted and book is not None:
+            self._emit(DELETED, 'books', book)
+        return deleted
     
     def add_reading_session(self, book_id: int, duration_seconds: int,
                            pages_read: Optional[int] = None,
                            notes: Optional[str] = None) -> int:
         """Add a new reading session."""
-        # Convert pages_read to int if it's a Decimal or other numeric type
-        if pages_read is not None:
-            try:
-                pages_read = int(pages_read) if pages_read != '' else None
-            except (ValueError, TypeError):
-                pages_read = None
-        
-        with sqlite3.connect(self.db_path) as conn:
+        with self.transaction() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 INSERT INTO reading_sessions (book_id, duration_seconds, pages_read, notes)
                 VALUES (?, ?, ?, ?)
-            ''', (book_id, duration_seconds, pages_read, notes))
-            conn.commit()
-            return cursor.lastrowid
+            ''', (book_id, _to_int(duration_seconds), _to_int(pages_read), notes))
+            session_id = cursor.lastrowid
+        
+        self._changed('reading_sessions')
+        if self._listeners:
+            row = self.get_connection().execute(
+                SESSIONS_QUERY + 'WHERE rs.id = ?', (session_id,)
+            ).fetchone()
+            self._emit(INSERTED, 'reading_sessions', SessionRow(*row))
+        return session_id
     
-    def get_reading_sessions(self, book_id: Optional[int] = None) -> List[Dict]:
-        """Get reading sessions, optionally filtered by book."""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            if book_id:
-                cursor.execute('''
-                    SELECT rs.id, rs.book_id, rs.duration_seconds, rs.pages_read,
-                           rs.notes, rs.session_date, b.title, b.author
-                    FROM reading_sessions rs
-                    JOIN books b ON rs.book_id = b.id
-                    WHERE rs.book_id = ?
-                    ORDER BY rs.session_date DESC
-                ''', (book_id,))
-            else:
-                cursor.execute('''
-                    SELECT rs.id, rs.book_id, rs.duration_seconds, rs.pages_read,
-                           rs.notes, rs.session_date, b.title, b.author
-                    FROM reading_sessions rs
-                    JOIN books b ON rs.book_id = b.id
-                    ORDER BY rs.session_date DESC
-                ''')
+    def checkpoint_session(self, book_id: int, elapsed_seconds: float, is_running: bool):
+        """Record the timer state of a reading session still in progress.
+        
+        Each book has at most one active session, overwritten in place by
+        every checkpoint: a single-row UPSERT, which in WAL mode commits
+        without waiting for an fsync.
+        """
+        self.checkpoint_sessions([(book_id, elapsed_seconds, is_running)])
+    
+    def checkpoint_sessions(self, checkpoints: Iterable[Tuple[int, float, bool]]):
+        """Record several (book_id, elapsed_seconds, is_running) checkpoints in one commit."""
+        with self.transaction() as conn:
+            conn.executemany('''
+                INSERT INTO active_sessions (book_id, elapsed_seconds, is_running)
+                VALUES (?, ?, ?)
+                ON CONFLICT (book_id) DO UPDATE SET
+                    elapsed_seconds = excluded.elapsed_seconds,
+                    is_running = excluded.is_running,
+                    checkpointed_at = CURRENT_TIMESTAMP
+            ''', ((book_id, elapsed, int(running)) for book_id, elapsed, running in checkpoints))
+        self._changed('active_sessions')
+    
+    def get_active_sessions(self) -> List[Dict]:
+        """Get the checkpointed sessions that were never saved or cancelled.
+        
+        Most recently checkpointed first, with the book's title and author.
+        """
+        cursor = self.get_connection().execute('''
+            SELECT a.book_id, a.elapsed_seconds, a.is_running, a.checkpointed_at,
+                   b.title, b.author
+            FROM active_sessions a
+            JOIN books b ON a.book_id = b.id
+            ORDER BY a.checkpointed_at DESC, a.book_id
+        ''')
+        return [
+            {
+                'book_id': row[0],
+                'elapsed_seconds': row[1],
+                'is_running': bool(row[2]),
+                'checkpointed_at': row[3],
+                'book_title': row[4],
+                'book_author': row[5]
+            }
+            for row in cursor
+        ]
+    
+    def clear_active_session(self, book_id: int) -> bool:
+        """Remove a session's checkpoint once it is saved or cancelled."""
+        with self.transaction() as conn:
+            deleted = conn.execute(
+                'DELETE FROM active_sessions WHERE book_id = ?', (book_id,)
+            ).rowcount > 0
+        self._changed('active_sessions')
+        return deleted
+    
+    def save_sessions(self, sessions: Iterable[Dict]) -> List[int]:
+        """Save finished timed sessions and clear their checkpoints in one transaction.
+        
+        Each session is a dict with book_id and duration_seconds, and
+        optionally pages_read and notes. Either every session is saved and
+        its checkpoint removed, or nothing is. Returns the new session ids.
+        """
+        session_ids = []
+        with self.transaction() as conn:
+            for session in sessions:
+                cursor = conn.execute('''
+                    INSERT INTO reading_sessions (book_id, duration_seconds, pages_read, notes)
+                    VALUES (?, ?, ?, ?)
+                ''', (session['book_id'], _to_int(session['duration_seconds']),
+                      _to_int(session.get('pages_read')), session.get('notes')))
+                session_ids.append(cursor.lastrowid)
+                conn.execute('DELETE FROM active_sessions WHERE book_id = ?',
+                             (session['book_id'],))
             
-            sessions = []
-            for row in cursor.fetchall():
-                sessions.append({
-                    'id': row[0],
-                    'book_id': row[1],
-                    'duration_seconds': row[2],
-                    'pages_read': row[3],
-                    'notes': row[4],
-                    'session_date': row[5],
-                    'book_title': row[6],
-                    'book_author': row[7]
-                })
-            return sessions
-    
-    def get_statistics(self) -> Dict:
-        """Get reading statistics."""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
+            if session_ids:
+                self._changed('reading_sessions', 'active_sessions')
+            if session_ids and self._listeners:
+                # Inserted under the write lock, so the ids form one range
+                for row in conn.execute(
+                    SESSIONS_QUERY + 'WHERE rs.id BETWEEN ? AND ? ORDER BY rs.id',
+                    (session_ids[0], session_ids[-1])
+                ):
+                    self._emit(INSERTED, 'reading_sessions', SessionRow(*row))
+        return session_ids
+    
+    def get_reading_sessions(self, book_id: Optional[int] = None, columnar: bool = False
+                             ) -> Union[List[SessionRow], SessionColumns]:
+        """Get reading sessions, optionally filtered by book.
+        
+        Sessions are returned as SessionRow, a compact read-only mapping,
+        with each book's title and author shared between its sessions.
+        With columnar=True a SessionColumns is returned instead, which
+        keeps the numeric columns in arrays; prefer it for whole-history
+        reads.
+        """
+        conn = self.get_connection()
+        cursor = self._query_sessions(conn, book_id or None)
+        if columnar:
+            return SessionColumns(cursor)
+        return list(session_rows(cursor))
+    
+    def iter_reading_sessions(self, book_id: Optional[int] = None,
+                              since: Union[date, str, None] = None,
+                              until: Union[date, str, None] = None,
+                              batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[SessionRow]:
+        """Yield reading sessions newest first without loading them all.
+        
+        since and until (dates, datetimes or 'YYYY-MM-DD[ HH:MM:SS]'
+        strings) limit session_date to since <= session_date < until. The
+        filters run in SQL on the session indexes, and rows are fetched
+        batch_size at a time as the generator is consumed.
+        """
+        cursor = self._query_sessions(self.get_connection(), book_id, since, until)
+        yield from session_rows(_fetch_batches(cursor, batch_size))
+    
+    @cached('books', 'reading_sessions')
+    def get_sessions_page(self, book_id: Optional[int] = None, limit: int = 50,
+                          after: Optional[Tuple[str, int]] = None,
+                          since: Union[date, str, None] = None,
+                          until: Union[date, str, None] = None
+                          ) -> Tuple[List[SessionRow], Optional[Tuple[str, int]]]:
+        """Get one page of reading sessions, newest first.
+        
+        Keyset pagination on (session_date, id) like get_books_page(): pass
+        the returned cursor as after to fetch the next page; it is None on
+        the last page. book_id, since and until filter as in
+        iter_reading_sessions().
+        """
+        conditions = []
+        params = []
+        if book_id is not None:
+            conditions.append('rs.book_id = ?')
+            params.append(book_id)
+        if since is not None:
+            conditions.append('rs.session_date >= ?')
+            params.append(date_bound(since))
+        if until is not None:
+            conditions.append('rs.session_date < ?')
+            params.append(date_bound(until))
+        if after is not None:
+            conditions.append('(rs.session_date, rs.id) < (?, ?)')
+            params.extend(after)
+        where = f'WHERE {" AND ".join(conditions)}' if conditions else ''
+        params.append(limit)
+        
+        conn = self.get_connection()
+        sessions = list(session_rows(conn.execute(f'''{SESSIONS_QUERY}
+            {where}
+            ORDER BY rs.session_date DESC, rs.id DESC
+            LIMIT ?
+        ''', params)))
+        
+        next_cursor = None
+        if len(sessions) == limit:
+            next_cursor = (sessions[-1]['session_date'], sessions[-1]['id'])
+        return sessions, next_cursor
+    
+    def _query_sessions(self, conn: sqlite3.Connection, book_id: Optional[int] = None,
+                        since=None, until=None) -> sqlite3.Cursor:
+        """Run the session query with the given filters and return its cursor."""
+        conditions = []
+        params = []
+        if book_id is not None:
+            conditions.append('rs.book_id = ?')
+            params.append(book_id)
+        if since is not None:
+            conditions.append('rs.session_date >= ?')
+            params.append(date_bound(since))
+        if until is not None:
+            conditions.append('rs.session_date < ?')
+            params.append(date_bound(until))
+        where = f'WHERE {" AND ".join(conditions)}' if conditions else ''
+        return conn.execute(f'''{SESSIONS_QUERY}
+            {where}
+            ORDER BY rs.session_date DESC
+        ''', params)
+    
+    def get_statistics(self, days: int = 30) -> Dict:
+        """Get reading statistics.
+        
+        Metrics are read from the rollup tables, so the cost depends on the
+        number of reading days and books, not sessions; see booktrack.stats
+        for the available keys.
+        """
+        # The daily window moves at midnight UTC, so the day is part of the
+        # cache key
+        return self._get_statistics(days, datetime.now(timezone.utc).date())
+    
+    @cached('books', 'reading_sessions')
+    def _get_statistics(self, days: int, day: date) -> Dict:
+        return compute_statistics(self.get_connection(), days)
+    
+    def search(self, query: str, limit: int = 20) -> List[Dict]:
+        """Full-text search over book titles, authors and session notes.
+        
+        query is plain typed text; the last word matches as a prefix.
+        Results are ranked with bm25, best first; see booktrack.search for
+        their keys.
+        """
+        return search(self.get_connection(), query, limit)
+    
+    def rebuild_rollups(self):
+        """Recompute the statistics rollup tables from the raw data."""
+        rebuild_rollups(self.get_connection())
+        self._changed('books', 'reading_sessions')
+    
+    def verify_rollups(self) -> List[str]:
+        """Check the statistics rollups; returns a list of mismatches."""
+        return verify_rollups(self.get_connection())
+    
+    def vacuum(self) -> Dict[str, int]:
+        """Compact the database file and refresh the query planner's statistics.
+        
+        Merges the search index's segments, rebuilds the file without its
+        free pages, truncates the WAL and runs PRAGMA optimize. Returns the
+        database size in bytes before and after.
+        """
+        conn = self.get_connection()
+        
+        def size():
+            page_size = conn.execute('PRAGMA page_size').fetchone()[0]
+            return page_size * conn.execute('PRAGMA page_count').fetchone()[0]
+        
+        size_before = size()
+        if has_search_index(conn):
+            with conn:
+                conn.execute("INSERT INTO search_index (search_index) VALUES ('optimize')")
+        conn.execute('VACUUM')
+        conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        conn.execute('PRAGMA optimize')
+        return {'size_before': size_before, 'size_after': size()}
+    
+    def export_to_file(self, fp, fmt: str = 'json', batch_size: int = DEFAULT_BATCH_SIZE,
+                       progress=None) -> Dict[str, int]:
+        """Stream all data to an open text file as JSON or JSON Lines.
+        
+        Unlike export_data(), rows are written as they are read, so memory
+        use does not grow with the size of the library. progress, if given,
+        is called as progress(done, total) after each batch of rows.
+        """
+        from .export import write_export
+        return write_export(self, fp, fmt, batch_size, progress)
+    
+    def import_books(self, books: Iterable[Dict],
+                     batch_size: int = DEFAULT_BATCH_SIZE) -> Dict:
+        """Insert or update many books in one transaction.
+        
+        Books are matched on (title, author): existing books get their
+        total_pages, cover_image_url and status updated where the input
+        provides them, new ones are inserted. books may be any iterable of
+        dicts, such as the 'books' list of an export.
+        
+        Returns a mapping from each input book's 'id' (when present) to the
+        id of the matching book in this database, for remapping sessions.
+        A record without a title or author raises ValueError.
+        """
+        id_map = {}
+        with self.transaction() as conn:
+            known = {
+                (title, author): book_id
+                for book_id, title, author in conn.execute('SELECT id, title, author FROM books')
+            }
+            last_id = conn.execute('SELECT COALESCE(MAX(id), 0) FROM books').fetchone()[0]
+            # Input ids of books inserted in this call, keyed by (title, author)
+            inserted = {}
+            changed = 0
+            
+            for batch in _batches(books, batch_size):
+                new_rows = []
+                updates = []
+                for book in batch:
+                    _require(book, ('title', 'author'), 'book')
+                    key = (book['title'], book['author'])
+                    values = (
+                        _to_int(book.get('total_pages')),
+                        book.get('cover_image_url'),
+                        book.get('status'),
+                    )
+                    if key in known:
+                        updates.append(values + (known[key],))
+                        if book.get('id') is not None:
+                            id_map[book['id']] = known[key]
+                    elif key in inserted:
+                        inserted[key].append(book.get('id'))
+                    else:
+                        inserted[key] = [book.get('id')]
+                        new_rows.append(key + values + (book.get('created_at'),))
+                
+                conn.executemany('''
+                    INSERT INTO books (title, author, total_pages, cover_image_url,
+                                       status, created_at)
+                    VALUES (?, ?, ?, ?, COALESCE(?, 'Active'), COALESCE(?, CURRENT_TIMESTAMP))
+                ''', new_rows)
+                conn.executemany('''
+                    UPDATE books SET
+                        total_pages = COALESCE(?, total_pages),
+                        cover_image_url = COALESCE(?, cover_image_url),
+                        status = COALESCE(?, status)
+                    WHERE id = ?
+                ''', updates)
+                changed += len(new_rows) + len(updates)
             
-            # Total reading time
-            cursor.execute('SELECT SUM(duration_seconds) FROM reading_sessions')
-            total_seconds = cursor.fetchone()[0] or 0
+            # The write lock is held, so every id above last_id is ours
+            for book_id, title, author in conn.execute(
+                'SELECT id, title, author FROM books WHERE id > ?', (last_id,)
+            ):
+                for source_id in inserted.get((title, author), ()):
+                    if source_id is not None:
+                        id_map[source_id] = book_id
             
-            # Total sessions
-            cursor.execute('SELECT COUNT(*) FROM reading_sessions')
-            total_sessions = cursor.fetchone()[0]
+            if changed:
+                self._changed('books')
+                self._emit(BULK, 'books')
+        return id_map
+    
+    def import_sessions(self, sessions: Iterable[Dict], book_ids: Optional[Dict] = None,
+                        batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+        """Insert many reading sessions in one transaction.
+        
+        Each session's book_id is translated through book_ids when given
+        (see import_books); sessions from an export whose book is not in
+        the mapping are matched on book_title/book_author instead. Sessions
+        whose book cannot be found are skipped. Returns the number inserted;
+        a record without a duration raises ValueError.
+        
+        Statistics rollups are updated once for the whole import, and very
+        large imports rebuild the session indexes once at the end, instead
+        of both being updated for every row.
+        """
+        inserted = 0
+        dropped_indexes = []
+        with self.transaction() as conn, deferred_session_rollups(conn):
+            by_key = None
+            known_ids = None
             
-            # Total books
-            cursor.execute('SELECT COUNT(*) FROM books')
-            total_books = cursor.fetchone()[0]
+            def resolve(session):
+                nonlocal by_key, known_ids
+                if book_ids is not None and session.get('book_id') in book_ids:
+                    return book_ids[session['book_id']]
+                if 'book_title' in session:
+                    if by_key is None:
+                        by_key = {
+                            (title, author): book_id for book_id, title, author
+                            in conn.execute('SELECT id, title, author FROM books')
+                        }
+                    return by_key.get((session['book_title'], session.get('book_author')))
+                # An id from another database may not be a book here
+                if known_ids is None:
+                    known_ids = {book_id for book_id, in conn.execute('SELECT id FROM books')}
+                book_id = _to_int(session.get('book_id'))
+                return book_id if book_id in known_ids else None
             
-            # Books by status
-            cursor.execute('''
-                SELECT status, COUNT(*) FROM books GROUP BY status
-            ''')
-            books_by_status = dict(cursor.fetchall())
+            for batch in _batches(sessions, batch_size):
+                rows = []
+                for session in batch:
+                    duration = _to_int(session.get('duration_seconds'))
+                    if duration is None:
+                        raise ValueError(f'reading_session record without duration_seconds: '
+                                         f'{session!r}')
+                    book_id = resolve(session)
+                    if book_id is None:
+                        continue
+                    rows.append((
+                        book_id,
+                        duration,
+                        _to_int(session.get('pages_read')),
+                        session.get('notes'),
+                        session.get('session_date'),
+                    ))
+                conn.executemany('''
+                    INSERT INTO reading_sessions
+                        (book_id, duration_seconds, pages_read, notes, session_date)
+                    VALUES (?, ?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP))
+                ''', rows)
+                inserted += len(rows)
+                
+                if inserted >= BULK_INDEX_THRESHOLD and not dropped_indexes:
+                    dropped_indexes = conn.execute('''
+                        SELECT name, sql FROM sqlite_master
+                        WHERE type = 'index' AND tbl_name = 'reading_sessions'
+                              AND sql IS NOT NULL
+                    ''').fetchall()
+                    for name, _ in dropped_indexes:
+                        conn.execute(f'DROP INDEX {name}')
             
-            # Reading time by day (last 30 days)
-            cursor.execute('''
-                SELECT DATE(session_date) as date, SUM(duration_seconds) as total_seconds
-                FROM reading_sessions
-                WHERE session_date >= datetime('now', '-30 days')
-                GROUP BY DATE(session_date)
-                ORDER BY date DESC
-            ''')
-            daily_stats = cursor.fetchall()
+            # Still inside the transaction, so a failure restores them too
+            for _, sql in dropped_indexes:
+                conn.execute(sql)
             
-            return {
-                'total_reading_time_seconds': total_seconds,
-                'total_sessions': total_sessions,
-                'total_books': total_books,
-                'books_by_status': books_by_status,
-                'daily_stats': daily_stats
-            }
+            if inserted:
+                self._changed('reading_sessions')
+                self._emit(BULK, 'reading_sessions')
+        return inserted
+    
+    def import_file(self, fp, batch_size: int = DEFAULT_BATCH_SIZE) -> Dict[str, int]:
+        """Import a JSON or JSON Lines export in a single transaction.
+        
+        JSON Lines files are streamed; returns the number of books and
+        sessions read from the file and imported.
+        """
+        from .export import iter_export_records
+        records = iter_export_records(fp)
+        books = []
+        first_session = []
+        for record_type, record in records:
+            if record_type == 'book':
+                books.append(record)
+            else:
+                first_session.append(record)
+                break
+        sessions = chain(first_session, (
+            record for record_type, record in records
+            if record_type == 'reading_session'
+        ))
+        
+        with self.transaction():
+            book_ids = self.import_books(books, batch_size)
+            session_count = self.import_sessions(sessions, book_ids, batch_size)
+        return {'books': len(books), 'reading_sessions': session_count}
     
     def export_data(self) -> Dict:
         """Export all data as JSON-serializable dictionary."""
-        books = self.get_books()
-        sessions = self.get_reading_sessions()
+        books = [dict(book) for book in self.iter_books()]
+        sessions = [dict(session) for session in self.iter_reading_sessions()]
         stats = self.get_statistics()
         
         return {
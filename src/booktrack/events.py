@@ -0,0 +1,31 @@
+"""
+Change events emitted by DatabaseManager.
+
+Every committed write is reported to subscribers as a ``ChangeEvent`` so
+views can patch themselves (insert, remove or update one row) instead of
+re-querying and rebuilding everything after each mutation.
+"""
+
+from typing import Callable, Dict, NamedTuple, Optional
+
+# Event actions
+INSERTED = 'inserted'
+UPDATED = 'updated'
+DELETED = 'deleted'
+# Many rows of a table changed at once, e.g. an import; row is None
+BULK = 'bulk'
+
+
+class ChangeEvent(NamedTuple):
+    """One committed change to a table.
+
+    row is the book or reading session as returned by the matching read
+    method: the new row for inserts and updates, the removed row for
+    deletes, and None for bulk changes.
+    """
+    action: str
+    table: str
+    row: Optional[Dict] = None
+
+
+ChangeListener = Callable[[ChangeEvent], None]
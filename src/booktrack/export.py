@@ -0,0 +1,133 @@
+"""
+Streaming export of the Booktrack library.
+
+Rows are streamed from ``DatabaseManager.iter_books`` and
+``iter_reading_sessions`` and written as soon as they arrive, so memory
+use stays flat however long the reading history is. Two formats are
+supported:
+
+* ``json``  - the same document ``DatabaseManager.export_data`` returns
+* ``jsonl`` - one JSON object per line, tagged with a ``type`` field
+
+``iter_export_records`` reads either format back for importing.
+"""
+
+import json
+from datetime import datetime
+from itertools import chain
+from typing import Callable, Dict, Iterator, Optional, TextIO, Tuple
+
+from .database import DEFAULT_BATCH_SIZE
+
+EXPORT_FORMATS = ('json', 'jsonl')
+
+# progress(done, total) is called after every batch
+ProgressCallback = Callable[[int, int], None]
+
+
+def _dumps(value) -> str:
+    return json.dumps(value, ensure_ascii=False)
+
+
+def write_export(db_manager, fp: TextIO, fmt: str = 'json',
+                 batch_size: int = DEFAULT_BATCH_SIZE,
+                 progress: Optional[ProgressCallback] = None) -> Dict[str, int]:
+    """Stream the whole library to fp; returns the number of rows written.
+
+    Everything is read inside one transaction, so the books, sessions and
+    statistics written come from a single consistent snapshot.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format '{fmt}', expected one of {EXPORT_FORMATS}")
+
+    conn = db_manager.get_connection()
+    owns_transaction = not conn.in_transaction
+    if owns_transaction:
+        conn.execute('BEGIN')
+    try:
+        # The rollups make these counts cheap, which gives progress a total
+        stats = db_manager.get_statistics()
+        total = stats['total_books'] + stats['total_sessions']
+        counts = {'books': 0, 'reading_sessions': 0}
+        done = 0
+
+        def report(section: str, rows_in_batch: int):
+            nonlocal done
+            counts[section] += rows_in_batch
+            done += rows_in_batch
+            if progress:
+                progress(done, total)
+
+        export_date = datetime.now().isoformat()
+        if fmt == 'json':
+            fp.write('{\n')
+            fp.write(f'  "export_date": {_dumps(export_date)},\n')
+        else:
+            fp.write(_dumps({'type': 'export', 'export_date': export_date}) + '\n')
+
+        sections = (
+            ('books', 'book', db_manager.iter_books(batch_size=batch_size)),
+            ('reading_sessions', 'reading_session',
+             db_manager.iter_reading_sessions(batch_size=batch_size)),
+        )
+        for section, record_type, rows in sections:
+            if fmt == 'json':
+                fp.write(f'  "{section}": [')
+            separator = '\n'
+            pending = 0
+            for row in rows:
+                if fmt == 'json':
+                    fp.write(separator + '    ' + _dumps(dict(row)))
+                    separator = ',\n'
+                else:
+                    fp.write(_dumps(dict(row, type=record_type)) + '\n')
+                pending += 1
+                if pending == batch_size:
+                    report(section, pending)
+                    pending = 0
+            report(section, pending)
+            if fmt == 'json':
+                fp.write('\n  ],\n' if separator != '\n' else '],\n')
+
+        if fmt == 'json':
+            fp.write(f'  "statistics": {_dumps(stats)}\n')
+            fp.write('}\n')
+        else:
+            fp.write(_dumps({'type': 'statistics', **stats}) + '\n')
+    finally:
+        if owns_transaction:
+            conn.rollback()
+
+    return counts
+
+
+def iter_export_records(fp: TextIO) -> Iterator[Tuple[str, Dict]]:
+    """Yield (type, record) pairs from a JSON or JSON Lines export.
+
+    Types are 'book' and 'reading_session'; books always come first. JSON
+    Lines files are read one line at a time; a JSON document has to be
+    parsed as a whole.
+    """
+    first_line = fp.readline()
+    try:
+        header = json.loads(first_line)
+    except ValueError:
+        header = None
+
+    if isinstance(header, dict) and 'type' in header:
+        # The header line is usually the export's own, but hand-written or
+        # filtered files may start straight with a record
+        records = chain([header], (json.loads(line) for line in fp if line.strip()))
+        for record in records:
+            if not isinstance(record, dict):
+                raise ValueError(f'expected a JSON object per line, got {record!r}')
+            record_type = record.pop('type', None)
+            if record_type in ('book', 'reading_session'):
+                yield record_type, record
+        return
+
+    document = json.loads(first_line + fp.read())
+    for book in document.get('books', []):
+        yield 'book', book
+    for session in document.get('reading_sessions', []):
+        yield 'reading_session', session
@@ -0,0 +1,321 @@
+"""
+Opt-in instrumentation of database calls, SQL and view rendering.
+
+``Instrumentation`` keeps a latency histogram per name: one per
+DatabaseManager method (``db.get_books``), per view (``view.book_list``)
+and per startup stage. Every SQL statement run by an instrumented
+DatabaseManager is counted too, through ``sqlite3`` trace callbacks, with
+literals replaced by ``?`` so that one query shape is one entry, along
+with the method that ran it. Results can be dumped as JSON.
+
+Instrumentation is off unless asked for: the default ``NULL_INSTRUMENTATION``
+records nothing, and a DatabaseManager given no instrumentation has its
+methods neither wrapped nor traced, so the off state costs nothing on the
+hot paths. Set the ``BOOKTRACK_INSTRUMENT`` environment variable to turn
+it on in the app (see ``from_environment``).
+"""
+
+import functools
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+# Environment variable that turns instrumentation on: '1', or the path of
+# a file to dump the results to when the app exits
+ENVIRONMENT_VARIABLE = 'BOOKTRACK_INSTRUMENT'
+
+# DatabaseManager methods that are not timed: connection and transaction
+# plumbing whose statements are counted for the caller, and calls that run
+# no SQL
+UNINSTRUMENTED = {'get_connection', 'transaction', 'close', 'subscribe', 'unsubscribe',
+                  'notify_bulk_change', 'cache_info'}
+
+# Error messages kept for the diagnostics view
+MAX_ERRORS = 50
+
+# Normalized statements remembered, by their exact text
+MAX_NORMALIZED = 1024
+
+_LITERALS = re.compile(r"'[^']*(?:''[^']*)*'|(?<![\w.])\d+(?:\.\d+)?\b|(?<!IS )(?<!NOT )NULL\b")
+_PLACEHOLDER_LISTS = re.compile(r'\?(?:, \?)+')
+# Statements that can fire triggers, which SQLite reports again
+_TRIGGERING = re.compile(r'\s*(?:INSERT|UPDATE|DELETE|REPLACE)\b', re.IGNORECASE)
+
+
+def normalize_sql(statement: str) -> str:
+    """Statement with whitespace squeezed, literals as ? and lists of ? collapsed."""
+    # Squeezed first, which is cheap and shortens the text to scan
+    statement = _LITERALS.sub('?', ' '.join(statement.split()))
+    return _PLACEHOLDER_LISTS.sub('?, ...', statement)
+
+
+class Histogram:
+    """Latency histogram with power-of-two microsecond buckets.
+
+    Bucket i counts durations of under 2**i microseconds (and at least
+    2**(i-1)), so percentiles are accurate to within a factor of two.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+        self.rows = 0
+        self.buckets: Dict[int, int] = {}
+
+    def add(self, seconds: float, rows: Optional[int] = None):
+        self.count += 1
+        self.total += seconds
+        if self.min is None or seconds < self.min:
+            self.min = seconds
+        if self.max is None or seconds > self.max:
+            self.max = seconds
+        if rows:
+            self.rows += rows
+        bucket = int(seconds * 1_000_000).bit_length()
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+
+    def percentile(self, p: float) -> float:
+        """Upper bound in seconds of the bucket holding the p-th percentile."""
+        if not self.count:
+            return 0.0
+        rank = p / 100 * self.count
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                return min(2 ** bucket / 1_000_000, self.max)
+        return self.max
+
+    def snapshot(self) -> Dict:
+        """JSON-serializable summary, in milliseconds."""
+        return {
+            'count': self.count,
+            'total_ms': self.total * 1000,
+            'min_ms': (self.min or 0) * 1000,
+            'p50_ms': self.percentile(50) * 1000,
+            'p95_ms': self.percentile(95) * 1000,
+            'p99_ms': self.percentile(99) * 1000,
+            'max_ms': (self.max or 0) * 1000,
+            'rows': self.rows,
+            'buckets_us': {f'<{2 ** bucket}': count
+                           for bucket, count in sorted(self.buckets.items())},
+        }
+
+
+class Instrumentation:
+    """Latency histograms, SQL statement counts and recent errors.
+
+    Safe to use from the UI and database worker threads at once.
+    """
+
+    enabled = True
+
+    def __init__(self, dump_path: Optional[str] = None):
+        # Where dump() writes by default, e.g. when the app exits
+        self.dump_path = dump_path
+        self.histograms: Dict[str, Histogram] = {}
+        # normalized SQL -> {'count', 'repeats', 'methods': {method name: count}}
+        self.queries: Dict[str, Dict] = {}
+        self.errors = deque(maxlen=MAX_ERRORS)
+        # Statement text -> normalize_sql(text), for statements that repeat
+        self._normalized: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        # The instrumented methods running on each thread, innermost last
+        self._local = threading.local()
+
+    @classmethod
+    def from_environment(cls, environ=os.environ):
+        """Instrumentation as set by BOOKTRACK_INSTRUMENT, off by default.
+
+        '1' (or any true-ish value) turns it on; any other value is taken
+        as the file to dump the results to.
+        """
+        value = environ.get(ENVIRONMENT_VARIABLE, '').strip()
+        if value.lower() in ('', '0', 'false', 'no', 'off'):
+            return NULL_INSTRUMENTATION
+        if value.lower() in ('1', 'true', 'yes', 'on'):
+            return cls()
+        return cls(dump_path=value)
+
+    def record(self, name: str, seconds: float, rows: Optional[int] = None):
+        """Add one duration to name's histogram."""
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.add(seconds, rows)
+
+    @contextmanager
+    def timer(self, name: str):
+        """Time the with block into name's histogram."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def error(self, message: str):
+        """Keep an error message for the diagnostics view and dumps."""
+        with self._lock:
+            self.errors.append({'time': time.time(), 'message': message})
+
+    def instrument_database(self, db_manager):
+        """Time db_manager's public methods and trace the SQL it runs.
+
+        The methods are wrapped on the instance, as db.<method>, and its
+        connections get a trace callback as they are opened.
+        """
+        # inspect is slow to import and only needed when instrumentation is on
+        import inspect
+        for name, method in inspect.getmembers(type(db_manager), inspect.isfunction):
+            if name.startswith('_') or name in UNINSTRUMENTED:
+                continue
+            bound = getattr(db_manager, name)
+            if inspect.isgeneratorfunction(method):
+                wrapper = self._wrap_generator(f'db.{name}', bound)
+            else:
+                wrapper = self._wrap(f'db.{name}', bound)
+            setattr(db_manager, name, wrapper)
+
+    def trace(self, conn: sqlite3.Connection):
+        """Count every statement conn runs.
+
+        SQLite reports an INSERT, UPDATE or DELETE again for every
+        trigger it fires, with the same text, so one that repeats the
+        statement just before it is not added to its count but to its
+        repeats: those are trigger reports or further runs with the same
+        values, so the runs lie between count and count + repeats. Every
+        other statement is counted each time it runs. Statements SQLite
+        runs internally (the FTS5 shadow tables, whose text starts with
+        --) are not counted.
+        """
+        conn.set_trace_callback(self._trace)
+
+    def _methods(self) -> List[str]:
+        methods = getattr(self._local, 'methods', None)
+        if methods is None:
+            methods = self._local.methods = []
+        return methods
+
+    def _wrap(self, name: str, method):
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            methods = self._methods()
+            methods.append(name)
+            self._local.last_statement = None
+            start = time.perf_counter()
+            try:
+                result = method(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                methods.pop()
+            self.record(name, elapsed, len(result) if isinstance(result, list) else None)
+            return result
+        return wrapper
+
+    def _wrap_generator(self, name: str, method):
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            # Timed from the call until the caller has consumed every row
+            # (or stopped), and counted in rows
+            rows = 0
+            start = time.perf_counter()
+            try:
+                for row in method(*args, **kwargs):
+                    rows += 1
+                    yield row
+            finally:
+                self.record(name, time.perf_counter() - start, rows)
+        return wrapper
+
+    def _trace(self, statement: str):
+        if statement.startswith('--'):
+            return
+        repeat = (statement == getattr(self._local, 'last_statement', None)
+                  and _TRIGGERING.match(statement) is not None)
+        self._local.last_statement = statement
+        methods = self._methods()
+        method = methods[-1] if methods else None
+        sql = self._normalized.get(statement)
+        if sql is None:
+            if len(self._normalized) >= MAX_NORMALIZED:
+                self._normalized.clear()
+            sql = self._normalized[statement] = normalize_sql(statement)
+        with self._lock:
+            query = self.queries.get(sql)
+            if query is None:
+                query = self.queries[sql] = {'count': 0, 'repeats': 0, 'methods': {}}
+            if repeat:
+                query['repeats'] += 1
+                return
+            query['count'] += 1
+            if method is not None:
+                query['methods'][method] = query['methods'].get(method, 0) + 1
+
+    def snapshot(self) -> Dict:
+        """Everything recorded so far, JSON-serializable.
+
+        Histograms are sorted by total time and queries by count, both
+        descending.
+        """
+        with self._lock:
+            histograms = {name: histogram.snapshot()
+                          for name, histogram in self.histograms.items()}
+            queries = [dict(query, sql=sql, methods=dict(query['methods']))
+                       for sql, query in self.queries.items()]
+            errors = list(self.errors)
+        return {
+            'histograms': dict(sorted(histograms.items(),
+                                      key=lambda item: item[1]['total_ms'], reverse=True)),
+            'queries': sorted(queries, key=lambda query: query['count'], reverse=True),
+            'errors': errors,
+        }
+
+    def dump(self, path: Optional[str] = None) -> str:
+        """Write snapshot() as JSON to path (dump_path by default); returns the path."""
+        import json
+        path = path or self.dump_path
+        if path is None:
+            raise ValueError('No path to dump instrumentation to')
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.snapshot(), f, indent=2)
+        return path
+
+    def reset(self):
+        """Forget everything recorded."""
+        with self._lock:
+            self.histograms.clear()
+            self.queries.clear()
+            self.errors.clear()
+
+
+class NullInstrumentation(Instrumentation):
+    """Instrumentation that records nothing, for when it is turned off."""
+
+    enabled = False
+
+    def record(self, name: str, seconds: float, rows: Optional[int] = None):
+        pass
+
+    @contextmanager
+    def timer(self, name: str):
+        yield
+
+    def error(self, message: str):
+        pass
+
+    def instrument_database(self, db_manager):
+        pass
+
+    def trace(self, conn: sqlite3.Connection):
+        pass
+
+
+NULL_INSTRUMENTATION = NullInstrumentation()
@@ -0,0 +1,472 @@
+"""
+Versioned schema migrations for the Booktrack database.
+
+The schema version is stored in ``PRAGMA user_version``. Each migration runs
+in its own transaction and bumps the version only if it succeeds, so an
+interrupted upgrade of an existing ``booktrack.db`` is simply retried on the
+next start.
+"""
+
+import logging
+import sqlite3
+from typing import Callable, List, Tuple
+
+from .search import create_search_index
+
+logger = logging.getLogger(__name__)
+
+
+class MigrationError(Exception):
+    """Raised when the database cannot be migrated to the current schema."""
+
+
+def _create_base_tables(conn: sqlite3.Connection):
+    """Create the books and reading_sessions tables."""
+    # IF NOT EXISTS keeps this a no-op for databases created before
+    # migrations existed (user_version 0 with both tables present)
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS books (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT NOT NULL,
+            author TEXT NOT NULL,
+            total_pages INTEGER,
+            cover_image_url TEXT,
+            status TEXT DEFAULT 'Active',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS reading_sessions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            book_id INTEGER NOT NULL,
+            duration_seconds INTEGER NOT NULL,
+            pages_read INTEGER,
+            notes TEXT,
+            session_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (book_id) REFERENCES books (id) ON DELETE CASCADE
+        )
+    ''')
+
+
+def _add_lookup_indexes(conn: sqlite3.Connection):
+    """Add indexes for status filters, date ranges and per-book lookups."""
+    # get_books(status=...) filters on status and sorts by created_at
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_books_status_created
+        ON books (status, created_at)
+    ''')
+    # get_books() without a filter sorts by created_at
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_books_created
+        ON books (created_at)
+    ''')
+    # get_reading_sessions(book_id) filters on book_id and sorts by date
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_sessions_book_date
+        ON reading_sessions (book_id, session_date)
+    ''')
+    # Covers date-range aggregates such as the daily statistics
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_sessions_date_duration
+        ON reading_sessions (session_date, duration_seconds)
+    ''')
+
+
+def _cover_statistics_scans(conn: sqlite3.Connection):
+    """Make the per-book and per-day statistics scans index-only."""
+    # Widen the per-book index so totals by book never touch the table
+    conn.execute('DROP INDEX IF EXISTS idx_sessions_book_date')
+    conn.execute('''
+        CREATE INDEX idx_sessions_book_date
+        ON reading_sessions (book_id, session_date, duration_seconds, pages_read)
+    ''')
+    # Lets GROUP BY DATE(session_date) walk an index instead of sorting
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_sessions_day
+        ON reading_sessions (DATE(session_date), duration_seconds, pages_read)
+    ''')
+
+
+def _add_statistics_rollups(conn: sqlite3.Connection):
+    """Add rollup tables kept current by triggers, and fill them."""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS daily_rollup (
+            day TEXT PRIMARY KEY,
+            total_seconds INTEGER NOT NULL DEFAULT 0,
+            session_count INTEGER NOT NULL DEFAULT 0,
+            pages_read INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS book_rollup (
+            book_id INTEGER PRIMARY KEY,
+            total_seconds INTEGER NOT NULL DEFAULT 0,
+            session_count INTEGER NOT NULL DEFAULT 0,
+            pages_read INTEGER NOT NULL DEFAULT 0,
+            paged_seconds INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS status_rollup (
+            status TEXT PRIMARY KEY,
+            book_count INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+
+    # Sessions: add NEW, subtract OLD; an update does both
+    add_session = '''
+        INSERT INTO daily_rollup (day, total_seconds, session_count, pages_read)
+        SELECT DATE(NEW.session_date), NEW.duration_seconds, 1,
+               COALESCE(NEW.pages_read, 0)
+        WHERE DATE(NEW.session_date) IS NOT NULL
+        ON CONFLICT (day) DO UPDATE SET
+            total_seconds = total_seconds + excluded.total_seconds,
+            session_count = session_count + 1,
+            pages_read = pages_read + excluded.pages_read;
+        INSERT INTO book_rollup
+            (book_id, total_seconds, session_count, pages_read, paged_seconds)
+        VALUES (NEW.book_id, NEW.duration_seconds, 1, COALESCE(NEW.pages_read, 0),
+                CASE WHEN NEW.pages_read IS NOT NULL THEN NEW.duration_seconds ELSE 0 END)
+        ON CONFLICT (book_id) DO UPDATE SET
+            total_seconds = total_seconds + excluded.total_seconds,
+            session_count = session_count + 1,
+            pages_read = pages_read + excluded.pages_read,
+            paged_seconds = paged_seconds + excluded.paged_seconds;
+    '''
+    remove_session = '''
+        UPDATE daily_rollup SET
+            total_seconds = total_seconds - OLD.duration_seconds,
+            session_count = session_count - 1,
+            pages_read = pages_read - COALESCE(OLD.pages_read, 0)
+        WHERE day = DATE(OLD.session_date);
+        DELETE FROM daily_rollup
+        WHERE day = DATE(OLD.session_date) AND session_count <= 0;
+        UPDATE book_rollup SET
+            total_seconds = total_seconds - OLD.duration_seconds,
+            session_count = session_count - 1,
+            pages_read = pages_read - COALESCE(OLD.pages_read, 0),
+            paged_seconds = paged_seconds - CASE WHEN OLD.pages_read IS NOT NULL
+                                                 THEN OLD.duration_seconds ELSE 0 END
+        WHERE book_id = OLD.book_id;
+        DELETE FROM book_rollup
+        WHERE book_id = OLD.book_id AND session_count <= 0;
+    '''
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_rollup_session_insert
+        AFTER INSERT ON reading_sessions
+        BEGIN {add_session} END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_rollup_session_delete
+        AFTER DELETE ON reading_sessions
+        BEGIN {remove_session} END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_rollup_session_update
+        AFTER UPDATE OF book_id, duration_seconds, pages_read, session_date
+        ON reading_sessions
+        BEGIN {remove_session} {add_session} END
+    ''')
+
+    # Books: one counter per status
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_rollup_book_insert
+        AFTER INSERT ON books
+        BEGIN
+            INSERT INTO status_rollup (status, book_count) VALUES (NEW.status, 1)
+            ON CONFLICT (status) DO UPDATE SET book_count = book_count + 1;
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_rollup_book_delete
+        AFTER DELETE ON books
+        BEGIN
+            UPDATE status_rollup SET book_count = book_count - 1
+            WHERE status = OLD.status;
+            DELETE FROM status_rollup WHERE status = OLD.status AND book_count <= 0;
+            DELETE FROM book_rollup WHERE book_id = OLD.id;
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_rollup_book_status
+        AFTER UPDATE OF status ON books
+        WHEN OLD.status IS NOT NEW.status
+        BEGIN
+            UPDATE status_rollup SET book_count = book_count - 1
+            WHERE status = OLD.status;
+            DELETE FROM status_rollup WHERE status = OLD.status AND book_count <= 0;
+            INSERT INTO status_rollup (status, book_count) VALUES (NEW.status, 1)
+            ON CONFLICT (status) DO UPDATE SET book_count = book_count + 1;
+        END
+    ''')
+
+    # Fill the rollups from existing data
+    conn.execute('''
+        INSERT INTO daily_rollup (day, total_seconds, session_count, pages_read)
+        SELECT DATE(session_date), SUM(duration_seconds), COUNT(*),
+               COALESCE(SUM(pages_read), 0)
+        FROM reading_sessions
+        WHERE DATE(session_date) IS NOT NULL
+        GROUP BY DATE(session_date)
+    ''')
+    conn.execute('''
+        INSERT INTO book_rollup
+            (book_id, total_seconds, session_count, pages_read, paged_seconds)
+        SELECT book_id, SUM(duration_seconds), COUNT(*),
+               COALESCE(SUM(pages_read), 0),
+               COALESCE(SUM(CASE WHEN pages_read IS NOT NULL
+                                 THEN duration_seconds END), 0)
+        FROM reading_sessions
+        GROUP BY book_id
+    ''')
+    conn.execute('''
+        INSERT INTO status_rollup (status, book_count)
+        SELECT status, COUNT(*) FROM books GROUP BY status
+    ''')
+
+
+def _add_rollup_deferral(conn: sqlite3.Connection):
+    """Let bulk imports suspend the per-row session rollup trigger."""
+    # While this table has a row, inserted sessions are left for the
+    # importer to fold into the rollups in one set-based statement
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS rollup_deferred (
+            id INTEGER PRIMARY KEY CHECK (id = 1)
+        )
+    ''')
+    conn.execute('DROP TRIGGER IF EXISTS trg_rollup_session_insert')
+    conn.execute('''
+        CREATE TRIGGER trg_rollup_session_insert
+        AFTER INSERT ON reading_sessions
+        WHEN NOT EXISTS (SELECT 1 FROM rollup_deferred)
+        BEGIN
+            INSERT INTO daily_rollup (day, total_seconds, session_count, pages_read)
+            SELECT DATE(NEW.session_date), NEW.duration_seconds, 1,
+                   COALESCE(NEW.pages_read, 0)
+            WHERE DATE(NEW.session_date) IS NOT NULL
+            ON CONFLICT (day) DO UPDATE SET
+                total_seconds = total_seconds + excluded.total_seconds,
+                session_count = session_count + 1,
+                pages_read = pages_read + excluded.pages_read;
+            INSERT INTO book_rollup
+                (book_id, total_seconds, session_count, pages_read, paged_seconds)
+            VALUES (NEW.book_id, NEW.duration_seconds, 1, COALESCE(NEW.pages_read, 0),
+                    CASE WHEN NEW.pages_read IS NOT NULL THEN NEW.duration_seconds ELSE 0 END)
+            ON CONFLICT (book_id) DO UPDATE SET
+                total_seconds = total_seconds + excluded.total_seconds,
+                session_count = session_count + 1,
+                pages_read = pages_read + excluded.pages_read,
+                paged_seconds = paged_seconds + excluded.paged_seconds;
+        END
+    ''')
+
+
+def _add_search_index(conn: sqlite3.Connection):
+    """Add the FTS5 index over book titles, authors and session notes.
+    
+    SQLite builds without FTS5 skip the index; search then falls back to
+    LIKE, and DatabaseManager adds the index once the database is opened
+    by a build that has FTS5.
+    """
+    if not create_search_index(conn):
+        logger.warning('SQLite has no FTS5; skipped the search index, search will scan with LIKE')
+
+
+def _add_active_sessions(conn: sqlite3.Connection):
+    """Add the journal of reading sessions still being timed.
+    
+    Each in-progress session is one row, overwritten in place by every
+    timer checkpoint and deleted once the session is saved or cancelled,
+    so a session interrupted by the app being killed can be recovered.
+    """
+    conn.execute('''
+        CREATE TABLE active_sessions (
+            book_id INTEGER PRIMARY KEY,
+            elapsed_seconds REAL NOT NULL,
+            is_running INTEGER NOT NULL,
+            checkpointed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (book_id) REFERENCES books (id) ON DELETE CASCADE
+        )
+    ''')
+
+
+# Millisecond timestamps, for ordering changes made within one second
+_NOW_MS = "strftime('%Y-%m-%d %H:%M:%f', 'now')"
+
+
+def _add_sync_tracking(conn: sqlite3.Connection):
+    """Add the change tracking used by booktrack.sync.
+
+    books and reading_sessions get global_id, a row's identity in every
+    database it is synced to, and updated_at. Both stay NULL when a row is
+    added, so inserts cost nothing extra; sync fills them in for new rows
+    in two set-based statements when it next runs. From then on, triggers
+    stamp updated_at on every change and record the row in sync_log: one
+    entry per row, moved to the end of the log by each new change, with
+    deletions kept as tombstones.
+    """
+    conn.execute('ALTER TABLE books ADD COLUMN global_id TEXT')
+    conn.execute('ALTER TABLE books ADD COLUMN updated_at TIMESTAMP')
+    conn.execute('ALTER TABLE reading_sessions ADD COLUMN global_id TEXT')
+    conn.execute('ALTER TABLE reading_sessions ADD COLUMN updated_at TIMESTAMP')
+    conn.execute('CREATE UNIQUE INDEX idx_books_global_id ON books (global_id)')
+    conn.execute('CREATE UNIQUE INDEX idx_sessions_global_id ON reading_sessions (global_id)')
+    # Sync matches books it has not seen before on (title, author)
+    conn.execute('CREATE INDEX idx_books_title_author ON books (title, author)')
+
+    conn.execute('''
+        CREATE TABLE sync_log (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            kind TEXT NOT NULL,
+            global_id TEXT NOT NULL,
+            deleted INTEGER NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP NOT NULL,
+            origin TEXT
+        )
+    ''')
+    conn.execute('CREATE UNIQUE INDEX idx_sync_log_row ON sync_log (kind, global_id)')
+    conn.execute('CREATE INDEX idx_sync_log_kind_seq ON sync_log (kind, seq)')
+    # This database's identity, and how far it has read each peer's log
+    conn.execute('''
+        CREATE TABLE sync_site (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            site_id TEXT NOT NULL
+        )
+    ''')
+    conn.execute("INSERT INTO sync_site (id, site_id) VALUES (1, lower(hex(randomblob(8))))")
+    conn.execute('''
+        CREATE TABLE sync_peers (
+            site_id TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            seq INTEGER NOT NULL,
+            PRIMARY KEY (site_id, kind)
+        ) WITHOUT ROWID
+    ''')
+    # While this table has a row, changes are being applied from a peer,
+    # which stamps and logs them itself
+    conn.execute('''
+        CREATE TABLE sync_applying (
+            id INTEGER PRIMARY KEY CHECK (id = 1)
+        )
+    ''')
+
+    conn.execute(f'''
+        CREATE TRIGGER trg_sync_book_update
+        AFTER UPDATE OF title, author, total_pages, cover_image_url, status ON books
+        WHEN (OLD.title, OLD.author, OLD.total_pages, OLD.cover_image_url, OLD.status)
+             IS NOT (NEW.title, NEW.author, NEW.total_pages, NEW.cover_image_url, NEW.status)
+             AND NOT EXISTS (SELECT 1 FROM sync_applying)
+        BEGIN
+            UPDATE books SET updated_at = {_NOW_MS} WHERE id = NEW.id;
+            INSERT OR REPLACE INTO sync_log (kind, global_id, deleted, updated_at)
+            SELECT 'book', NEW.global_id, 0, {_NOW_MS} WHERE NEW.global_id IS NOT NULL;
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER trg_sync_book_delete AFTER DELETE ON books
+        WHEN OLD.global_id IS NOT NULL AND NOT EXISTS (SELECT 1 FROM sync_applying)
+        BEGIN
+            INSERT OR REPLACE INTO sync_log (kind, global_id, deleted, updated_at)
+            VALUES ('book', OLD.global_id, 1, {_NOW_MS});
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER trg_sync_session_update
+        AFTER UPDATE OF book_id, duration_seconds, pages_read, notes, session_date
+        ON reading_sessions
+        WHEN (OLD.book_id, OLD.duration_seconds, OLD.pages_read, OLD.notes, OLD.session_date)
+             IS NOT (NEW.book_id, NEW.duration_seconds, NEW.pages_read, NEW.notes,
+                     NEW.session_date)
+             AND NOT EXISTS (SELECT 1 FROM sync_applying)
+        BEGIN
+            UPDATE reading_sessions SET updated_at = {_NOW_MS} WHERE id = NEW.id;
+            INSERT OR REPLACE INTO sync_log (kind, global_id, deleted, updated_at)
+            SELECT 'reading_session', NEW.global_id, 0, {_NOW_MS}
+            WHERE NEW.global_id IS NOT NULL;
+        END
+    ''')
+    # Sessions deleted along with their book need no tombstone of their
+    # own: the book's takes them with it everywhere
+    conn.execute(f'''
+        CREATE TRIGGER trg_sync_session_delete AFTER DELETE ON reading_sessions
+        WHEN OLD.global_id IS NOT NULL AND NOT EXISTS (SELECT 1 FROM sync_applying)
+             AND EXISTS (SELECT 1 FROM books WHERE id = OLD.book_id)
+        BEGIN
+            INSERT OR REPLACE INTO sync_log (kind, global_id, deleted, updated_at)
+            VALUES ('reading_session', OLD.global_id, 1, {_NOW_MS});
+        END
+    ''')
+
+
+def _drop_statistics_scan_indexes(conn: sqlite3.Connection):
+    """Drop the indexes of migration 3, which the rollups made redundant.
+
+    Statistics read the rollup tables instead of scanning
+    reading_sessions, so the per-day index and the extra columns of the
+    per-book one only slow down every session write. Per-book session
+    lookups still need (book_id, session_date).
+    """
+    conn.execute('DROP INDEX IF EXISTS idx_sessions_day')
+    conn.execute('DROP INDEX IF EXISTS idx_sessions_book_date')
+    conn.execute('''
+        CREATE INDEX idx_sessions_book_date
+        ON reading_sessions (book_id, session_date)
+    ''')
+
+
+# (version, description, migration) in the order they must be applied.
+# Never edit a released migration; append a new one instead.
+MIGRATIONS: List[Tuple[int, str, Callable[[sqlite3.Connection], None]]] = [
+    (1, 'Create books and reading_sessions tables', _create_base_tables),
+    (2, 'Add lookup indexes on books and reading_sessions', _add_lookup_indexes),
+    (3, 'Add covering indexes for statistics scans', _cover_statistics_scans),
+    (4, 'Add trigger-maintained statistics rollup tables', _add_statistics_rollups),
+    (5, 'Allow bulk imports to defer session rollups', _add_rollup_deferral),
+    (6, 'Add full-text search index', _add_search_index),
+    (7, 'Add active session checkpoints', _add_active_sessions),
+    (8, 'Add change tracking for sync', _add_sync_tracking),
+    (9, 'Drop statistics scan indexes replaced by rollups', _drop_statistics_scan_indexes),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    """Return the schema version recorded in the database."""
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def migrate(conn: sqlite3.Connection, target: int = SCHEMA_VERSION) -> int:
+    """Apply pending migrations up to target and return the new version."""
+    if conn.in_transaction:
+        conn.commit()
+
+    current = get_schema_version(conn)
+    if current > SCHEMA_VERSION:
+        raise MigrationError(
+            f'Database schema version {current} is newer than this app '
+            f'supports ({SCHEMA_VERSION})'
+        )
+
+    for version, description, apply in MIGRATIONS:
+        if version <= current or version > target:
+            continue
+
+        # IMMEDIATE takes the write lock up front so two processes starting
+        # at once cannot both apply the same migration
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            if get_schema_version(conn) >= version:
+                conn.rollback()
+                continue
+            apply(conn)
+            conn.execute(f'PRAGMA user_version = {version}')
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            raise MigrationError(
+                f'Migration {version} ({description}) failed: {e}'
+            ) from e
+        current = version
+
+    return get_schema_version(conn)
@@ -0,0 +1,138 @@
+"""
+Compact result rows for books and reading sessions.
+
+``BookRow`` and ``SessionRow`` store their fields in ``__slots__`` instead
+of a per-row dict, but are read-only mappings: ``row['title']``,
+``row.get('total_pages')``, ``dict(row)`` and comparison with plain dicts
+all work, so widgets and callers written against dicts keep working. Use
+``dict(row)`` where a real dict is needed, e.g. for ``json.dumps``.
+
+``SessionColumns`` goes further for whole-history reads: the numeric
+columns live in ``array`` buffers and each book's title and author are
+stored once, with rows materialised only when indexed.
+"""
+
+from array import array
+from collections.abc import Mapping
+from typing import Dict, Iterable, Iterator, Tuple
+
+
+class _SlotsRow(Mapping):
+    """Read-only mapping over the instance's slots."""
+
+    __slots__ = ()
+
+    def __getitem__(self, key):
+        if key in self.__slots__:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.__slots__)
+
+    def __len__(self) -> int:
+        return len(self.__slots__)
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}({dict(self)!r})'
+
+
+class BookRow(_SlotsRow):
+    """One row of the books table."""
+
+    __slots__ = ('id', 'title', 'author', 'total_pages', 'cover_image_url',
+                 'status', 'created_at')
+
+    def __init__(self, id, title, author, total_pages, cover_image_url, status,
+                 created_at):
+        self.id = id
+        self.title = title
+        self.author = author
+        self.total_pages = total_pages
+        self.cover_image_url = cover_image_url
+        self.status = status
+        self.created_at = created_at
+
+
+class SessionRow(_SlotsRow):
+    """One reading session with its book's title and author."""
+
+    __slots__ = ('id', 'book_id', 'duration_seconds', 'pages_read', 'notes',
+                 'session_date', 'book_title', 'book_author')
+
+    def __init__(self, id, book_id, duration_seconds, pages_read, notes,
+                 session_date, book_title, book_author):
+        self.id = id
+        self.book_id = book_id
+        self.duration_seconds = duration_seconds
+        self.pages_read = pages_read
+        self.notes = notes
+        self.session_date = session_date
+        self.book_title = book_title
+        self.book_author = book_author
+
+
+def session_rows(rows: Iterable[Tuple]) -> Iterator[SessionRow]:
+    """Build SessionRows from query tuples, sharing each distinct title and author."""
+    strings: Dict[str, str] = {}
+    for id, book_id, duration, pages, notes, when, title, author in rows:
+        yield SessionRow(id, book_id, duration, pages, notes, when,
+                         strings.setdefault(title, title),
+                         strings.setdefault(author, author))
+
+
+# Stored in SessionColumns.pages_read and analytics.SessionArrays.pages for
+# sessions without a page count
+NO_PAGES = -1
+
+
+class SessionColumns:
+    """Reading sessions stored column by column.
+
+    duration_seconds and pages_read are ``array('q')`` buffers (pages_read
+    uses NO_PAGES for None), ids and book ids likewise, and titles and
+    authors are kept once per book in ``books``. Indexing or iterating
+    yields SessionRow objects built on demand; aggregations should read
+    the arrays directly.
+    """
+
+    def __init__(self, rows: Iterable[Tuple] = ()):
+        self.ids = array('q')
+        self.book_ids = array('q')
+        self.duration_seconds = array('q')
+        self.pages_read = array('q')
+        self.notes = []
+        self.session_dates = []
+        # book_id -> (title, author)
+        self.books: Dict[int, Tuple[str, str]] = {}
+        self.extend(rows)
+
+    def extend(self, rows: Iterable[Tuple]):
+        """Append query tuples in SessionRow field order."""
+        for id, book_id, duration, pages, notes, when, title, author in rows:
+            self.ids.append(id)
+            self.book_ids.append(book_id)
+            self.duration_seconds.append(duration)
+            self.pages_read.append(NO_PAGES if pages is None else pages)
+            self.notes.append(notes)
+            self.session_dates.append(when)
+            if book_id not in self.books:
+                self.books[book_id] = (title, author)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __getitem__(self, index: int) -> SessionRow:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        book_id = self.book_ids[index]
+        pages = self.pages_read[index]
+        title, author = self.books[book_id]
+        return SessionRow(self.ids[index], book_id, self.duration_seconds[index],
+                          None if pages == NO_PAGES else pages,
+                          self.notes[index], self.session_dates[index],
+                          title, author)
+
+    def __iter__(self) -> Iterator[SessionRow]:
+        for index in range(len(self)):
+            yield self[index]
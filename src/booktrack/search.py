@@ -0,0 +1,250 @@
+"""
+Full-text search over book titles, authors and session notes.
+
+Searches run against the FTS5 ``search_index`` table (see migration 6),
+which triggers keep in sync with books and reading_sessions, and are
+ranked with bm25 so title matches outrank author matches, which outrank
+notes. On SQLite builds without FTS5 the same API falls back to LIKE
+scans, unranked.
+
+bm25 has to score every matching row, which is too slow for a word found
+in most notes, so only the newest RANKED_NOTES matching notes are ranked;
+matching books always are. The index stores books under rowid = book id
+and notes under rowid = -session id, so the newest notes come first in
+rowid order and finding that cut-off is a short index scan.
+"""
+
+import re
+import sqlite3
+from typing import Dict, List
+
+from .rows import BookRow, SessionRow
+
+# bm25 column weights for title, author and notes
+COLUMN_WEIGHTS = (10.0, 5.0, 1.0)
+
+# Matching notes ranked per search, newest first
+RANKED_NOTES = 500
+
+_BOOK_QUERY = '''
+    SELECT id, title, author, total_pages, cover_image_url, status, created_at
+    FROM books WHERE id IN ({ids})
+'''
+_SESSION_QUERY = '''
+    SELECT rs.id, rs.book_id, rs.duration_seconds, rs.pages_read,
+           rs.notes, rs.session_date, b.title, b.author
+    FROM reading_sessions rs
+    JOIN books b ON rs.book_id = b.id
+    WHERE rs.id IN ({ids})
+'''
+
+
+def has_search_index(conn: sqlite3.Connection) -> bool:
+    """Whether this database has the FTS5 search index."""
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE name = 'search_index'"
+    ).fetchone() is not None
+
+
+def create_search_index(conn: sqlite3.Connection) -> bool:
+    """Create the FTS5 index and its triggers, and fill it from the library.
+
+    Books are indexed with rowid = id and sessions with rowid = -id, so
+    the triggers can find a row's entry without a lookup table. Returns
+    False, creating nothing, on SQLite builds without FTS5.
+    """
+    try:
+        conn.execute('''
+            CREATE VIRTUAL TABLE search_index USING fts5(
+                title, author, notes,
+                tokenize = 'unicode61 remove_diacritics 2',
+                prefix = '2 3'
+            )
+        ''')
+    except sqlite3.OperationalError as e:
+        if 'fts5' not in str(e):
+            raise
+        return False
+
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_search_book_insert AFTER INSERT ON books
+        BEGIN
+            INSERT INTO search_index (rowid, title, author)
+            VALUES (NEW.id, NEW.title, NEW.author);
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_search_book_update AFTER UPDATE OF title, author ON books
+        BEGIN
+            UPDATE search_index SET title = NEW.title, author = NEW.author
+            WHERE rowid = NEW.id;
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_search_book_delete AFTER DELETE ON books
+        BEGIN
+            DELETE FROM search_index WHERE rowid = OLD.id;
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_search_session_insert AFTER INSERT ON reading_sessions
+        WHEN NEW.notes IS NOT NULL AND NEW.notes != ''
+        BEGIN
+            INSERT INTO search_index (rowid, notes) VALUES (-NEW.id, NEW.notes);
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_search_session_update AFTER UPDATE OF notes ON reading_sessions
+        BEGIN
+            DELETE FROM search_index WHERE rowid = -OLD.id;
+            INSERT INTO search_index (rowid, notes)
+            SELECT -NEW.id, NEW.notes WHERE NEW.notes IS NOT NULL AND NEW.notes != '';
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_search_session_delete AFTER DELETE ON reading_sessions
+        WHEN OLD.notes IS NOT NULL AND OLD.notes != ''
+        BEGIN
+            DELETE FROM search_index WHERE rowid = -OLD.id;
+        END
+    ''')
+
+    conn.execute('''
+        INSERT INTO search_index (rowid, title, author)
+        SELECT id, title, author FROM books
+    ''')
+    conn.execute('''
+        INSERT INTO search_index (rowid, notes)
+        SELECT -id, notes FROM reading_sessions
+        WHERE notes IS NOT NULL AND notes != ''
+    ''')
+    return True
+
+
+def fts_query(text: str) -> str:
+    """Turn typed text into an FTS5 query matching every word.
+
+    Words are quoted, so FTS5 operators in the input are matched as plain
+    text, and the last word matches as a prefix since it may still be
+    being typed. Returns '' when the text has no words.
+    """
+    words = re.findall(r'\w+', text)
+    if not words:
+        return ''
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+
+def _fetch(conn: sqlite3.Connection, sql: str, ids: List[int], row_type) -> Dict[int, object]:
+    if not ids:
+        return {}
+    placeholders = ', '.join('?' * len(ids))
+    return {row[0]: row_type(*row) for row in conn.execute(sql.format(ids=placeholders), ids)}
+
+
+def search(conn: sqlite3.Connection, text: str, limit: int = 20) -> List[Dict]:
+    """Search books and session notes, best matches first.
+
+    Each result is a dict with 'type' ('book' or 'reading_session'),
+    'book' (a BookRow), 'session' (a SessionRow, or None for book
+    matches), 'snippet' (matched notes text with the terms in [brackets],
+    or None) and 'score' (bm25, lower is better; None without FTS5).
+    """
+    if not has_search_index(conn):
+        return _search_like(conn, text, limit)
+
+    query = fts_query(text)
+    if not query:
+        return []
+    # rowid of the oldest note that will be ranked
+    bound = conn.execute('''
+        SELECT rowid FROM search_index
+        WHERE search_index MATCH ? AND rowid < 0
+        ORDER BY rowid
+        LIMIT 1 OFFSET ?
+    ''', (query, RANKED_NOTES - 1)).fetchone()
+    score = f"bm25(search_index, {', '.join(str(weight) for weight in COLUMN_WEIGHTS)})"
+    matches = conn.execute(f'''
+        SELECT rowid, {score} AS score FROM search_index
+        WHERE search_index MATCH ? AND rowid > 0
+        UNION ALL
+        SELECT rowid, {score} AS score FROM search_index
+        WHERE search_index MATCH ? AND rowid <= ?
+        ORDER BY score
+        LIMIT ?
+    ''', (query, query, bound[0] if bound else -1, limit)).fetchall()
+
+    # Snippets only for the notes returned, not for every note ranked. FTS5
+    # would run an IN list as one lookup per rowid, so it only gets the
+    # range and SQLite (+rowid) picks the rows out of it.
+    note_rowids = [rowid for rowid, _ in matches if rowid < 0]
+    snippets = {}
+    if note_rowids:
+        snippets = dict(conn.execute(f'''
+            SELECT rowid, snippet(search_index, 2, '[', ']', '...', 10)
+            FROM search_index
+            WHERE search_index MATCH ? AND rowid BETWEEN ? AND ?
+              AND +rowid IN ({', '.join('?' * len(note_rowids))})
+        ''', [query, min(note_rowids), max(note_rowids)] + note_rowids))
+
+    sessions = _fetch(conn, _SESSION_QUERY, [-rowid for rowid in note_rowids], SessionRow)
+    book_ids = {rowid for rowid, _ in matches if rowid > 0}
+    book_ids.update(session['book_id'] for session in sessions.values())
+    books = _fetch(conn, _BOOK_QUERY, sorted(book_ids), BookRow)
+
+    results = []
+    for rowid, score in matches:
+        if rowid > 0:
+            results.append({'type': 'book', 'book': books[rowid], 'session': None,
+                            'snippet': None, 'score': score})
+        else:
+            session = sessions[-rowid]
+            results.append({'type': 'reading_session', 'book': books[session['book_id']],
+                            'session': session, 'snippet': snippets[rowid], 'score': score})
+    return results
+
+
+def _search_like(conn: sqlite3.Connection, text: str, limit: int) -> List[Dict]:
+    """Unranked search for SQLite builds without FTS5: books first, then notes."""
+    words = re.findall(r'\w+', text)
+    if not words:
+        return []
+
+    def matching(columns, params):
+        # Every word must appear in at least one of the columns
+        condition = ' AND '.join(
+            '(' + ' OR '.join(f"{column} LIKE ? ESCAPE '\\'" for column in columns) + ')'
+            for _ in words
+        )
+        for word in words:
+            pattern = '%' + word.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+            params.extend([pattern] * len(columns))
+        return condition
+
+    params = []
+    books = [BookRow(*row) for row in conn.execute(f'''
+        SELECT id, title, author, total_pages, cover_image_url, status, created_at
+        FROM books WHERE {matching(('title', 'author'), params)}
+        ORDER BY created_at DESC, id DESC
+        LIMIT ?
+    ''', params + [limit])]
+    results = [{'type': 'book', 'book': book, 'session': None, 'snippet': None, 'score': None}
+               for book in books]
+
+    if len(results) < limit:
+        params = []
+        session_ids = [row[0] for row in conn.execute(f'''
+            SELECT id FROM reading_sessions
+            WHERE {matching(('notes',), params)}
+            ORDER BY session_date DESC
+            LIMIT ?
+        ''', params + [limit - len(results)])]
+        sessions = _fetch(conn, _SESSION_QUERY, session_ids, SessionRow)
+        owners = _fetch(conn, _BOOK_QUERY,
+                        sorted({s['book_id'] for s in sessions.values()}), BookRow)
+        for session_id in session_ids:
+            session = sessions[session_id]
+            results.append({'type': 'reading_session', 'book': owners[session['book_id']],
+                            'session': session, 'snippet': session['notes'], 'score': None})
+    return results
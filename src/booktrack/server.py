@@ -0,0 +1,480 @@
+"""
+Local HTTP/JSON API over the Booktrack library.
+
+``BooktrackServer`` lets other devices and tools read and write the same
+library as the app, over plain HTTP with JSON bodies, using only asyncio
+streams from the standard library::
+
+    python -m booktrack.server --port 8765
+
+Writes all go through one AsyncDatabaseManager worker, the only connection
+that ever writes, so requests are applied one at a time in arrival order
+and never contend for SQLite's write lock. Reads run on a pool of threads
+with a connection each; in WAL mode they proceed alongside the writer and
+each other.
+
+Every GET response carries an ETag, a hash of its body. A client polling
+with If-None-Match gets an empty 304 while nothing has changed, and the
+reads behind it are answered from the query cache, so an unchanged poll
+costs a cache lookup and a hash instead of a query and a transfer. Lists
+are paged with opaque keyset cursors.
+
+    GET    /books?status=&limit=&cursor=   {"total", "books", "next_cursor"}
+    POST   /books                          the new book (201)
+    GET    /books/<id>                     a book
+    PATCH  /books/<id>                     the updated book
+    DELETE /books/<id>                     no content (204)
+    GET    /sessions?book_id=&since=&until=&limit=&cursor=
+                                           {"sessions", "next_cursor"}
+    POST   /sessions                       the new session (201)
+    GET    /stats?days=                    DatabaseManager.get_statistics()
+    GET    /search?q=&limit=               DatabaseManager.search()
+
+Errors are answered with {"error": message}. The server listens on
+127.0.0.1 by default and has no authentication: only bind it to another
+interface on a network you trust.
+"""
+
+import asyncio
+import base64
+import functools
+import hashlib
+import json
+import re
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from typing import Callable, Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from .async_db import AsyncDatabaseManager, call_method
+from .database import STATUSES, DatabaseManager
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+
+# Reader threads, each with its own connection. Reads mostly hold the GIL,
+# so more threads add little throughput; two keep a slow read (statistics,
+# a search) from holding up the others, while every thread added clears
+# the query cache once more after each write (see QueryCache)
+DEFAULT_READERS = 2
+
+# Rows per page of /books and /sessions, unless limit= asks otherwise
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+# Limits on what a request may send
+MAX_BODY_SIZE = 1024 * 1024
+MAX_HEADERS = 100
+
+# Seconds an idle keep-alive connection stays open
+KEEP_ALIVE_TIMEOUT = 30
+
+# Fields of a book that POST /books and PATCH /books/<id> accept
+BOOK_FIELDS = ('title', 'author', 'total_pages', 'cover_image_url', 'status')
+SESSION_FIELDS = ('book_id', 'duration_seconds', 'pages_read', 'notes')
+
+
+class HTTPError(Exception):
+    """A request that is answered with an error status and message."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def _json_default(value):
+    # BookRow and SessionRow are read-only mappings
+    if hasattr(value, 'keys'):
+        return dict(value)
+    return str(value)
+
+
+def _encode(data) -> bytes:
+    return json.dumps(data, default=_json_default, ensure_ascii=False,
+                      separators=(',', ':')).encode('utf-8')
+
+
+def encode_cursor(cursor: Optional[Tuple[str, int]]) -> Optional[str]:
+    """Opaque, URL-safe token for a keyset pagination cursor."""
+    if cursor is None:
+        return None
+    return base64.urlsafe_b64encode(_encode(list(cursor))).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token: Optional[str]) -> Optional[Tuple[str, int]]:
+    """The cursor encode_cursor() made token from; HTTPError 400 if it is not one."""
+    if not token:
+        return None
+    try:
+        key, row_id = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+        return str(key), int(row_id)
+    except (ValueError, TypeError):
+        raise HTTPError(400, 'invalid cursor')
+
+
+def _int(value, name: str, minimum: Optional[int] = None) -> Optional[int]:
+    """value as an int, for a query parameter or body field called name."""
+    if value is None or value == '':
+        return None
+    if isinstance(value, bool):
+        raise HTTPError(400, f'{name} must be an integer')
+    try:
+        number = int(value)
+    except (ValueError, TypeError):
+        raise HTTPError(400, f'{name} must be an integer')
+    if minimum is not None and number < minimum:
+        raise HTTPError(400, f'{name} must be at least {minimum}')
+    return number
+
+
+def _limit(query: Dict[str, str], default: int = DEFAULT_PAGE_SIZE) -> int:
+    limit = _int(query.get('limit'), 'limit', minimum=1)
+    return min(limit or default, MAX_PAGE_SIZE)
+
+
+def _fields(data, allowed: Tuple[str, ...]) -> Dict:
+    """The fields of a JSON object body, which may only use allowed keys."""
+    if not isinstance(data, dict):
+        raise HTTPError(400, 'expected a JSON object')
+    unknown = sorted(set(data) - set(allowed))
+    if unknown:
+        raise HTTPError(400, f"unknown field '{unknown[0]}'")
+    return data
+
+
+def _check_names(fields: Dict, required: bool = True):
+    """Title and author must be non-blank strings; a PATCH may leave them out."""
+    for name in ('title', 'author'):
+        if not required and name not in fields:
+            continue
+        if not isinstance(fields.get(name), str) or not fields[name].strip():
+            raise HTTPError(400, f'{name} is required')
+
+
+def _check_status(fields: Dict):
+    if fields.get('status') is not None and fields['status'] not in STATUSES:
+        raise HTTPError(400, f"status must be one of {', '.join(STATUSES)}")
+
+
+def _etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+
+
+def _etag_matches(etag: str, if_none_match: Optional[str]) -> bool:
+    if not if_none_match:
+        return False
+    # Weak comparison: W/"x" matches "x"
+    tags = [tag.strip() for tag in if_none_match.split(',')]
+    return '*' in tags or etag in (tag[2:] if tag.startswith('W/') else tag for tag in tags)
+
+
+# The reads and writes behind the endpoints, run on a reader thread or the
+# writer, with the DatabaseManager as their first argument
+
+def _add_book(db: DatabaseManager, fields: Dict):
+    book_id = db.add_book(fields['title'], fields['author'], fields.get('total_pages'),
+                          fields.get('cover_image_url'), fields.get('status') or 'Active')
+    return db.get_book(book_id)
+
+
+def _update_book(db: DatabaseManager, book_id: int, fields: Dict):
+    if db.get_book(book_id) is None:
+        raise HTTPError(404, f'no book with id {book_id}')
+    db.update_book(book_id, **fields)
+    return db.get_book(book_id)
+
+
+def _add_session(db: DatabaseManager, fields: Dict):
+    if db.get_book(fields['book_id']) is None:
+        raise HTTPError(404, f"no book with id {fields['book_id']}")
+    session_id = db.add_reading_session(fields['book_id'], fields['duration_seconds'],
+                                        fields.get('pages_read'), fields.get('notes'))
+    return dict(fields, id=session_id)
+
+
+class BooktrackServer:
+    """HTTP/JSON API over one library: a serialized writer and a pool of readers.
+
+    Use ``async with BooktrackServer(path, port=0) as server`` (port 0
+    picks a free port, then available as server.port), or ``await
+    serve_forever()``.
+    """
+
+    # path pattern -> {method: handler name}
+    ROUTES = [
+        (re.compile(r'/books'), {'GET': '_get_books', 'POST': '_post_book'}),
+        (re.compile(r'/books/(\d+)'), {'GET': '_get_book', 'PATCH': '_patch_book',
+                                       'DELETE': '_delete_book'}),
+        (re.compile(r'/sessions'), {'GET': '_get_sessions', 'POST': '_post_session'}),
+        (re.compile(r'/stats'), {'GET': '_get_stats'}),
+        (re.compile(r'/search'), {'GET': '_get_search'}),
+    ]
+
+    def __init__(self, db_path: str = None, host: str = DEFAULT_HOST,
+                 port: int = DEFAULT_PORT, readers: int = DEFAULT_READERS):
+        self.db_path = db_path
+        self.host = host
+        self.port = port
+        self.readers = readers
+        self.writer: Optional[AsyncDatabaseManager] = None
+        self.reader: Optional[DatabaseManager] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._connections = set()
+
+    async def start(self):
+        """Open the database and start listening."""
+        self.writer = AsyncDatabaseManager(self.db_path)
+        # The writer opens the database first and applies any migrations,
+        # so the readers never have to
+        self.db_path = await self.writer.run(lambda db: db.db_path)
+        self._executor = ThreadPoolExecutor(self.readers, thread_name_prefix='booktrack-reader')
+        self.reader = await asyncio.get_running_loop().run_in_executor(
+            self._executor, DatabaseManager, self.db_path)
+        self._server = await asyncio.start_server(self._serve, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        """Stop listening, drop open connections and close the database."""
+        if self._server is not None:
+            self._server.close()
+            for writer in list(self._connections):
+                writer.close()
+            await self._server.wait_closed()
+            self._server = None
+        loop = asyncio.get_running_loop()
+        if self._executor is not None:
+            await loop.run_in_executor(None, self._executor.shutdown)
+            self._executor = None
+        if self.reader is not None:
+            self.reader.close()
+            self.reader = None
+        if self.writer is not None:
+            await loop.run_in_executor(None, self.writer.close)
+            self.writer = None
+
+    async def serve_forever(self):
+        """Start, then serve until cancelled."""
+        async with self:
+            await self._server.serve_forever()
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def read(self, func: Callable, *args, **kwargs):
+        """Run func(db_manager, *args, **kwargs) on a reader thread."""
+        return await asyncio.get_running_loop().run_in_executor(
+            self._executor, functools.partial(func, self.reader, *args, **kwargs))
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Answer the requests of one connection until it closes."""
+        self._connections.add(writer)
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(self._read_request(reader),
+                                                     KEEP_ALIVE_TIMEOUT)
+                except HTTPError as error:
+                    writer.write(self._response(error.status, _encode({'error': str(error)}),
+                                                keep_alive=False))
+                    await writer.drain()
+                    break
+                if request is None:
+                    break
+                method, target, version, headers, body = request
+                connection = headers.get('connection', '').lower()
+                keep_alive = connection != 'close' and (version == 'HTTP/1.1'
+                                                        or connection == 'keep-alive')
+                status, body, response_headers = await self._dispatch(method, target,
+                                                                      headers, body)
+                writer.write(self._response(status, body, response_headers, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self._connections.discard(writer)
+            writer.close()
+
+    async def _read_request(self, reader: asyncio.StreamReader):
+        """(method, target, version, headers, body) of the next request, or None at EOF."""
+        async def readline():
+            try:
+                return await reader.readline()
+            except ValueError:
+                # Longer than the stream's buffer limit
+                raise HTTPError(431, 'request line or header too long')
+
+        line = await readline()
+        if not line:
+            return None
+        try:
+            method, target, version = line.decode('latin-1').split()
+        except ValueError:
+            raise HTTPError(400, 'malformed request line')
+
+        headers = {}
+        while True:
+            line = await readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            if len(headers) >= MAX_HEADERS:
+                raise HTTPError(431, 'too many headers')
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        try:
+            length = int(headers.get('content-length', 0))
+        except ValueError:
+            raise HTTPError(400, 'invalid Content-Length')
+        if length > MAX_BODY_SIZE:
+            raise HTTPError(413, f'request body over {MAX_BODY_SIZE} bytes')
+        body = await reader.readexactly(length) if length > 0 else b''
+        return method, target, version, headers, body
+
+    async def _dispatch(self, method: str, target: str, headers: Dict[str, str],
+                        body: bytes) -> Tuple[int, bytes, Dict[str, str]]:
+        """Route a request to its handler; returns (status, body, headers)."""
+        url = urlsplit(target)
+        path = url.path.rstrip('/') or '/'
+        try:
+            for pattern, handlers in self.ROUTES:
+                match = pattern.fullmatch(path)
+                if match is not None:
+                    break
+            else:
+                raise HTTPError(404, f'no such endpoint: {path}')
+            handler = handlers.get(method)
+            if handler is None:
+                return 405, _encode({'error': f'{method} not allowed'}), {
+                    'Allow': ', '.join(handlers)}
+
+            query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+            data = None
+            if body:
+                try:
+                    data = json.loads(body)
+                except ValueError:
+                    raise HTTPError(400, 'request body is not valid JSON')
+            status, result = await getattr(self, handler)(query, data, *match.groups())
+        except HTTPError as error:
+            return error.status, _encode({'error': str(error)}), {}
+        except Exception as error:
+            return 500, _encode({'error': f'{type(error).__name__}: {error}'}), {}
+
+        if status == 204:
+            return status, b'', {}
+        payload = _encode(result)
+        if method != 'GET':
+            return status, payload, {}
+        etag = _etag(payload)
+        if _etag_matches(etag, headers.get('if-none-match')):
+            return 304, b'', {'ETag': etag}
+        return status, payload, {'ETag': etag}
+
+    def _response(self, status: int, body: bytes = b'', headers: Optional[Dict] = None,
+                  keep_alive: bool = True) -> bytes:
+        lines = [f'HTTP/1.1 {status} {HTTPStatus(status).phrase}']
+        if status not in (204, 304):
+            lines.append('Content-Type: application/json; charset=utf-8')
+            lines.append(f'Content-Length: {len(body)}')
+        if headers:
+            lines.extend(f'{name}: {value}' for name, value in headers.items())
+        # Clients must revalidate, which the ETag makes cheap
+        lines.append('Cache-Control: no-cache')
+        if not keep_alive:
+            lines.append('Connection: close')
+        return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + body
+
+    # Handlers: (query, JSON body, path groups) -> (status, result)
+
+    async def _get_books(self, query, data):
+        total, books, cursor = await self.read(
+            call_method, 'get_book_list', query.get('status') or None, _limit(query),
+            decode_cursor(query.get('cursor')))
+        return 200, {'total': total, 'books': books, 'next_cursor': encode_cursor(cursor)}
+
+    async def _post_book(self, query, data):
+        fields = _fields(data, BOOK_FIELDS)
+        _check_names(fields)
+        fields['total_pages'] = _int(fields.get('total_pages'), 'total_pages', minimum=0)
+        _check_status(fields)
+        return 201, await self.writer.run(_add_book, fields)
+
+    async def _get_book(self, query, data, book_id):
+        book = await self.read(call_method, 'get_book', int(book_id))
+        if book is None:
+            raise HTTPError(404, f'no book with id {book_id}')
+        return 200, book
+
+    async def _patch_book(self, query, data, book_id):
+        fields = _fields(data, BOOK_FIELDS)
+        if not fields:
+            raise HTTPError(400, 'nothing to update')
+        _check_names(fields, required=False)
+        if 'total_pages' in fields:
+            fields['total_pages'] = _int(fields['total_pages'], 'total_pages', minimum=0)
+        _check_status(fields)
+        return 200, await self.writer.run(_update_book, int(book_id), fields)
+
+    async def _delete_book(self, query, data, book_id):
+        if not await self.writer.delete_book(int(book_id)):
+            raise HTTPError(404, f'no book with id {book_id}')
+        return 204, None
+
+    async def _get_sessions(self, query, data):
+        sessions, cursor = await self.read(
+            call_method, 'get_sessions_page', _int(query.get('book_id'), 'book_id'),
+            _limit(query), decode_cursor(query.get('cursor')),
+            query.get('since') or None, query.get('until') or None)
+        return 200, {'sessions': sessions, 'next_cursor': encode_cursor(cursor)}
+
+    async def _post_session(self, query, data):
+        fields = _fields(data, SESSION_FIELDS)
+        fields['book_id'] = _int(fields.get('book_id'), 'book_id')
+        fields['duration_seconds'] = _int(fields.get('duration_seconds'), 'duration_seconds',
+                                          minimum=0)
+        fields['pages_read'] = _int(fields.get('pages_read'), 'pages_read', minimum=0)
+        if fields['book_id'] is None or fields['duration_seconds'] is None:
+            raise HTTPError(400, 'book_id and duration_seconds are required')
+        return 201, await self.writer.run(_add_session, fields)
+
+    async def _get_stats(self, query, data):
+        days = _int(query.get('days'), 'days', minimum=1) or 30
+        return 200, await self.read(call_method, 'get_statistics', days)
+
+    async def _get_search(self, query, data):
+        if not query.get('q', '').strip():
+            raise HTTPError(400, 'q is required')
+        return 200, await self.read(call_method, 'search', query['q'], _limit(query, 20))
+
+
+def main(argv=None):
+    """Serve the library until interrupted."""
+    import argparse
+    parser = argparse.ArgumentParser(prog='booktrack-server',
+                                     description='Serve a Booktrack library over HTTP/JSON.')
+    parser.add_argument('--db', metavar='PATH',
+                        help='database file (default: ~/.booktrack/booktrack.db)')
+    parser.add_argument('--host', default=DEFAULT_HOST,
+                        help=f'interface to listen on (default: {DEFAULT_HOST})')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT,
+                        help=f'port to listen on (default: {DEFAULT_PORT})')
+    parser.add_argument('--readers', type=int, default=DEFAULT_READERS,
+                        help=f'reader threads (default: {DEFAULT_READERS})')
+    args = parser.parse_args(argv)
+
+    server = BooktrackServer(args.db, args.host, args.port, args.readers)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,212 @@
+"""
+Concurrent reading sessions.
+
+``SessionManager`` keeps one Timer per book, so several books can be timed
+at once, and drives all of them from a single scheduled wakeup on the
+event loop rather than one per timer. The running timers' next tick
+boundaries are kept in a heap, so each wakeup only touches the timers
+whose tick is due, then schedules the next wakeup for the earliest
+upcoming boundary.
+
+Timers started at different moments cross their boundaries at different
+times, so wakeups are kept at least min_interval_ns apart: however many
+timers run, the loop wakes at most 1 / min_interval times per second, and
+a tick is never more than min_interval late.
+"""
+
+import asyncio
+import heapq
+import time
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .timer import NS_PER_SECOND, TICK_MARGIN_NS, Timer
+
+# Minimum time between two wakeups of the shared tick loop
+MIN_TICK_INTERVAL_NS = 50_000_000
+
+
+class SessionManager:
+    """The running reading sessions, one Timer per book id."""
+
+    def __init__(self, clock: Callable[[], int] = time.monotonic_ns,
+                 tick_ns: int = NS_PER_SECOND,
+                 min_interval_ns: int = MIN_TICK_INTERVAL_NS):
+        self.clock = clock
+        self.tick_ns = tick_ns
+        self.min_interval_ns = min_interval_ns
+        self.timers: Dict[int, Timer] = {}
+        self.tick_callbacks: List[Callable[[int, float], None]] = []
+        # Number of times the shared tick loop has woken up
+        self.wakeups = 0
+        # (clock reading of the next tick, book id) of running timers; an
+        # entry is stale unless it matches the book's entry in _due
+        self._heap: List[Tuple[int, int]] = []
+        self._due: Dict[int, int] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._handle: Optional[asyncio.TimerHandle] = None
+        self._wake_ns: Optional[int] = None
+        self._last_wake_ns: Optional[int] = None
+
+    def __len__(self) -> int:
+        return len(self.timers)
+
+    def __contains__(self, book_id: int) -> bool:
+        return book_id in self.timers
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(list(self.timers))
+
+    def get(self, book_id: int) -> Optional[Timer]:
+        """The timer of book_id's session, or None."""
+        return self.timers.get(book_id)
+
+    def start(self, book_id: int) -> Timer:
+        """Start timing a session for book_id, or resume the one it has."""
+        timer = self.timers.get(book_id)
+        if timer is None:
+            timer = self.timers[book_id] = Timer(self.clock, self.tick_ns)
+        timer.resume()
+        if book_id not in self._due:
+            self._push(book_id, timer)
+            self._reschedule()
+        return timer
+
+    def restore(self, book_id: int, elapsed_seconds: float) -> Timer:
+        """Add a paused session for book_id holding elapsed_seconds, e.g. from a checkpoint."""
+        timer = Timer.restore(elapsed_seconds, clock=self.clock, tick_ns=self.tick_ns)
+        self.discard(book_id)
+        self.timers[book_id] = timer
+        return timer
+
+    def pause(self, book_id: int):
+        """Pause book_id's session."""
+        timer = self.timers.get(book_id)
+        if timer is not None:
+            timer.pause()
+            self._due.pop(book_id, None)
+            self._reschedule()
+
+    def resume(self, book_id: int):
+        """Resume book_id's session."""
+        if book_id in self.timers:
+            self.start(book_id)
+
+    def discard(self, book_id: int) -> Optional[Timer]:
+        """Drop book_id's session without saving it; returns its timer."""
+        timer = self.timers.pop(book_id, None)
+        self._due.pop(book_id, None)
+        if timer is not None:
+            timer.stop()
+            self._reschedule()
+        return timer
+
+    def stop(self, book_ids: Optional[Iterable[int]] = None) -> List[Dict]:
+        """Stop and remove sessions, every one by default.
+
+        Returns a {'book_id', 'duration_seconds'} dict per session, ready
+        to be completed with pages_read and notes and passed to
+        DatabaseManager.save_sessions(), which saves them all in one
+        transaction.
+        """
+        if book_ids is None:
+            book_ids = list(self.timers)
+        finished = []
+        for book_id in book_ids:
+            timer = self.discard(book_id)
+            if timer is not None:
+                finished.append({'book_id': book_id,
+                                 'duration_seconds': int(timer.get_elapsed_time())})
+        return finished
+
+    def checkpoints(self) -> List[Tuple[int, float, bool]]:
+        """(book_id, elapsed_seconds, is_running) of every session.
+
+        For DatabaseManager.checkpoint_sessions().
+        """
+        return [(book_id, timer.get_elapsed_time(), timer.is_running)
+                for book_id, timer in self.timers.items()]
+
+    def add_tick_callback(self, callback: Callable[[int, float], None]):
+        """Call callback(book_id, elapsed_seconds) on every tick of every session."""
+        self.tick_callbacks.append(callback)
+
+    def remove_tick_callback(self, callback: Callable[[int, float], None]):
+        """Stop calling callback on ticks."""
+        if callback in self.tick_callbacks:
+            self.tick_callbacks.remove(callback)
+
+    def start_ticking(self, loop: Optional[asyncio.AbstractEventLoop] = None):
+        """Dispatch ticks on loop (the running loop by default).
+
+        Every session ticks once straight away, so displays catch up after
+        ticking was suspended.
+        """
+        self._loop = loop or asyncio.get_running_loop()
+        self._heap = []
+        self._due = {}
+        for book_id, timer in list(self.timers.items()):
+            if timer.is_running:
+                self._push(book_id, timer)
+        for book_id, timer in list(self.timers.items()):
+            self._dispatch(book_id, timer)
+        self._reschedule()
+
+    def stop_ticking(self):
+        """Suspend ticks, e.g. in the background; the timers keep counting."""
+        self._cancel()
+        self._loop = None
+
+    def _push(self, book_id: int, timer: Timer):
+        due = timer.next_tick_ns()
+        self._due[book_id] = due
+        heapq.heappush(self._heap, (due, book_id))
+
+    def _reschedule(self):
+        """Move the shared wakeup to the earliest upcoming tick, if that is sooner."""
+        heap = self._heap
+        while heap and self._due.get(heap[0][1]) != heap[0][0]:
+            heapq.heappop(heap)
+        if self._loop is None or not heap:
+            self._cancel()
+            return
+        due = heap[0][0] + TICK_MARGIN_NS
+        if self._last_wake_ns is not None:
+            due = max(due, self._last_wake_ns + self.min_interval_ns)
+        if self._handle is not None:
+            if self._wake_ns <= due:
+                return
+            self._cancel()
+        self._wake_ns = due
+        self._handle = self._loop.call_later((due - self.clock()) / NS_PER_SECOND, self._wake)
+
+    def _cancel(self):
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+            self._wake_ns = None
+
+    def _wake(self):
+        self._handle = None
+        self._wake_ns = None
+        now = self._last_wake_ns = self.clock()
+        self.wakeups += 1
+
+        heap = self._heap
+        due = []
+        while heap and heap[0][0] <= now:
+            tick_ns, book_id = heapq.heappop(heap)
+            if self._due.get(book_id) == tick_ns:
+                timer = self.timers[book_id]
+                self._push(book_id, timer)
+                due.append((book_id, timer))
+        # Rescheduled before the callbacks run, so one that raises does not
+        # stop the ticks
+        self._reschedule()
+        for book_id, timer in due:
+            self._dispatch(book_id, timer)
+
+    def _dispatch(self, book_id: int, timer: Timer):
+        timer.dispatch_tick()
+        elapsed = timer.get_elapsed_time()
+        for callback in list(self.tick_callbacks):
+            callback(book_id, elapsed)
@@ -0,0 +1,267 @@
+"""
+Reading statistics engine.
+
+Metrics are computed from the per-day, per-book and per-status rollup
+tables, which triggers keep current on every write (see migration 4), so
+opening the statistics view never scans reading_sessions. Metrics are
+registered with ``@metric`` and computed from the shared buckets, so adding
+a metric never adds a query.
+
+``rebuild_rollups`` and ``verify_rollups`` recompute the rollups from the
+raw tables to repair or check them.
+"""
+
+import sqlite3
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Tuple
+
+
+class StatsBuckets:
+    """Aggregated reading data that all metrics are computed from."""
+
+    def __init__(self, since_day: str = ''):
+        # day -> (seconds, sessions, pages), for days inside the recent window
+        self.per_day: Dict[str, Tuple[int, int, int]] = {}
+        # book_id -> (seconds, sessions, pages, seconds of sessions with pages)
+        self.per_book: Dict[int, Tuple[int, int, int, int]] = {}
+        # status -> number of books
+        self.status_counts: Dict[str, int] = {}
+        # book_id -> title, for books that have sessions
+        self.titles: Dict[int, str] = {}
+        # First day (YYYY-MM-DD) of the recent window used by daily_stats
+        self.since_day = since_day
+        # Longest run of consecutive days with a session, over all history
+        self.longest_streak = 0
+
+    @property
+    def total_seconds(self) -> int:
+        return sum(book[0] for book in self.per_book.values())
+
+    @property
+    def total_sessions(self) -> int:
+        return sum(book[1] for book in self.per_book.values())
+
+    @property
+    def recent_days(self) -> Dict[str, int]:
+        """Reading seconds for each day inside the recent window."""
+        return {day: totals[0] for day, totals in self.per_day.items()}
+
+
+# name -> function(buckets) computing that metric
+METRICS: Dict[str, Callable[[StatsBuckets], object]] = {}
+
+
+def metric(name: str):
+    """Register a metric under the given statistics key."""
+    def register(func: Callable[[StatsBuckets], object]):
+        METRICS[name] = func
+        return func
+    return register
+
+
+def load_buckets(conn: sqlite3.Connection, days: int = 30) -> StatsBuckets:
+    """Load the statistics rollups into buckets.
+
+    Only the recent window of daily_rollup is read; the longest streak is
+    computed over all of it by SQLite, so no per-day rows outside the
+    window are returned.
+    """
+    since_day = conn.execute(
+        "SELECT DATE('now', ?)", (f'-{int(days)} days',)
+    ).fetchone()[0]
+    buckets = StatsBuckets(since_day)
+
+    buckets.status_counts = dict(conn.execute(
+        'SELECT status, book_count FROM status_rollup'
+    ))
+    for book_id, title, *totals in conn.execute('''
+        SELECT r.book_id, b.title, r.total_seconds, r.session_count,
+               r.pages_read, r.paged_seconds
+        FROM book_rollup r
+        JOIN books b ON b.id = r.book_id
+    '''):
+        buckets.per_book[book_id] = tuple(totals)
+        buckets.titles[book_id] = title
+    for day, *totals in conn.execute('''
+        SELECT day, total_seconds, session_count, pages_read FROM daily_rollup
+        WHERE day >= ?
+    ''', (since_day,)):
+        buckets.per_day[day] = tuple(totals)
+    # Days in one run share julianday(day) minus their position
+    buckets.longest_streak = conn.execute('''
+        SELECT COALESCE(MAX(length), 0) FROM (
+            SELECT COUNT(*) AS length FROM (
+                SELECT julianday(day) - ROW_NUMBER() OVER (ORDER BY day) AS run
+                FROM daily_rollup
+            )
+            GROUP BY run
+        )
+    ''').fetchone()[0]
+
+    return buckets
+
+
+# Queries recomputing each rollup from the raw tables
+_ROLLUP_SOURCES = {
+    'daily_rollup': (
+        'day, total_seconds, session_count, pages_read',
+        '''
+        SELECT DATE(session_date), SUM(duration_seconds), COUNT(*),
+               COALESCE(SUM(pages_read), 0)
+        FROM reading_sessions
+        WHERE DATE(session_date) IS NOT NULL
+        GROUP BY DATE(session_date)
+        ''',
+    ),
+    'book_rollup': (
+        'book_id, total_seconds, session_count, pages_read, paged_seconds',
+        '''
+        SELECT book_id, SUM(duration_seconds), COUNT(*),
+               COALESCE(SUM(pages_read), 0),
+               COALESCE(SUM(CASE WHEN pages_read IS NOT NULL
+                                 THEN duration_seconds END), 0)
+        FROM reading_sessions
+        GROUP BY book_id
+        ''',
+    ),
+    'status_rollup': (
+        'status, book_count',
+        'SELECT status, COUNT(*) FROM books GROUP BY status',
+    ),
+}
+
+
+def rebuild_rollups(conn: sqlite3.Connection):
+    """Recompute every rollup table from books and reading_sessions."""
+    with conn:
+        for table, (columns, source) in _ROLLUP_SOURCES.items():
+            conn.execute(f'DELETE FROM {table}')
+            conn.execute(f'INSERT INTO {table} ({columns}) {source}')
+
+
+@contextmanager
+def deferred_session_rollups(conn: sqlite3.Connection):
+    """Suspend the per-row session rollup trigger for a bulk insert.
+
+    Sessions inserted inside the block are folded into the rollups with
+    one grouped statement per table when it exits. Must run inside the
+    caller's transaction, which also makes the suspension invisible to
+    other connections.
+    """
+    last_id = conn.execute(
+        'SELECT COALESCE(MAX(id), 0) FROM reading_sessions'
+    ).fetchone()[0]
+    conn.execute('INSERT INTO rollup_deferred (id) VALUES (1)')
+    yield
+    conn.execute('''
+        INSERT INTO daily_rollup (day, total_seconds, session_count, pages_read)
+        SELECT DATE(session_date), SUM(duration_seconds), COUNT(*),
+               COALESCE(SUM(pages_read), 0)
+        FROM reading_sessions
+        WHERE id > ? AND DATE(session_date) IS NOT NULL
+        GROUP BY DATE(session_date)
+        ON CONFLICT (day) DO UPDATE SET
+            total_seconds = total_seconds + excluded.total_seconds,
+            session_count = session_count + excluded.session_count,
+            pages_read = pages_read + excluded.pages_read
+    ''', (last_id,))
+    conn.execute('''
+        INSERT INTO book_rollup
+            (book_id, total_seconds, session_count, pages_read, paged_seconds)
+        SELECT book_id, SUM(duration_seconds), COUNT(*),
+               COALESCE(SUM(pages_read), 0),
+               COALESCE(SUM(CASE WHEN pages_read IS NOT NULL
+                                 THEN duration_seconds END), 0)
+        FROM reading_sessions
+        WHERE id > ?
+        GROUP BY book_id
+        ON CONFLICT (book_id) DO UPDATE SET
+            total_seconds = total_seconds + excluded.total_seconds,
+            session_count = session_count + excluded.session_count,
+            pages_read = pages_read + excluded.pages_read,
+            paged_seconds = paged_seconds + excluded.paged_seconds
+    ''', (last_id,))
+    conn.execute('DELETE FROM rollup_deferred')
+
+
+def verify_rollups(conn: sqlite3.Connection) -> List[str]:
+    """Compare the rollups with the raw data; return any differences."""
+    problems = []
+    for table, (columns, source) in _ROLLUP_SOURCES.items():
+        expected = {row[0]: row[1:] for row in conn.execute(source)}
+        actual = {row[0]: row[1:] for row in conn.execute(
+            f'SELECT {columns} FROM {table}'
+        )}
+        for key in sorted(set(expected) | set(actual), key=str):
+            if expected.get(key) != actual.get(key):
+                problems.append(
+                    f'{table}[{key}]: expected {expected.get(key)}, '
+                    f'found {actual.get(key)}'
+                )
+    return problems
+
+
+def compute_statistics(conn: sqlite3.Connection, days: int = 30) -> Dict:
+    """Compute every registered metric from the rollup tables."""
+    buckets = load_buckets(conn, days)
+    return {name: func(buckets) for name, func in METRICS.items()}
+
+
+@metric('total_reading_time_seconds')
+def total_reading_time_seconds(buckets: StatsBuckets) -> int:
+    return buckets.total_seconds
+
+
+@metric('total_sessions')
+def total_sessions(buckets: StatsBuckets) -> int:
+    return buckets.total_sessions
+
+
+@metric('total_books')
+def total_books(buckets: StatsBuckets) -> int:
+    return sum(buckets.status_counts.values())
+
+
+@metric('books_by_status')
+def books_by_status(buckets: StatsBuckets) -> Dict[str, int]:
+    return dict(buckets.status_counts)
+
+
+@metric('daily_stats')
+def daily_stats(buckets: StatsBuckets) -> List[Tuple[str, int]]:
+    """Reading seconds per day inside the recent window, newest first."""
+    return sorted(buckets.recent_days.items(), reverse=True)
+
+
+@metric('per_book')
+def per_book(buckets: StatsBuckets) -> Dict[int, Dict]:
+    """Totals for every book that has at least one session."""
+    result = {}
+    for book_id, (seconds, sessions, pages, _) in buckets.per_book.items():
+        result[book_id] = {
+            'title': buckets.titles.get(book_id),
+            'total_seconds': seconds,
+            'sessions': sessions,
+            'pages_read': pages,
+        }
+    return result
+
+
+@metric('pages_per_hour')
+def pages_per_hour(buckets: StatsBuckets) -> float:
+    """Reading speed over sessions that recorded pages read."""
+    pages = sum(book[2] for book in buckets.per_book.values())
+    seconds = sum(book[3] for book in buckets.per_book.values())
+    return pages / (seconds / 3600) if seconds else 0.0
+
+
+@metric('average_session_seconds')
+def average_session_seconds(buckets: StatsBuckets) -> float:
+    sessions = buckets.total_sessions
+    return buckets.total_seconds / sessions if sessions else 0.0
+
+
+@metric('longest_streak_days')
+def longest_streak_days(buckets: StatsBuckets) -> int:
+    """Longest run of consecutive days with at least one session."""
+    return buckets.longest_streak
@@ -0,0 +1,409 @@
+"""
+Delta sync between two Booktrack databases, such as a phone and a desktop.
+
+Every database has a random site id. Each book and reading session gets a
+global_id, the same in every database the row reaches, and an updated_at
+timestamp; triggers record each change in sync_log (see migration 8), one
+entry per row that moves to the end of the log when the row changes
+again, with deleted rows kept as tombstones. A database remembers, per
+peer, the last log entry it has applied, so a sync only reads and sends
+the rows changed since then::
+
+    from booktrack.sync import sync
+
+    with DatabaseManager('phone.db') as phone, DatabaseManager('desktop.db') as desktop:
+        sync(phone, desktop)
+
+``iter_changes`` and ``apply_changes`` are the two halves of a pull and
+exchange changesets, plain JSON-serialisable dicts, so they can also be
+carried over a network or a file.
+
+Conflicts are resolved the same way on every side: the version with the
+later updated_at wins, a deletion beats an edit made at the same moment,
+and remaining ties go to the greater content. Timestamps come from each
+device's clock. Books and sessions added on both sides before their first
+sync (for instance by importing the same export) are matched on
+(title, author), and on book, date and duration, rather than duplicated;
+the pair keeps the smaller of the two global ids. A row is never matched
+to one its sender already has, so a second copy of a book stays a copy.
+"""
+
+import json
+import sqlite3
+from typing import Dict, Iterator, Optional
+
+from .database import DEFAULT_BATCH_SIZE, DatabaseManager
+
+# Row kinds, in the order changes are sent: sessions refer to their book
+KINDS = ('book', 'reading_session')
+
+_TABLES = {'book': 'books', 'reading_session': 'reading_sessions'}
+
+BOOK_FIELDS = ('title', 'author', 'total_pages', 'cover_image_url', 'status', 'created_at')
+SESSION_FIELDS = ('duration_seconds', 'pages_read', 'notes', 'session_date')
+
+_NOW_MS = "strftime('%Y-%m-%d %H:%M:%f', 'now')"
+
+_CHANGES_QUERY = {
+    'book': '''
+        SELECT l.seq, l.global_id, l.deleted, l.updated_at, l.origin, b.id,
+               b.title, b.author, b.total_pages, b.cover_image_url, b.status, b.created_at,
+               (SELECT json_group_array(o.global_id) FROM books o
+                WHERE o.title = b.title AND o.author = b.author AND o.id != b.id)
+        FROM sync_log l
+        LEFT JOIN books b ON b.global_id = l.global_id
+        WHERE l.kind = 'book' AND l.seq > ? AND l.seq <= ?
+        ORDER BY l.seq
+        LIMIT ?
+    ''',
+    'reading_session': '''
+        SELECT l.seq, l.global_id, l.deleted, l.updated_at, l.origin, rs.id,
+               rs.duration_seconds, rs.pages_read, rs.notes, rs.session_date,
+               b.global_id, b.title, b.author,
+               (SELECT json_group_array(o.global_id) FROM reading_sessions o
+                WHERE o.book_id = rs.book_id AND o.session_date = rs.session_date
+                      AND o.duration_seconds = rs.duration_seconds AND o.id != rs.id)
+        FROM sync_log l
+        LEFT JOIN reading_sessions rs ON rs.global_id = l.global_id
+        LEFT JOIN books b ON b.id = rs.book_id
+        WHERE l.kind = 'reading_session' AND l.seq > ? AND l.seq <= ?
+        ORDER BY l.seq
+        LIMIT ?
+    ''',
+}
+
+
+def site_id(db: DatabaseManager) -> str:
+    """This database's site id."""
+    return db.get_connection().execute('SELECT site_id FROM sync_site').fetchone()[0]
+
+
+def watermarks(db: DatabaseManager, peer: str) -> Dict[str, int]:
+    """The last sync_log seq of peer's, per kind, that db has applied."""
+    rows = db.get_connection().execute(
+        'SELECT kind, seq FROM sync_peers WHERE site_id = ?', (peer,))
+    return dict(rows)
+
+
+def _stamp_new_rows(conn: sqlite3.Connection) -> str:
+    """Give rows added since the last sync a global_id and a log entry.
+
+    Ids are site:rowid, unique because rowids are never reused. Returns
+    the site id.
+    """
+    site = conn.execute('SELECT site_id FROM sync_site').fetchone()[0]
+    for kind, created in (('book', 'created_at'), ('reading_session', 'session_date')):
+        table = _TABLES[kind]
+        stamp = (f"COALESCE(updated_at, strftime('%Y-%m-%d %H:%M:%f', {created}), "
+                 f"{_NOW_MS})")
+        conn.execute(f'''
+            INSERT OR REPLACE INTO sync_log (kind, global_id, deleted, updated_at)
+            SELECT ?, ? || ':' || id, 0, {stamp} FROM {table} WHERE global_id IS NULL
+        ''', (kind, site))
+        conn.execute(f'''
+            UPDATE {table} SET global_id = ? || ':' || id, updated_at = {stamp}
+            WHERE global_id IS NULL
+        ''', (site,))
+    return site
+
+
+def iter_changes(db: DatabaseManager, since: Optional[Dict[str, int]] = None,
+                 peer: Optional[str] = None,
+                 batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[Dict]:
+    """Yield db's changes after the since watermarks, as changesets.
+
+    A changeset is ``{'site_id', 'kind', 'seq', 'changes'}`` holding up to
+    batch_size changes of one kind; books come before sessions. Once it
+    has been applied, the receiver has everything up to seq. Changes that
+    db received from peer are not sent back to it, but still count towards
+    seq, so a changeset's changes may be empty.
+
+    The log is read in one snapshot, after rows added since the last sync
+    have been given their global ids.
+    """
+    since = since or {}
+    with db.transaction() as conn:
+        site = _stamp_new_rows(conn)
+
+    owns_transaction = not conn.in_transaction
+    if owns_transaction:
+        conn.execute('BEGIN')
+    try:
+        for kind in KINDS:
+            last = since.get(kind, 0)
+            top = conn.execute(
+                'SELECT COALESCE(MAX(seq), 0) FROM sync_log WHERE kind = ?', (kind,)
+            ).fetchone()[0]
+            while last < top:
+                rows = conn.execute(_CHANGES_QUERY[kind], (last, top, batch_size)).fetchall()
+                if not rows:
+                    break
+                changes = []
+                for seq, global_id, deleted, updated_at, origin, row_id, *values, same_key \
+                        in rows:
+                    if origin is not None and origin == peer:
+                        continue
+                    change = {'global_id': global_id, 'updated_at': updated_at,
+                              'deleted': bool(deleted)}
+                    if not deleted:
+                        if row_id is None:
+                            continue
+                        if kind == 'book':
+                            change.update(zip(BOOK_FIELDS, values))
+                        else:
+                            change.update(zip(SESSION_FIELDS, values[:4]))
+                            change.update(zip(('book_global_id', 'book_title', 'book_author'),
+                                              values[4:]))
+                        if same_key != '[]':
+                            # Rows the receiver must not merge this one into
+                            change['same_key_ids'] = json.loads(same_key)
+                    changes.append(change)
+                last = rows[-1][0]
+                yield {'site_id': site, 'kind': kind, 'seq': last, 'changes': changes}
+    finally:
+        if owns_transaction:
+            conn.rollback()
+
+
+def _version(updated_at, deleted, content) -> tuple:
+    """Sort key deciding which version of a row wins a conflict."""
+    return (updated_at or '', 1 if deleted else 0,
+            '' if deleted else json.dumps(content, separators=(',', ':'), default=str))
+
+
+_LOCAL_ROWS = {
+    'book': f'''
+        SELECT id, global_id, updated_at, {', '.join(BOOK_FIELDS)}
+        FROM books
+    ''',
+    'reading_session': f'''
+        SELECT rs.id, rs.global_id, rs.updated_at, b.global_id,
+               {', '.join('rs.' + field for field in SESSION_FIELDS)}
+        FROM reading_sessions rs JOIN books b ON b.id = rs.book_id
+    ''',
+}
+
+# Changes are compared on these, in this order
+_CONTENT = {'book': BOOK_FIELDS, 'reading_session': ('book_global_id',) + SESSION_FIELDS}
+
+
+def _log(conn: sqlite3.Connection, kind: str, global_id: str, deleted: bool,
+         updated_at: str, origin: Optional[str]):
+    conn.execute('''
+        INSERT OR REPLACE INTO sync_log (kind, global_id, deleted, updated_at, origin)
+        VALUES (?, ?, ?, ?, ?)
+    ''', (kind, global_id, int(deleted), updated_at, origin))
+
+
+class _Applier:
+    """Applies one changeset's changes, sharing lookups between them.
+
+    The local rows and tombstones for every global id in the changeset
+    are read up front in one query each, so a change costs only the
+    statements that write it.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, changeset: Dict):
+        self.conn = conn
+        self.kind = changeset['kind']
+        self.source = changeset['site_id']
+        ids = json.dumps([change['global_id'] for change in changeset['changes']])
+        alias = 'rs.' if self.kind == 'reading_session' else ''
+        self.rows = {row[1]: row for row in conn.execute(
+            _LOCAL_ROWS[self.kind]
+            + f'WHERE {alias}global_id IN (SELECT value FROM json_each(?))', (ids,))}
+        self.tombstones = dict(conn.execute('''
+            SELECT global_id, updated_at FROM sync_log
+            WHERE kind = ? AND deleted = 1 AND global_id IN (SELECT value FROM json_each(?))
+        ''', (self.kind, ids)))
+        # Local rows already matched to or created for a change in this
+        # changeset, which later changes must not be merged into
+        self.claimed = set()
+        self.book_ids = {}
+
+    def apply(self, change: Dict) -> str:
+        """Apply one change; returns 'applied', 'deleted' or 'ignored'."""
+        global_id = change['global_id']
+        row = self.rows.get(global_id)
+        if row is not None:
+            self.claimed.add(row[0])
+            if self._version(change) <= _version(row[2], False, list(row[3:])):
+                return 'ignored'
+        elif global_id in self.tombstones:
+            if self._version(change) <= _version(self.tombstones[global_id], True, None):
+                return 'ignored'
+
+        if change['deleted']:
+            if row is not None:
+                self.conn.execute(f'DELETE FROM {_TABLES[self.kind]} WHERE id = ?', (row[0],))
+            _log(self.conn, self.kind, global_id, True, change['updated_at'], self.source)
+            return 'deleted'
+
+        values = self._values(change)
+        if values is None:
+            return 'ignored'
+        if row is not None:
+            self._write(row[0], values, change['updated_at'])
+        elif global_id not in self.tombstones and self._merge(change, values):
+            return 'applied'
+        else:
+            self._insert(values, global_id, change['updated_at'])
+        _log(self.conn, self.kind, global_id, False, change['updated_at'], self.source)
+        return 'applied'
+
+    def _version(self, change: Dict) -> tuple:
+        return _version(change['updated_at'], change['deleted'],
+                        [change.get(field) for field in _CONTENT[self.kind]])
+
+    def _values(self, change: Dict) -> Optional[list]:
+        """The column values to store, or None for a session without its book here."""
+        if self.kind == 'book':
+            return [change.get(field) for field in BOOK_FIELDS]
+        key = change['book_global_id']
+        if key not in self.book_ids:
+            book = self.conn.execute('SELECT id FROM books WHERE global_id = ?',
+                                     (key,)).fetchone()
+            if book is None:
+                # The peer's book may still be known here under its own global id
+                book = self.conn.execute('''
+                    SELECT id FROM books WHERE title = ? AND author = ?
+                    ORDER BY global_id LIMIT 1
+                ''', (change['book_title'], change['book_author'])).fetchone()
+            self.book_ids[key] = book[0] if book else None
+        if self.book_ids[key] is None:
+            return None
+        return [self.book_ids[key]] + [change.get(field) for field in SESSION_FIELDS]
+
+    def _write(self, row_id: int, values: list, updated_at: str):
+        if self.kind == 'book':
+            self.conn.execute('''
+                UPDATE books SET title = ?, author = ?, total_pages = ?, cover_image_url = ?,
+                                 status = ?, created_at = ?, updated_at = ?
+                WHERE id = ?
+            ''', values + [updated_at, row_id])
+        else:
+            self.conn.execute('''
+                UPDATE reading_sessions SET book_id = ?, duration_seconds = ?, pages_read = ?,
+                                            notes = ?, session_date = ?, updated_at = ?
+                WHERE id = ?
+            ''', values + [updated_at, row_id])
+
+    def _insert(self, values: list, global_id: str, updated_at: str):
+        if self.kind == 'book':
+            cursor = self.conn.execute(f'''
+                INSERT INTO books ({', '.join(BOOK_FIELDS)}, global_id, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', values + [global_id, updated_at])
+        else:
+            cursor = self.conn.execute(f'''
+                INSERT INTO reading_sessions
+                    (book_id, {', '.join(SESSION_FIELDS)}, global_id, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', values + [global_id, updated_at])
+        self.claimed.add(cursor.lastrowid)
+
+    def _merge(self, change: Dict, values: list) -> bool:
+        """Fold a peer's new row into a local row with the same content, if any.
+
+        Books match on (title, author), sessions on book, date and
+        duration. Rows the peer holds itself, listed in the change's
+        same_key_ids, are a second copy the peer already knows apart from
+        this one, and are never merged. The pair keeps the smaller global
+        id and the winning version; unless the peer already has exactly
+        that, the result is logged as a local change so it goes back to
+        the peer too.
+        """
+        if self.kind == 'book':
+            where = 'WHERE title = ? AND author = ? ORDER BY global_id'
+            key = (change['title'], change['author'])
+        else:
+            where = ('WHERE rs.book_id = ? AND rs.session_date = ? '
+                     'AND rs.duration_seconds = ? ORDER BY rs.global_id')
+            key = (values[0], change['session_date'], change['duration_seconds'])
+        known = set(change.get('same_key_ids', ()))
+        candidate = next((
+            row for row in self.conn.execute(_LOCAL_ROWS[self.kind] + where, key)
+            # Rows the peer knows by their own id are not duplicates
+            if row[0] not in self.claimed and row[1] not in self.rows and row[1] not in known
+        ), None)
+        if candidate is None:
+            return False
+
+        row_id, local_id = candidate[0], candidate[1]
+        self.claimed.add(row_id)
+        keep = min(change['global_id'], local_id)
+        if keep != local_id:
+            self.conn.execute(f'UPDATE {_TABLES[self.kind]} SET global_id = ? WHERE id = ?',
+                              (keep, row_id))
+            self.conn.execute('DELETE FROM sync_log WHERE kind = ? AND global_id = ?',
+                              (self.kind, local_id))
+        remote = self._version(change)
+        local = _version(candidate[2], False, list(candidate[3:]))
+        if remote > local:
+            self._write(row_id, values, change['updated_at'])
+        echo = keep != change['global_id'] or remote < local
+        _log(self.conn, self.kind, keep, False, max(remote, local)[0],
+             None if echo else self.source)
+        return True
+
+
+def apply_changes(db: DatabaseManager, changeset: Dict) -> Dict[str, int]:
+    """Apply a changeset from iter_changes to db in one transaction.
+
+    Advances db's watermark for the sending site along with the changes.
+    Returns how many changes were applied, deleted a row and were ignored,
+    either because db already had the same or a newer version or, for a
+    session, because its book is not in db.
+    """
+    kind = changeset['kind']
+    counts = {'applied': 0, 'deleted': 0, 'ignored': 0}
+    with db.transaction() as conn:
+        conn.execute('INSERT OR IGNORE INTO sync_applying (id) VALUES (1)')
+        try:
+            _stamp_new_rows(conn)
+            applier = _Applier(conn, changeset)
+            for change in changeset['changes']:
+                counts[applier.apply(change)] += 1
+            conn.execute('''
+                INSERT INTO sync_peers (site_id, kind, seq) VALUES (?, ?, ?)
+                ON CONFLICT (site_id, kind) DO UPDATE SET seq = MAX(seq, excluded.seq)
+            ''', (changeset['site_id'], kind, changeset['seq']))
+        finally:
+            conn.execute('DELETE FROM sync_applying')
+
+        if counts['applied'] or counts['deleted']:
+            # Deleted books take their sessions with them
+            db.notify_bulk_change(*(('books', 'reading_sessions') if kind == 'book'
+                                    else ('reading_sessions',)))
+    return counts
+
+
+def pull(db: DatabaseManager, peer: DatabaseManager,
+         batch_size: int = DEFAULT_BATCH_SIZE) -> Dict[str, int]:
+    """Apply to db the changes made in peer since db last pulled from it.
+
+    Returns the number of changes received, and the totals from
+    apply_changes.
+    """
+    totals = {'changes': 0, 'applied': 0, 'deleted': 0, 'ignored': 0}
+    since = watermarks(db, site_id(peer))
+    # One transaction for the whole pull, so a first sync commits once
+    # rather than once per changeset
+    with db.transaction():
+        for changeset in iter_changes(peer, since, site_id(db), batch_size):
+            totals['changes'] += len(changeset['changes'])
+            for key, count in apply_changes(db, changeset).items():
+                totals[key] += count
+    return totals
+
+
+def sync(db: DatabaseManager, peer: DatabaseManager,
+         batch_size: int = DEFAULT_BATCH_SIZE) -> Dict[str, Dict[str, int]]:
+    """Bring db and peer up to date with each other.
+
+    Pulls peer's changes into db, then db's into peer, which includes
+    any merges made by the first pull. Returns the totals of each pull.
+    """
+    received = pull(db, peer, batch_size)
+    sent = pull(peer, db, batch_size)
+    return {'received': received, 'sent': sent}
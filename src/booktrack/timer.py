@@ -1,55 +1,91 @@
+import asyncio
 import time
-from typing import Callable, Optional
+from typing import Callable, List, Optional
+
+NS_PER_SECOND = 1_000_000_000
+
+# Ticks are scheduled this long after the boundary they are for, so a
+# wakeup that the event loop runs slightly early still sees the new second
+TICK_MARGIN_NS = 1_000_000
 
 
 class Timer:
-    """Timer class for tracking reading sessions."""
+    """Timer class for tracking reading sessions.
+    
+    Time is measured with a monotonic clock, so NTP adjustments and wall
+    clock changes do not affect it. While the timer runs and ticking is
+    started, the tick callbacks are called on the event loop each time the
+    elapsed time crosses a whole tick (one second by default). No wakeups
+    are scheduled while the timer is paused or stopped, or while ticking
+    is suspended, e.g. when the app is in the background.
+    """
     
-    def __init__(self):
-        self.start_time: Optional[float] = None
-        self.elapsed_time: float = 0.0
+    def __init__(self, clock: Callable[[], int] = time.monotonic_ns,
+                 tick_ns: int = NS_PER_SECOND):
+        self.clock = clock
+        self.tick_ns = tick_ns
         self.is_running: bool = False
-        self.on_tick_callback: Optional[Callable[[float], None]] = None
+        self.tick_callbacks: List[Callable[[float], None]] = []
+        self._started_ns: Optional[int] = None
+        self._elapsed_ns: int = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._tick_handle: Optional[asyncio.TimerHandle] = None
+    
+    @classmethod
+    def restore(cls, elapsed_seconds: float, **kwargs) -> 'Timer':
+        """Create a paused timer holding elapsed_seconds, e.g. from a checkpoint.
+        
+        kwargs are passed to the constructor.
+        """
+        timer = cls(**kwargs)
+        timer._elapsed_ns = int(elapsed_seconds * NS_PER_SECOND)
+        return timer
+    
+    @property
+    def elapsed_time(self) -> float:
+        """Seconds accumulated before the current run, if any."""
+        return self._elapsed_ns / NS_PER_SECOND
     
     def start(self):
         """Start the timer."""
         if not self.is_running:
-            self.start_time = time.time()
+            self._started_ns = self.clock()
             self.is_running = True
+            self._schedule_tick()
     
     def stop(self) -> float:
         """Stop the timer and return elapsed time in seconds."""
-        if self.is_running and self.start_time:
-            self.elapsed_time += time.time() - self.start_time
-            self.is_running = False
-            self.start_time = None
+        self.pause()
         return self.elapsed_time
     
     def pause(self):
         """Pause the timer."""
-        if self.is_running and self.start_time:
-            self.elapsed_time += time.time() - self.start_time
+        if self.is_running:
+            self._elapsed_ns += self.clock() - self._started_ns
             self.is_running = False
-            self.start_time = None
+            self._started_ns = None
+            self._cancel_tick()
     
     def resume(self):
         """Resume the timer."""
-        if not self.is_running:
-            self.start_time = time.time()
-            self.is_running = True
+        self.start()
     
     def reset(self):
         """Reset the timer to zero."""
-        self.start_time = None
-        self.elapsed_time = 0.0
+        self._started_ns = None
+        self._elapsed_ns = 0
         self.is_running = False
+        self._cancel_tick()
+    
+    def get_elapsed_ns(self) -> int:
+        """Get current elapsed time in nanoseconds."""
+        if self.is_running:
+            return self._elapsed_ns + self.clock() - self._started_ns
+        return self._elapsed_ns
     
     def get_elapsed_time(self) -> float:
         """Get current elapsed time in seconds."""
-        current_elapsed = self.elapsed_time
-        if self.is_running and self.start_time:
-            current_elapsed += time.time() - self.start_time
-        return current_elapsed
+        return self.get_elapsed_ns() / NS_PER_SECOND
     
     def format_time(self, seconds: Optional[float] = None) -> str:
         """Format time as HH:MM:SS."""
@@ -63,5 +99,69 @@ class Timer:
         return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
     
     def set_on_tick_callback(self, callback: Callable[[float], None]):
-        """Set a callback function to be called periodically during timing."""
-        self.on_tick_callback = callback
+        """Set a callback function to be called periodically during timing.
+        
+        Replaces any tick callbacks added before; see add_tick_callback.
+        """
+        self.tick_callbacks = [callback]
+    
+    def add_tick_callback(self, callback: Callable[[float], None]):
+        """Call callback(elapsed_seconds) on every tick."""
+        self.tick_callbacks.append(callback)
+    
+    def remove_tick_callback(self, callback: Callable[[float], None]):
+        """Stop calling callback on ticks."""
+        if callback in self.tick_callbacks:
+            self.tick_callbacks.remove(callback)
+    
+    def next_tick_ns(self) -> Optional[int]:
+        """Clock reading at which elapsed time next crosses a whole tick.
+        
+        None while the timer is not running.
+        """
+        if not self.is_running:
+            return None
+        now = self.clock()
+        elapsed = self._elapsed_ns + now - self._started_ns
+        return now + self.tick_ns - elapsed % self.tick_ns
+    
+    def dispatch_tick(self):
+        """Call every tick callback with the current elapsed time."""
+        elapsed = self.get_elapsed_time()
+        for callback in list(self.tick_callbacks):
+            callback(elapsed)
+    
+    def start_ticking(self, loop: Optional[asyncio.AbstractEventLoop] = None):
+        """Dispatch tick callbacks on loop (the running loop by default).
+        
+        The callbacks are called once straight away, so a display can
+        catch up after ticking was suspended, and then on each tick.
+        """
+        self._loop = loop or asyncio.get_running_loop()
+        self._cancel_tick()
+        self.dispatch_tick()
+        self._schedule_tick()
+    
+    def stop_ticking(self):
+        """Suspend tick callbacks; the timer itself keeps counting."""
+        self._cancel_tick()
+        self._loop = None
+    
+    def _schedule_tick(self):
+        """Schedule a wakeup just after the next whole tick of elapsed time."""
+        if self._loop is None or not self.is_running or self._tick_handle is not None:
+            return
+        delay_ns = self.next_tick_ns() - self.clock() + TICK_MARGIN_NS
+        self._tick_handle = self._loop.call_later(delay_ns / NS_PER_SECOND, self._tick)
+    
+    def _cancel_tick(self):
+        if self._tick_handle is not None:
+            self._tick_handle.cancel()
+            self._tick_handle = None
+    
+    def _tick(self):
+        self._tick_handle = None
+        # Rescheduled before the callbacks run, so one that raises does
+        # not stop the ticks
+        self._schedule_tick()
+        self.dispatch_tick()
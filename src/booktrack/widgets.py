@@ -2,184 +2,78 @@ import toga
 from toga.style import Pack
 from toga.style.pack import COLUMN, ROW
 from typing import List, Dict, Optional
-from .database import DatabaseManager
-
-
-class BookForm:
-    """Form widget for adding/editing books."""
-    
-    def __init__(self, on_save_callback, book_data: Optional[Dict] = None):
-        self.on_save_callback = on_save_callback
-        self.book_data = book_data
-        self.is_edit_mode = book_data is not None
-        
-        # Create form inputs
-        self.title_input = toga.TextInput(
-            value=book_data.get('title', '') if book_data else '',
-            style=Pack(flex=1, margin=5)
-        )
-        
-        self.author_input = toga.TextInput(
-            value=book_data.get('author', '') if book_data else '',
-            style=Pack(flex=1, margin=5)
-        )
-        
-        self.pages_input = toga.NumberInput(
-            value=book_data.get('total_pages') if book_data and book_data.get('total_pages') else None,
-            style=Pack(flex=1, margin=5)
-        )
-        
-        self.cover_url_input = toga.TextInput(
-            value=book_data.get('cover_image_url', '') if book_data else '',
-            style=Pack(flex=1, margin=5)
-        )
-        
-        if self.is_edit_mode:
-            self.status_selection = toga.Selection(
-                items=['Active', 'Read', 'Paused', 'Abandoned'],
-                value=book_data.get('status', 'Active'),
-                style=Pack(flex=1, margin=5)
-            )
-    
-    def create_form_box(self) -> toga.Box:
-        """Create the form layout."""
-        form_box = toga.Box(style=Pack(direction=COLUMN, margin=10))
-        
-        # Title
-        form_box.add(toga.Label('Title *', style=Pack(margin=(0, 0, 5, 0))))
-        form_box.add(self.title_input)
-        
-        # Author
-        form_box.add(toga.Label('Author *', style=Pack(margin=(10, 0, 5, 0))))
-        form_box.add(self.author_input)
-        
-        # Total Pages
-        form_box.add(toga.Label('Total Pages', style=Pack(margin=(10, 0, 5, 0))))
-        form_box.add(self.pages_input)
-        
-        # Cover URL
-        form_box.add(toga.Label('Cover Image URL', style=Pack(margin=(10, 0, 5, 0))))
-        form_box.add(self.cover_url_input)
-        
-        # Status (only for edit mode)
-        if self.is_edit_mode:
-            form_box.add(toga.Label('Status', style=Pack(margin=(10, 0, 5, 0))))
-            form_box.add(self.status_selection)
-        
-        # Buttons
-        button_box = toga.Box(style=Pack(direction=ROW, margin=10))
-        
-        save_button = toga.Button(
-            'Update' if self.is_edit_mode else 'Add Book',
-            on_press=self.save_book,
-            style=Pack(flex=1, margin=5)
-        )
-        
-        cancel_button = toga.Button(
-            'Cancel',
-            on_press=self.cancel,
-            style=Pack(flex=1, margin=5)
-        )
-        
-        button_box.add(save_button)
-        button_box.add(cancel_button)
-        
-        form_box.add(button_box)
-        
-        return form_box
-    
-    def save_book(self, widget):
-        """Save the book data."""
-        # Validate required fields
-        if not self.title_input.value or not self.author_input.value:
-            # TODO: Show error message
-            return
-        
-        # Convert pages to int, handling None and empty string cases
-        total_pages = self.pages_input.value
-        if total_pages is not None and total_pages != '':
-            try:
-                total_pages = int(total_pages)
-            except (ValueError, TypeError):
-                total_pages = None
-        else:
-            total_pages = None
-        
-        book_data = {
-            'title': self.title_input.value,
-            'author': self.author_input.value,
-            'total_pages': total_pages,
-            'cover_image_url': self.cover_url_input.value if self.cover_url_input.value else None
-        }
-        
-        if self.is_edit_mode:
-            book_data['status'] = self.status_selection.value
-            book_data['id'] = self.book_data['id']
-        
-        self.on_save_callback(book_data)
-    
-    def cancel(self, widget):
-        """Cancel form operation."""
-        self.on_save_callback(None)
 
 
 class BookListItem:
-    """Widget for displaying a single book in the list."""
+    """Widget for displaying a single book in the list.
+    
+    The widget tree is built once; update() then changes only the labels
+    and buttons whose underlying data changed, so an item can be kept and
+    reused for as long as its book exists. on_start_reading and
+    on_edit_book are called with the book; on_delete_book is a coroutine
+    function, awaited with it.
+    """
     
     def __init__(self, book_data: Dict, on_start_reading, on_edit_book, on_delete_book):
         self.book_data = book_data
         self.on_start_reading = on_start_reading
         self.on_edit_book = on_edit_book
         self.on_delete_book = on_delete_book
+        self.item_box = None
     
     def create_item_box(self) -> toga.Box:
-        """Create the book item layout."""
+        """Create the book item layout, or return the one already built."""
+        if self.item_box is not None:
+            return self.item_box
+        
         item_box = toga.Box(style=Pack(direction=COLUMN, margin=5))
         
         # Book info
         info_box = toga.Box(style=Pack(direction=ROW, margin=5))
         
         # Book details
-        details_box = toga.Box(style=Pack(direction=COLUMN, flex=1))
+        self.details_box = toga.Box(style=Pack(direction=COLUMN, flex=1))
         
-        title_label = toga.Label(
+        self.title_label = toga.Label(
             self.book_data['title'],
             style=Pack(font_weight='bold', margin=(0, 0, 2, 0))
         )
         
-        author_label = toga.Label(
+        self.author_label = toga.Label(
             f"by {self.book_data['author']}",
             style=Pack(font_size=12, margin=(0, 0, 2, 0))
         )
         
-        status_label = toga.Label(
+        self.status_label = toga.Label(
             f"Status: {self.book_data['status']}",
             style=Pack(font_size=10, margin=(0, 0, 2, 0))
         )
         
-        details_box.add(title_label)
-        details_box.add(author_label)
-        details_box.add(status_label)
+        self.pages_label = toga.Label(
+            f"Pages: {self.book_data.get('total_pages')}",
+            style=Pack(font_size=10)
+        )
+        
+        self.details_box.add(self.title_label)
+        self.details_box.add(self.author_label)
+        self.details_box.add(self.status_label)
         
         if self.book_data.get('total_pages'):
-            pages_label = toga.Label(
-                f"Pages: {self.book_data['total_pages']}",
-                style=Pack(font_size=10)
-            )
-            details_box.add(pages_label)
+            self.details_box.add(self.pages_label)
         
-        info_box.add(details_box)
+        info_box.add(self.details_box)
         
         # Action buttons
-        button_box = toga.Box(style=Pack(direction=COLUMN, margin=5))
+        self.button_box = toga.Box(style=Pack(direction=COLUMN, margin=5))
+        
+        self.start_button = toga.Button(
+            'Start Reading',
+            on_press=lambda x: self.on_start_reading(self.book_data),
+            style=Pack(width=120, margin=2)
+        )
         
         if self.book_data['status'] == 'Active':
-            start_button = toga.Button(
-                'Start Reading',
-                on_press=lambda x: self.on_start_reading(self.book_data),
-                style=Pack(width=120, margin=2)
-            )
-            button_box.add(start_button)
+            self.button_box.add(self.start_button)
         
         edit_button = toga.Button(
             'Edit',
@@ -189,14 +83,14 @@ class BookListItem:
         
         delete_button = toga.Button(
             'Delete',
-            on_press=lambda x: self.on_delete_book(self.book_data),
+            on_press=self.delete_pressed,
             style=Pack(width=120, margin=2)
         )
         
-        button_box.add(edit_button)
-        button_box.add(delete_button)
+        self.button_box.add(edit_button)
+        self.button_box.add(delete_button)
         
-        info_box.add(button_box)
+        info_box.add(self.button_box)
         
         item_box.add(info_box)
         
@@ -204,92 +98,207 @@ class BookListItem:
         separator = toga.Box(style=Pack(height=1, background_color='#CCCCCC', margin=(5, 0)))
         item_box.add(separator)
         
+        self.item_box = item_box
         return item_box
+    
+    async def delete_pressed(self, widget):
+        """Delete button handler; toga only awaits coroutine functions it is given."""
+        await self.on_delete_book(self.book_data)
+    
+    def update(self, book_data: Dict) -> bool:
+        """Apply new book data, touching only what changed.
+        
+        Returns True if any widget had to change.
+        """
+        old = self.book_data
+        self.book_data = book_data
+        if self.item_box is None:
+            return False
+        
+        changed = False
+        if book_data['title'] != old['title']:
+            self.title_label.text = book_data['title']
+            changed = True
+        if book_data['author'] != old['author']:
+            self.author_label.text = f"by {book_data['author']}"
+            changed = True
+        if book_data['status'] != old['status']:
+            self.status_label.text = f"Status: {book_data['status']}"
+            is_active = book_data['status'] == 'Active'
+            if is_active != (old['status'] == 'Active'):
+                if is_active:
+                    self.button_box.insert(0, self.start_button)
+                else:
+                    self.button_box.remove(self.start_button)
+            changed = True
+        if book_data.get('total_pages') != old.get('total_pages'):
+            self.pages_label.text = f"Pages: {book_data.get('total_pages')}"
+            if bool(book_data.get('total_pages')) != bool(old.get('total_pages')):
+                if book_data.get('total_pages'):
+                    self.details_box.add(self.pages_label)
+                else:
+                    self.details_box.remove(self.pages_label)
+            changed = True
+        return changed
 
 
-class SessionLogForm:
-    """Form for logging reading session details."""
+class BookListItemPool:
+    """Keeps one BookListItem per book id so views can reuse them.
     
-    def __init__(self, duration_seconds: int, on_save_callback):
-        self.duration_seconds = duration_seconds
-        self.on_save_callback = on_save_callback
-        
-        # Create form inputs
-        self.duration_label = toga.Label(
-            f"Reading Time: {self.format_duration(duration_seconds)}",
-            style=Pack(font_weight='bold', margin=5)
-        )
-        
-        self.pages_input = toga.NumberInput(
-            style=Pack(flex=1, margin=5)
-        )
-        
-        self.notes_input = toga.MultilineTextInput(
-            style=Pack(flex=1, height=100, margin=5)
-        )
+    Switching between the Active and All views, or refreshing a view after
+    an edit, hands back the existing items; only books seen for the first
+    time are built.
+    """
     
-    def format_duration(self, seconds: int) -> str:
-        """Format duration as HH:MM:SS."""
-        hours = seconds // 3600
-        minutes = (seconds % 3600) // 60
-        seconds = seconds % 60
-        return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+    def __init__(self, on_start_reading, on_edit_book, on_delete_book):
+        self.on_start_reading = on_start_reading
+        self.on_edit_book = on_edit_book
+        self.on_delete_book = on_delete_book
+        self.items: Dict[int, BookListItem] = {}
     
-    def create_form_box(self) -> toga.Box:
-        """Create the session log form layout."""
-        form_box = toga.Box(style=Pack(direction=COLUMN, margin=10))
-        
-        form_box.add(self.duration_label)
-        
-        # Pages read
-        form_box.add(toga.Label('Pages Read', style=Pack(margin=(10, 0, 5, 0))))
-        form_box.add(self.pages_input)
-        
-        # Notes
-        form_box.add(toga.Label('Session Notes', style=Pack(margin=(10, 0, 5, 0))))
-        form_box.add(self.notes_input)
-        
-        # Buttons
-        button_box = toga.Box(style=Pack(direction=ROW, margin=10))
-        
-        save_button = toga.Button(
-            'Save Session',
-            on_press=self.save_session,
-            style=Pack(flex=1, margin=5)
-        )
-        
-        cancel_button = toga.Button(
-            'Cancel',
-            on_press=self.cancel,
-            style=Pack(flex=1, margin=5)
+    def get(self, book_data: Dict) -> BookListItem:
+        """Return the item for a book, updated to book_data."""
+        item = self.items.get(book_data['id'])
+        if item is None:
+            item = BookListItem(
+                book_data,
+                self.on_start_reading,
+                self.on_edit_book,
+                self.on_delete_book
+            )
+            self.items[book_data['id']] = item
+        else:
+            item.update(book_data)
+        return item
+    
+    def update(self, book_data: Dict) -> Optional[BookListItem]:
+        """Update a book's item if it has been built; returns the item."""
+        item = self.items.get(book_data['id'])
+        if item is not None:
+            item.update(book_data)
+        return item
+    
+    def discard(self, book_id: int):
+        """Forget a deleted book's item and detach it from its list."""
+        item = self.items.pop(book_id, None)
+        if item is not None and item.item_box is not None and item.item_box.parent:
+            item.item_box.parent.remove(item.item_box)
+    
+    def clear(self):
+        """Forget every item."""
+        self.items.clear()
+
+
+class PagedBookList:
+    """Book list that fetches and builds its rows one page at a time.
+    
+    Books past the last loaded page are neither queried nor turned into
+    widgets until load_next_page() is called, normally when the user
+    scrolls near the end of the list or presses "Load more". Rows come
+    from a BookListItemPool, so books already built for another view are
+    reused rather than rebuilt. place() and remove() patch single rows in
+    after a change without reloading anything.
+    """
+    
+    def __init__(self, fetch_page, pool: BookListItemPool, page_size: int = 20):
+        # await fetch_page(after, limit) -> (books, next_cursor)
+        self.fetch_page = fetch_page
+        self.pool = pool
+        self.page_size = page_size
+        
+        self.cursor = None
+        self.has_more = True
+        self.loading = False
+        self.closed = False
+        # Loaded rows, in display order
+        self.items: List[BookListItem] = []
+        
+        self.box = toga.Box(style=Pack(direction=COLUMN))
+        self.items_box = toga.Box(style=Pack(direction=COLUMN))
+        self.load_more_button = toga.Button(
+            'Load more',
+            on_press=self.load_next_page,
+            style=Pack(margin=5)
         )
-        
-        button_box.add(save_button)
-        button_box.add(cancel_button)
-        
-        form_box.add(button_box)
-        
-        return form_box
+        self.box.add(self.items_box)
+        self.box.add(self.load_more_button)
     
-    def save_session(self, widget):
-        """Save the session data."""
-        # Convert pages to int, handling None and empty string cases
-        pages_read = self.pages_input.value
-        if pages_read is not None and pages_read != '':
-            try:
-                pages_read = int(pages_read)
-            except (ValueError, TypeError):
-                pages_read = None
-        else:
-            pages_read = None
-        
-        session_data = {
-            'duration_seconds': self.duration_seconds,
-            'pages_read': pages_read,
-            'notes': self.notes_input.value if self.notes_input.value else None
-        }
-        self.on_save_callback(session_data)
+    async def load_next_page(self, widget=None) -> int:
+        """Fetch the next page and append its rows; returns the row count.
+        
+        Calls made while a page is still loading return 0 straight away,
+        so repeated scroll events fetch each page once.
+        """
+        if not self.has_more or self.loading:
+            return 0
+        
+        self.loading = True
+        self.load_more_button.enabled = False
+        try:
+            books, cursor = await self.fetch_page(self.cursor, self.page_size)
+        finally:
+            self.loading = False
+            self.load_more_button.enabled = True
+        # A replaced list must not take pooled rows from its successor
+        if self.closed:
+            return 0
+        return self.add_page(books, cursor)
+    
+    def close(self):
+        """Stop loading pages; called when another list replaces this one."""
+        self.closed = True
+        self.has_more = False
+    
+    def add_page(self, books: List[Dict], cursor) -> int:
+        """Append a fetched page of books; cursor is the page's next cursor."""
+        self.cursor = cursor
+        for book in books:
+            item = self.pool.get(book)
+            item_box = item.create_item_box()
+            # A pooled row may still be attached to another view's list
+            if item_box.parent is not None:
+                item_box.parent.remove(item_box)
+            self.items_box.add(item_box)
+            self.items.append(item)
+        
+        self.has_more = self.cursor is not None
+        if not self.has_more:
+            self.box.remove(self.load_more_button)
+        return len(books)
+    
+    @staticmethod
+    def sort_key(book_data: Dict):
+        """Position of a book in the list, which is sorted newest first."""
+        return (book_data['created_at'], book_data['id'])
+    
+    def place(self, item: BookListItem) -> bool:
+        """Insert or move an item to its sorted position among the loaded rows.
+        
+        Returns False if the book sorts after the last loaded page; it is
+        then left out and arrives with a later page.
+        """
+        self.remove(item)
+        key = self.sort_key(item.book_data)
+        if self.has_more and (self.cursor is None or key < tuple(self.cursor)):
+            return False
+        
+        index = len(self.items)
+        for position, other in enumerate(self.items):
+            if self.sort_key(other.book_data) < key:
+                index = position
+                break
+        
+        item_box = item.create_item_box()
+        if item_box.parent is not None:
+            item_box.parent.remove(item_box)
+        self.items_box.insert(index, item_box)
+        self.items.insert(index, item)
+        return True
     
-    def cancel(self, widget):
-        """Cancel the session logging."""
-        self.on_save_callback(None)
+    def remove(self, item: BookListItem) -> bool:
+        """Take an item out of the list; returns False if it was not in it."""
+        if item not in self.items:
+            return False
+        self.items.remove(item)
+        self.items_box.remove(item.item_box)
+        return True
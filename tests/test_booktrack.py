@@ -8,12 +8,29 @@ import tempfile
 import os
 import json
 import sys
-from datetime import datetime
+import sqlite3
+import threading
+import time
+import asyncio
+import inspect
+import importlib.util
+from datetime import date, datetime
 
 # Add the src directory to Python path
 sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(__file__)), 'src'))
 
+from booktrack.async_db import AsyncDatabaseManager
 from booktrack.database import DatabaseManager
+from booktrack.events import ChangeEvent
+from booktrack.instrumentation import (Histogram, Instrumentation, NULL_INSTRUMENTATION,
+                                       normalize_sql)
+from booktrack.rows import BookRow, SessionColumns, SessionRow
+from booktrack.server import BooktrackServer, HTTPError, decode_cursor, encode_cursor
+from booktrack.session_manager import SessionManager
+from booktrack.sync import apply_changes, iter_changes, pull, sync
+from booktrack.search import fts_query, has_search_index, search as like_or_fts_search
+from booktrack.migrations import MigrationError, SCHEMA_VERSION, get_schema_version
+from booktrack import analytics, cli, stats as stats_engine
 from booktrack.timer import Timer
 
 
@@ -29,6 +46,7 @@ class TestDatabaseManager(unittest.TestCase):
     def tearDown(self):
         """Clean up test database."""
         # Ensure database connection is closed
+        self.db_manager.close()
         self.db_manager = None
         # Give Windows time to release the file handle
         import time
@@ -165,6 +183,2750 @@ class TestDatabaseManager(unittest.TestCase):
         self.assertEqual(len(export_data['reading_sessions']), 1)
 
 
+class TestConnectionManagement(unittest.TestCase):
+    """Test cases for the persistent connection layer."""
+    
+    def setUp(self):
+        """Set up test database."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.temp_dir.name, 'booktrack.db')
+        self.db_manager = DatabaseManager(self.db_path)
+    
+    def tearDown(self):
+        """Clean up test database."""
+        self.db_manager.close()
+        self.temp_dir.cleanup()
+    
+    def test_connection_reused_within_thread(self):
+        """Test that repeated calls share one connection per thread."""
+        conn = self.db_manager.get_connection()
+        self.db_manager.add_book("Book", "Author")
+        self.db_manager.get_books()
+        self.assertIs(self.db_manager.get_connection(), conn)
+    
+    def test_connection_per_thread(self):
+        """Test that each thread gets its own connection."""
+        main_conn = self.db_manager.get_connection()
+        other = []
+        
+        def worker():
+            other.append(self.db_manager.get_connection())
+            self.db_manager.add_book("Threaded", "Author")
+        
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join()
+        
+        self.assertIsNot(other[0], main_conn)
+        self.assertEqual(len(self.db_manager.get_books()), 1)
+    
+    def test_default_pragmas(self):
+        """Test that the default pragmas are applied."""
+        conn = self.db_manager.get_connection()
+        self.assertEqual(conn.execute('PRAGMA journal_mode').fetchone()[0], 'wal')
+        self.assertEqual(conn.execute('PRAGMA synchronous').fetchone()[0], 1)
+        self.assertEqual(conn.execute('PRAGMA foreign_keys').fetchone()[0], 1)
+        self.assertEqual(conn.execute('PRAGMA cache_size').fetchone()[0], -8000)
+    
+    def test_custom_pragmas(self):
+        """Test that pragmas can be overridden."""
+        self.db_manager.close()
+        self.db_manager = DatabaseManager(self.db_path, pragmas={'cache_size': -2000})
+        conn = self.db_manager.get_connection()
+        self.assertEqual(conn.execute('PRAGMA cache_size').fetchone()[0], -2000)
+    
+    def test_close_and_reopen(self):
+        """Test that the manager reconnects after close()."""
+        conn = self.db_manager.get_connection()
+        self.db_manager.add_book("Book", "Author")
+        self.db_manager.close()
+        
+        with self.assertRaises(Exception):
+            conn.execute('SELECT 1')
+        self.assertEqual(len(self.db_manager.get_books()), 1)
+
+
+class TestSchemaMigrations(unittest.TestCase):
+    """Test cases for schema migrations and index usage."""
+    
+    def setUp(self):
+        """Set up test database."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.temp_dir.name, 'booktrack.db')
+    
+    def tearDown(self):
+        """Clean up test database."""
+        self.temp_dir.cleanup()
+    
+    def query_plan(self, db_manager, sql, params=()):
+        """Return the EXPLAIN QUERY PLAN details for a statement."""
+        conn = db_manager.get_connection()
+        rows = conn.execute('EXPLAIN QUERY PLAN ' + sql, params).fetchall()
+        return ' | '.join(row[3] for row in rows)
+    
+    def test_new_database_is_current(self):
+        """Test that a new database is created at the latest version."""
+        with DatabaseManager(self.db_path) as db:
+            self.assertEqual(get_schema_version(db.get_connection()), SCHEMA_VERSION)
+    
+    def test_upgrade_legacy_database(self):
+        """Test that a pre-migration database is upgraded in place."""
+        import sqlite3
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute('''
+                CREATE TABLE books (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    title TEXT NOT NULL,
+                    author TEXT NOT NULL,
+                    total_pages INTEGER,
+                    cover_image_url TEXT,
+                    status TEXT DEFAULT 'Active',
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            conn.execute('''
+                CREATE TABLE reading_sessions (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    book_id INTEGER NOT NULL,
+                    duration_seconds INTEGER NOT NULL,
+                    pages_read INTEGER,
+                    notes TEXT,
+                    session_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    FOREIGN KEY (book_id) REFERENCES books (id) ON DELETE CASCADE
+                )
+            ''')
+            conn.execute("INSERT INTO books (title, author) VALUES ('Old', 'Author')")
+            conn.execute('INSERT INTO reading_sessions (book_id, duration_seconds) VALUES (1, 600)')
+        
+        with DatabaseManager(self.db_path) as db:
+            conn = db.get_connection()
+            self.assertEqual(get_schema_version(conn), SCHEMA_VERSION)
+            indexes = {row[0] for row in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'index'")}
+            self.assertIn('idx_sessions_book_date', indexes)
+            self.assertIn('idx_books_status_created', indexes)
+            self.assertEqual(db.get_books()[0]['title'], 'Old')
+            self.assertEqual(len(db.get_reading_sessions(1)), 1)
+            self.assertEqual(db.verify_rollups(), [])
+            self.assertEqual(db.get_statistics()['total_reading_time_seconds'], 600)
+    
+    def test_newer_database_rejected(self):
+        """Test that a database from a newer app version is not touched."""
+        import sqlite3
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION + 1}')
+        with self.assertRaises(MigrationError):
+            DatabaseManager(self.db_path)
+    
+    def test_books_by_status_uses_index(self):
+        """Test that filtering books by status avoids a scan and sort."""
+        with DatabaseManager(self.db_path) as db:
+            plan = self.query_plan(db, '''
+                SELECT id, title, author, total_pages, cover_image_url, status, created_at
+                FROM books WHERE status = ?
+                ORDER BY created_at DESC, id DESC
+            ''', ('Active',))
+        self.assertIn('idx_books_status_created', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+    
+    def test_sessions_by_book_uses_index(self):
+        """Test that per-book session lookups use the composite index."""
+        with DatabaseManager(self.db_path) as db:
+            plan = self.query_plan(db, '''
+                SELECT rs.id, rs.book_id, rs.duration_seconds, rs.pages_read,
+                       rs.notes, rs.session_date, b.title, b.author
+                FROM reading_sessions rs
+                JOIN books b ON rs.book_id = b.id
+                WHERE rs.book_id = ?
+                ORDER BY rs.session_date DESC
+            ''', (1,))
+        self.assertIn('idx_sessions_book_date', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+    
+    def test_statistics_scan_indexes_dropped(self):
+        """Test that the rollups' redundant statistics indexes are gone."""
+        with DatabaseManager(self.db_path) as db:
+            conn = db.get_connection()
+            indexes = {row[0] for row in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'index'")}
+            columns = [row[2] for row in conn.execute(
+                "PRAGMA index_info('idx_sessions_book_date')")]
+        self.assertNotIn('idx_sessions_day', indexes)
+        self.assertEqual(columns, ['book_id', 'session_date'])
+
+
+class TestStatisticsEngine(unittest.TestCase):
+    """Test cases for the single-pass statistics engine."""
+    
+    def setUp(self):
+        """Set up test database."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_manager = DatabaseManager(os.path.join(self.temp_dir.name, 'booktrack.db'))
+    
+    def tearDown(self):
+        """Clean up test database."""
+        self.db_manager.close()
+        self.temp_dir.cleanup()
+    
+    def add_session_on(self, book_id, days_ago, seconds, pages=None):
+        """Insert a session dated a number of days in the past."""
+        with self.db_manager.get_connection() as conn:
+            conn.execute('''
+                INSERT INTO reading_sessions (book_id, duration_seconds, pages_read, session_date)
+                VALUES (?, ?, ?, datetime('now', ?))
+            ''', (book_id, seconds, pages, f'-{days_ago} days'))
+    
+    def legacy_statistics(self):
+        """Compute the original five-query statistics for comparison."""
+        conn = self.db_manager.get_connection()
+        daily = conn.execute('''
+            SELECT DATE(session_date) as date, SUM(duration_seconds) as total_seconds
+            FROM reading_sessions
+            WHERE session_date >= datetime('now', '-30 days')
+            GROUP BY DATE(session_date)
+            ORDER BY date DESC
+        ''').fetchall()
+        return {
+            'total_reading_time_seconds': conn.execute(
+                'SELECT SUM(duration_seconds) FROM reading_sessions').fetchone()[0] or 0,
+            'total_sessions': conn.execute('SELECT COUNT(*) FROM reading_sessions').fetchone()[0],
+            'total_books': conn.execute('SELECT COUNT(*) FROM books').fetchone()[0],
+            'books_by_status': dict(conn.execute(
+                'SELECT status, COUNT(*) FROM books GROUP BY status').fetchall()),
+            'daily_stats': daily,
+        }
+    
+    def test_matches_legacy_queries(self):
+        """Test that the engine agrees with the original queries."""
+        book1 = self.db_manager.add_book("Book 1", "Author")
+        book2 = self.db_manager.add_book("Book 2", "Author")
+        self.db_manager.update_book(book2, status='Read')
+        for days_ago in (0, 1, 1, 5, 40, 90):
+            self.add_session_on(book1, days_ago, 600 + days_ago, 10)
+            self.add_session_on(book2, days_ago, 300, None)
+        
+        stats = self.db_manager.get_statistics()
+        for key, value in self.legacy_statistics().items():
+            self.assertEqual(stats[key], value, key)
+    
+    def test_empty_database(self):
+        """Test statistics on an empty library."""
+        stats = self.db_manager.get_statistics()
+        self.assertEqual(stats['total_reading_time_seconds'], 0)
+        self.assertEqual(stats['total_sessions'], 0)
+        self.assertEqual(stats['daily_stats'], [])
+        self.assertEqual(stats['pages_per_hour'], 0.0)
+        self.assertEqual(stats['average_session_seconds'], 0.0)
+        self.assertEqual(stats['longest_streak_days'], 0)
+    
+    def test_derived_metrics(self):
+        """Test per-book totals, pages/hour, averages and streaks."""
+        book1 = self.db_manager.add_book("Book 1", "Author")
+        book2 = self.db_manager.add_book("Book 2", "Author")
+        # Three consecutive days, a gap, then two more
+        for days_ago in (10, 9, 8):
+            self.add_session_on(book1, days_ago, 3600, 40)
+        for days_ago in (2, 1):
+            self.add_session_on(book2, days_ago, 1800)
+        
+        stats = self.db_manager.get_statistics()
+        self.assertEqual(stats['per_book'][book1]['total_seconds'], 3 * 3600)
+        self.assertEqual(stats['per_book'][book1]['pages_read'], 120)
+        self.assertEqual(stats['per_book'][book2]['sessions'], 2)
+        self.assertEqual(stats['per_book'][book2]['title'], "Book 2")
+        # Sessions without pages do not dilute the reading speed
+        self.assertAlmostEqual(stats['pages_per_hour'], 40.0)
+        self.assertAlmostEqual(stats['average_session_seconds'], (3 * 3600 + 2 * 1800) / 5)
+        self.assertEqual(stats['longest_streak_days'], 3)
+    
+    def test_window_and_streak(self):
+        """Test that only the recent days are loaded but streaks span all history."""
+        book_id = self.db_manager.add_book("Book", "Author")
+        for days_ago in (100, 99, 98, 97, 1):
+            self.add_session_on(book_id, days_ago, 600)
+        
+        buckets = stats_engine.load_buckets(self.db_manager.get_connection(), 30)
+        self.assertEqual(len(buckets.per_day), 1)
+        stats = self.db_manager.get_statistics()
+        self.assertEqual(len(stats['daily_stats']), 1)
+        self.assertEqual(stats['longest_streak_days'], 4)
+    
+    def test_custom_metric(self):
+        """Test that registered metrics appear in get_statistics()."""
+        @stats_engine.metric('reading_days')
+        def reading_days(buckets):
+            return len(buckets.per_day)
+        
+        try:
+            book_id = self.db_manager.add_book("Book", "Author")
+            self.add_session_on(book_id, 0, 60)
+            self.add_session_on(book_id, 3, 60)
+            self.assertEqual(self.db_manager.get_statistics()['reading_days'], 2)
+        finally:
+            del stats_engine.METRICS['reading_days']
+
+
+class TestStatisticsRollups(unittest.TestCase):
+    """Test cases for the trigger-maintained statistics rollups."""
+    
+    def setUp(self):
+        """Set up test database."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_manager = DatabaseManager(os.path.join(self.temp_dir.name, 'booktrack.db'))
+    
+    def tearDown(self):
+        """Clean up test database."""
+        self.db_manager.close()
+        self.temp_dir.cleanup()
+    
+    def test_rollups_follow_writes(self):
+        """Test that rollups stay consistent through every kind of write."""
+        book1 = self.db_manager.add_book("Book 1", "Author", 300)
+        book2 = self.db_manager.add_book("Book 2", "Author", 200)
+        session_id = self.db_manager.add_reading_session(book1, 1800, 20)
+        self.db_manager.add_reading_session(book1, 600)
+        self.db_manager.add_reading_session(book2, 1200, 15)
+        self.assertEqual(self.db_manager.verify_rollups(), [])
+        
+        self.db_manager.update_book(book1, status='Read')
+        self.db_manager.update_book(book2, title='Renamed')
+        self.assertEqual(self.db_manager.verify_rollups(), [])
+        
+        with self.db_manager.get_connection() as conn:
+            conn.execute('''
+                UPDATE reading_sessions
+                SET duration_seconds = 2400, session_date = datetime('now', '-3 days')
+                WHERE id = ?
+            ''', (session_id,))
+        self.assertEqual(self.db_manager.verify_rollups(), [])
+        
+        self.db_manager.delete_book(book1)
+        self.assertEqual(self.db_manager.verify_rollups(), [])
+        
+        stats = self.db_manager.get_statistics()
+        self.assertEqual(stats['total_reading_time_seconds'], 1200)
+        self.assertEqual(stats['total_sessions'], 1)
+        self.assertEqual(stats['books_by_status'], {'Active': 1})
+        self.assertEqual(stats['per_book'][book2]['title'], 'Renamed')
+    
+    def test_statistics_do_not_scan_sessions(self):
+        """Test that get_statistics reads only the rollup tables."""
+        book_id = self.db_manager.add_book("Book", "Author")
+        self.db_manager.add_reading_session(book_id, 600)
+        
+        statements = []
+        conn = self.db_manager.get_connection()
+        conn.set_trace_callback(statements.append)
+        try:
+            self.db_manager.get_statistics()
+        finally:
+            conn.set_trace_callback(None)
+        
+        self.assertTrue(statements)
+        self.assertFalse([sql for sql in statements if 'reading_sessions' in sql])
+    
+    def test_verify_and_rebuild(self):
+        """Test that verify reports drift and rebuild repairs it."""
+        book_id = self.db_manager.add_book("Book", "Author")
+        self.db_manager.add_reading_session(book_id, 600, 5)
+        with self.db_manager.get_connection() as conn:
+            conn.execute('UPDATE book_rollup SET total_seconds = 1')
+            conn.execute('DELETE FROM status_rollup')
+        
+        problems = self.db_manager.verify_rollups()
+        self.assertEqual(len(problems), 2)
+        
+        self.db_manager.rebuild_rollups()
+        self.assertEqual(self.db_manager.verify_rollups(), [])
+        self.assertEqual(self.db_manager.get_statistics()['total_reading_time_seconds'], 600)
+
+
+class TestStreamingExport(unittest.TestCase):
+    """Test cases for the streaming exporter."""
+    
+    def setUp(self):
+        """Set up test database."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_manager = DatabaseManager(os.path.join(self.temp_dir.name, 'booktrack.db'))
+        self.export_path = os.path.join(self.temp_dir.name, 'export.json')
+    
+    def tearDown(self):
+        """Clean up test database."""
+        self.db_manager.close()
+        self.temp_dir.cleanup()
+    
+    def add_sessions(self, book_id, count):
+        """Insert many sessions directly."""
+        with self.db_manager.get_connection() as conn:
+            conn.executemany(
+                'INSERT INTO reading_sessions (book_id, duration_seconds, notes) VALUES (?, ?, ?)',
+                ((book_id, 60 + i, f'Note {i}') for i in range(count))
+            )
+    
+    def export(self, **kwargs):
+        """Export to the temp file and return its text."""
+        with open(self.export_path, 'w', encoding='utf-8') as f:
+            self.db_manager.export_to_file(f, **kwargs)
+        with open(self.export_path, encoding='utf-8') as f:
+            return f.read()
+    
+    def test_json_matches_export_data(self):
+        """Test that the streamed JSON matches export_data()."""
+        book1 = self.db_manager.add_book("Book 1", "Autore è", 200)
+        self.db_manager.add_book("Book 2", "Author 2")
+        self.db_manager.add_reading_session(book1, 1800, 25, "Notes")
+        self.add_sessions(book1, 7)
+        
+        streamed = json.loads(self.export(batch_size=3))
+        expected = json.loads(json.dumps(self.db_manager.export_data()))
+        
+        for key in ('books', 'reading_sessions', 'statistics'):
+            self.assertEqual(streamed[key], expected[key], key)
+        self.assertIn('export_date', streamed)
+    
+    def test_empty_library(self):
+        """Test exporting an empty library produces valid JSON."""
+        data = json.loads(self.export())
+        self.assertEqual(data['books'], [])
+        self.assertEqual(data['reading_sessions'], [])
+    
+    def test_json_lines(self):
+        """Test the JSON Lines format."""
+        book_id = self.db_manager.add_book("Book", "Author")
+        self.add_sessions(book_id, 5)
+        
+        records = [json.loads(line) for line in self.export(fmt='jsonl').splitlines()]
+        types = [record['type'] for record in records]
+        self.assertEqual(types[0], 'export')
+        self.assertEqual(types[-1], 'statistics')
+        self.assertEqual(types.count('book'), 1)
+        self.assertEqual(types.count('reading_session'), 5)
+    
+    def test_unknown_format(self):
+        """Test that an unknown format is rejected."""
+        with self.assertRaises(ValueError):
+            self.export(fmt='xml')
+    
+    def test_progress_reports(self):
+        """Test that progress is reported per batch up to the total."""
+        book_id = self.db_manager.add_book("Book", "Author")
+        self.add_sessions(book_id, 25)
+        
+        reports = []
+        self.export(batch_size=10, progress=lambda done, total: reports.append((done, total)))
+        self.assertEqual(reports[-1], (26, 26))
+        self.assertEqual([done for done, _ in reports], sorted(done for done, _ in reports))
+        self.assertGreaterEqual(len(reports), 3)
+    
+    def test_memory_stays_bounded(self):
+        """Test that peak memory does not grow with the number of sessions."""
+        import tracemalloc
+        book_id = self.db_manager.add_book("Book", "Author")
+        self.add_sessions(book_id, 20000)
+        
+        tracemalloc.start()
+        try:
+            with open(self.export_path, 'w', encoding='utf-8') as f:
+                self.db_manager.export_to_file(f, batch_size=200)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        
+        # Materialising 20k session dicts takes well over 5 MB
+        self.assertLess(peak, 1024 * 1024)
+
+
+class TestBulkImport(unittest.TestCase):
+    """Test cases for the bulk import API."""
+    
+    def setUp(self):
+        """Set up test databases."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_manager = DatabaseManager(os.path.join(self.temp_dir.name, 'booktrack.db'))
+        self.target = DatabaseManager(os.path.join(self.temp_dir.name, 'target.db'))
+    
+    def tearDown(self):
+        """Clean up test databases."""
+        self.db_manager.close()
+        self.target.close()
+        self.temp_dir.cleanup()
+    
+    def test_import_books_upserts_on_title_author(self):
+        """Test that books are matched on (title, author)."""
+        existing = self.db_manager.add_book("Dune", "Frank Herbert", 400)
+        
+        id_map = self.db_manager.import_books(iter([
+            {'id': 10, 'title': "Dune", 'author': "Frank Herbert", 'total_pages': Decimal('412'),
+             'status': 'Read'},
+            {'id': 11, 'title': "Emma", 'author': "Jane Austen"},
+            {'id': 12, 'title': "Emma", 'author': "Jane Austen", 'total_pages': 300},
+        ]))
+        
+        books = self.db_manager.get_books()
+        self.assertEqual(len(books), 2)
+        self.assertEqual(id_map[10], existing)
+        self.assertEqual(id_map[11], id_map[12])
+        dune = self.db_manager.get_book(existing)
+        self.assertEqual(dune['total_pages'], 412)
+        self.assertEqual(dune['status'], 'Read')
+        self.assertEqual(self.db_manager.get_book(id_map[11])['status'], 'Active')
+    
+    def test_import_sessions_from_generator(self):
+        """Test importing streamed sessions with remapped book ids."""
+        id_map = self.db_manager.import_books([{'id': 99, 'title': "Book", 'author': "Author"}])
+        sessions = (
+            {'book_id': 99, 'duration_seconds': 60 * i, 'pages_read': i,
+             'session_date': f'2024-01-{i:02d} 10:00:00'}
+            for i in range(1, 21)
+        )
+        
+        count = self.db_manager.import_sessions(sessions, id_map, batch_size=7)
+        
+        self.assertEqual(count, 20)
+        stored = self.db_manager.get_reading_sessions(id_map[99])
+        self.assertEqual(len(stored), 20)
+        self.assertEqual(stored[0]['session_date'], '2024-01-20 10:00:00')
+        self.assertEqual(self.db_manager.verify_rollups(), [])
+    
+    def test_unknown_books_are_skipped(self):
+        """Test that sessions for unknown books are not imported."""
+        book_id = self.db_manager.add_book("Book", "Author")
+        count = self.db_manager.import_sessions([
+            {'book_title': "Missing", 'book_author': "Nobody", 'duration_seconds': 60},
+            {'book_id': book_id + 1, 'duration_seconds': 60},
+            {'book_id': book_id, 'duration_seconds': 60},
+        ])
+        self.assertEqual(count, 1)
+    
+    def test_failed_import_rolls_back(self):
+        """Test that an error leaves the database untouched."""
+        book_id = self.db_manager.add_book("Book", "Author")
+        with self.assertRaises(ValueError):
+            self.db_manager.import_sessions([
+                {'book_id': book_id, 'duration_seconds': 60},
+                {'book_id': book_id},
+            ], batch_size=1)
+        self.assertEqual(self.db_manager.get_reading_sessions(), [])
+    
+    def test_large_import_rebuilds_indexes(self):
+        """Test the drop-and-rebuild index path used for large imports."""
+        import booktrack.database as database_module
+        book_id = self.db_manager.add_book("Book", "Author")
+        conn = self.db_manager.get_connection()
+        index_query = "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'reading_sessions'"
+        indexes = conn.execute(index_query).fetchall()
+        
+        threshold = database_module.BULK_INDEX_THRESHOLD
+        database_module.BULK_INDEX_THRESHOLD = 10
+        try:
+            count = self.db_manager.import_sessions(
+                ({'book_id': book_id, 'duration_seconds': 60, 'pages_read': 2} for _ in range(50)),
+                batch_size=8
+            )
+        finally:
+            database_module.BULK_INDEX_THRESHOLD = threshold
+        
+        self.assertEqual(count, 50)
+        self.assertEqual(conn.execute(index_query).fetchall(), indexes)
+        self.assertEqual(self.db_manager.verify_rollups(), [])
+        self.assertEqual(self.db_manager.get_statistics()['total_sessions'], 50)
+        
+        # Per-row maintenance is back on after the import
+        self.db_manager.add_reading_session(book_id, 60)
+        self.assertEqual(self.db_manager.verify_rollups(), [])
+    
+    def test_round_trip_through_export(self):
+        """Test that both export formats import back into a new database."""
+        book1 = self.db_manager.add_book("Book 1", "Author 1", 200)
+        book2 = self.db_manager.add_book("Book 2", "Author 2")
+        self.db_manager.update_book(book2, status='Paused')
+        self.db_manager.add_reading_session(book1, 1800, 25, "First")
+        self.db_manager.add_reading_session(book2, 600, None, "Second")
+        
+        for fmt in ('json', 'jsonl'):
+            target = DatabaseManager(os.path.join(self.temp_dir.name, f'{fmt}.db'))
+            path = os.path.join(self.temp_dir.name, f'export.{fmt}')
+            with open(path, 'w', encoding='utf-8') as f:
+                self.db_manager.export_to_file(f, fmt=fmt)
+            with open(path, encoding='utf-8') as f:
+                result = target.import_file(f)
+            
+            self.assertEqual(result, {'books': 2, 'reading_sessions': 2})
+            self.assertEqual(
+                sorted((b['title'], b['status'], b['created_at']) for b in target.get_books()),
+                sorted((b['title'], b['status'], b['created_at']) for b in self.db_manager.get_books())
+            )
+            self.assertEqual(
+                sorted((s['book_title'], s['notes'], s['session_date'])
+                       for s in target.get_reading_sessions()),
+                sorted((s['book_title'], s['notes'], s['session_date'])
+                       for s in self.db_manager.get_reading_sessions())
+            )
+            target.close()
+    
+    def test_import_export_data_document(self):
+        """Test importing the document written from export_data()."""
+        book_id = self.db_manager.add_book("Book", "Author")
+        self.db_manager.add_reading_session(book_id, 900)
+        
+        path = os.path.join(self.temp_dir.name, 'export.json')
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.db_manager.export_data(), f, indent=2)
+        with open(path, encoding='utf-8') as f:
+            self.target.import_file(f)
+        
+        self.assertEqual(self.target.get_statistics()['total_reading_time_seconds'], 900)
+    
+    def test_import_jsonl_without_header(self):
+        """Test that a JSON Lines file starting straight with a record loses nothing."""
+        path = os.path.join(self.temp_dir.name, 'books.jsonl')
+        with open(path, 'w', encoding='utf-8') as f:
+            for title in ("Dune", "Emma"):
+                f.write(json.dumps({'type': 'book', 'title': title, 'author': "Author"}) + '\n')
+        with open(path, encoding='utf-8') as f:
+            self.assertEqual(self.target.import_file(f), {'books': 2, 'reading_sessions': 0})
+        self.assertEqual(self.target.count_books(), 2)
+
+
+class TestBookPagination(unittest.TestCase):
+    """Test cases for keyset pagination of the book list."""
+    
+    def setUp(self):
+        """Set up test database."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_manager = DatabaseManager(os.path.join(self.temp_dir.name, 'booktrack.db'))
+        # Several books share a created_at timestamp to exercise the id tie-break
+        self.db_manager.import_books(
+            {'title': f'Book {i}', 'author': 'Author',
+             'status': 'Active' if i % 3 else 'Read',
+             'created_at': f'2024-01-{1 + i // 4:02d} 12:00:00'}
+            for i in range(23)
+        )
+    
+    def tearDown(self):
+        """Clean up test database."""
+        self.db_manager.close()
+        self.temp_dir.cleanup()
+    
+    def collect_pages(self, status=None, limit=5):
+        """Walk every page and return the ids in order."""
+        ids = []
+        cursor = None
+        while True:
+            page, cursor = self.db_manager.get_books_page(status, limit, cursor)
+            self.assertLessEqual(len(page), limit)
+            ids.extend(book['id'] for book in page)
+            if cursor is None:
+                return ids
+    
+    def test_pages_match_full_list(self):
+        """Test that walking the pages yields get_books() exactly."""
+        expected = [book['id'] for book in self.db_manager.get_books()]
+        self.assertEqual(self.collect_pages(limit=5), expected)
+        self.assertEqual(self.collect_pages(limit=23), expected)
+    
+    def test_pages_with_status(self):
+        """Test pagination of a status-filtered list."""
+        expected = [book['id'] for book in self.db_manager.get_books(status='Active')]
+        self.assertEqual(self.collect_pages(status='Active', limit=4), expected)
+    
+    def test_count_books(self):
+        """Test the rollup-backed book counts."""
+        self.assertEqual(self.db_manager.count_books(), 23)
+        self.assertEqual(self.db_manager.count_books('Read'), 8)
+        self.assertEqual(self.db_manager.count_books('Abandoned'), 0)
+    
+    def test_get_book_list(self):
+        """Test the total and first page of a list in one call."""
+        total, books, cursor = self.db_manager.get_book_list('Read', 5)
+        self.assertEqual(total, 8)
+        self.assertEqual((books, cursor), self.db_manager.get_books_page('Read', 5))
+        self.assertEqual(self.db_manager.get_book_list('Abandoned', 5), (0, [], None))
+        self.assertEqual(self.db_manager.get_book_list('Read', 5, after=cursor),
+                         (8, *self.db_manager.get_books_page('Read', 5, cursor)))
+    
+    def test_book_list_is_one_snapshot(self):
+        """Test that the total and page agree when another connection writes between them."""
+        from unittest import mock
+        other = DatabaseManager(self.db_manager.db_path)
+        self.addCleanup(other.close)
+        count_books = DatabaseManager.count_books
+        
+        def count_then_write(db, *args, **kwargs):
+            total = count_books(db, *args, **kwargs)
+            other.add_book('Late', 'Author', status='Read')
+            return total
+        
+        with mock.patch.object(DatabaseManager, 'count_books', count_then_write):
+            total, books, cursor = self.db_manager.get_book_list('Read', 50)
+        self.assertEqual((total, len(books)), (8, 8))
+        self.assertFalse(self.db_manager.get_connection().in_transaction)
+        self.assertEqual(self.db_manager.get_book_list('Read', 50)[0], 9)
+    
+    def test_page_query_uses_index(self):
+        """Test that a deep page is an index range scan without a sort."""
+        conn = self.db_manager.get_connection()
+        plan = ' | '.join(row[3] for row in conn.execute('''
+            EXPLAIN QUERY PLAN
+            SELECT id, title, author, total_pages, cover_image_url, status, created_at
+            FROM books WHERE status = ? AND (created_at, id) < (?, ?)
+            ORDER BY created_at DESC, id DESC
+            LIMIT ?
+        ''', ('Active', '2024-01-03 12:00:00', 10, 5)))
+        self.assertIn('idx_books_status_created', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+
+class TestChangeEvents(unittest.TestCase):
+    """Test cases for DatabaseManager change events."""
+    
+    def setUp(self):
+        """Set up test database with an event recorder."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_manager = DatabaseManager(os.path.join(self.temp_dir.name, 'booktrack.db'))
+        self.events = []
+        self.db_manager.subscribe(self.events.append)
+    
+    def tearDown(self):
+        """Clean up test database."""
+        self.db_manager.close()
+        self.temp_dir.cleanup()
+    
+    def test_book_events_carry_rows(self):
+        """Test inserted/updated/deleted events for a book."""
+        book_id = self.db_manager.add_book("Test Book", "Test Author", 100)
+        self.db_manager.update_book(book_id, status="Read")
+        self.db_manager.delete_book(book_id)
+        
+        self.assertEqual([(e.action, e.table) for e in self.events], [
+            ('inserted', 'books'), ('updated', 'books'), ('deleted', 'books'),
+        ])
+        self.assertEqual(self.events[0].row['title'], "Test Book")
+        self.assertEqual(self.events[0].row['status'], "Active")
+        self.assertEqual(self.events[1].row['status'], "Read")
+        self.assertEqual(self.events[2].row['id'], book_id)
+        
+        # A book added with a status is one insert, not an insert and an update
+        self.db_manager.add_book("Emma", "Jane Austen", status="Paused")
+        self.assertEqual([(e.action, e.row['status']) for e in self.events[3:]],
+                         [('inserted', 'Paused')])
+    
+    def test_session_event(self):
+        """Test that a saved session is reported with its book."""
+        book_id = self.db_manager.add_book("Test Book", "Test Author")
+        session_id = self.db_manager.add_reading_session(book_id, 1800, 20, "Notes")
+        
+        event = self.events[-1]
+        self.assertEqual((event.action, event.table), ('inserted', 'reading_sessions'))
+        self.assertEqual(event.row['id'], session_id)
+        self.assertEqual(event.row['duration_seconds'], 1800)
+        self.assertEqual(event.row['book_title'], "Test Book")
+    
+    def test_no_event_without_change(self):
+        """Test that updates and deletes that match nothing stay silent."""
+        self.db_manager.update_book(999, title="Missing")
+        self.db_manager.delete_book(999)
+        self.assertEqual(self.events, [])
+    
+    def test_import_emits_one_event_per_table(self):
+        """Test that a bulk import is reported once, after it commits."""
+        books = [{'id': i, 'title': f'Book {i}', 'author': 'Author'} for i in range(50)]
+        sessions = [{'book_id': i % 50, 'duration_seconds': 60} for i in range(200)]
+        self.db_manager.import_books(books)
+        self.events.clear()
+        
+        with self.db_manager.transaction():
+            book_ids = self.db_manager.import_books(books)
+            self.db_manager.import_sessions(sessions, book_ids)
+            self.assertEqual(self.events, [])
+        self.assertEqual(self.events, [
+            ChangeEvent('bulk', 'books'), ChangeEvent('bulk', 'reading_sessions'),
+        ])
+    
+    def test_rolled_back_changes_are_not_reported(self):
+        """Test that events from a failed transaction are discarded."""
+        with self.assertRaises(ValueError):
+            self.db_manager.import_sessions([{'book_id': 1}])
+        with self.assertRaises(RuntimeError):
+            with self.db_manager.transaction():
+                self.db_manager.import_books([{'title': 'Book', 'author': 'Author'}])
+                raise RuntimeError('abort')
+        self.assertEqual(self.events, [])
+        self.assertEqual(self.db_manager.get_books(), [])
+    
+    def test_writes_join_an_outer_transaction(self):
+        """Test that single writes inside transaction() commit or roll back with it."""
+        with self.assertRaises(RuntimeError):
+            with self.db_manager.transaction():
+                book_id = self.db_manager.add_book('Book', 'Author')
+                self.db_manager.update_book(book_id, title='Renamed')
+                self.db_manager.add_reading_session(book_id, 60)
+                self.db_manager.checkpoint_session(book_id, 30, True)
+                raise RuntimeError('abort')
+        self.assertEqual(self.events, [])
+        self.assertEqual(self.db_manager.get_books(), [])
+        self.assertEqual(self.db_manager.get_active_sessions(), [])
+        
+        with self.db_manager.transaction():
+            book_id = self.db_manager.add_book('Book', 'Author')
+            self.db_manager.delete_book(book_id)
+            self.assertEqual(self.events, [])
+        self.assertEqual([event.action for event in self.events], ['inserted', 'deleted'])
+    
+    def test_notify_bulk_change(self):
+        """Test reporting writes made with raw SQL inside a transaction."""
+        self.assertEqual(self.db_manager.get_books(), [])
+        with self.db_manager.transaction() as conn:
+            conn.execute("INSERT INTO books (title, author) VALUES ('Book', 'Author')")
+            self.db_manager.notify_bulk_change('books')
+            self.assertEqual(self.events, [])
+        self.assertEqual(self.events, [ChangeEvent('bulk', 'books')])
+        self.assertEqual(len(self.db_manager.get_books()), 1)
+    
+    def test_unsubscribe(self):
+        """Test that an unsubscribed listener gets no more events."""
+        self.db_manager.unsubscribe(self.events.append)
+        self.db_manager.add_book("Test Book", "Test Author")
+        self.assertEqual(self.events, [])
+
+
+class TestAsyncDatabaseManager(unittest.TestCase):
+    """Test cases for the worker-thread database facade."""
+    
+    def setUp(self):
+        """Set up test database path."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.temp_dir.name, 'booktrack.db')
+    
+    def tearDown(self):
+        """Clean up test database."""
+        self.temp_dir.cleanup()
+    
+    def test_calls_run_on_worker_thread(self):
+        """Test that queries run off the event loop's thread."""
+        async def scenario():
+            async with AsyncDatabaseManager(self.db_path) as db:
+                book_id = await db.add_book("Test Book", "Test Author", 100)
+                books = await db.get_books(status='Active')
+                thread = await db.run(lambda manager: threading.current_thread().name)
+                return book_id, books, thread
+        
+        book_id, books, thread = asyncio.run(scenario())
+        self.assertEqual([book['id'] for book in books], [book_id])
+        self.assertEqual(thread, 'booktrack-db')
+        self.assertNotEqual(thread, threading.current_thread().name)
+    
+    def test_requests_run_in_order(self):
+        """Test that concurrent requests are served in submission order."""
+        async def scenario():
+            async with AsyncDatabaseManager(self.db_path) as db:
+                ids = await asyncio.gather(*(
+                    db.add_book(f"Book {i}", "Author") for i in range(20)
+                ))
+                return ids, await db.count_books()
+        
+        ids, count = asyncio.run(scenario())
+        self.assertEqual(ids, sorted(ids))
+        self.assertEqual(count, 20)
+    
+    def test_errors_propagate(self):
+        """Test that an exception on the worker is raised to the awaiter."""
+        async def scenario():
+            async with AsyncDatabaseManager(self.db_path) as db:
+                with self.assertRaises(ZeroDivisionError):
+                    await db.run(lambda manager: 1 / 0)
+                # The worker keeps serving after a failed request
+                return await db.count_books()
+        
+        self.assertEqual(asyncio.run(scenario()), 0)
+    
+    def test_events_delivered_on_loop(self):
+        """Test that change events reach listeners on the event loop thread."""
+        received = []
+        
+        async def scenario():
+            async with AsyncDatabaseManager(self.db_path) as db:
+                db.subscribe(lambda event: received.append(
+                    (event.action, threading.current_thread().name)
+                ))
+                await db.add_book("Test Book", "Test Author")
+        
+        asyncio.run(scenario())
+        self.assertEqual(received, [('inserted', threading.current_thread().name)])
+    
+    def test_closed_manager_rejects_calls(self):
+        """Test that close() finishes queued work and refuses new calls."""
+        async def scenario():
+            db = AsyncDatabaseManager(self.db_path)
+            pending = db.add_book("Test Book", "Test Author")
+            task = asyncio.ensure_future(pending)
+            await asyncio.sleep(0)
+            db.close()
+            book_id = await task
+            with self.assertRaises(RuntimeError):
+                db.run(lambda manager: None)
+            return book_id
+        
+        self.assertIsNotNone(asyncio.run(scenario()))
+    
+    def test_unknown_method(self):
+        """Test that only public DatabaseManager methods are proxied."""
+        db = AsyncDatabaseManager(self.db_path)
+        try:
+            with self.assertRaises(AttributeError):
+                db.no_such_method
+            with self.assertRaises(AttributeError):
+                db._emit
+        finally:
+            db.close()
+
+
+class TestCompactRows(unittest.TestCase):
+    """Test cases for the slotted and columnar result rows."""
+    
+    def setUp(self):
+        """Set up test database with two books and some sessions."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_manager = DatabaseManager(os.path.join(self.temp_dir.name, 'booktrack.db'))
+        self.book_a = self.db_manager.add_book("Book A", "Author A", 300)
+        self.book_b = self.db_manager.add_book("Book B", "Author B")
+        for i in range(6):
+            self.db_manager.add_reading_session(
+                self.book_a if i % 2 else self.book_b, 600 + i,
+                pages_read=None if i == 3 else i, notes="Notes" if i == 0 else None
+            )
+    
+    def tearDown(self):
+        """Clean up test database."""
+        self.db_manager.close()
+        self.temp_dir.cleanup()
+    
+    def test_rows_behave_like_dicts(self):
+        """Test mapping access, dict() and equality with plain dicts."""
+        book = self.db_manager.get_book(self.book_a)
+        self.assertIsInstance(book, BookRow)
+        self.assertEqual(book['title'], "Book A")
+        self.assertEqual(book.get('total_pages'), 300)
+        self.assertIsNone(book.get('missing'))
+        self.assertNotIn('missing', book)
+        with self.assertRaises(KeyError):
+            book['missing']
+        self.assertEqual(dict(book), {
+            'id': self.book_a, 'title': "Book A", 'author': "Author A",
+            'total_pages': 300, 'cover_image_url': None, 'status': 'Active',
+            'created_at': book['created_at'],
+        })
+        self.assertEqual(book, dict(book))
+        self.assertEqual(json.loads(json.dumps(dict(book))), dict(book))
+    
+    def test_rows_have_no_instance_dict(self):
+        """Test that rows store their fields in slots only."""
+        session = self.db_manager.get_reading_sessions()[0]
+        self.assertIsInstance(session, SessionRow)
+        self.assertFalse(hasattr(session, '__dict__'))
+        self.assertFalse(hasattr(self.db_manager.get_books()[0], '__dict__'))
+    
+    def test_sessions_share_title_strings(self):
+        """Test that sessions of one book share a single title object."""
+        sessions = [s for s in self.db_manager.get_reading_sessions()
+                    if s['book_id'] == self.book_a]
+        self.assertEqual(len(sessions), 3)
+        self.assertTrue(all(s['book_title'] is sessions[0]['book_title'] for s in sessions))
+    
+    def test_columnar_matches_rows(self):
+        """Test that the columnar result holds the same sessions."""
+        rows = self.db_manager.get_reading_sessions()
+        columns = self.db_manager.get_reading_sessions(columnar=True)
+        self.assertIsInstance(columns, SessionColumns)
+        self.assertEqual(len(columns), len(rows))
+        self.assertEqual(list(columns), rows)
+        self.assertEqual(columns[-1], rows[-1])
+        self.assertEqual(columns[1:3], rows[1:3])
+        self.assertEqual(sum(columns.duration_seconds),
+                         sum(s['duration_seconds'] for s in rows))
+        self.assertIn(None, [s['pages_read'] for s in columns])
+        self.assertEqual(len(columns.books), 2)
+    
+    def test_columnar_filtered_by_book(self):
+        """Test columnar results for one book."""
+        columns = self.db_manager.get_reading_sessions(self.book_b, columnar=True)
+        self.assertEqual(set(columns.book_ids), {self.book_b})
+        self.assertEqual(columns.books, {self.book_b: ("Book B", "Author B")})
+
+
+class TestStreamingReads(unittest.TestCase):
+    """Test cases for iter_books and iter_reading_sessions."""
+    
+    def setUp(self):
+        """Set up test database with sessions spread over several days."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_manager = DatabaseManager(os.path.join(self.temp_dir.name, 'booktrack.db'))
+        self.book_ids = self.db_manager.import_books(
+            {'id': i, 'title': f'Book {i}', 'author': 'Author',
+             'status': 'Active' if i % 2 else 'Read'}
+            for i in range(7)
+        )
+        self.db_manager.import_sessions((
+            {'book_id': i % 7, 'duration_seconds': 60 * (i + 1),
+             'session_date': f'2024-03-{1 + i % 20:02d} {i % 24:02d}:00:00'}
+            for i in range(60)
+        ), self.book_ids)
+    
+    def tearDown(self):
+        """Clean up test database."""
+        self.db_manager.close()
+        self.temp_dir.cleanup()
+    
+    def test_iter_books_matches_get_books(self):
+        """Test that iter_books yields get_books() lazily, in order."""
+        books = self.db_manager.iter_books(batch_size=2)
+        self.assertTrue(inspect.isgenerator(books))
+        self.assertEqual(list(books), self.db_manager.get_books())
+        self.assertEqual(list(self.db_manager.iter_books(status='Read')),
+                         self.db_manager.get_books(status='Read'))
+    
+    def test_iter_sessions_matches_get_sessions(self):
+        """Test the unfiltered and per-book session streams."""
+        self.assertEqual(list(self.db_manager.iter_reading_sessions(batch_size=7)),
+                         self.db_manager.get_reading_sessions())
+        book_id = self.book_ids[3]
+        self.assertEqual(list(self.db_manager.iter_reading_sessions(book_id)),
+                         self.db_manager.get_reading_sessions(book_id))
+    
+    def test_date_range(self):
+        """Test since (inclusive) and until (exclusive) filters."""
+        sessions = list(self.db_manager.iter_reading_sessions(
+            since=date(2024, 3, 5), until='2024-03-08'
+        ))
+        expected = [s for s in self.db_manager.get_reading_sessions()
+                    if '2024-03-05' <= s['session_date'] < '2024-03-08']
+        self.assertEqual(sessions, expected)
+        self.assertEqual(len(sessions), 9)
+        
+        sessions = list(self.db_manager.iter_reading_sessions(
+            self.book_ids[0], since=datetime(2024, 3, 8, 7, 0, 0)
+        ))
+        self.assertTrue(all(s['session_date'] >= '2024-03-08 07:00:00' for s in sessions))
+        self.assertTrue(all(s['book_id'] == self.book_ids[0] for s in sessions))
+    
+    def test_filters_use_indexes(self):
+        """Test that book and date filters are index range scans."""
+        conn = self.db_manager.get_connection()
+        plan = ' | '.join(row[3] for row in conn.execute('''
+            EXPLAIN QUERY PLAN
+            SELECT rs.id FROM reading_sessions rs
+            WHERE rs.book_id = ? AND rs.session_date >= ? AND rs.session_date < ?
+            ORDER BY rs.session_date DESC
+        ''', (1, '2024-03-01', '2024-03-05')))
+        self.assertIn('idx_sessions_book_date', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+
+class TestAnalytics(unittest.TestCase):
+    """Test cases for the analytics module's pure-Python path."""
+    
+    use_numpy = False
+    
+    def setUp(self):
+        """Set up test database with a few days of sessions."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_manager = DatabaseManager(os.path.join(self.temp_dir.name, 'booktrack.db'))
+        self.book_a = self.db_manager.add_book("Book A", "Author", 300)
+        self.book_b = self.db_manager.add_book("Book B", "Author", 100)
+        self.book_c = self.db_manager.add_book("Book C", "Author", 200)
+        self.book_d = self.db_manager.add_book("Book D", "Author", 250)
+        self.db_manager.update_book(self.book_c, status='Read')
+        self.db_manager.import_sessions([
+            {'book_id': self.book_a, 'duration_seconds': 3600, 'pages_read': 30,
+             'session_date': '2024-05-01 08:00:00'},
+            {'book_id': self.book_a, 'duration_seconds': 1800, 'pages_read': 20,
+             'session_date': '2024-05-02 21:00:00'},
+            {'book_id': self.book_b, 'duration_seconds': 1800, 'pages_read': None,
+             'session_date': '2024-05-03 21:30:00'},
+            {'book_id': self.book_b, 'duration_seconds': 3600, 'pages_read': 50,
+             'session_date': '2024-05-05 08:15:00'},
+            {'book_id': self.book_a, 'duration_seconds': 600, 'pages_read': 10,
+             'session_date': '2024-05-06 22:00:00'},
+        ])
+        self.today = date(2024, 5, 6)
+        # Days and hours are local; the expected values are for UTC
+        if hasattr(time, 'tzset'):
+            self.set_timezone('UTC')
+        self.data = analytics.load_sessions(self.db_manager, use_numpy=self.use_numpy)
+    
+    def tearDown(self):
+        """Clean up test database."""
+        self.db_manager.close()
+        self.temp_dir.cleanup()
+    
+    def test_load_sessions(self):
+        """Test the bulk load and its filters."""
+        self.assertEqual(len(self.data), 5)
+        self.assertEqual(sorted(self.data.pages), [analytics.NO_PAGES, 10, 20, 30, 50])
+        data = analytics.load_sessions(self.db_manager, book_id=self.book_b,
+                                       since='2024-05-04', use_numpy=self.use_numpy)
+        self.assertEqual(list(data.duration), [3600])
+    
+    def test_velocity_by_book(self):
+        """Test pages per hour over sessions that recorded pages."""
+        velocity = analytics.velocity_by_book(self.data)
+        self.assertEqual(set(velocity), {self.book_a, self.book_b})
+        self.assertAlmostEqual(velocity[self.book_a], 36.0)
+        self.assertAlmostEqual(velocity[self.book_b], 50.0)
+    
+    def test_rolling_average(self):
+        """Test trailing averages including days without reading."""
+        rolling = analytics.rolling_average(self.data, 7, self.today)
+        self.assertEqual(len(rolling), 6)
+        self.assertEqual(rolling[-1][0], self.today)
+        self.assertAlmostEqual(rolling[-1][1], 11400 / 7)
+        two_day = dict(analytics.rolling_average(self.data, 2, self.today))
+        self.assertAlmostEqual(two_day[date(2024, 5, 4)], 900)
+    
+    def test_streaks(self):
+        """Test current and longest streaks."""
+        self.assertEqual(analytics.streaks(self.data, self.today),
+                         {'current': 2, 'longest': 3})
+        self.assertEqual(analytics.streaks(self.data, date(2024, 5, 8)),
+                         {'current': 0, 'longest': 3})
+    
+    def set_timezone(self, name):
+        """Switch the local time zone for the rest of the test."""
+        from unittest import mock
+        patcher = mock.patch.dict(os.environ, {'TZ': name})
+        patcher.start()
+        self.addCleanup(time.tzset)
+        self.addCleanup(patcher.stop)
+        time.tzset()
+    
+    @unittest.skipUnless(hasattr(time, 'tzset'), 'needs time.tzset')
+    def test_time_of_day_histogram(self):
+        """Test reading seconds and session counts per local starting hour."""
+        self.set_timezone('UTC')
+        data = analytics.load_sessions(self.db_manager, use_numpy=self.use_numpy)
+        seconds = analytics.time_of_day_histogram(data)
+        sessions = analytics.time_of_day_histogram(data, by='sessions')
+        self.assertEqual(len(seconds), 24)
+        self.assertEqual((seconds[8], seconds[21], seconds[22]), (7200, 3600, 600))
+        self.assertEqual(sum(seconds), 11400)
+        self.assertEqual((sessions[8], sessions[21], sessions[22]), (2, 2, 1))
+        
+        # Sessions are stored in UTC; UTC+5:30 moves 08:00 to 13:30
+        self.set_timezone('IST-5:30')
+        data = analytics.load_sessions(self.db_manager, use_numpy=self.use_numpy)
+        seconds = analytics.time_of_day_histogram(data)
+        self.assertEqual((seconds[13], seconds[2], seconds[3]), (7200, 1800, 2400))
+        self.assertEqual(sum(seconds), 11400)
+    
+    @unittest.skipUnless(hasattr(time, 'tzset'), 'needs time.tzset')
+    def test_days_are_local(self):
+        """Test that sessions are bucketed into local days, like the hours."""
+        # UTC+5:30 moves the evening sessions past midnight
+        self.set_timezone('IST-5:30')
+        data = analytics.load_sessions(self.db_manager, use_numpy=self.use_numpy)
+        self.assertEqual(analytics.streaks(data, date(2024, 5, 7)),
+                         {'current': 1, 'longest': 3})
+        two_day = dict(analytics.rolling_average(data, 2, date(2024, 5, 7)))
+        self.assertAlmostEqual(two_day[date(2024, 5, 7)], 300)
+    
+    def test_unparseable_dates_skipped(self):
+        """Test that sessions whose date does not parse are left out."""
+        conn = self.db_manager.get_connection()
+        conn.execute('''
+            INSERT INTO reading_sessions (book_id, duration_seconds, session_date)
+            VALUES (?, 60, 'yesterday')
+        ''', (self.book_a,))
+        conn.commit()
+        data = analytics.load_sessions(self.db_manager, use_numpy=self.use_numpy)
+        self.assertEqual(len(data), 5)
+        self.assertEqual(analytics.streaks(data, self.today), {'current': 2, 'longest': 3})
+    
+    def test_projected_completion(self):
+        """Test completion dates projected from each book's pace."""
+        projections = analytics.projected_completion(
+            self.data, self.db_manager.get_books(), self.today
+        )
+        self.assertEqual(projections, {
+            self.book_a: date(2024, 5, 30),
+            self.book_b: date(2024, 5, 10),
+            self.book_d: None,
+        })
+    
+    def test_empty_history(self):
+        """Test every analytic on a library without sessions."""
+        self.db_manager.get_connection().execute('DELETE FROM reading_sessions')
+        self.db_manager.get_connection().commit()
+        summary = analytics.summarize(self.db_manager, self.today, use_numpy=self.use_numpy)
+        self.assertEqual(summary['velocity_by_book'], {})
+        self.assertEqual(summary['rolling_7_day_seconds'], 0.0)
+        self.assertEqual(summary['streaks'], {'current': 0, 'longest': 0})
+        self.assertEqual(summary['time_of_day_seconds'], [0] * 24)
+        self.assertEqual(summary['projected_completion'],
+                         {self.book_a: None, self.book_b: None, self.book_d: None})
+
+
+@unittest.skipIf(analytics.np is None, 'NumPy is not installed')
+class TestAnalyticsNumpy(TestAnalytics):
+    """Test cases for the analytics module's NumPy path."""
+    
+    use_numpy = True
+
+
+class TestQueryCache(unittest.TestCase):
+    """Test cases for the read-through query cache."""
+    
+    def setUp(self):
+        """Set up test database."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, 'booktrack.db')
+        self.db_manager = DatabaseManager(self.path)
+        self.book_id = self.db_manager.add_book("Dune", "Frank Herbert")
+    
+    def tearDown(self):
+        """Clean up test database."""
+        self.db_manager.close()
+        self.temp_dir.cleanup()
+    
+    def counts(self):
+        info = self.db_manager.cache_info()
+        return info['hits'], info['misses']
+    
+    def test_repeated_reads_hit(self):
+        """Test that repeating a read is served from the cache."""
+        first = self.db_manager.get_books(status='Active')
+        stats = self.db_manager.get_statistics()
+        self.assertEqual(self.counts(), (0, 2))
+        
+        self.assertIs(self.db_manager.get_books(status='Active'), first)
+        self.assertIs(self.db_manager.get_statistics(), stats)
+        self.assertEqual(self.counts(), (2, 2))
+        
+        # Different arguments are different entries
+        self.db_manager.get_books()
+        self.assertEqual(self.counts(), (2, 3))
+    
+    def test_writes_invalidate_their_tables(self):
+        """Test that each write drops exactly the results it affects."""
+        self.db_manager.get_books()
+        self.db_manager.get_statistics()
+        
+        self.db_manager.add_reading_session(self.book_id, 600)
+        self.db_manager.get_books()
+        self.assertEqual(self.counts(), (1, 2))
+        self.assertEqual(self.db_manager.get_statistics()['total_sessions'], 1)
+        self.assertEqual(self.counts(), (1, 3))
+        
+        self.db_manager.update_book(self.book_id, status='Completed')
+        self.assertEqual(self.db_manager.get_books(status='Active'), [])
+        self.assertEqual(self.db_manager.count_books(status='Completed'), 1)
+        self.assertEqual(self.db_manager.get_book(self.book_id)['status'], 'Completed')
+        
+        other = self.db_manager.add_book("Emma", "Jane Austen")
+        self.assertEqual([b['id'] for b in self.db_manager.get_books()], [other, self.book_id])
+        
+        self.db_manager.delete_book(self.book_id)
+        self.assertIsNone(self.db_manager.get_book(self.book_id))
+        self.assertEqual(self.db_manager.get_statistics()['total_sessions'], 0)
+        
+        self.db_manager.import_books([{'title': 'Persuasion', 'author': 'Jane Austen'}])
+        self.assertEqual(self.db_manager.count_books(), 2)
+    
+    def test_lru_bound(self):
+        """Test that the least recently used result is evicted."""
+        with DatabaseManager(self.path, cache_size=2) as db:
+            db.get_book(1)
+            db.get_book(2)
+            db.get_book(1)
+            db.get_book(3)
+            self.assertEqual(db.cache_info()['size'], 2)
+            db.get_book(1)
+            db.get_book(2)
+            self.assertEqual(db.cache_info()['hits'], 2)
+    
+    def test_external_writes_clear_cache(self):
+        """Test writes from another connection and raw SQL on this one."""
+        self.assertEqual(self.db_manager.count_books(), 1)
+        with DatabaseManager(self.path) as other:
+            other.add_book("Emma", "Jane Austen")
+        self.assertEqual(self.db_manager.count_books(), 2)
+        
+        conn = self.db_manager.get_connection()
+        with conn:
+            conn.execute("UPDATE books SET title = 'Dune Messiah'")
+        self.assertEqual(self.db_manager.get_book(self.book_id)['title'], 'Dune Messiah')
+    
+    def test_external_writes_before_local_write(self):
+        """Test that a local write does not hide another connection's commit."""
+        self.db_manager.get_statistics()
+        self.db_manager.get_sessions_page(self.book_id)
+        with DatabaseManager(self.path) as other:
+            other.add_reading_session(self.book_id, 600)
+        
+        self.db_manager.checkpoint_session(self.book_id, 30, True)
+        self.assertEqual(self.db_manager.get_statistics()['total_sessions'], 1)
+        self.assertEqual(len(self.db_manager.get_sessions_page(self.book_id)[0]), 1)
+        
+        with DatabaseManager(self.path) as other:
+            other.add_reading_session(self.book_id, 900)
+        self.db_manager.clear_active_session(self.book_id)
+        self.assertEqual(self.db_manager.get_statistics()['total_sessions'], 2)
+        self.assertEqual(len(self.db_manager.get_sessions_page(self.book_id)[0]), 2)
+    
+    def test_rolled_back_writes_keep_cache(self):
+        """Test that uncommitted rows are never cached."""
+        self.db_manager.get_books()
+        with self.assertRaises(RuntimeError):
+            with self.db_manager.transaction():
+                self.db_manager.import_books([{'title': 'Emma', 'author': 'Jane Austen'}])
+                self.assertEqual(len(self.db_manager.get_books()), 2)
+                raise RuntimeError
+        self.assertEqual(len(self.db_manager.get_books()), 1)
+        self.assertEqual(self.counts(), (1, 1))
+    
+    def test_disabled(self):
+        """Test that cache_size=0 turns the cache off."""
+        with DatabaseManager(self.path, cache_size=0) as db:
+            first = db.get_books()
+            self.assertIsNot(db.get_books(), first)
+            self.assertEqual(db.cache_info()['size'], 0)
+
+
+class TestSearch(unittest.TestCase):
+    """Test cases for full-text search."""
+    
+    def setUp(self):
+        """Set up test database with books and session notes."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_manager = DatabaseManager(os.path.join(self.temp_dir.name, 'booktrack.db'))
+        self.hobbit = self.db_manager.add_book("The Hobbit", "J. R. R. Tolkien")
+        self.dune = self.db_manager.add_book("Dune", "Frank Herbert")
+        self.emma = self.db_manager.add_book("Emma", "Jane Austen")
+        self.note = self.db_manager.add_reading_session(
+            self.dune, 1800, notes="Compared the sandworms to a hobbit hole")
+        self.db_manager.add_reading_session(self.emma, 1200, notes="Café scene in Highbury")
+        self.db_manager.add_reading_session(self.emma, 600)
+    
+    def tearDown(self):
+        """Clean up test database."""
+        self.db_manager.close()
+        self.temp_dir.cleanup()
+    
+    def describe(self, results):
+        return [(r['type'], r['book']['id'], r['session'] and r['session']['id'])
+                for r in results]
+    
+    def test_index_is_available(self):
+        """Test that the FTS5 index exists on this SQLite build."""
+        self.assertTrue(has_search_index(self.db_manager.get_connection()))
+    
+    def test_titles_rank_above_notes(self):
+        """Test bm25 ranking with title matches first."""
+        results = self.db_manager.search("hobbit")
+        self.assertEqual(self.describe(results), [
+            ('book', self.hobbit, None),
+            ('reading_session', self.dune, self.note),
+        ])
+        self.assertLess(results[0]['score'], results[1]['score'])
+        self.assertIn('[hobbit]', results[1]['snippet'])
+        self.assertEqual(results[1]['session']['book_title'], "Dune")
+    
+    def test_prefix_and_diacritics(self):
+        """Test as-you-type prefixes and accent-insensitive matching."""
+        self.assertEqual(self.describe(self.db_manager.search("tolk")),
+                         [('book', self.hobbit, None)])
+        self.assertEqual(self.db_manager.search("cafe")[0]['book']['id'], self.emma)
+        self.assertEqual(self.db_manager.search("frank herb")[0]['book']['id'], self.dune)
+        self.assertEqual(self.db_manager.search("frank austen"), [])
+    
+    def test_query_text_is_not_fts_syntax(self):
+        """Test that FTS5 operators and quotes in the input are harmless."""
+        self.assertEqual(fts_query('Dune" OR title:*'), '"Dune" "OR" "title"*')
+        self.assertEqual(fts_query('  "" ** '), '')
+        self.assertEqual(self.db_manager.search('  "" ** '), [])
+        self.assertEqual(self.db_manager.search('Dune" (')[0]['book']['id'], self.dune)
+    
+    def test_index_follows_changes(self):
+        """Test that the triggers keep the index in sync."""
+        self.db_manager.update_book(self.emma, title="Persuasion")
+        self.assertEqual(self.db_manager.search("emma"), [])
+        self.assertEqual(self.db_manager.search("persuasion")[0]['book']['id'], self.emma)
+        
+        self.db_manager.delete_book(self.dune)
+        self.assertEqual(self.describe(self.db_manager.search("hobbit")),
+                         [('book', self.hobbit, None)])
+        
+        self.db_manager.import_sessions([
+            {'book_id': self.hobbit, 'duration_seconds': 60, 'notes': 'Smaug appears'}
+        ])
+        self.assertEqual(self.db_manager.search("smaug")[0]['type'], 'reading_session')
+    
+    def test_limit(self):
+        """Test that limit caps the number of results."""
+        self.db_manager.import_sessions(
+            {'book_id': self.emma, 'duration_seconds': 60, 'notes': f'Highbury visit {i}'}
+            for i in range(30)
+        )
+        self.assertEqual(len(self.db_manager.search("highbury", limit=5)), 5)
+
+    def test_ranks_newest_notes(self):
+        """Test that only the newest RANKED_NOTES matching notes are ranked."""
+        from booktrack import search as search_module
+        self.db_manager.import_sessions(
+            {'book_id': self.emma, 'duration_seconds': 60, 'notes': f'Highbury visit {i}'}
+            for i in range(10)
+        )
+        newest = sorted(s['id'] for s in self.db_manager.get_reading_sessions())[-3:]
+        original = search_module.RANKED_NOTES
+        search_module.RANKED_NOTES = 3
+        try:
+            results = self.db_manager.search("highbury")
+        finally:
+            search_module.RANKED_NOTES = original
+        self.assertEqual(sorted(r['session']['id'] for r in results), newest)
+        self.assertTrue(all('[Highbury]' in r['snippet'] for r in results))
+
+    def test_like_fallback(self):
+        """Test the LIKE search used when FTS5 is unavailable."""
+        conn = self.db_manager.get_connection()
+        conn.execute('DROP TABLE search_index')
+        conn.commit()
+        self.assertEqual(self.describe(self.db_manager.search("hobbit")), [
+            ('book', self.hobbit, None),
+            ('reading_session', self.dune, self.note),
+        ])
+        self.assertIsNone(like_or_fts_search(conn, "hobbit")[0]['score'])
+        self.assertEqual(self.db_manager.search("100%"), [])
+    
+    def test_migration_without_fts5(self):
+        """Test that migration 6 logs and skips the index when FTS5 is missing."""
+        import sqlite3
+        from booktrack.migrations import MIGRATIONS, migrate
+        
+        class WithoutFts5:
+            def __init__(self, conn):
+                self.conn = conn
+            
+            def execute(self, sql, *args):
+                if 'fts5' in sql:
+                    raise sqlite3.OperationalError('no such module: fts5')
+                return self.conn.execute(sql, *args)
+        
+        conn = sqlite3.connect(':memory:')
+        self.addCleanup(conn.close)
+        migrate(conn, target=5)
+        version, _, add_search_index = MIGRATIONS[5]
+        self.assertEqual(version, 6)
+        with self.assertLogs('booktrack.migrations', 'WARNING'):
+            add_search_index(WithoutFts5(conn))
+        self.assertFalse(has_search_index(conn))
+    
+    def test_missing_index_is_added_on_open(self):
+        """Test that a library migrated without FTS5 gets the index when reopened."""
+        conn = self.db_manager.get_connection()
+        conn.execute('DROP TABLE search_index')
+        conn.commit()
+        self.db_manager.close()
+        self.db_manager = DatabaseManager(os.path.join(self.temp_dir.name, 'booktrack.db'))
+        self.assertTrue(has_search_index(self.db_manager.get_connection()))
+        self.assertEqual(self.describe(self.db_manager.search("hobbit")), [
+            ('book', self.hobbit, None),
+            ('reading_session', self.dune, self.note),
+        ])
+        self.assertIsNotNone(self.db_manager.search("hobbit")[0]['score'])
+    
+    def test_upgrade_indexes_existing_rows(self):
+        """Test that migrating an existing database fills the index."""
+        path = os.path.join(self.temp_dir.name, 'upgrade.db')
+        import sqlite3
+        from booktrack.migrations import migrate
+        conn = sqlite3.connect(path)
+        migrate(conn, target=5)
+        conn.execute("INSERT INTO books (title, author) VALUES ('Old Title', 'Author')")
+        conn.execute("INSERT INTO reading_sessions (book_id, duration_seconds, notes) "
+                     "VALUES (1, 60, 'remembered notes')")
+        conn.commit()
+        conn.close()
+        
+        with DatabaseManager(path) as db:
+            self.assertEqual(db.search("old")[0]['book']['title'], 'Old Title')
+            self.assertEqual(db.search("remembered")[0]['type'], 'reading_session')
+
+
+class TestSessionCheckpoints(unittest.TestCase):
+    """Test cases for the active session journal."""
+    
+    def setUp(self):
+        """Set up test database."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, 'booktrack.db')
+        self.db_manager = DatabaseManager(self.path)
+        self.book_id = self.db_manager.add_book("Dune", "Frank Herbert")
+    
+    def tearDown(self):
+        """Clean up test database."""
+        self.db_manager.close()
+        self.temp_dir.cleanup()
+    
+    def test_checkpoint_overwrites_one_row(self):
+        """Test that repeated checkpoints keep one row per book."""
+        self.db_manager.checkpoint_session(self.book_id, 15.5, True)
+        self.db_manager.checkpoint_session(self.book_id, 30.0, False)
+        
+        active = self.db_manager.get_active_sessions()
+        self.assertEqual(len(active), 1)
+        self.assertEqual(active[0]['book_id'], self.book_id)
+        self.assertEqual(active[0]['elapsed_seconds'], 30.0)
+        self.assertFalse(active[0]['is_running'])
+        self.assertEqual(active[0]['book_title'], "Dune")
+        self.assertIsNotNone(active[0]['checkpointed_at'])
+    
+    def test_checkpoint_survives_reopen(self):
+        """Test recovering a checkpoint after the process went away."""
+        self.db_manager.checkpoint_session(self.book_id, 42.0, True)
+        self.db_manager.close()
+        
+        with DatabaseManager(self.path) as db:
+            active = db.get_active_sessions()
+            self.assertEqual([(a['book_id'], a['elapsed_seconds']) for a in active],
+                             [(self.book_id, 42.0)])
+            timer = Timer.restore(active[0]['elapsed_seconds'])
+            self.assertFalse(timer.is_running)
+            self.assertEqual(timer.format_time(), "00:00:42")
+    
+    def test_clear_and_delete(self):
+        """Test that saving, cancelling or deleting the book clears the checkpoint."""
+        other = self.db_manager.add_book("Emma", "Jane Austen")
+        self.db_manager.checkpoint_session(self.book_id, 10, True)
+        self.db_manager.checkpoint_session(other, 20, True)
+        
+        self.assertTrue(self.db_manager.clear_active_session(self.book_id))
+        self.assertFalse(self.db_manager.clear_active_session(self.book_id))
+        self.db_manager.delete_book(other)
+        self.assertEqual(self.db_manager.get_active_sessions(), [])
+    
+    def test_checkpoint_keeps_query_cache(self):
+        """Test that checkpoints do not invalidate cached reads."""
+        self.db_manager.get_books()
+        self.db_manager.checkpoint_session(self.book_id, 10, True)
+        self.db_manager.get_books()
+        self.assertEqual(self.db_manager.cache_info()['hits'], 1)
+
+
+class TestSessionManager(unittest.TestCase):
+    """Test cases for concurrent sessions and the shared tick loop."""
+    
+    def setUp(self):
+        """Set up test database and a manager on a controllable clock."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_manager = DatabaseManager(os.path.join(self.temp_dir.name, 'booktrack.db'))
+        self.dune = self.db_manager.add_book("Dune", "Frank Herbert")
+        self.emma = self.db_manager.add_book("Emma", "Jane Austen")
+        self.now = [0]
+        self.sessions = SessionManager(clock=lambda: self.now[0])
+    
+    def tearDown(self):
+        """Clean up test database."""
+        self.db_manager.close()
+        self.temp_dir.cleanup()
+    
+    def advance(self, seconds):
+        self.now[0] += int(seconds * 1_000_000_000)
+    
+    def test_concurrent_timers(self):
+        """Test independent timers per book."""
+        self.sessions.start(self.dune)
+        self.advance(10)
+        self.sessions.start(self.emma)
+        self.advance(5)
+        self.sessions.pause(self.dune)
+        self.advance(5)
+        
+        self.assertEqual(len(self.sessions), 2)
+        self.assertEqual(self.sessions.get(self.dune).get_elapsed_time(), 15)
+        self.assertEqual(self.sessions.get(self.emma).get_elapsed_time(), 10)
+        self.assertEqual(sorted(self.sessions.checkpoints()),
+                         [(self.dune, 15, False), (self.emma, 10, True)])
+        
+        # Starting a book that already has a session resumes it
+        self.assertIs(self.sessions.start(self.dune), self.sessions.get(self.dune))
+        self.advance(1)
+        self.assertEqual(self.sessions.get(self.dune).get_elapsed_time(), 16)
+        
+        self.assertIsNotNone(self.sessions.discard(self.emma))
+        self.assertNotIn(self.emma, self.sessions)
+        self.assertEqual(list(self.sessions), [self.dune])
+    
+    def test_batch_stop_and_save(self):
+        """Test stopping several sessions and saving them in one transaction."""
+        self.sessions.start(self.dune)
+        self.sessions.start(self.emma)
+        self.advance(90)
+        self.db_manager.checkpoint_sessions(self.sessions.checkpoints())
+        
+        finished = self.sessions.stop()
+        self.assertEqual(len(self.sessions), 0)
+        self.assertEqual(sorted((s['book_id'], s['duration_seconds']) for s in finished),
+                         [(self.dune, 90), (self.emma, 90)])
+        
+        finished[0]['pages_read'] = Decimal('12')
+        finished[0]['notes'] = 'Good chapter'
+        received = []
+        self.db_manager.subscribe(received.append)
+        ids = self.db_manager.save_sessions(finished)
+        
+        self.assertEqual(len(ids), 2)
+        self.assertEqual(self.db_manager.get_active_sessions(), [])
+        self.assertEqual(self.db_manager.get_statistics()['total_sessions'], 2)
+        self.assertEqual([event.row['id'] for event in received], ids)
+        self.assertEqual(received[0].row['pages_read'], 12)
+    
+    def test_batch_save_is_atomic(self):
+        """Test that a failing session leaves every session and checkpoint in place."""
+        self.db_manager.checkpoint_sessions([(self.dune, 60, True), (self.emma, 30, True)])
+        with self.assertRaises(sqlite3.IntegrityError):
+            self.db_manager.save_sessions([
+                {'book_id': self.dune, 'duration_seconds': 60},
+                {'book_id': 9999, 'duration_seconds': 30},
+            ])
+        self.assertEqual(self.db_manager.get_statistics()['total_sessions'], 0)
+        self.assertEqual(len(self.db_manager.get_active_sessions()), 2)
+    
+    def test_restore(self):
+        """Test restoring a paused session from a checkpoint."""
+        timer = self.sessions.restore(self.dune, 42)
+        self.assertFalse(timer.is_running)
+        self.sessions.resume(self.dune)
+        self.advance(3)
+        self.assertEqual(self.sessions.stop([self.dune]),
+                         [{'book_id': self.dune, 'duration_seconds': 45}])
+    
+    def test_shared_tick_loop_with_hundreds_of_timers(self):
+        """Test that one wakeup serves many timers, each ticking on its own boundaries."""
+        import time
+        count, tick_ns, interval_ns = 300, 20_000_000, 5_000_000
+        sessions = SessionManager(tick_ns=tick_ns, min_interval_ns=interval_ns)
+        ticks = {}
+        sessions.add_tick_callback(
+            lambda book_id, elapsed: ticks.setdefault(book_id, []).append(elapsed))
+        
+        async def main():
+            sessions.start_ticking()
+            for book_id in range(count):
+                # Spread the timers' tick boundaries across the tick
+                sessions.restore(book_id, book_id * 0.02 / count)
+                sessions.start(book_id)
+            start = time.perf_counter()
+            await asyncio.sleep(0.2)
+            elapsed = time.perf_counter() - start
+            # Never more than one pending wakeup, however many timers
+            self.assertIsNotNone(sessions._handle)
+            sessions.stop_ticking()
+            return elapsed
+        
+        elapsed = asyncio.run(main())
+        
+        # One timer per asyncio wakeup would need count * 10 wakeups
+        self.assertLessEqual(sessions.wakeups, elapsed / (interval_ns / 1e9) + 2)
+        self.assertEqual(len(ticks), count)
+        lateness = []
+        for book_id, values in ticks.items():
+            self.assertGreaterEqual(len(values), 5)
+            whole = [int(value / 0.02) for value in values]
+            self.assertEqual(whole, sorted(set(whole)))
+            lateness.extend(value - n * 0.02 for n, value in zip(whole[1:], values[1:]))
+        # Coalescing delays ticks by up to the wakeup interval
+        lateness.sort()
+        self.assertLess(lateness[len(lateness) // 2], 0.01)
+
+    def test_paused_session_stops_ticking(self):
+        """Test that pausing one session leaves the others ticking."""
+        sessions = SessionManager(tick_ns=20_000_000, min_interval_ns=1_000_000)
+        ticks = []
+        sessions.add_tick_callback(lambda book_id, elapsed: ticks.append(book_id))
+
+        async def main():
+            sessions.start_ticking()
+            sessions.start(self.dune)
+            sessions.start(self.emma)
+            await asyncio.sleep(0.05)
+            sessions.pause(self.dune)
+            ticks.clear()
+            await asyncio.sleep(0.1)
+            sessions.pause(self.emma)
+            await asyncio.sleep(0.01)
+            # Nothing left running, so nothing is scheduled
+            self.assertIsNone(sessions._handle)
+            sessions.stop_ticking()
+
+        asyncio.run(main())
+        self.assertNotIn(self.dune, ticks)
+        self.assertGreaterEqual(ticks.count(self.emma), 3)
+
+
+class TestInstrumentation(unittest.TestCase):
+    """Test cases for opt-in instrumentation."""
+    
+    def setUp(self):
+        """Set up an instrumented test database."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.temp_dir.name, 'booktrack.db')
+        self.instrumentation = Instrumentation()
+        self.db_manager = DatabaseManager(self.db_path, instrumentation=self.instrumentation)
+    
+    def tearDown(self):
+        """Clean up test database."""
+        self.db_manager.close()
+        self.temp_dir.cleanup()
+    
+    def test_off_by_default(self):
+        """Test that without instrumentation nothing is wrapped or traced."""
+        with DatabaseManager(os.path.join(self.temp_dir.name, 'plain.db')) as db:
+            self.assertIs(db.instrumentation, NULL_INSTRUMENTATION)
+            self.assertNotIn('get_books', vars(db))
+            db.add_book("Dune", "Frank Herbert")
+        self.assertEqual(NULL_INSTRUMENTATION.snapshot()['histograms'], {})
+        
+        self.assertIs(Instrumentation.from_environment({}), NULL_INSTRUMENTATION)
+        self.assertIs(Instrumentation.from_environment({'BOOKTRACK_INSTRUMENT': '0'}),
+                      NULL_INSTRUMENTATION)
+        self.assertTrue(Instrumentation.from_environment({'BOOKTRACK_INSTRUMENT': '1'}).enabled)
+        self.assertEqual(
+            Instrumentation.from_environment({'BOOKTRACK_INSTRUMENT': '/tmp/d.json'}).dump_path,
+            '/tmp/d.json'
+        )
+    
+    def test_method_latency_and_rows(self):
+        """Test per-method histograms with row counts, generators included."""
+        for i in range(3):
+            self.db_manager.add_book(f"Book {i}", "Author")
+        self.db_manager.get_books()
+        self.assertEqual(len(list(self.db_manager.iter_books())), 3)
+        
+        histograms = self.instrumentation.snapshot()['histograms']
+        self.assertEqual(histograms['db.add_book']['count'], 3)
+        self.assertEqual(histograms['db.get_books']['rows'], 3)
+        self.assertEqual(histograms['db.iter_books']['rows'], 3)
+        self.assertIn('db.init_database', histograms)
+        for histogram in histograms.values():
+            self.assertLessEqual(histogram['p50_ms'], histogram['max_ms'])
+    
+    def test_sql_trace(self):
+        """Test that statements are counted once per run, by shape and method."""
+        for i in range(3):
+            self.db_manager.add_book(f"Book {i}", "Author")
+        queries = {query['sql']: query for query in self.instrumentation.snapshot()['queries']}
+        insert = queries['INSERT INTO books (title, author, total_pages, cover_image_url, status) '
+                         'VALUES (?, ...)']
+        # Once per book, although the insert fires several triggers
+        self.assertEqual(insert['count'], 3)
+        self.assertGreater(insert['repeats'], 0)
+        self.assertEqual(insert['methods'], {'db.add_book': 3})
+        self.assertFalse(any(sql.startswith('--') for sql in queries))
+    
+    def test_sql_trace_counts_repeats(self):
+        """Test that statements run again with the same values are not lost."""
+        self.instrumentation.reset()
+        conn = self.db_manager.get_connection()
+        with self.db_manager.transaction():
+            for _ in range(3):
+                conn.execute('SELECT COUNT(*) FROM books').fetchone()
+            conn.executemany('DELETE FROM active_sessions WHERE book_id = ?', [(1,)] * 4)
+        queries = {query['sql']: query for query in self.instrumentation.snapshot()['queries']}
+        self.assertEqual(queries['SELECT COUNT(*) FROM books']['count'], 3)
+        delete = queries['DELETE FROM active_sessions WHERE book_id = ?']
+        self.assertLessEqual(delete['count'], 4)
+        self.assertLessEqual(4, delete['count'] + delete['repeats'])
+    
+    def test_normalize_sql(self):
+        """Test that literals become placeholders and lists collapse."""
+        self.assertEqual(
+            normalize_sql("SELECT *  FROM t\n WHERE id IN (1, 2, 3) AND name = 'O''Brien' "
+                          "AND x IS NULL"),
+            'SELECT * FROM t WHERE id IN (?, ...) AND name = ? AND x IS NULL'
+        )
+    
+    def test_histogram_percentiles(self):
+        """Test that percentiles fall in the right power-of-two bucket."""
+        histogram = Histogram()
+        for _ in range(90):
+            histogram.add(0.0001)
+        for _ in range(10):
+            histogram.add(0.01)
+        self.assertAlmostEqual(histogram.percentile(50), 128e-6)
+        self.assertAlmostEqual(histogram.percentile(99), 0.01)
+        self.assertEqual(histogram.snapshot()['count'], 100)
+    
+    def test_async_calls_and_dump(self):
+        """Test that calls through AsyncDatabaseManager are timed, and dumping."""
+        async def main():
+            async with AsyncDatabaseManager(self.db_path,
+                                            instrumentation=self.instrumentation) as db:
+                await db.add_book("Dune", "Frank Herbert")
+                return await db.get_books()
+        
+        self.instrumentation.reset()
+        self.assertEqual(len(asyncio.run(main())), 1)
+        with self.instrumentation.timer('view.test'):
+            pass
+        self.instrumentation.error('Something failed')
+        
+        path = self.instrumentation.dump(os.path.join(self.temp_dir.name, 'diagnostics.json'))
+        with open(path, encoding='utf-8') as f:
+            dumped = json.load(f)
+        self.assertEqual(dumped['histograms']['db.get_books']['rows'], 1)
+        self.assertEqual(dumped['histograms']['view.test']['count'], 1)
+        self.assertEqual(dumped['errors'][0]['message'], 'Something failed')
+
+
+class TestCommandLine(unittest.TestCase):
+    """Test cases for the headless command-line interface."""
+    
+    def setUp(self):
+        """Set up test database."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.temp_dir.name, 'booktrack.db')
+    
+    def tearDown(self):
+        """Clean up test database."""
+        self.temp_dir.cleanup()
+    
+    def run_cli(self, *args, db_path=None):
+        """Run a command; returns its exit status and the JSON Lines it wrote."""
+        import io
+        out = io.StringIO()
+        status = cli.main(['--db', db_path or self.db_path] + list(args), stdout=out)
+        return status, [json.loads(line) for line in out.getvalue().splitlines()]
+    
+    def test_add_and_list(self):
+        """Test adding books and listing them as JSON Lines."""
+        status, [book] = self.run_cli('add', 'Dune', 'Frank Herbert', '--pages', '412')
+        self.assertEqual(status, 0)
+        self.assertEqual(book['title'], 'Dune')
+        self.assertEqual(book['total_pages'], 412)
+        self.run_cli('add', 'Emma', 'Jane Austen')
+        with DatabaseManager(self.db_path) as db:
+            db.update_book(book['id'], status='Read')
+        
+        status, books = self.run_cli('list')
+        self.assertEqual(status, 0)
+        self.assertEqual(sorted(b['title'] for b in books), ['Dune', 'Emma'])
+        _, books = self.run_cli('list', '--status', 'Active')
+        self.assertEqual([b['title'] for b in books], ['Emma'])
+    
+    def test_log_session_and_stats(self):
+        """Test logging sessions, listing them and reading statistics."""
+        _, [book] = self.run_cli('add', 'Dune', 'Frank Herbert')
+        status, [session] = self.run_cli('log-session', str(book['id']), '1h30m',
+                                         '--pages', '30', '--notes', 'Arrakis')
+        self.assertEqual(status, 0)
+        self.assertEqual(session['duration_seconds'], 5400)
+        self.run_cli('log-session', str(book['id']), '10:00')
+        
+        _, sessions = self.run_cli('list', '--sessions', '--book', str(book['id']))
+        self.assertEqual(sorted(s['duration_seconds'] for s in sessions), [600, 5400])
+        self.assertEqual({s['book_title'] for s in sessions}, {'Dune'})
+        
+        _, [stats] = self.run_cli('stats', '--days', '7')
+        self.assertEqual(stats['total_sessions'], 2)
+        self.assertEqual(stats['total_reading_time_seconds'], 6000)
+    
+    def test_parse_duration(self):
+        """Test the accepted duration formats."""
+        self.assertEqual(cli.parse_duration('90'), 90)
+        self.assertEqual(cli.parse_duration('1:30:00'), 5400)
+        self.assertEqual(cli.parse_duration('45:30'), 2730)
+        self.assertEqual(cli.parse_duration('1h 5m 3s'), 3903)
+        self.assertEqual(cli.parse_duration('45M'), 2700)
+        for text in ('', 'abc', '1h30', '1:2:3:4', '-5'):
+            with self.assertRaises(Exception, msg=text):
+                cli.parse_duration(text)
+    
+    def test_errors(self):
+        """Test that failures exit non-zero with a message instead of a traceback."""
+        import contextlib
+        import io
+        stderr = io.StringIO()
+        with contextlib.redirect_stderr(stderr):
+            status, output = self.run_cli('log-session', '99', '60')
+            self.assertEqual((status, output), (1, []))
+            status, output = self.run_cli('import', os.path.join(self.temp_dir.name, 'missing'))
+            self.assertEqual((status, output), (1, []))
+            with self.assertRaises(SystemExit):
+                self.run_cli('log-session', '1', 'soon')
+            malformed = os.path.join(self.temp_dir.name, 'malformed.jsonl')
+            with open(malformed, 'w', encoding='utf-8') as f:
+                f.write(json.dumps({'type': 'book', 'title': 'Dune'}) + '\n')
+            status, output = self.run_cli('import', malformed)
+            self.assertEqual((status, output), (1, []))
+        self.assertIn('no book with id 99', stderr.getvalue())
+        self.assertIn('book record without author', stderr.getvalue())
+        with DatabaseManager(self.db_path) as db:
+            self.assertEqual(db.count_books(), 0)
+    
+    def test_export_import_round_trip(self):
+        """Test exporting to a file and importing it into another database."""
+        _, [book] = self.run_cli('add', 'Dune', 'Frank Herbert')
+        self.run_cli('log-session', str(book['id']), '600')
+        export_path = os.path.join(self.temp_dir.name, 'export.jsonl')
+        
+        status, [written] = self.run_cli('export', '-o', export_path)
+        self.assertEqual(status, 0)
+        self.assertEqual(written['path'], export_path)
+        
+        other = os.path.join(self.temp_dir.name, 'other.db')
+        status, [counts] = self.run_cli('import', export_path, db_path=other)
+        self.assertEqual(counts, {'books': 1, 'reading_sessions': 1})
+        _, sessions = self.run_cli('list', '--sessions', db_path=other)
+        self.assertEqual([s['duration_seconds'] for s in sessions], [600])
+    
+    def test_export_to_stdout(self):
+        """Test that export without -o streams JSON Lines to stdout."""
+        self.run_cli('add', 'Dune', 'Frank Herbert')
+        _, records = self.run_cli('export')
+        self.assertEqual([r['type'] for r in records], ['export', 'book', 'statistics'])
+    
+    def test_vacuum(self):
+        """Test that vacuum shrinks a database with deleted rows."""
+        with DatabaseManager(self.db_path) as db:
+            book_id = db.add_book("Dune", "Frank Herbert")
+            db.import_sessions({'book_id': book_id, 'duration_seconds': 60, 'notes': 'x' * 200}
+                               for _ in range(2000))
+            db.get_connection().execute('DELETE FROM reading_sessions')
+            db.get_connection().commit()
+        
+        status, [sizes] = self.run_cli('vacuum')
+        self.assertEqual(status, 0)
+        self.assertLess(sizes['size_after'], sizes['size_before'])
+        self.assertEqual(sizes['saved'], sizes['size_before'] - sizes['size_after'])
+        with DatabaseManager(self.db_path) as db:
+            self.assertEqual(db.verify_rollups(), [])
+            self.assertEqual(db.search('Dune')[0]['book']['title'], 'Dune')
+    
+    def test_sync(self):
+        """Test syncing with another database file, and a missing one."""
+        other = os.path.join(self.temp_dir.name, 'phone.db')
+        self.run_cli('add', 'Dune', 'Frank Herbert')
+        self.run_cli('add', 'Emma', 'Jane Austen', db_path=other)
+        
+        status, [result] = self.run_cli('sync', other)
+        self.assertEqual(status, 0)
+        self.assertEqual(result['received']['applied'], 1)
+        self.assertEqual(result['sent']['applied'], 1)
+        _, books = self.run_cli('list', db_path=other)
+        self.assertEqual(sorted(b['title'] for b in books), ['Dune', 'Emma'])
+        
+        status, _ = self.run_cli('sync', os.path.join(self.temp_dir.name, 'missing.db'))
+        self.assertEqual(status, 1)
+
+
+class TestServer(unittest.TestCase):
+    """Test cases for the HTTP/JSON API, through a loopback client."""
+    
+    def setUp(self):
+        """Set up test database."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.temp_dir.name, 'booktrack.db')
+    
+    def tearDown(self):
+        """Clean up test database."""
+        self.temp_dir.cleanup()
+    
+    def serve(self, client, **kwargs):
+        """Run client(port) on a thread while a server answers on port; returns its result."""
+        async def run():
+            async with BooktrackServer(self.db_path, port=0, **kwargs) as server:
+                return await asyncio.get_running_loop().run_in_executor(None, client, server.port)
+        return asyncio.run(run())
+    
+    @staticmethod
+    def connect(port):
+        """A request(method, path, body, headers) -> (status, headers, data) function."""
+        import http.client
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        
+        def request(method, path, body=None, headers=None):
+            conn.request(method, path, body=None if body is None else json.dumps(body),
+                         headers=headers or {})
+            response = conn.getresponse()
+            data = response.read()
+            return response.status, dict(response.getheaders()), json.loads(data) if data else None
+        return request
+    
+    def test_books(self):
+        """Test adding, reading, updating and deleting a book."""
+        def client(port):
+            request = self.connect(port)
+            status, _, book = request('POST', '/books', {'title': "Dune", 'author': "Frank Herbert",
+                                                         'total_pages': 412})
+            self.assertEqual(status, 201)
+            self.assertEqual(request('GET', f"/books/{book['id']}")[2], book)
+            
+            status, _, updated = request('PATCH', f"/books/{book['id']}", {'status': 'Read'})
+            self.assertEqual((status, updated['status']), (200, 'Read'))
+            self.assertEqual(request('DELETE', f"/books/{book['id']}")[0], 204)
+            self.assertEqual(request('GET', f"/books/{book['id']}")[0], 404)
+            self.assertEqual(request('PATCH', f"/books/{book['id']}", {'status': 'Read'})[0], 404)
+            
+            status, _, book = request('POST', '/books', {'title': "Emma", 'author': "Jane Austen",
+                                                         'status': 'Paused'})
+            self.assertEqual((status, book['status']), (201, 'Paused'))
+        
+        self.serve(client)
+    
+    def test_sessions_and_stats(self):
+        """Test logging a session and reading it back with the statistics."""
+        with DatabaseManager(self.db_path) as db:
+            book_id = db.add_book("Dune", "Frank Herbert")
+        
+        def client(port):
+            request = self.connect(port)
+            status, _, session = request('POST', '/sessions', {
+                'book_id': book_id, 'duration_seconds': 600, 'pages_read': 12, 'notes': 'Arrakis'})
+            self.assertEqual((status, session['duration_seconds']), (201, 600))
+            self.assertEqual(request('POST', '/sessions', {'book_id': 99,
+                                                           'duration_seconds': 60})[0], 404)
+            
+            _, _, page = request('GET', f'/sessions?book_id={book_id}')
+            self.assertEqual([s['notes'] for s in page['sessions']], ['Arrakis'])
+            self.assertEqual(page['sessions'][0]['book_title'], "Dune")
+            _, _, stats = request('GET', '/stats?days=7')
+            self.assertEqual(stats['total_reading_time_seconds'], 600)
+            _, _, results = request('GET', '/search?q=arrak')
+            self.assertEqual(results[0]['type'], 'reading_session')
+        
+        self.serve(client)
+    
+    def test_pagination(self):
+        """Test that following next_cursor walks every book and session once, in order."""
+        with DatabaseManager(self.db_path) as db:
+            book_ids = [db.add_book(f"Book {i}", "Author") for i in range(7)]
+            db.import_sessions({'book_id': book_ids[i % 7], 'duration_seconds': 60 + i}
+                               for i in range(23))
+            expected_books = [book['id'] for book in db.get_books()]
+            expected_sessions = [session['id'] for session in db.get_reading_sessions()]
+        
+        def walk(request, path, key):
+            ids, cursor = [], ''
+            while True:
+                status, _, page = request('GET', f'{path}&cursor={cursor}')
+                self.assertEqual(status, 200)
+                ids.extend(row['id'] for row in page[key])
+                cursor = page['next_cursor']
+                if cursor is None:
+                    return ids, page
+        
+        def client(port):
+            request = self.connect(port)
+            ids, page = walk(request, '/books?limit=3', 'books')
+            self.assertEqual(ids, expected_books)
+            self.assertEqual(page['total'], 7)
+            ids, _ = walk(request, '/sessions?limit=5', 'sessions')
+            self.assertEqual(sorted(ids), sorted(expected_sessions))
+            self.assertEqual(len(ids), 23)
+        
+        self.serve(client)
+    
+    def test_etag(self):
+        """Test that polls with a current ETag get an empty 304 until the data changes."""
+        def client(port):
+            request = self.connect(port)
+            request('POST', '/books', {'title': "Dune", 'author': "Frank Herbert"})
+            status, headers, _ = request('GET', '/books')
+            etag = headers['ETag']
+            
+            status, headers, data = request('GET', '/books', headers={'If-None-Match': etag})
+            self.assertEqual((status, data, headers['ETag']), (304, None, etag))
+            self.assertEqual(request('GET', '/books', headers={'If-None-Match': f'W/{etag}'})[0],
+                             304)
+            self.assertEqual(request('GET', '/books', headers={'If-None-Match': '"other"'})[0], 200)
+            
+            request('POST', '/books', {'title': "Emma", 'author': "Jane Austen"})
+            status, headers, data = request('GET', '/books', headers={'If-None-Match': etag})
+            self.assertEqual((status, data['total']), (200, 2))
+            self.assertNotEqual(headers['ETag'], etag)
+        
+        self.serve(client)
+    
+    def test_errors(self):
+        """Test that bad requests get an error status and message."""
+        def client(port):
+            request = self.connect(port)
+            status, headers, data = request('PUT', '/books')
+            self.assertEqual((status, headers['Allow']), (405, 'GET, POST'))
+            self.assertEqual(request('GET', '/shelves')[0], 404)
+            self.assertEqual(request('GET', '/books?cursor=nonsense')[0], 400)
+            self.assertEqual(request('GET', '/books?limit=0')[0], 400)
+            status, _, data = request('POST', '/books', {'title': "Dune", 'author': "F", 'isbn': 1})
+            self.assertEqual((status, data['error']), (400, "unknown field 'isbn'"))
+            self.assertEqual(request('POST', '/books', {'title': "Dune"})[0], 400)
+            status, _, data = request('POST', '/books', {'title': "Dune", 'author': "F",
+                                                         'status': 'Lost'})
+            self.assertEqual((status, data['error']),
+                             (400, 'status must be one of Active, Read, Paused, Abandoned'))
+            self.assertEqual(request('GET', '/books')[2]['total'], 0)
+            self.assertEqual(request('PATCH', '/books/1', {'status': 'Lost'})[0], 400)
+            status, _, data = request('PATCH', '/books/1', {'title': ' '})
+            self.assertEqual((status, data['error']), (400, 'title is required'))
+            self.assertEqual(request('PATCH', '/books/1', {'author': None})[0], 400)
+            self.assertEqual(request('POST', '/sessions', {'book_id': 'one',
+                                                           'duration_seconds': 1})[0], 400)
+            
+            import http.client
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+            conn.request('POST', '/books', body=b'{not json')
+            self.assertEqual(conn.getresponse().status, 400)
+        
+        self.serve(client)
+    
+    def test_concurrent_load(self):
+        """Test many clients reading and writing at once: no errors, no lost writes."""
+        from concurrent.futures import ThreadPoolExecutor
+        with DatabaseManager(self.db_path) as db:
+            book_ids = [db.add_book(f"Book {i}", "Author") for i in range(5)]
+        writers, readers, requests = 8, 8, 25
+        
+        def write(port, n):
+            request = self.connect(port)
+            return [request('POST', '/sessions', {'book_id': book_ids[(n + i) % 5],
+                                                  'duration_seconds': 60})[0]
+                    for i in range(requests)]
+        
+        def read(port, n):
+            request = self.connect(port)
+            paths = ['/books?limit=2', '/sessions?limit=10', '/stats', f'/books/{book_ids[n % 5]}']
+            return [request('GET', paths[i % len(paths)])[0] for i in range(requests)]
+        
+        def client(port):
+            with ThreadPoolExecutor(writers + readers) as pool:
+                written = [pool.submit(write, port, n) for n in range(writers)]
+                read_ = [pool.submit(read, port, n) for n in range(readers)]
+                return ([f.result() for f in written], [f.result() for f in read_])
+        
+        written, read_ = self.serve(client, readers=4)
+        self.assertEqual({status for statuses in written for status in statuses}, {201})
+        self.assertEqual({status for statuses in read_ for status in statuses}, {200})
+        with DatabaseManager(self.db_path) as db:
+            self.assertEqual(db.get_statistics()['total_sessions'], writers * requests)
+            self.assertEqual(db.verify_rollups(), [])
+    
+    def test_cursor_round_trip(self):
+        """Test that cursors survive encoding and junk is rejected."""
+        cursor = ('2024-01-01 10:00:00', 42)
+        self.assertEqual(decode_cursor(encode_cursor(cursor)), cursor)
+        self.assertIsNone(decode_cursor(None))
+        self.assertIsNone(encode_cursor(None))
+        for token in ('abc', encode_cursor(('x', 1))[:-3] + '!!', 'e30'):
+            with self.assertRaises(HTTPError):
+                decode_cursor(token)
+
+
+class TestSync(unittest.TestCase):
+    """Test cases for delta sync between two database files."""
+    
+    def setUp(self):
+        """Set up two test databases."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.phone = DatabaseManager(os.path.join(self.temp_dir.name, 'phone.db'))
+        self.desktop = DatabaseManager(os.path.join(self.temp_dir.name, 'desktop.db'))
+    
+    def tearDown(self):
+        """Clean up test databases."""
+        self.phone.close()
+        self.desktop.close()
+        self.temp_dir.cleanup()
+    
+    def library(self, db):
+        """Books and sessions by content, without local ids."""
+        books = sorted((b['title'], b['author'], b['total_pages'], b['status'])
+                       for b in db.iter_books())
+        sessions = sorted((s['book_title'], s['duration_seconds'], s['pages_read'], s['notes'],
+                           s['session_date']) for s in db.iter_reading_sessions())
+        return books, sessions
+    
+    def assertInSync(self):
+        self.assertEqual(self.library(self.phone), self.library(self.desktop))
+        self.assertEqual(self.phone.verify_rollups(), [])
+        self.assertEqual(self.desktop.verify_rollups(), [])
+    
+    def test_initial_sync_copies_library(self):
+        """Test that a first sync copies books, sessions and statistics."""
+        dune = self.phone.add_book('Dune', 'Frank Herbert', 412)
+        emma = self.phone.add_book('Emma', 'Jane Austen', 474)
+        self.phone.add_reading_session(dune, 1800, 30, 'Arrakis')
+        self.phone.add_reading_session(emma, 600, 10)
+        self.phone.update_book(emma, status='Read')
+        
+        result = sync(self.phone, self.desktop)
+        self.assertEqual(result['sent']['applied'], 4)
+        self.assertEqual(result['received']['changes'], 0)
+        self.assertInSync()
+        stats = self.desktop.get_statistics()
+        self.assertEqual(stats['total_books'], 2)
+        self.assertEqual(stats['total_reading_time_seconds'], 2400)
+        self.assertEqual(self.desktop.search('Arrakis')[0]['session']['notes'], 'Arrakis')
+    
+    def test_changes_flow_both_ways(self):
+        """Test that each side gets the books and sessions added on the other."""
+        dune = self.phone.add_book('Dune', 'Frank Herbert')
+        self.phone.add_reading_session(dune, 600)
+        emma = self.desktop.add_book('Emma', 'Jane Austen')
+        self.desktop.add_reading_session(emma, 900)
+        sync(self.phone, self.desktop)
+        self.assertInSync()
+        self.assertEqual(self.phone.get_statistics()['total_sessions'], 2)
+    
+    def test_only_changes_since_last_sync_are_sent(self):
+        """Test that later syncs send the delta, not the library."""
+        ids = [self.phone.add_book(f'Book {i}', 'Author') for i in range(20)]
+        for book_id in ids:
+            self.phone.add_reading_session(book_id, 600)
+        sync(self.phone, self.desktop)
+        
+        self.phone.update_book(ids[3], status='Read')
+        self.phone.add_reading_session(ids[5], 300)
+        result = sync(self.phone, self.desktop)
+        self.assertEqual(result['sent']['changes'], 2)
+        self.assertEqual(result['received']['changes'], 0)
+        self.assertInSync()
+        # Nothing changed since, so nothing is read or sent
+        self.assertEqual(list(iter_changes(self.phone, {'book': 10**9, 'reading_session': 10**9})),
+                         [])
+        result = sync(self.phone, self.desktop)
+        self.assertEqual(result['sent']['changes'] + result['received']['changes'], 0)
+    
+    def test_last_writer_wins(self):
+        """Test that the later of two conflicting edits wins on both sides."""
+        book_id = self.phone.add_book('Dune', 'Frank Herbert')
+        sync(self.phone, self.desktop)
+        desktop_id = self.desktop.get_books()[0]['id']
+        
+        self.phone.update_book(book_id, status='Paused')
+        time.sleep(0.01)
+        self.desktop.update_book(desktop_id, status='Read', total_pages=412)
+        sync(self.phone, self.desktop)
+        self.assertInSync()
+        self.assertEqual(self.phone.get_book(book_id)['status'], 'Read')
+        self.assertEqual(self.phone.get_statistics()['books_by_status'], {'Read': 1})
+    
+    def test_simultaneous_edits_resolve_the_same_everywhere(self):
+        """Test that edits with equal timestamps converge on one version."""
+        book_id = self.phone.add_book('Dune', 'Frank Herbert')
+        sync(self.phone, self.desktop)
+        desktop_id = self.desktop.get_books()[0]['id']
+        self.phone.update_book(book_id, status='Paused')
+        self.desktop.update_book(desktop_id, status='Read')
+        for db in (self.phone, self.desktop):
+            with db.get_connection() as conn:
+                conn.execute("UPDATE books SET updated_at = '2030-01-01 00:00:00.000'")
+                conn.execute("UPDATE sync_log SET updated_at = '2030-01-01 00:00:00.000'")
+        
+        sync(self.phone, self.desktop)
+        self.assertInSync()
+        self.assertEqual(self.phone.get_book(book_id)['status'], 'Read')
+    
+    def test_deletes_propagate(self):
+        """Test that deletes are sent as tombstones and beat earlier edits."""
+        dune = self.phone.add_book('Dune', 'Frank Herbert')
+        self.phone.add_reading_session(dune, 600)
+        emma = self.phone.add_book('Emma', 'Jane Austen')
+        session_id = self.phone.add_reading_session(emma, 900)
+        sync(self.phone, self.desktop)
+        desktop_dune = [b for b in self.desktop.get_books() if b['title'] == 'Dune'][0]
+        
+        self.desktop.update_book(desktop_dune['id'], status='Read')
+        time.sleep(0.01)
+        self.phone.delete_book(dune)
+        with self.phone.get_connection() as conn:
+            conn.execute('DELETE FROM reading_sessions WHERE id = ?', (session_id,))
+        # One tombstone for the book covers its sessions
+        self.assertEqual(self.phone.get_connection().execute(
+            'SELECT kind FROM sync_log WHERE deleted = 1 ORDER BY seq').fetchall(),
+            [('book',), ('reading_session',)])
+        
+        result = sync(self.phone, self.desktop)
+        self.assertEqual(result['sent']['deleted'], 2)
+        self.assertInSync()
+        self.assertEqual([b['title'] for b in self.desktop.get_books()], ['Emma'])
+        self.assertEqual(self.desktop.get_statistics()['total_sessions'], 0)
+    
+    def test_later_edit_beats_delete(self):
+        """Test that an edit made after a delete on the other side keeps the book."""
+        book_id = self.phone.add_book('Dune', 'Frank Herbert')
+        sync(self.phone, self.desktop)
+        self.phone.delete_book(book_id)
+        time.sleep(0.01)
+        self.desktop.update_book(self.desktop.get_books()[0]['id'], status='Read')
+        
+        sync(self.phone, self.desktop)
+        self.assertInSync()
+        self.assertEqual([b['status'] for b in self.phone.get_books()], ['Read'])
+    
+    def test_first_sync_merges_identical_imports(self):
+        """Test that the same export imported on both sides is not duplicated."""
+        dune = self.phone.add_book('Dune', 'Frank Herbert', 412)
+        self.phone.add_reading_session(dune, 600, 10)
+        self.phone.add_reading_session(dune, 900, 20)
+        export = self.phone.export_data()
+        self.desktop.import_sessions(export['reading_sessions'],
+                                     self.desktop.import_books(export['books']))
+        self.desktop.add_book('Emma', 'Jane Austen')
+        
+        sync(self.phone, self.desktop)
+        self.assertInSync()
+        self.assertEqual(self.phone.get_statistics()['total_books'], 2)
+        self.assertEqual(self.phone.get_statistics()['total_sessions'], 2)
+        ids = 'SELECT global_id FROM reading_sessions ORDER BY global_id'
+        self.assertEqual(self.phone.get_connection().execute(ids).fetchall(),
+                         self.desktop.get_connection().execute(ids).fetchall())
+        result = sync(self.phone, self.desktop)
+        self.assertEqual(result['sent']['changes'] + result['received']['changes'], 0)
+    
+    def test_second_copy_is_not_merged(self):
+        """Test that a copy added after a sync stays separate, and deleting it deletes only it."""
+        dune = self.phone.add_book('Dune', 'Frank Herbert')
+        self.phone.add_reading_session(dune, 600)
+        sync(self.phone, self.desktop)
+        
+        copy = self.desktop.add_book('Dune', 'Frank Herbert')
+        self.desktop.add_reading_session(copy, 600)
+        sync(self.phone, self.desktop)
+        self.assertInSync()
+        self.assertEqual(self.phone.count_books(), 2)
+        self.assertEqual(self.phone.get_statistics()['total_sessions'], 2)
+        
+        self.desktop.delete_book(copy)
+        sync(self.phone, self.desktop)
+        self.assertInSync()
+        self.assertEqual(self.phone.count_books(), 1)
+        self.assertEqual(len(self.phone.get_reading_sessions(dune)), 1)
+    
+    def test_changes_are_relayed_without_echo(self):
+        """Test that a third database gets changes through the second."""
+        laptop = DatabaseManager(os.path.join(self.temp_dir.name, 'laptop.db'))
+        self.addCleanup(laptop.close)
+        book_id = self.phone.add_book('Dune', 'Frank Herbert')
+        sync(self.phone, self.desktop)
+        # The desktop does not send the phone's own changes back
+        self.assertEqual(pull(self.phone, self.desktop)['changes'], 0)
+        
+        sync(self.desktop, laptop)
+        laptop.add_reading_session(laptop.get_books()[0]['id'], 1200)
+        sync(laptop, self.desktop)
+        sync(self.desktop, self.phone)
+        self.assertInSync()
+        self.assertEqual(self.phone.get_reading_sessions(book_id)[0]['duration_seconds'], 1200)
+        # Relayed back to the phone, its own book is recognised and left alone
+        self.assertEqual(pull(self.phone, laptop)['applied'], 0)
+    
+    def test_changesets_are_json(self):
+        """Test that changesets survive a JSON round trip, in small batches."""
+        for i in range(5):
+            self.phone.add_reading_session(self.phone.add_book(f'Book {i}', 'Author'), 60 * i)
+        changesets = [json.loads(json.dumps(changeset)) for changeset
+                      in iter_changes(self.phone, batch_size=2)]
+        self.assertEqual([len(c['changes']) for c in changesets], [2, 2, 1, 2, 2, 1])
+        for changeset in changesets:
+            apply_changes(self.desktop, changeset)
+        self.assertInSync()
+        self.assertEqual(pull(self.desktop, self.phone)['changes'], 0)
+
+
+@unittest.skipUnless(importlib.util.find_spec('toga') and importlib.util.find_spec('toga_dummy'),
+                     'needs toga and its toga_dummy test backend')
+class TestAppViews(unittest.TestCase):
+    """Test cases for rendering the app's views on the toga_dummy backend."""
+    
+    def setUp(self):
+        """Set up the app on a test database in a temporary home directory."""
+        from unittest import mock
+        self.temp_dir = tempfile.TemporaryDirectory()
+        patcher = mock.patch.dict(os.environ, {'HOME': self.temp_dir.name,
+                                               'TOGA_BACKEND': 'toga_dummy'})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        from booktrack.app import Booktrack
+        self.app = Booktrack('Booktrack', 'com.valerio.booktrack')
+        # Let the first view load, so it cannot replace the view under test
+        self.wait_for(lambda: self.app.book_list_content is not None)
+    
+    def tearDown(self):
+        """Clean up the app and test database."""
+        self.app.on_app_exit(self.app)
+        self.temp_dir.cleanup()
+    
+    def run_app(self, coroutine):
+        return self.app.loop.run_until_complete(coroutine)
+    
+    def wait_for(self, condition, timeout=5.0):
+        """Run the app's loop until condition() is true."""
+        deadline = time.monotonic() + timeout
+        while not condition():
+            if time.monotonic() > deadline:
+                self.fail('timed out waiting for the app')
+            self.run_app(asyncio.sleep(0.01))
+    
+    def find(self, widget_type, text, root=None):
+        """The first widget of widget_type with this text in the shown view."""
+        root = root or self.app.main_content.content
+        if isinstance(root, widget_type) and getattr(root, 'text', None) == text:
+            return root
+        for child in getattr(root, 'children', []):
+            found = self.find(widget_type, text, child)
+            if found is not None:
+                return found
+        return None
+    
+    def press(self, text):
+        """Press the button labelled text in the shown view."""
+        import toga
+        button = self.find(toga.Button, text)
+        self.assertIsNotNone(button, f'no {text!r} button')
+        button._impl.simulate_press()
+    
+    def add_books(self, count, status='Active'):
+        """Add count books directly, bypassing the app's views."""
+        return [self.run_app(self.app.db_manager.add_book(f'Book {n}', 'Author', status=status))
+                for n in range(count)]
+    
+    def test_book_list_pages(self):
+        """Test that the book list builds one page at a time."""
+        from booktrack.app import BOOK_PAGE_SIZE
+        self.add_books(BOOK_PAGE_SIZE + 5)
+        self.run_app(self.app.show_all_books())
+        book_list = self.app.book_list
+        self.assertEqual(len(book_list.items), BOOK_PAGE_SIZE)
+        self.assertEqual(len(self.app.book_pool.items), BOOK_PAGE_SIZE)
+        self.assertTrue(book_list.has_more)
+        
+        # Overlapping scroll events fetch the next page once
+        loaded = self.run_app(asyncio.gather(book_list.load_next_page(),
+                                             book_list.load_next_page()))
+        self.assertEqual(sorted(loaded), [0, 5])
+        self.assertEqual(len(book_list.items), BOOK_PAGE_SIZE + 5)
+        self.assertEqual(len(book_list.items_box.children), BOOK_PAGE_SIZE + 5)
+        self.assertFalse(book_list.has_more)
+        self.assertNotIn(book_list.load_more_button, book_list.box.children)
+        self.assertEqual(self.run_app(book_list.load_next_page()), 0)
+        
+        titles = [item.book_data['title'] for item in book_list.items]
+        self.assertEqual(titles, [f'Book {n}' for n in reversed(range(BOOK_PAGE_SIZE + 5))])
+    
+    def test_book_list_place_and_remove(self):
+        """Test that rows are patched into the loaded pages in sort order."""
+        from booktrack.app import BOOK_PAGE_SIZE
+        self.add_books(BOOK_PAGE_SIZE + 1)
+        self.run_app(self.app.show_all_books())
+        book_list = self.app.book_list
+        oldest, newest = book_list.items[-1], book_list.items[0]
+        
+        self.assertTrue(book_list.remove(newest))
+        self.assertFalse(book_list.remove(newest))
+        self.assertNotIn(newest.item_box, book_list.items_box.children)
+        self.assertTrue(book_list.place(newest))
+        self.assertIs(book_list.items[0], newest)
+        self.assertIs(book_list.items_box.children[0], newest.item_box)
+        
+        # A row sorting after the last loaded page waits for that page
+        unloaded = self.app.book_pool.get(dict(oldest.book_data, id=0))
+        self.assertFalse(book_list.place(unloaded))
+        self.assertNotIn(unloaded, book_list.items)
+        self.assertEqual(len(book_list.items), BOOK_PAGE_SIZE)
+    
+    def test_book_items_reused_across_views(self):
+        """Test that switching views reuses the pooled rows instead of rebuilding them."""
+        from unittest import mock
+        from booktrack import widgets
+        self.add_books(2)
+        self.add_books(1, status='Read')
+        self.run_app(self.app.show_all_books())
+        boxes = {item.book_data['id']: item.item_box for item in self.app.book_list.items}
+        self.assertEqual(len(boxes), 3)
+        
+        with mock.patch.object(widgets, 'BookListItem') as new_item:
+            self.run_app(self.app.show_active_books())
+            self.run_app(self.app.show_all_books())
+        new_item.assert_not_called()
+        self.assertEqual({item.book_data['id']: item.item_box for item in self.app.book_list.items},
+                         boxes)
+        
+        # Only a book seen for the first time gets a new row
+        self.add_books(1)
+        self.run_app(self.app.show_all_books())
+        self.assertEqual(len(self.app.book_pool.items), 4)
+        self.assertTrue(all(item.item_box is boxes[item.book_data['id']]
+                            for item in self.app.book_list.items[1:]))
+    
+    def test_book_changes_patch_views(self):
+        """Test that single book changes patch the kept views instead of rebuilding them."""
+        db = self.app.db_manager
+        first, second = self.add_books(2)
+        self.run_app(self.app.show_statistics())
+        stats_content = self.app.stats_content
+        self.run_app(self.app.show_active_books())
+        content = self.app.main_content.content
+        book_list = self.app.book_list
+        
+        new_id = self.run_app(db.add_book('New', 'Author'))
+        self.wait_for(lambda: self.app.book_list_title.text == 'Active Books (3)')
+        self.assertEqual(book_list.items[0].book_data['id'], new_id)
+        self.assertIs(self.app.stats_content, stats_content)
+        self.assertEqual(self.app.stats_labels['total_books'][0].text, 'Total Books: 3')
+        self.assertEqual(self.app.stats_labels['Active'][0].text, '  Active: 3')
+        
+        item = book_list.items[0]
+        item_box = item.item_box
+        self.run_app(db.update_book(new_id, title='Renamed'))
+        self.wait_for(lambda: item.title_label.text == 'Renamed')
+        self.assertIs(item.item_box, item_box)
+        
+        # Leaving the Active list takes the row out; other edits reset the statistics
+        self.run_app(db.update_book(new_id, status='Read'))
+        self.wait_for(lambda: self.app.book_list_title.text == 'Active Books (2)')
+        self.assertNotIn(item, book_list.items)
+        self.assertNotIn(item_box, book_list.items_box.children)
+        self.assertIsNone(self.app.stats_content)
+        
+        self.run_app(db.delete_book(first))
+        self.wait_for(lambda: self.app.book_list_title.text == 'Active Books (1)')
+        self.assertNotIn(first, self.app.book_pool.items)
+        self.assertEqual([item.book_data['id'] for item in book_list.items], [second])
+        self.assertIs(self.app.main_content.content, content)
+        self.assertIs(self.app.book_list, book_list)
+    
+    def test_form_buttons(self):
+        """Test that the book and session forms' buttons write and return."""
+        from unittest import mock
+        db = self.app.db_manager
+        self.app.show_add_book_form()
+        form = self.app.main_content.content
+        self.press('Cancel')
+        self.wait_for(lambda: self.app.main_content.content is not form)
+        
+        self.app.show_add_book_form()
+        title_input, author_input = self.app.main_content.content.children[1:4:2]
+        title_input.value, author_input.value = 'Dune', 'Frank Herbert'
+        self.press('Add Book')
+        self.wait_for(lambda: self.run_app(db.count_books()) == 1)
+        book = self.run_app(db.get_books())[0]
+        
+        self.app.edit_book(dict(book))
+        self.app.main_content.content.children[1].value = 'Dune Messiah'
+        self.press('Update')
+        self.wait_for(lambda: self.run_app(db.get_book(book['id']))['title'] == 'Dune Messiah')
+        
+        self.app.show_session_log_form({'book_id': book['id'], 'duration_seconds': 600})
+        self.press('Save Session')
+        self.wait_for(lambda: len(self.run_app(db.get_reading_sessions(book['id']))) == 1)
+        
+        self.run_app(self.app.show_active_books())
+        self.app.main_window.confirm_dialog = mock.AsyncMock(return_value=True)
+        self.press('Delete')
+        self.wait_for(lambda: self.run_app(db.count_books()) == 0)
+    
+    def test_book_form_requires_title_and_author(self):
+        """Test that saving without a title or author shows an error and writes nothing."""
+        import toga
+        self.app.show_add_book_form()
+        form = self.app.main_content.content
+        title_input, author_input = form.children[1:4:2]
+        title_input.value, author_input.value = 'Dune', '  '
+        self.press('Add Book')
+        self.wait_for(lambda: self.find(toga.Label, 'Title and author are required.'))
+        self.assertIs(self.app.main_content.content, form)
+        self.assertEqual(self.run_app(self.app.db_manager.count_books()), 0)
+        
+        author_input.value = 'Frank Herbert'
+        self.press('Add Book')
+        self.wait_for(lambda: self.run_app(self.app.db_manager.count_books()) == 1)
+    
+    def test_statistics_view(self):
+        """Test that the statistics view renders, with and without reading history."""
+        from datetime import date as calendar_date
+        self.run_app(self.app.show_statistics())
+        self.assertEqual(self.app.stats_day, calendar_date.today())
+        self.assertIs(self.app.main_content.content, self.app.stats_content)
+        
+        db = self.app.db_manager
+        book_id = self.run_app(db.add_book('Dune', 'Frank Herbert', 412))
+        self.run_app(db.add_reading_session(book_id, 1800, 30))
+        self.app.stats_content = None
+        self.run_app(self.app.show_statistics())
+        labels = [child.text for child in self.app.stats_content.children
+                  if hasattr(child, 'text')]
+        self.assertIn('Total Reading Sessions: 1', labels)
+        self.assertIn(f'  {calendar_date.today().isoformat()}: 0.5 hours', labels)
+    
+    def test_trends_on_request(self):
+        """Test that trends are computed only when asked for, and cached until a change."""
+        from booktrack.app import summarize_trends
+        db = self.app.db_manager
+        book_id = self.run_app(db.add_book('Dune', 'Frank Herbert', 412))
+        self.run_app(db.add_reading_session(book_id, 1800, 30))
+        self.run_app(self.app.show_statistics())
+        trends_box = self.app.trends_box
+        self.assertEqual([child.text for child in trends_box.children], ['Show Trends'])
+        
+        self.press('Show Trends')
+        self.wait_for(lambda: trends_box.children[0].text == 'Trends:')
+        labels = [child.text for child in trends_box.children]
+        self.assertIn('  Current streak: 1 days', labels)
+        self.assertIn('Projected Finish:', labels)
+        
+        async def summarize():
+            return await db.run(summarize_trends)
+        
+        trends = self.run_app(summarize())
+        self.assertIs(self.run_app(summarize()), trends)
+        self.run_app(db.add_reading_session(book_id, 600, 5))
+        self.assertIsNot(self.run_app(summarize()), trends)
+    
+    def test_startup_is_recorded_not_printed(self):
+        """Test that startup times go to instrumentation only, and nothing is printed."""
+        import contextlib
+        import io
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            self.run_app(self.app.load_first_view())
+            self.run_app(asyncio.sleep(0.01))
+        self.assertEqual(out.getvalue(), '')
+        
+        self.app.instrumentation = Instrumentation()
+        self.app.record_startup('interactive')
+        self.assertEqual(self.app.instrumentation.histograms['startup.interactive'].count, 1)
+
+
+class TestStartupImports(unittest.TestCase):
+    """Test cases for what is imported at startup, listed with python -X importtime."""
+    
+    # Loaded on first use only
+    DEFERRED = ['numpy', 'json', 'booktrack.analytics', 'booktrack.export', 'booktrack.forms',
+                'booktrack.cli', 'booktrack.server', 'booktrack.sync']
+    
+    def imported_modules(self, statement):
+        """Names of the modules imported by running statement in a fresh interpreter."""
+        import subprocess
+        src = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+        env = dict(os.environ, PYTHONPATH=src)
+        result = subprocess.run([sys.executable, '-X', 'importtime', '-c', statement],
+                                env=env, capture_output=True, text=True, check=True)
+        modules = set()
+        for line in result.stderr.splitlines():
+            # import time: self [us] | cumulative | imported package
+            if line.startswith('import time:') and 'imported package' not in line:
+                modules.add(line.rsplit('|', 1)[1].strip())
+        return modules
+    
+    def startup_statement(self):
+        """The imports of starting the app.
+        
+        Without toga, the module-level imports of app.py that do not need
+        toga themselves.
+        """
+        if importlib.util.find_spec('toga'):
+            return 'import booktrack.app'
+        import ast
+        package = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                               'src', 'booktrack')
+        
+        def imports(name):
+            """Modules imported at the top of booktrack/<name>.py."""
+            with open(os.path.join(package, f'{name}.py'), encoding='utf-8') as f:
+                tree = ast.parse(f.read())
+            for node in tree.body:
+                if isinstance(node, ast.ImportFrom):
+                    yield f'booktrack.{node.module}' if node.level else node.module
+                elif isinstance(node, ast.Import):
+                    yield from (alias.name for alias in node.names)
+        
+        def needs_toga(module):
+            if module.startswith('booktrack.'):
+                return any(needs_toga(name) for name in imports(module[len('booktrack.'):]))
+            return module.split('.')[0] == 'toga'
+        
+        return 'import ' + ', '.join(module for module in imports('app')
+                                     if not needs_toga(module))
+    
+    def test_heavy_modules_deferred(self):
+        """Test that startup does not load analytics, export, forms, NumPy or json."""
+        modules = self.imported_modules(self.startup_statement())
+        self.assertIn('booktrack.async_db', modules)
+        for module in self.DEFERRED:
+            self.assertNotIn(module, modules)
+    
+    def test_cli_imports(self):
+        """Test that the command-line interface loads neither the GUI nor the heavy modules."""
+        modules = self.imported_modules('import booktrack.cli')
+        self.assertIn('booktrack.database', modules)
+        for module in ['toga', 'booktrack.app', 'booktrack.widgets', 'booktrack.forms',
+                       'booktrack.analytics', 'booktrack.export', 'booktrack.server',
+                       'booktrack.sync', 'numpy', 'inspect']:
+            self.assertNotIn(module, modules)
+
+
+class TestBenchmarkSuite(unittest.TestCase):
+    """Test cases for benchmarks/run_benchmarks.py."""
+    
+    @classmethod
+    def setUpClass(cls):
+        benchmarks_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                      'benchmarks')
+        sys.path.insert(0, benchmarks_dir)
+        import run_benchmarks
+        import synthetic
+        cls.suite = run_benchmarks
+        cls.synthetic = synthetic
+    
+    def setUp(self):
+        """Set up a small synthetic library."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.temp_dir.name, 'booktrack.db')
+        with DatabaseManager(self.db_path) as db:
+            self.synthetic.generate_library(db, 20, 300)
+    
+    def tearDown(self):
+        """Clean up test database."""
+        self.temp_dir.cleanup()
+    
+    def test_every_method_benchmarked(self):
+        """Test that every public DatabaseManager method that runs SQL is timed."""
+        self.assertEqual(self.suite.untimed_methods(), [])
+    
+    def test_run_library(self):
+        """Test a run of every benchmark on a small library."""
+        results = self.suite.run_library(self.db_path, repeat=2)
+        self.assertIn('get_statistics', results)
+        self.assertIn('export_data', results)
+        for timing in results.values():
+            self.assertEqual(timing['runs'], 2)
+            self.assertGreater(timing['median_ms'], 0)
+            self.assertLessEqual(timing['min_ms'], timing['median_ms'])
+    
+    def test_generator_is_seeded(self):
+        """Test that the same seed generates the same library."""
+        other = os.path.join(self.temp_dir.name, 'other.db')
+        with DatabaseManager(other) as db:
+            self.synthetic.generate_library(db, 20, 300)
+        
+        def sessions(path):
+            with DatabaseManager(path) as db:
+                return [tuple(row) for row in db.get_connection().execute(
+                    'SELECT book_id, duration_seconds, pages_read, notes FROM reading_sessions'
+                )]
+        
+        self.assertEqual(sessions(self.db_path), sessions(other))
+    
+    def test_regression_check(self):
+        """Test that only slowdowns past the threshold and noise floor count."""
+        def results(**timings):
+            return {'results': {'1k': {name: {'median_ms': ms} for name, ms in timings.items()}}}
+        
+        baseline = results(get_books=10.0, get_book=0.01, search=5.0)
+        current = results(get_books=13.0, get_book=0.03, search=5.5, export_data=99.0)
+        self.assertEqual(self.suite.compare(current, baseline, threshold=0.25),
+                         [('1k', 'get_books', 10.0, 13.0)])
+        self.assertEqual(self.suite.compare(current, baseline, threshold=0.5), [])
+
+
 class TestTimer(unittest.TestCase):
     """Test cases for Timer."""
     
@@ -233,6 +2995,93 @@ class TestTimer(unittest.TestCase):
         self.assertEqual(self.timer.format_time(61), "00:01:01")
         self.assertEqual(self.timer.format_time(3661), "01:01:01")
         self.assertEqual(self.timer.format_time(7323), "02:02:03")
+    
+    def test_restore(self):
+        """Test restoring a paused timer from a checkpoint."""
+        timer = Timer.restore(90)
+        self.assertFalse(timer.is_running)
+        self.assertEqual(timer.get_elapsed_time(), 90.0)
+        
+        timer.resume()
+        self.assertGreaterEqual(timer.stop(), 90.0)
+    
+    def test_monotonic_clock(self):
+        """Test that elapsed time comes only from the monotonic clock."""
+        now = [5_000_000_000]
+        timer = Timer(clock=lambda: now[0])
+        timer.start()
+        now[0] += 1_500_000_000
+        self.assertEqual(timer.get_elapsed_time(), 1.5)
+        timer.pause()
+        now[0] += 60_000_000_000
+        timer.resume()
+        now[0] += 500_000_000
+        self.assertEqual(timer.stop(), 2.0)
+        self.assertEqual(timer.get_elapsed_ns(), 2_000_000_000)
+    
+    def run_ticks(self, timer, scenario):
+        """Run scenario(timer, ticks, sleep) on an event loop, recording ticks."""
+        ticks = []
+        
+        async def main():
+            timer.add_tick_callback(ticks.append)
+            await scenario(timer, ticks, asyncio.sleep)
+            timer.stop_ticking()
+        
+        asyncio.run(main())
+        return ticks
+    
+    def test_ticks_on_boundaries(self):
+        """Test that tick callbacks run as each whole tick is crossed."""
+        async def scenario(timer, ticks, sleep):
+            timer.start()
+            timer.start_ticking()
+            await sleep(0.17)
+        
+        ticks = self.run_ticks(Timer(tick_ns=20_000_000), scenario)
+        # One immediate dispatch, then one just after each 20 ms boundary
+        self.assertGreaterEqual(len(ticks), 5)
+        whole = [int(elapsed / 0.02) for elapsed in ticks[1:]]
+        self.assertEqual(whole[0], 1)
+        self.assertEqual(whole, sorted(set(whole)))
+    
+    def test_no_ticks_while_paused_or_suspended(self):
+        """Test that no wakeups happen while paused or suspended."""
+        async def scenario(timer, ticks, sleep):
+            timer.start()
+            timer.start_ticking()
+            await sleep(0.05)
+            timer.pause()
+            paused = len(ticks)
+            await sleep(0.1)
+            self.assertEqual(len(ticks), paused)
+            self.assertIsNone(timer._tick_handle)
+            
+            timer.resume()
+            timer.stop_ticking()
+            await sleep(0.1)
+            self.assertEqual(len(ticks), paused)
+            self.assertIsNone(timer._tick_handle)
+            
+            # Catches up immediately when ticking starts again
+            timer.start_ticking()
+            self.assertEqual(len(ticks), paused + 1)
+            self.assertGreater(ticks[-1], 0.14)
+        
+        self.run_ticks(Timer(tick_ns=20_000_000), scenario)
+    
+    def test_set_on_tick_callback(self):
+        """Test that the single-callback setter replaces added callbacks."""
+        calls = []
+        timer = Timer.restore(3)
+        timer.add_tick_callback(lambda elapsed: calls.append(('added', elapsed)))
+        timer.set_on_tick_callback(lambda elapsed: calls.append(('set', elapsed)))
+        
+        async def main():
+            timer.start_ticking()
+        
+        asyncio.run(main())
+        self.assertEqual(calls, [('set', 3.0)])
 
 
 class TestDecimalHandling(unittest.TestCase):
@@ -247,6 +3096,7 @@ class TestDecimalHandling(unittest.TestCase):
     def tearDown(self):
         """Clean up test database."""
         # Ensure database connection is closed
+        self.db_manager.close()
         self.db_manager = None
         # Give Windows time to release the file handle
         import time
@@ -296,6 +3146,13 @@ class TestDecimalHandling(unittest.TestCase):
         self.assertEqual(len(sessions), 1)
         self.assertEqual(sessions[0]['pages_read'], 25)
         self.assertIsInstance(sessions[0]['pages_read'], int)
+        
+        # Timed durations are floats or Decimals too
+        self.db_manager.add_reading_session(book_id, Decimal('90.5'), '7')
+        self.db_manager.save_sessions([{'book_id': book_id, 'duration_seconds': 120.9}])
+        durations = {session['duration_seconds']
+                     for session in self.db_manager.get_reading_sessions(book_id)}
+        self.assertEqual(durations, {1800, 90, 120})
     
     def test_decimal_book_update(self):
         """Test updating book with Decimal values."""
@@ -339,6 +3196,7 @@ class TestIntegration(unittest.TestCase):
     def tearDown(self):
         """Clean up test environment."""
         # Ensure database connection is closed
+        self.db_manager.close()
         self.db_manager = None
         self.timer = None
         # Give Windows time to release the file handle
@@ -483,6 +3341,7 @@ def run_standalone_tests():
         assert len(export_data['reading_sessions']) == 1
         print("✅ Data export successful")
         
+        db.close()
     finally:
         try:
             os.unlink(tmp_path)